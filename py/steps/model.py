@@ -785,6 +785,9 @@ class GHKcurr(steps_swig.GHKcurr) :
             * bool computeflux
             
             NOTE: function setP or setPInfo must be called on the object before creating simulation object.
+            
+            Function setVRange may be called to tabulate the flux equation over a
+            range of potentials, which is faster to evaluate in simulations.
             """
         this = _steps_swig.new_GHKcurr(*args, **kwargs)
         try: self.this.append(this)
@@ -800,6 +803,8 @@ class GHKcurr(steps_swig.GHKcurr) :
         self.__swig_getmethods__["ion"] = _steps_swig.GHKcurr_getIon      
         self.__swig_setmethods__["pinfo"] = _steps_swig.GHKcurr_setPInfo
         self.__swig_setmethods__["p"] = _steps_swig.GHKcurr_setP
+        self.__swig_setmethods__["vrange"] = _steps_swig.GHKcurr_setVRange
+        self.__swig_getmethods__["vrange"] = _steps_swig.GHKcurr_getVRange
     
     id = steps_swig._swig_property(_steps_swig.GHKcurr_getID, _steps_swig.GHKcurr_setID)
     """Identifier string of the ghk current."""
@@ -813,6 +818,8 @@ class GHKcurr(steps_swig.GHKcurr) :
     """ The infomation allowing permeability to be found internally. """
     p = steps_swig._swig_property(_steps_swig.GHKcurr_setP)       
     """ The permeability. """
+    vrange = steps_swig._swig_property(_steps_swig.GHKcurr_getVRange, _steps_swig.GHKcurr_setVRange)
+    """ The voltage range [min, max, step] of the flux table. """
 
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 
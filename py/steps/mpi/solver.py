@@ -53,6 +53,8 @@ EF_NONE = steps_swig.EF_NONE
 EF_DEFAULT = steps_swig.EF_DEFAULT
 EF_DV_BDSYS = steps_swig.EF_DV_BDSYS
 EF_DV_SLUSYS = steps_swig.EF_DV_SLUSYS
+EF_DV_PCG = steps_swig.EF_DV_PCG
+EF_DV_BDSYS_LAPACK = steps_swig.EF_DV_BDSYS_LAPACK
 
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 # Tetrahedral Direct SSA
@@ -149,3 +151,28 @@ class TetOpSplit(steps_swig.TetOpSplitP) :
             mapping["Patch"].append({"Name":cname, "Species":spec_names})
         return mapping
 
+
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+# Standalone membrane potential simulation
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+class EFieldSim(steps_swig.EFieldSimP) :
+    def __init__(self, mesh, efield_solver = EF_DEFAULT):
+        """
+            Construction::
+            
+            sim = steps.mpi.solver.EFieldSim(mesh, efield_solver = EF_DEFAULT)
+            
+            Create a membrane potential simulation of the membrane of mesh,
+            with EF_DV_SLUSYS available in addition to the serial EField
+            solvers. All processes must make the same calls in the same order.
+            
+            Arguments:
+            * steps.geom.Tetmesh mesh
+            * int efield_solver
+            
+            """
+        this = _steps_swig.new_EFieldSimP(mesh, efield_solver)
+        try: self.this.append(this)
+        except: self.this = this
+        self.thisown = 1
+        self.mesh = mesh
@@ -66,6 +66,8 @@ EF_NONE = steps_swig.EF_NONE
 EF_DEFAULT = steps_swig.EF_DEFAULT
 EF_DV_BDSYS = steps_swig.EF_DV_BDSYS
 EF_DV_SLUSYS = steps_swig.EF_DV_SLUSYS
+EF_DV_PCG = steps_swig.EF_DV_PCG
+EF_DV_BDSYS_LAPACK = steps_swig.EF_DV_BDSYS_LAPACK
 
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 # Well-mixed RK4
@@ -339,6 +341,104 @@ class Tetexact(steps_swig.Tetexact) :
         return mapping
 
 
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+# Multithreaded operator-splitting solver
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+class TetOpSplit(steps_swig.TetOpSplit) :
+    def __init__(self, model, geom, rng, calcMembPot = False, tet_hosts = [], tri_hosts = {}, wm_hosts = [], nthreads = 0):
+        """
+            Construction::
+            
+            sim = steps.solver.TetOpSplit(model, geom, rng, calcMembPot = False, tet_hosts = [], tri_hosts = {}, wm_hosts = [], nthreads = 0)
+            
+            Create a multithreaded operator-splitting simulation solver.
+            If tet_hosts is empty, the mesh is split into nthreads
+            partitions (the number of hardware threads if 0).
+            
+            Arguments:
+            * steps.model.Model model
+            * steps.geom.Geom geom
+            * steps.rng.RNG rng
+            # int calcMembPot
+            # list tet_hosts
+            # dict tri_hosts
+            # list wm_hosts
+            # int nthreads
+            
+            """
+        this = _steps_swig.new_TetOpSplit(model, geom, rng, calcMembPot, tet_hosts, tri_hosts, wm_hosts, nthreads)
+        try: self.this.append(this)
+        except: self.this = this
+        self.thisown = 1
+        self.model = model
+        self.geom = geom
+
+    def run(self, end_time, cp_interval = 0.0, prefix = ""):
+        """
+        Run the simulation until <end_time>, 
+        automatically checkpoint at each <cp_interval>.
+        Prefix can be added using prefix=<prefix_string>.
+        """
+        
+        if cp_interval > 0:
+            while _steps_swig.API_getTime(self) + cp_interval < end_time:
+                _steps_swig.API_advance(self, cp_interval)
+                filename = "%s%e.tetopsplit_cp" % (prefix, _steps_swig.API_getTime(self))
+                print "Checkpointing -> ", filename
+                _steps_swig.API_checkpoint(self, filename)
+            _steps_swig.API_run(self, end_time)
+            filename = "%s%e.tetopsplit_cp" % (prefix, _steps_swig.API_getTime(self))
+            print "Checkpointing -> ", filename
+            _steps_swig.API_checkpoint(self, filename)
+        else:
+            _steps_swig.API_run(self, end_time)
+        
+    def advance(self, advance_time, cp_interval = 0.0, prefix = ""):
+        """
+        Advance the simulation for <advance_time>, 
+        automatically checkpoint at each <cp_interval>.
+        Prefix can be added using prefix=<prefix_string>.
+        """
+        
+        end_time = _steps_swig.API_getTime(self) + advance_time
+        if cp_interval > 0:
+            while _steps_swig.API_getTime(self) + cp_interval < end_time:
+                _steps_swig.API_advance(self, cp_interval)
+                filename = "%s%e.tetopsplit_cp" % (prefix, _steps_swig.API_getTime(self))
+                print "Checkpointing -> ", filename
+                _steps_swig.API_checkpoint(self, filename)
+            _steps_swig.API_run(self, end_time)
+            filename = "%s%e.tetopsplit_cp" % (prefix, _steps_swig.API_getTime(self))
+            print "Checkpointing -> ", filename
+            _steps_swig.API_checkpoint(self, filename)
+        else:
+            _steps_swig.API_run(self, end_time)
+
+    def getIndexMapping(self):
+        """
+            Get a mapping between compartments/patches/species
+            and their indices in the solver.
+            """
+        mapping = {"Comp":[], "Patch":[]}
+        ncomps = _steps_swig.API_getNComps(self)
+        for c in range(ncomps):
+            cname = _steps_swig.API_getCompName(self, c)
+            spec_names = []
+            nspces = _steps_swig.API_getNCompSpecs(self, c)
+            for s in range(nspces):
+                spec_names.append(_steps_swig.API_getCompSpecName(self, c, s))
+            mapping["Comp"].append({"Name":cname, "Species":spec_names})
+        npatches = _steps_swig.API_getNPatches(self)
+        for p in range(npatches):
+            pname = _steps_swig.API_getPatchName(self, p)
+            spec_names = []
+            nspces = _steps_swig.API_getNPatchSpecs(self, p)
+            for s in range(nspces):
+                spec_names.append(_steps_swig.API_getPatchSpecName(self, p, s))
+            mapping["Patch"].append({"Name":cname, "Species":spec_names})
+        return mapping
+
+
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 # Tetrahedral-based ODE solver
 # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #        
@@ -428,3 +528,28 @@ class TetODE(steps_swig.TetODE) :
                 spec_names.append(_steps_swig.API_getPatchSpecName(self, p, s))
             mapping["Patch"].append({"Name":cname, "Species":spec_names})
         return mapping
+
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+# Standalone membrane potential simulation
+# # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
+class EFieldSim(steps_swig.EFieldSim) :
+    def __init__(self, mesh, efield_solver = EF_DEFAULT):
+        """
+            Construction::
+            
+            sim = steps.solver.EFieldSim(mesh, efield_solver = EF_DEFAULT)
+            
+            Create a membrane potential simulation of the membrane of mesh,
+            without a model or kinetic solver. The potential is driven by
+            currents injected across the membrane triangles.
+            
+            Arguments:
+            * steps.geom.Tetmesh mesh
+            * int efield_solver
+            
+            """
+        this = _steps_swig.new_EFieldSim(mesh, efield_solver)
+        try: self.this.append(this)
+        except: self.this = this
+        self.thisown = 1
+        self.mesh = mesh
@@ -0,0 +1,197 @@
+####################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+###
+
+"""
+Benchmark of the EField solvers on cable-shaped meshes.
+
+The membrane potential of a box mesh is simulated with
+steps.solver.EFieldSim, driven by a current injected at one end, and
+the time per EField step is reported for each solver and mesh size.
+EF_DV_SLUSYS is included when the MPI build of STEPS is available; run
+the script with mpirun to use it on several processes.
+
+Matrix assembly, the banded LU of EF_DV_BDSYS and the vector loops of
+EF_DV_PCG are shared between OpenMP threads, and EF_DV_BDSYS_LAPACK uses
+the threads of the LAPACK/BLAS library; set OMP_NUM_THREADS (and e.g.
+OPENBLAS_NUM_THREADS) to measure the scaling with the number of threads.
+
+Usage::
+
+    python -m steps.utilities.efield_benchmark [length ...]
+
+where each length is the number of cubes along the cable axis.
+"""
+
+import os
+import sys
+import time
+
+import steps.geom as sgeom
+import steps.solver as ssolver
+
+# Without the MPI build the steps.mpi module lacks the MPI functions.
+try:
+    import steps.mpi
+    import steps.mpi.solver as smpisolver
+except (ImportError, AttributeError):
+    smpisolver = None
+
+################################################################################
+
+def cableMesh(nx, ny = 3, nz = 3, h = 1.0e-6, opt_method = 3):
+    """
+    Create a box mesh of nx * ny * nz cubes of side h, each split into six
+    tetrahedrons, with one compartment and a membrane on the whole surface.
+    
+    Parameters:
+        * nx, ny, nz          Number of cubes along each axis
+        * h                   Side of the cubes (m)
+        * opt_method          Vertex ordering method of the membrane
+    
+    Return:
+        steps.geom.Tetmesh
+    """
+    def vidx(i, j, k):
+        return (i * (ny + 1) + j) * (nz + 1) + k
+    
+    verts = []
+    for i in range(nx + 1):
+        for j in range(ny + 1):
+            for k in range(nz + 1):
+                verts.extend([i * h, j * h, k * h])
+    
+    perms = [(0, 1, 2), (0, 2, 1), (1, 0, 2), (1, 2, 0), (2, 0, 1), (2, 1, 0)]
+    tets = []
+    for i in range(nx):
+        for j in range(ny):
+            for k in range(nz):
+                for p in perms:
+                    c = [i, j, k]
+                    tets.append(vidx(*c))
+                    for axis in p:
+                        c[axis] += 1
+                        tets.append(vidx(*c))
+    
+    mesh = sgeom.Tetmesh(verts, tets)
+    comp = sgeom.TmComp('cyto', mesh, range(mesh.ntets))
+    patch = sgeom.TmPatch('memb_patch', mesh, mesh.getSurfTris(), comp)
+    sgeom.Memb('memb', mesh, [patch], opt_method = opt_method)
+    return mesh
+
+################################################################################
+
+def benchmarkSolver(mesh, efield_solver, dt = 1.0e-5, nsteps = 200, 
+                    injection = 1.0e-13, parallel = False):
+    """
+    Time the EField steps of one solver on the membrane of mesh.
+    
+    A current is injected across the membrane triangles at the lower x 
+    end of the mesh, passed as a numpy array at each step.
+    
+    Parameters:
+        * mesh                steps.geom.Tetmesh with one membrane
+        * efield_solver       EField solver (EF_DV_BDSYS, EF_DV_SLUSYS, EF_DV_PCG,
+                              EF_DV_BDSYS_LAPACK)
+        * dt                  EField time step (s)
+        * nsteps              Number of timed steps
+        * injection           Total injected current (A)
+        * parallel            Use steps.mpi.solver.EFieldSim
+    
+    Return:
+        (setup time (s), time per step (s), potential of vertex 0 at the end (V))
+    """
+    import numpy
+    
+    start = time.time()
+    if parallel:
+        sim = smpisolver.EFieldSim(mesh, efield_solver)
+    else:
+        sim = ssolver.EFieldSim(mesh, efield_solver)
+    setup = time.time() - start
+    
+    sim.setMembPotential('memb', -65.0e-3)
+    sim.setMembCapac('memb', 1.0e-2)
+    sim.setMembVolRes('memb', 1.0)
+    sim.setMembRes('memb', 1.0, -65.0e-3)
+    
+    memb_tris = sim.getMembTris()
+    xmin = mesh.getBoundMin()[0]
+    currents = numpy.zeros(len(memb_tris))
+    for i, tidx in enumerate(memb_tris):
+        if mesh.getTriBarycenter(tidx)[0] - xmin < 1.0e-9:
+            currents[i] = 1.0
+    currents *= injection / currents.sum()
+    
+    start = time.time()
+    for s in range(nsteps):
+        sim.setTriIsNP(currents)
+        sim.advance(dt)
+    per_step = (time.time() - start) / nsteps
+    
+    return setup, per_step, sim.getVertV(sim.getMembVerts()[0])
+
+################################################################################
+
+def run(lengths = (10, 30, 100, 300), nsteps = 200):
+    """
+    Benchmark every available EField solver on cables of the given lengths
+    and print the time per step.
+    """
+    solvers = [('BDSYS', ssolver.EF_DV_BDSYS, False),
+               ('LAPACK', ssolver.EF_DV_BDSYS_LAPACK, False),
+               ('PCG', ssolver.EF_DV_PCG, False)]
+    rank = 0
+    if smpisolver is not None:
+        rank = steps.mpi.rank
+        solvers.append(('SLUSYS', smpisolver.EF_DV_SLUSYS, True))
+    
+    if rank == 0:
+        print("OMP_NUM_THREADS = %s" % os.environ.get('OMP_NUM_THREADS', 'not set'))
+        print("%8s %8s %8s %12s %12s %12s" % 
+              ("length", "nverts", "solver", "setup (s)", "step (ms)", "V0 (mV)"))
+    for length in lengths:
+        mesh = cableMesh(length)
+        for name, efield_solver, parallel in solvers:
+            try:
+                setup, per_step, v0 = benchmarkSolver(mesh, efield_solver, 
+                                                      nsteps = nsteps, 
+                                                      parallel = parallel)
+            except NameError:
+                # Solver not built in this installation, e.g. no LAPACK.
+                continue
+            if rank == 0:
+                print("%8d %8d %8s %12.4f %12.4f %12.4f" % 
+                      (length, mesh.nverts, name, setup, per_step * 1.0e3, v0 * 1.0e3))
+
+################################################################################
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run([int(a) for a in sys.argv[1:]])
+    else:
+        run()
+
+################################################################################
+
+# END
@@ -0,0 +1,184 @@
+####################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+###
+
+"""
+Well-Mixed Lumping Utilities
+
+The lumping module selects the compartments of a tetrahedral mesh that show
+no spatial gradients at the time scale of interest and replaces them by 
+well-mixed compartments (see steps.geom.Tetmesh.lumpComps), reducing the 
+number of kinetic processes (KProcs) a Tetexact solver has to handle.
+
+"""
+
+import steps.geom
+from math import sqrt
+
+################################################################################
+
+def compInfo(mesh, model):
+    """
+    Collect the data used by lumping criteria for each tetrahedral 
+    compartment of the mesh.
+    
+    Arguements:
+        * steps.geom.Tetmesh mesh
+        * steps.model.Model model
+        
+    Return:
+        dict<string, dict> mapping compartment id to a dict with entries
+        
+        * 'ntets': number of tetrahedrons
+        * 'vol': volume (m^3)
+        * 'size': diagonal of the bounding box (m)
+        * 'nreacs': number of reaction rules
+        * 'ndiffs': number of diffusion rules
+        * 'dcsts': dict<string, float> mapping diffusing species to its 
+          smallest diffusion constant (m^2/s)
+        * 'lumpable': True if mesh.lumpComps accepts the compartment
+    """
+    
+    info = {}
+    for comp in mesh.getAllComps():
+        tmcomp = steps.geom.castToTmComp(comp)
+        if tmcomp == None: continue
+        bmin = tmcomp.getBoundMin()
+        bmax = tmcomp.getBoundMax()
+        size = sqrt(sum((bmax[i] - bmin[i]) ** 2 for i in range(3)))
+        
+        nreacs = 0
+        ndiffs = 0
+        dcsts = {}
+        for vsys_id in tmcomp.getVolsys():
+            vsys = model.getVolsys(vsys_id)
+            nreacs += len(vsys.getAllReacs())
+            for diff in vsys.getAllDiffs():
+                ndiffs += 1
+                spec_id = diff.getLig().getID()
+                dcst = diff.getDcst()
+                if spec_id not in dcsts or dcst < dcsts[spec_id]:
+                    dcsts[spec_id] = dcst
+        
+        comp_id = tmcomp.getID()
+        info[comp_id] = {'ntets': tmcomp.countTets(), 'vol': tmcomp.getVol(), 
+                         'size': size, 'nreacs': nreacs, 'ndiffs': ndiffs, 
+                         'dcsts': dcsts, 
+                         'lumpable': mesh.canLumpComp(comp_id)}
+    return info
+
+################################################################################
+
+def diffusionLengthCriterion(t, ratio = 1.0):
+    """
+    Return a lumping criterion for lumpWellMixed. A compartment is lumped
+    if, within time t, every species diffusing in it travels a mean 
+    distance sqrt(6 D t) of at least ratio times the compartment size,
+    i.e. gradients relax faster than the time scale of interest. 
+    Compartments without diffusion rules are never lumped.
+    
+    Arguements:
+        * float t: shortest time scale of interest (s), e.g. the time 
+          constant of the fastest reaction or the recording interval
+        * float ratio: required diffusion length per compartment size
+        
+    Return:
+        function(comp_id, info) -> bool
+    """
+    
+    def criterion(comp_id, info):
+        if len(info['dcsts']) == 0: return False
+        dcst = min(info['dcsts'].values())
+        return sqrt(6.0 * dcst * t) >= ratio * info['size']
+    return criterion
+
+################################################################################
+
+def lumpWellMixed(mesh, model, criterion, verbose = True):
+    """
+    Replace the tetrahedral compartments of the mesh accepted by the 
+    criterion with well-mixed compartments and report the KProcs saved 
+    in Tetexact.
+    
+    Compartments that mesh.canLumpComp refuses (those touching a diffusion 
+    boundary or forming the conduction volume of a membrane) are kept.
+    Surface KProcs are not affected by lumping and are not reported.
+    
+    Arguements:
+        * steps.geom.Tetmesh mesh
+        * steps.model.Model model
+        * function criterion: called as criterion(comp_id, info) with the 
+          entries of compInfo, returns True to lump the compartment
+        * bool verbose: print a summary
+        
+    Return:
+        (steps.geom.Tetmesh reduced_mesh, dict report)
+        
+        report maps 'comps' to a dict from compartment id to a dict with 
+        entries 'lumped', 'ntets', 'kprocs_before' and 'kprocs_after', and 
+        'kprocs_before', 'kprocs_after' and 'kprocs_saved' to the totals
+        over all compartments.
+    """
+    
+    info = compInfo(mesh, model)
+    lumped = []
+    comps = {}
+    total_before = 0
+    total_after = 0
+    for comp_id in sorted(info.keys()):
+        ci = info[comp_id]
+        lump = ci['lumpable'] and bool(criterion(comp_id, ci))
+        before = ci['ntets'] * (ci['nreacs'] + ci['ndiffs'])
+        if lump:
+            lumped.append(comp_id)
+            after = ci['nreacs']
+        else:
+            after = before
+        comps[comp_id] = {'lumped': lump, 'ntets': ci['ntets'], 
+                          'kprocs_before': before, 'kprocs_after': after}
+        total_before += before
+        total_after += after
+    
+    reduced_mesh = mesh.lumpComps(lumped)
+    report = {'comps': comps, 'kprocs_before': total_before, 
+              'kprocs_after': total_after, 
+              'kprocs_saved': total_before - total_after}
+    
+    if verbose:
+        print "Well-mixed lumping:"
+        for comp_id in sorted(comps.keys()):
+            c = comps[comp_id]
+            if c['lumped']: state = "lumped"
+            elif not info[comp_id]['lumpable']: state = "kept (not lumpable)"
+            else: state = "kept"
+            print "    %s: %i tets, %s, %i -> %i KProcs" % \
+                (comp_id, c['ntets'], state, c['kprocs_before'], 
+                 c['kprocs_after'])
+        print "Volume KProcs: %i -> %i (%i saved)" % \
+            (total_before, total_after, total_before - total_after)
+    
+    return reduced_mesh, report
+
+################################################################################
+
+# END
@@ -1378,7 +1378,17 @@ def loadMesh(pathname, scale=1, strict=False):
     assert(attrs.has_key('size'))
     nnodes = int(attrs['size'])
     
-    nodes_out = [0.0]*(nnodes*3)    
+    # Fill numpy arrays if the numpy Tetmesh constructor is available,
+    # so that the mesh is built without converting intermediate lists.
+    if stetmesh._has_numpy:
+        import numpy
+    else:
+        numpy = None
+    
+    if numpy is not None:
+        nodes_out = numpy.zeros(nnodes*3, dtype = numpy.float64)
+    else:
+        nodes_out = [0.0]*(nnodes*3)
     for i in range(nnodes):
         idxtemp = xmlfile.readline().strip()
         assert(int(idxtemp[13:-2]) == i)
@@ -1397,7 +1407,10 @@ def loadMesh(pathname, scale=1, strict=False):
     assert(attrs.has_key('size'))
     ntris = int(attrs['size'])
 
-    tris_out = [0]*(ntris*3) # numpy.zeros(ntris*3, dtype = 'int')
+    if numpy is not None:
+        tris_out = numpy.zeros(ntris*3, dtype = numpy.uint32)
+    else:
+        tris_out = [0]*(ntris*3)
     
     for i in range(ntris): 
         idxtemp = xmlfile.readline().strip()
@@ -1422,7 +1435,10 @@ def loadMesh(pathname, scale=1, strict=False):
     assert(attrs.has_key('size'))
     ntets = int(attrs['size'])
     
-    tets_out = [0]*(ntets*4)	# numpy.zeros(ntets*4, dtype = 'int')
+    if numpy is not None:
+        tets_out = numpy.zeros(ntets*4, dtype = numpy.uint32)
+    else:
+        tets_out = [0]*(ntets*4)
     for i in range(ntets): 
         idxtemp = xmlfile.readline().strip()
         if strict:
@@ -1440,8 +1456,11 @@ def loadMesh(pathname, scale=1, strict=False):
 
     # Rescale coordinates if requested.
     if scale!=1:
-        for i in xrange(len(nodes_out)):
-            nodes_out[i] *= scale
+        if numpy is not None:
+            nodes_out *= scale
+        else:
+            for i in xrange(len(nodes_out)):
+                nodes_out[i] *= scale
 
     # We have all the information now. Time to make the Tetmesh object.
     mesh = stetmesh.Tetmesh(nodes_out, tets_out, tris_out)
@@ -1548,3 +1567,189 @@ def loadMesh(pathname, scale=1, strict=False):
 
     assert(info == '</tetmesh>')
     return (mesh,comps_out,patches_out)
+
+#############################################################################################
+
+# Sections of a STEPS binary mesh file, in file order, with their numpy
+# dtype and number of columns. Keep in sync with BinSection in
+# steps/geom/tetmesh_rw.cpp.
+_BINARY_SECTIONS = [
+    ('verts',           '<f8', 3),
+    ('bars',            '<u4', 2),
+    ('tris',            '<u4', 3),
+    ('tri_bars',        '<u4', 3),
+    ('tri_areas',       '<f8', 1),
+    ('tri_barycs',      '<f8', 3),
+    ('tri_norms',       '<f8', 3),
+    ('tri_tet_neighbs', '<i4', 2),
+    ('tets',            '<u4', 4),
+    ('tet_vols',        '<f8', 1),
+    ('tet_barycs',      '<f8', 3),
+    ('tet_tri_neighbs', '<u4', 4),
+    ('tet_tet_neighbs', '<i4', 4),
+    ('comp_tets',       '<u4', 1),
+    ('patch_tris',      '<u4', 1),
+    ('roi_indices',     '<u4', 1),
+    ('meta',            'u1',  1),
+]
+
+_BINARY_MAGIC = 'STEPSTMB'
+# The sections are the same in all versions; only the meta section differs.
+_BINARY_VERSIONS = (1, 2)
+
+def saveMeshBinary(pathname, tetmesh):
+    """
+    Save a STEPS Tetmesh in a binary file
+    
+    The file holds the mesh tables (vertices, triangles, tetrahedrons,
+    and all derived neighbour, area, volume and barycentre data), the
+    compartments (including well-mixed ones made by
+    steps.geom.Tetmesh.lumpComps), the patches and the ROI data as
+    contiguous little-endian arrays, so that it can be loaded without
+    parsing or recomputation.
+    Use this format instead of saveMesh for large meshes.
+    
+    PARAMETERS:
+    
+    * pathname: 
+      
+      the root of the path to store the file. 
+      
+      e.g. 'meshes/spine1' will save data in /meshes/spine1.stm
+      
+    * tetmesh:
+    
+      A valid STEPS Tetmesh object (of class steps.geom.Tetmesh). 
+    """
+    stetmesh.saveBinary(pathname + '.stm', tetmesh)
+
+#############################################################################################
+
+def loadMeshBinary(pathname):
+    """ 
+    Load a mesh in STEPS from a binary file written by saveMeshBinary.
+     
+    PARAMETERS:
+    
+    * pathname:
+    
+      the root of the path where the file is stored, e.g. 'meshes/spine1'
+      will look for the file /meshes/spine1.stm
+      
+    RETURNS:
+    
+    A tuple (mesh, comps, patches) as returned by loadMesh.
+    """
+    mesh = stetmesh.loadBinary(pathname + '.stm')
+    comps_out = [stetmesh.castToTmComp(c) for c in mesh.getAllComps()]
+    patches_out = [stetmesh.castToTmPatch(p) for p in mesh.getAllPatches()]
+    return (mesh,comps_out,patches_out)
+
+#############################################################################################
+
+def mapMeshBinary(pathname):
+    """ 
+    Map the arrays of a binary mesh file as read-only numpy memmaps,
+    without creating a Tetmesh.
+    
+    This is meant for analysis of large meshes: only the parts of the
+    file that are used are read from disk.
+     
+    PARAMETERS:
+    
+    * pathname:
+    
+      the root of the path where the file is stored, e.g. 'meshes/spine1'
+      will look for the file /meshes/spine1.stm
+      
+    RETURNS:
+    
+    A dictionary with
+    
+    * one numpy.memmap per table: 'verts' (nverts x 3), 'bars', 'tris',
+      'tri_bars', 'tri_areas', 'tri_barycs', 'tri_norms',
+      'tri_tet_neighbs', 'tets', 'tet_vols', 'tet_barycs',
+      'tet_tri_neighbs' and 'tet_tet_neighbs', indexed as in the Tetmesh.
+    * 'comps': a list of (id, volsys, tets) tuples.
+    * 'patches': a list of (id, icomp, ocomp, surfsys, tris) tuples, where
+      icomp and ocomp are comp ids or None.
+    * 'rois': a dictionary of id: (type, indices).
+    
+    where tets, tris and indices are numpy.memmap views as well.
+    """
+    import struct
+    import numpy
+    
+    filename = pathname + '.stm'
+    nsections = len(_BINARY_SECTIONS)
+    head_fmt = '<8sII4Q%dQ%dQ' % (nsections, nsections)
+    with open(filename, 'rb') as f:
+        head = struct.unpack(head_fmt, f.read(struct.calcsize(head_fmt)))
+    if head[0] != _BINARY_MAGIC:
+        raise IOError(filename + ' is not a STEPS binary mesh.')
+    if head[1] not in _BINARY_VERSIONS or head[2] != nsections:
+        raise IOError('Unsupported binary mesh version ' + str(head[1]) + ' in ' + filename)
+    offsets = head[7:7 + nsections]
+    sizes = head[7 + nsections:]
+    
+    out = {}
+    for (name, dtype, ncols), off, size in zip(_BINARY_SECTIONS, offsets, sizes):
+        nitems = size / numpy.dtype(dtype).itemsize
+        if nitems == 0:
+            out[name] = numpy.zeros(0, dtype=dtype)
+            continue
+        shape = (nitems / ncols, ncols) if ncols > 1 else (nitems,)
+        out[name] = numpy.memmap(filename, dtype=dtype, mode='r', offset=off, shape=shape)
+    
+    # Decode the comp, patch and ROI names.
+    meta = out.pop('meta').tostring()
+    pos = [0]
+    def get(fmt):
+        v = struct.unpack_from('<' + fmt, meta, pos[0])
+        pos[0] += struct.calcsize('<' + fmt)
+        return v[0]
+    def getstr():
+        n = get('I')
+        v = meta[pos[0]:pos[0] + n]
+        pos[0] += n
+        return v
+    
+    comp_tets = out.pop('comp_tets')
+    patch_tris = out.pop('patch_tris')
+    roi_indices = out.pop('roi_indices')
+    
+    comps = []
+    start = 0
+    for c in range(get('I')):
+        id = getstr()
+        volsys = [getstr() for v in range(get('I'))]
+        n = get('Q')
+        comps.append((id, volsys, comp_tets[start:start + n]))
+        start += n
+    
+    patches = []
+    start = 0
+    for p in range(get('I')):
+        id = getstr()
+        icomp = get('i')
+        ocomp = get('i')
+        surfsys = [getstr() for s in range(get('I'))]
+        n = get('Q')
+        patches.append((id, comps[icomp][0] if icomp >= 0 else None,
+                        comps[ocomp][0] if ocomp >= 0 else None,
+                        surfsys, patch_tris[start:start + n]))
+        start += n
+    
+    rois = {}
+    start = 0
+    for r in range(get('I')):
+        id = getstr()
+        type = get('I')
+        n = get('Q')
+        rois[id] = (type, roi_indices[start:start + n])
+        start += n
+    
+    out['comps'] = comps
+    out['patches'] = patches
+    out['rois'] = rois
+    return out
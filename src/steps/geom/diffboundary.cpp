@@ -130,5 +130,12 @@ std::vector<bool> stetmesh::DiffBoundary::isTriInside(const std::vector<uint> &t
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void stetmesh::DiffBoundary::_renumberTris(std::vector<uint> const & tri_map)
+{
+    for (uint & tri: pTri_indices) tri = tri_map[tri];
+    std::sort(pTri_indices.begin(), pTri_indices.end());
+}
+
+////////////////////////////////////////////////////////////////////////////////
 
 // END
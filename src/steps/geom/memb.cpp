@@ -70,8 +70,8 @@ stetmesh::Memb::Memb(std::string const & id, Tetmesh * container,
     if (patches.size() == 0)
         throw ArgErr("No Patches provided to Membrane initializer function.");
 
-    if (pOpt_method != 1 && pOpt_method != 2)
-        throw ArgErr("Unknown optimization method. Choices are 1 or 2.");
+    if (pOpt_method != 1 && pOpt_method != 2 && pOpt_method != 3)
+        throw ArgErr("Unknown optimization method. Choices are 1, 2 or 3.");
 
     if (pSearch_percent > 100.0)
         throw ArgErr("Search percentage is greater than 100.");
@@ -389,5 +389,18 @@ void stetmesh::Memb::verifyMemb() {
     }
 }
 
+////////////////////////////////////////////////////////////////////////////////
+
+void stetmesh::Memb::_renumber(std::vector<uint> const & vert_map,
+                               std::vector<uint> const & tet_map,
+                               std::vector<uint> const & tri_map)
+{
+    for (uint & vert: pVert_indices) vert = vert_map[vert];
+    for (uint & tet: pTet_indices) tet = tet_map[tet];
+    for (uint & tri: pTri_indices) tri = tri_map[tri];
+    for (uint & tri: pTrivirt_indices) tri = tri_map[tri];
+}
+
+////////////////////////////////////////////////////////////////////////////////
 
 // END
@@ -203,6 +203,17 @@ public:
     inline std::vector<uint> const & _getAllVertIndices(void) const
     { return pVert_indices; }
 
+    /// Replace the vertex, tetrahedron and triangle indices by their
+    /// entries in the given maps (see Tetmesh::renumber). The order of
+    /// the lists is kept.
+    ///
+    /// \param vert_map New index of each vertex in the mesh.
+    /// \param tet_map New index of each tetrahedron in the mesh.
+    /// \param tri_map New index of each triangle in the mesh.
+    void _renumber(std::vector<uint> const & vert_map,
+                   std::vector<uint> const & tet_map,
+                   std::vector<uint> const & tri_map);
+
     /// Return whether surface is 'open' or not
     ///
     /// \return Bool of open or not.
@@ -0,0 +1,143 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+
+ */
+
+// STL headers.
+#include <algorithm>
+#include <cmath>
+#include <numeric>
+
+// STEPS headers.
+#include "steps/common.h"
+#include "steps/math/tetrahedron.hpp"
+#include "steps/geom/tetgrid.hpp"
+
+namespace stetmesh = steps::tetmesh;
+
+using steps::math::point3d;
+
+////////////////////////////////////////////////////////////////////////////////
+
+stetmesh::TetGrid::TetGrid(std::vector<point3d> const & verts,
+                           std::vector<tet_verts> const & tets)
+: pVerts(verts)
+, pTets(tets)
+, pBBox(verts.begin(), verts.end())
+, pDims()
+, pInvCell()
+, pCellPtr()
+, pCellTets()
+{
+    uint ntets = tets.size();
+    point3d ext = pBBox.max() - pBBox.min();
+
+    // Aim for about one cell per tetrahedron, with cubic cells.
+    double vol = 1.0;
+    uint nflat = 0;
+    for (uint d = 0; d < 3; ++d) {
+        if (ext[d] > 0.0) vol *= ext[d];
+        else ++nflat;
+    }
+    double h = (nflat < 3) ? std::pow(vol / std::max(ntets, 1u), 1.0 / (3 - nflat)) : 1.0;
+
+    for (uint d = 0; d < 3; ++d) {
+        double n = (ext[d] > 0.0) ? std::ceil(ext[d] / h) : 1.0;
+        pDims[d] = static_cast<uint>(std::max(1.0, std::min(n, 1024.0)));
+        pInvCell[d] = (ext[d] > 0.0) ? pDims[d] / ext[d] : 0.0;
+    }
+
+    uint ncells = pDims[0] * pDims[1] * pDims[2];
+    pCellPtr.assign(ncells + 1, 0);
+
+    // Two passes: count, then fill. Tetrahedra are visited in index
+    // order, so each cell list ends up sorted.
+    for (uint t = 0; t < ntets; ++t) {
+        std::array<uint,6> r = _cellRange(t);
+        for (uint k = r[2]; k <= r[5]; ++k)
+            for (uint j = r[1]; j <= r[4]; ++j)
+                for (uint i = r[0]; i <= r[3]; ++i)
+                    ++pCellPtr[_cellIdx(i, j, k) + 1];
+    }
+
+    std::partial_sum(pCellPtr.begin(), pCellPtr.end(), pCellPtr.begin());
+    pCellTets.resize(pCellPtr.back());
+
+    std::vector<uint> fill(pCellPtr.begin(), pCellPtr.end() - 1);
+    for (uint t = 0; t < ntets; ++t) {
+        std::array<uint,6> r = _cellRange(t);
+        for (uint k = r[2]; k <= r[5]; ++k)
+            for (uint j = r[1]; j <= r[4]; ++j)
+                for (uint i = r[0]; i <= r[3]; ++i)
+                    pCellTets[fill[_cellIdx(i, j, k)]++] = t;
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::array<uint,6> stetmesh::TetGrid::_cellRange(uint tidx) const
+{
+    tet_verts const & v = pTets[tidx];
+    steps::math::bounding_box b(pVerts[v[0]]);
+    for (uint i = 1; i < 4; ++i) b.insert(pVerts[v[i]]);
+
+    std::array<uint,6> r;
+    for (uint d = 0; d < 3; ++d) {
+        r[d] = _cell(b.min()[d], d);
+        r[d + 3] = _cell(b.max()[d], d);
+    }
+    return r;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+uint stetmesh::TetGrid::_cell(double x, uint d) const
+{
+    double c = std::floor((x - pBBox.min()[d]) * pInvCell[d]);
+    if (c <= 0.0) return 0;
+    if (c >= pDims[d] - 1) return pDims[d] - 1;
+    return static_cast<uint>(c);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+int stetmesh::TetGrid::find(point3d const & x) const
+{
+    if (!pBBox.contains(x)) return -1;
+
+    uint c = _cellIdx(_cell(x[0], 0), _cell(x[1], 1), _cell(x[2], 2));
+    uint end = pCellPtr[c + 1];
+    for (uint i = pCellPtr[c]; i < end; ++i) {
+        uint tidx = pCellTets[i];
+        tet_verts const & v = pTets[tidx];
+        if (steps::math::tet_inside(pVerts[v[0]], pVerts[v[1]], pVerts[v[2]], pVerts[v[3]], x))
+            return tidx;
+    }
+
+    return -1;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+// END
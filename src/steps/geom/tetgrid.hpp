@@ -0,0 +1,108 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+
+ */
+
+#ifndef STEPS_TETMESH_TETGRID_HPP
+#define STEPS_TETMESH_TETGRID_HPP 1
+
+// STL headers.
+#include <array>
+#include <vector>
+
+// STEPS headers.
+#include "steps/common.h"
+#include "steps/math/point.hpp"
+#include "steps/math/bbox.hpp"
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace steps {
+namespace tetmesh {
+
+////////////////////////////////////////////////////////////////////////////////
+
+/// Uniform grid over the bounding boxes of the tetrahedra of a mesh,
+/// used to accelerate point location.
+/*!
+The bounding box of the mesh is divided into roughly as many cubic-ish
+cells as there are tetrahedra. Each cell lists, in increasing order, the
+tetrahedra whose bounding box overlaps it; the lists are stored in
+compressed (offset, index) form.
+
+A point can only lie in a tetrahedron that is listed in the cell
+containing the point, so find() tests only that cell. Because the lists
+are sorted, find() returns the same tetrahedron as a linear scan over
+the whole mesh.
+*/
+
+class TetGrid
+{
+public:
+    typedef std::array<uint,4> tet_verts;
+
+    TetGrid(std::vector<steps::math::point3d> const & verts,
+            std::vector<tet_verts> const & tets);
+
+    /// Return the index of the first tetrahedron containing x, or -1 if
+    /// x lies outside the mesh.
+    int find(steps::math::point3d const & x) const;
+
+    /// Number of cells along each axis.
+    inline std::array<uint,3> const & dims(void) const
+    { return pDims; }
+
+private:
+    /// Cell coordinate of x along axis d, clamped to the grid.
+    uint _cell(double x, uint d) const;
+
+    /// Lowest and highest cell coordinates overlapped by the bounding
+    /// box of tetrahedron tidx, as (i0, j0, k0, i1, j1, k1).
+    std::array<uint,6> _cellRange(uint tidx) const;
+
+    inline uint _cellIdx(uint i, uint j, uint k) const
+    { return (k * pDims[1] + j) * pDims[0] + i; }
+
+    std::vector<steps::math::point3d> const & pVerts;
+    std::vector<tet_verts> const &            pTets;
+
+    steps::math::bounding_box                 pBBox;
+    std::array<uint,3>                        pDims;
+    std::array<double,3>                      pInvCell;
+
+    /// Offsets of the cell lists into pCellTets (size: ncells + 1).
+    std::vector<uint>                         pCellPtr;
+    /// Tetrahedron indices, cell by cell.
+    std::vector<uint>                         pCellTets;
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
+}
+}
+
+#endif
+
+// STEPS_TETMESH_TETGRID_HPP
+// END
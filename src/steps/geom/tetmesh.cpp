@@ -30,6 +30,9 @@
 #include <cstdlib>
 #include <ctime>
 #include <iostream>
+#include <limits>
+#include <map>
+#include <memory>
 #include <set>
 #include <sstream>
 #include <string>
@@ -37,10 +40,15 @@
 #include <vector>
 #include <numeric>
 
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
 #include "steps/common.h"
 #include "steps/error.hpp"
 
 #include "steps/math/bbox.hpp"
+#include "steps/math/hilbert.hpp"
 #include "steps/math/point.hpp"
 #include "steps/math/smallsort.hpp"
 #include "steps/math/tetrahedron.hpp"
@@ -60,9 +68,132 @@ using steps::util::checkID;
 
 ////////////////////////////////////////////////////////////////////////////////
 
+namespace {
+
+/// Sort v, sorting chunks on separate threads and merging them pairwise.
+template <typename T>
+void parallel_sort(std::vector<T> & v)
+{
+#ifdef _OPENMP
+    int nchunks = omp_get_max_threads();
+#else
+    int nchunks = 1;
+#endif
+    size_t n = v.size();
+    if (nchunks < 2 || n < (1u << 16)) {
+        std::sort(v.begin(), v.end());
+        return;
+    }
+
+    std::vector<size_t> bounds(nchunks + 1);
+    for (int c = 0; c <= nchunks; ++c) bounds[c] = n * c / nchunks;
+
+    #pragma omp parallel for schedule(static, 1)
+    for (int c = 0; c < nchunks; ++c)
+        std::sort(v.begin() + bounds[c], v.begin() + bounds[c + 1]);
+
+    for (int width = 1; width < nchunks; width *= 2) {
+        #pragma omp parallel for schedule(static, 1)
+        for (int c = 0; c < nchunks - width; c += 2 * width)
+            std::inplace_merge(v.begin() + bounds[c], v.begin() + bounds[c + width],
+                               v.begin() + bounds[std::min(c + 2 * width, nchunks)]);
+    }
+}
+
+/// Number the distinct keys in order of first occurrence.
+///
+/// Equivalent to inserting keys one by one into a unique_indexer, but
+/// deduplicates by sorting (key, position) pairs, which is much faster
+/// than hashing for the face and edge tables of large meshes.
+///
+/// \param keys   Keys to number.
+/// \param index  On return, the number of the key at each position.
+/// \param first  On return, the position of the first occurrence of each number.
+template <typename K>
+void number_unique(std::vector<K> const & keys, std::vector<uint> & index, std::vector<uint> & first)
+{
+    struct entry {
+        K key;
+        uint pos;
+        bool operator<(entry const & o) const {
+            return key < o.key || (key == o.key && pos < o.pos);
+        }
+    };
+
+    long n = keys.size();
+    std::vector<entry> sorted(n);
+    #pragma omp parallel for schedule(static)
+    for (long i = 0; i < n; ++i) sorted[i] = entry{keys[i], (uint)i};
+    parallel_sort(sorted);
+
+    // Position of the first occurrence of the key at each position.
+    index.resize(n);
+    for (long i = 0; i < n; ) {
+        long j = i;
+        uint rep = sorted[i].pos;
+        for (; j < n && sorted[j].key == sorted[i].key; ++j) index[sorted[j].pos] = rep;
+        i = j;
+    }
+    std::vector<entry>().swap(sorted);
+
+    // First occurrences precede their repeats, so one pass in position
+    // order numbers them and resolves the repeats.
+    first.clear();
+    for (long i = 0; i < n; ++i) {
+        if (index[i] == (uint)i) {
+            index[i] = first.size();
+            first.push_back(i);
+        }
+        else index[i] = index[index[i]];
+    }
+}
+
+/// Move v[i] to v[map[i]] for each i. The result is written back into
+/// the storage of v, so that exported pointers to it stay valid.
+template <typename T>
+void permute(std::vector<T> & v, std::vector<uint> const & map)
+{
+    std::vector<T> out(v.size());
+    for (size_t i = 0; i < v.size(); ++i) out[map[i]] = v[i];
+    std::copy(out.begin(), out.end(), v.begin());
+}
+
+/// Keys of a sorted vertex triple: packed into 64 bits when the vertex
+/// indices fit in 21 bits, or the 96-bit triple itself otherwise. Both
+/// order triples lexicographically.
+inline uint64_t tri_key64(std::array<uint,3> const & t) {
+    return ((uint64_t)t[0] << 42) | ((uint64_t)t[1] << 21) | t[2];
+}
+
+inline std::array<uint,3> tri_key96(std::array<uint,3> const & t) { return t; }
+
+/// Number distinct faces with number_unique, comparing them by key.
+template <typename K>
+void number_tris(std::vector<std::array<uint,3>> const & faces, std::vector<uint> & index,
+                 std::vector<uint> & first, K (*key)(std::array<uint,3> const &))
+{
+    std::vector<K> keys(faces.size());
+    #pragma omp parallel for schedule(static)
+    for (long i = 0; i < (long)faces.size(); ++i) keys[i] = key(faces[i]);
+    number_unique(keys, index, first);
+}
+
+} // namespace
+
+////////////////////////////////////////////////////////////////////////////////
+
 stetmesh::Tetmesh::Tetmesh(std::vector<double> const & verts,
                            std::vector<uint> const & tets,
                            std::vector<uint> const & tris)
+: Tetmesh(verts.data(), verts.size(), tets.data(), tets.size(), tris.data(), tris.size())
+{
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+stetmesh::Tetmesh::Tetmesh(const double * verts, int verts_size,
+                           const uint * tets, int tets_size,
+                           const uint * tris, int tris_size)
 : Geom()
 , pVertsN(0)
 , pBarsN(0)
@@ -70,20 +201,21 @@ stetmesh::Tetmesh::Tetmesh(std::vector<double> const & verts,
 , pTetsN(0)
 , pMembs()
 , pDiffBoundaries()
+, mROIVersion(0)
 {
     using steps::math::small_sort;
     using std::to_string;
 
     srand (time(NULL));
     
-    // check the vectors are of the expected size
-    if (verts.size() % 3 || tris.size() % 3 || tets.size() % 4)
+    // check the arrays are of the expected size
+    if (verts_size % 3 || tris_size % 3 || tets_size % 4)
         throw ArgErr("Tables supplied to Tet mesh initialiser function are not of the expected dimensions");
 
-    pVertsN = verts.size() / 3;
+    pVertsN = verts_size / 3;
     if (!pVertsN) throw ArgErr("Empty vertex list");
 
-    pTetsN = tets.size() / 4;
+    pTetsN = tets_size / 4;
     if (!pTetsN) throw ArgErr("Empty tets list");
 
     // copy vertices and update bounding box
@@ -100,48 +232,60 @@ stetmesh::Tetmesh::Tetmesh(std::vector<double> const & verts,
         pTets[i] = tet_verts{tets[j],tets[j+1],tets[j+2],tets[j+3]};
 
     // Add user-supplied tris and faces for each tet to pTris and set
-    // tet->tri adjacency
+    // tet->tri adjacency. Tris are numbered in order of first occurrence,
+    // user-supplied tris first.
     {
-        pTet_tri_neighbours.resize(pTetsN);
-        auto tri_indices = make_unique_indexer<tri_verts>(std::back_inserter(pTris));
+        size_t userTrisN = tris_size/3;
+        std::vector<tri_verts> faces(userTrisN + 4 * (size_t)pTetsN);
 
-        // first add user-supplied tris:
-        size_t userTrisN = tris.size()/3;
-        for (uint i = 0; i < tris.size(); i+=3)
-            tri_indices.insert(small_sort<3>(tri_verts{tris[i], tris[i+1], tris[i+2]}));
+        #pragma omp parallel for schedule(static)
+        for (long i = 0; i < (long)userTrisN; ++i)
+            faces[i] = small_sort<3>(tri_verts{tris[3*i], tris[3*i+1], tris[3*i+2]});
 
-        for (uint i = 0; i < pTetsN; ++i) {
+        #pragma omp parallel for schedule(static)
+        for (long i = 0; i < (long)pTetsN; ++i) {
             const tet_verts &tet=pTets[i];
-            tri_verts tris[4] = {
-                small_sort<3>(tri_verts{tet[0],tet[1],tet[2]}),
-                small_sort<3>(tri_verts{tet[0],tet[1],tet[3]}),
-                small_sort<3>(tri_verts{tet[0],tet[2],tet[3]}),
-                small_sort<3>(tri_verts{tet[1],tet[2],tet[3]})
-            };
+            tri_verts *tet_faces = &faces[userTrisN + 4*i];
+            tet_faces[0] = small_sort<3>(tri_verts{tet[0],tet[1],tet[2]});
+            tet_faces[1] = small_sort<3>(tri_verts{tet[0],tet[1],tet[3]});
+            tet_faces[2] = small_sort<3>(tri_verts{tet[0],tet[2],tet[3]});
+            tet_faces[3] = small_sort<3>(tri_verts{tet[1],tet[2],tet[3]});
+        }
+
+        std::vector<uint> index, first;
+        if (pVertsN <= (1u << 21)) number_tris(faces, index, first, tri_key64);
+        else number_tris(faces, index, first, tri_key96);
+
+        pTris.resize(first.size());
+        for (size_t i = 0; i < first.size(); ++i) pTris[i] = faces[first[i]];
 
+        pTet_tri_neighbours.resize(pTetsN);
+        for (uint i = 0; i < pTetsN; ++i)
             for (int j = 0; j < 4; ++j)
-                pTet_tri_neighbours[i][j] = tri_indices[tris[j]];
-        }
+                pTet_tri_neighbours[i][j] = index[userTrisN + 4*i + j];
     }
-    pTris.shrink_to_fit();
     pTrisN = pTris.size();
 
-    // For each tet, compute volume and barycentre, and update
-    // tri->tet adjacency and tet->tet adjacency information.
+    // For each tet, compute volume and barycentre.
 
     pTet_vols.resize(pTetsN);
     pTet_barycentres.resize(pTetsN);
 
-    pTet_tet_neighbours.assign(pTetsN,tet_tets{-1,-1,-1,-1});
-    pTri_tet_neighbours.assign(pTrisN,tri_tets{-1,-1});
-
+    #pragma omp parallel for schedule(static)
     for (int i = 0; i < pTetsN; ++i) {
         auto tet = pTets[i];
         point3d v[4] = {pVerts[tet[0]], pVerts[tet[1]], pVerts[tet[2]], pVerts[tet[3]]};
 
         pTet_vols[i] = steps::math::tet_vol(v[0],v[1],v[2],v[3]);
         pTet_barycentres[i] = steps::math::tet_barycenter(v[0],v[1],v[2],v[3]);
+    }
+
+    // Update tri->tet adjacency and tet->tet adjacency information.
 
+    pTet_tet_neighbours.assign(pTetsN,tet_tets{-1,-1,-1,-1});
+    pTri_tet_neighbours.assign(pTrisN,tri_tets{-1,-1});
+
+    for (int i = 0; i < pTetsN; ++i) {
         if (pTet_vols[i]<=0) throw ArgErr("degenerate tetrahedron "+to_string(i));
 
         for (int face = 0; face < 4; ++face) {
@@ -184,6 +328,7 @@ stetmesh::Tetmesh::Tetmesh(std::vector<double> const & verts,
     pTri_diffboundaries.assign(pTrisN,nullptr);
     pTri_patches.assign(pTrisN,nullptr);
 
+    #pragma omp parallel for schedule(static)
     for (int i = 0; i < pTrisN; ++i) {
         auto tri = pTris[i];
         point3d v[3] = {pVerts[tri[0]], pVerts[tri[1]], pVerts[tri[2]]};
@@ -191,9 +336,10 @@ stetmesh::Tetmesh::Tetmesh(std::vector<double> const & verts,
         pTri_areas[i] = steps::math::tri_area(v[0], v[1], v[2]);
         pTri_norms[i] = steps::math::tri_normal(v[0], v[1], v[2]);
         pTri_barycs[i] = steps::math::tri_barycenter(v[0], v[1], v[2]);
+    }
 
+    for (int i = 0; i < pTrisN; ++i)
         if (pTri_areas[i]<=0) throw ArgErr("degenerate triangle "+to_string(i));
-    }
 
     // initialise tet compartment association.
     pTet_comps.assign(pTetsN,nullptr);
@@ -204,15 +350,367 @@ stetmesh::Tetmesh::Tetmesh(std::vector<double> const & verts,
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void stetmesh::Tetmesh::renumber(std::vector<uint> & vert_map, std::vector<uint> & tet_map,
+                                 std::vector<uint> & tri_map, std::vector<uint> & bar_map)
+{
+    // order tets along a Hilbert curve through their barycentres
+    std::vector<std::pair<uint64_t, uint>> order(pTetsN);
+    #pragma omp parallel for schedule(static)
+    for (long i = 0; i < (long)pTetsN; ++i)
+        order[i] = std::make_pair(steps::math::hilbert_index(pTet_barycentres[i], pBBox), (uint)i);
+    parallel_sort(order);
+
+    tet_map.resize(pTetsN);
+    for (uint i = 0; i < pTetsN; ++i) tet_map[order[i].second] = i;
+
+    // number vertices and tris in order of first use by the ordered tets
+    const uint unset = std::numeric_limits<uint>::max();
+    vert_map.assign(pVertsN, unset);
+    tri_map.assign(pTrisN, unset);
+    uint nverts = 0, ntris = 0;
+    for (auto const & o: order) {
+        for (uint v: pTets[o.second])
+            if (vert_map[v] == unset) vert_map[v] = nverts++;
+        for (uint t: pTet_tri_neighbours[o.second])
+            if (tri_map[t] == unset) tri_map[t] = ntris++;
+    }
+    for (uint & v: vert_map) if (v == unset) v = nverts++;
+    for (uint & t: tri_map) if (t == unset) t = ntris++;
+
+    // The vertex order of each element and the order of the tets of each
+    // tri are kept, as patches orient triangles through them.
+    permute(pVerts, vert_map);
+
+    for (auto & tet: pTets)
+        for (uint & v: tet) v = vert_map[v];
+    for (auto & tris: pTet_tri_neighbours)
+        for (uint & t: tris) t = tri_map[t];
+    for (auto & tets: pTet_tet_neighbours)
+        for (int & t: tets) if (t >= 0) t = tet_map[t];
+
+    permute(pTets, tet_map);
+    permute(pTet_vols, tet_map);
+    permute(pTet_barycentres, tet_map);
+    permute(pTet_comps, tet_map);
+    permute(pTet_tri_neighbours, tet_map);
+    permute(pTet_tet_neighbours, tet_map);
+
+    for (auto & tri: pTris)
+        for (uint & v: tri) v = vert_map[v];
+    for (auto & tets: pTri_tet_neighbours)
+        for (int & t: tets) if (t >= 0) t = tet_map[t];
+
+    permute(pTris, tri_map);
+    permute(pTri_areas, tri_map);
+    permute(pTri_barycs, tri_map);
+    permute(pTri_norms, tri_map);
+    permute(pTri_patches, tri_map);
+    permute(pTri_diffboundaries, tri_map);
+    permute(pTri_tet_neighbours, tri_map);
+    permute(pTri_bars, tri_map);
+
+    // rebuild bars and match them to the old bars of the same tri by
+    // vertices, as patches may have reordered the vertices of a tri
+    std::vector<tri_bars> old_tri_bars(pTri_bars);
+    std::vector<bar_verts> old_bars(pBars);
+    bar_map.assign(pBarsN, 0);
+    buildBarData();
+    for (uint i = 0; i < pTrisN; ++i) {
+        for (uint old_bar: old_tri_bars[i]) {
+            bar_verts verts = steps::math::small_sort<2>(
+                bar_verts{vert_map[old_bars[old_bar][0]], vert_map[old_bars[old_bar][1]]});
+            for (uint bar: pTri_bars[i])
+                if (pBars[bar] == verts) bar_map[old_bar] = bar;
+        }
+    }
+
+    // update the objects and ROIs that refer to the mesh by index
+    std::set<TmComp *> comps(pTet_comps.begin(), pTet_comps.end());
+    comps.erase(nullptr);
+    for (auto comp: comps) comp->_renumberTets(tet_map);
+
+    std::set<TmPatch *> patches(pTri_patches.begin(), pTri_patches.end());
+    patches.erase(nullptr);
+    for (auto patch: patches) patch->_renumberTris(tri_map);
+
+    for (auto const & memb: pMembs) memb.second->_renumber(vert_map, tet_map, tri_map);
+    for (auto const & db: pDiffBoundaries) db.second->_renumberTris(tri_map);
+
+    for (auto & roi: mROI) {
+        std::vector<uint> const * map = nullptr;
+        switch (roi.second.type) {
+            case ELEM_VERTEX: map = &vert_map; break;
+            case ELEM_TRI:    map = &tri_map;  break;
+            case ELEM_TET:    map = &tet_map;  break;
+            default: continue;
+        }
+        std::set<uint> indices;
+        for (uint idx: roi.second.indices) indices.insert((*map)[idx]);
+        roi.second.indices.assign(indices.begin(), indices.end());
+    }
+
+    ++mROIVersion;
+
+    // the point location index refers to tets by index
+    if (pTetGrid) pTetGrid.reset(new TetGrid(pVerts, pTets));
+
+    // as does the triangle neighbour table, if built
+    if (!pTri_tri_offsets.empty()) _buildTriTriNeighbs();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stetmesh::Tetmesh::getSubmeshMaps(std::vector<uint> const & tets,
+    std::vector<uint> & vert_map, std::vector<uint> & tet_map, std::vector<uint> & tri_map) const
+{
+    tet_map = tets;
+    std::sort(tet_map.begin(), tet_map.end());
+    tet_map.erase(std::unique(tet_map.begin(), tet_map.end()), tet_map.end());
+
+    if (tet_map.empty())
+        throw steps::ArgErr("No tetrahedrons given for the sub-mesh.");
+    if (tet_map.back() >= pTetsN)
+        throw steps::ArgErr("Invalid tetrahedron index " + std::to_string(tet_map.back()) + ".");
+
+    std::vector<bool> vert_used(pVertsN, false);
+    std::vector<bool> tri_used(pTrisN, false);
+    for (uint tet: tet_map) {
+        for (uint v: pTets[tet]) vert_used[v] = true;
+        for (uint t: pTet_tri_neighbours[tet]) tri_used[t] = true;
+    }
+
+    vert_map.clear();
+    for (uint v = 0; v < pVertsN; ++v)
+        if (vert_used[v]) vert_map.push_back(v);
+
+    tri_map.clear();
+    for (uint t = 0; t < pTrisN; ++t)
+        if (tri_used[t]) tri_map.push_back(t);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+stetmesh::Tetmesh * stetmesh::Tetmesh::extractSubmesh(std::vector<uint> const & tets) const
+{
+    std::vector<uint> vert_map, tet_map, tri_map;
+    getSubmeshMaps(tets, vert_map, tet_map, tri_map);
+
+    // the sub-mesh index of each element of this mesh, if any
+    const uint unset = std::numeric_limits<uint>::max();
+    std::vector<uint> sub_vert(pVertsN, unset);
+    std::vector<uint> sub_tet(pTetsN, unset);
+    std::vector<uint> sub_tri(pTrisN, unset);
+    for (uint i = 0; i < vert_map.size(); ++i) sub_vert[vert_map[i]] = i;
+    for (uint i = 0; i < tet_map.size(); ++i) sub_tet[tet_map[i]] = i;
+    for (uint i = 0; i < tri_map.size(); ++i) sub_tri[tri_map[i]] = i;
+
+    std::vector<double> verts;
+    verts.reserve(3 * vert_map.size());
+    for (uint v: vert_map)
+        verts.insert(verts.end(), pVerts[v].begin(), pVerts[v].end());
+
+    std::vector<uint> tet_verts;
+    tet_verts.reserve(4 * tet_map.size());
+    for (uint t: tet_map)
+        for (uint v: pTets[t]) tet_verts.push_back(sub_vert[v]);
+
+    // Every face of the tets is listed, so the sub-mesh keeps the given
+    // triangles in order and adds none.
+    std::vector<uint> tri_verts;
+    tri_verts.reserve(3 * tri_map.size());
+    for (uint t: tri_map)
+        for (uint v: pTris[t]) tri_verts.push_back(sub_vert[v]);
+
+    std::unique_ptr<Tetmesh> sub(new Tetmesh(verts, tet_verts, tri_verts));
+    if (sub->countTris() != tri_map.size())
+        throw steps::ProgErr("Unexpected triangles in sub-mesh.");
+
+    _copyObjects(sub.get(), sub_vert, sub_tet, sub_tri, std::set<std::string>());
+
+    return sub.release();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stetmesh::Tetmesh::_copyObjects(Tetmesh * mesh, std::vector<uint> const & new_vert,
+    std::vector<uint> const & new_tet, std::vector<uint> const & new_tri,
+    std::set<std::string> const & wm_comps) const
+{
+    const uint unset = std::numeric_limits<uint>::max();
+
+    // compartments
+    std::map<steps::wm::Comp *, steps::wm::Comp *> comps;
+    for (auto comp: getAllComps()) {
+        TmComp * tmcomp = dynamic_cast<TmComp *>(comp);
+        if (tmcomp == nullptr) continue;
+
+        steps::wm::Comp * new_comp = nullptr;
+        if (wm_comps.count(tmcomp->getID())) {
+            new_comp = new steps::wm::Comp(tmcomp->getID(), mesh, tmcomp->getVol());
+        }
+        else {
+            std::vector<uint> comp_tets;
+            for (uint t: tmcomp->_getAllTetIndices())
+                if (new_tet[t] != unset) comp_tets.push_back(new_tet[t]);
+            if (comp_tets.empty()) continue;
+
+            new_comp = new TmComp(tmcomp->getID(), mesh, comp_tets);
+        }
+        for (auto const & volsys: tmcomp->getVolsys()) new_comp->addVolsys(volsys);
+        comps[comp] = new_comp;
+    }
+
+    // patches, whose triangles must still separate their compartments;
+    // the tetrahedrons of well-mixed compartments belong to none
+    for (auto patch: getAllPatches()) {
+        TmPatch * tmpatch = dynamic_cast<TmPatch *>(patch);
+        if (tmpatch == nullptr) continue;
+
+        // a patch whose inner or outer compartment is not in the new mesh
+        // would become a boundary patch, so it is dropped
+        auto icomp = comps.find(tmpatch->getIComp());
+        if (icomp == comps.end()) continue;
+        auto ocomp = comps.find(tmpatch->getOComp());
+        if (tmpatch->getOComp() != nullptr && ocomp == comps.end()) continue;
+        steps::wm::Comp * new_icomp = icomp->second;
+        steps::wm::Comp * new_ocomp = ocomp == comps.end() ? nullptr : ocomp->second;
+        TmComp * tet_icomp = dynamic_cast<TmComp *>(new_icomp);
+        TmComp * tet_ocomp = dynamic_cast<TmComp *>(new_ocomp);
+
+        std::vector<uint> patch_tris;
+        for (uint t: tmpatch->_getAllTriIndices()) {
+            if (new_tri[t] == unset) continue;
+
+            const int * tri_tets = mesh->_getTriTetNeighb(new_tri[t]);
+            TmComp * tri_comps[2] = {
+                tri_tets[0] == -1 ? nullptr : mesh->getTetComp(tri_tets[0]),
+                tri_tets[1] == -1 ? nullptr : mesh->getTetComp(tri_tets[1]),
+            };
+            if ((tri_comps[0] == tet_icomp && tri_comps[1] == tet_ocomp) ||
+                (tri_comps[1] == tet_icomp && tri_comps[0] == tet_ocomp))
+                patch_tris.push_back(new_tri[t]);
+        }
+        if (patch_tris.empty()) continue;
+
+        TmPatch * new_patch = new TmPatch(tmpatch->getID(), mesh, patch_tris, new_icomp, new_ocomp);
+        for (auto const & surfsys: tmpatch->getSurfsys()) new_patch->addSurfsys(surfsys);
+    }
+
+    // ROIs
+    for (auto const & roi: mROI) {
+        std::vector<uint> const * map = nullptr;
+        switch (roi.second.type) {
+            case ELEM_VERTEX: map = &new_vert; break;
+            case ELEM_TRI:    map = &new_tri;  break;
+            case ELEM_TET:    map = &new_tet;  break;
+            default: continue;
+        }
+        std::set<uint> indices;
+        for (uint idx: roi.second.indices)
+            if ((*map)[idx] != unset) indices.insert((*map)[idx]);
+        if (!indices.empty()) mesh->addROI(roi.first, roi.second.type, indices);
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::string stetmesh::Tetmesh::_lumpError(std::string const & comp_id) const
+{
+    if (dynamic_cast<TmComp *>(getComp(comp_id)) == nullptr)
+        return "Compartment " + comp_id + " is not a tetrahedral compartment.";
+
+    // Diffusion boundaries and conduction volumes need the tetrahedrons.
+    for (auto const & db: pDiffBoundaries) {
+        for (auto comp: db.second->getComps()) {
+            if (comp != nullptr && comp->getID() == comp_id)
+                return "Compartment " + comp_id + " is connected by diffusion boundary "
+                    + db.first + " and can not be made well-mixed.";
+        }
+    }
+
+    for (auto const & memb: pMembs) {
+        for (uint tri: memb.second->_getAllTriIndices()) {
+            if (pTri_patches[tri]->getIComp()->getID() == comp_id)
+                return "Compartment " + comp_id + " is in the conduction volume of membrane "
+                    + memb.first + " and can not be made well-mixed.";
+        }
+    }
+
+    return std::string();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+bool stetmesh::Tetmesh::canLumpComp(std::string const & comp_id) const
+{
+    return _lumpError(comp_id).empty();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+stetmesh::Tetmesh * stetmesh::Tetmesh::lumpComps(std::vector<std::string> const & comp_ids) const
+{
+    std::set<std::string> wm_comps;
+    for (auto const & id: comp_ids) {
+        std::string error = _lumpError(id);
+        if (!error.empty()) throw steps::ArgErr(error);
+        wm_comps.insert(id);
+    }
+
+    // copy the elements in the same order
+    std::vector<double> verts;
+    verts.reserve(3 * pVertsN);
+    for (auto const & vert: pVerts) verts.insert(verts.end(), vert.begin(), vert.end());
+
+    std::vector<uint> tet_verts;
+    tet_verts.reserve(4 * pTetsN);
+    for (auto const & tet: pTets) tet_verts.insert(tet_verts.end(), tet.begin(), tet.end());
+
+    std::vector<uint> tri_verts;
+    tri_verts.reserve(3 * pTrisN);
+    for (auto const & tri: pTris) tri_verts.insert(tri_verts.end(), tri.begin(), tri.end());
+
+    std::unique_ptr<Tetmesh> mesh(new Tetmesh(verts, tet_verts, tri_verts));
+    if (mesh->countTris() != pTrisN)
+        throw steps::ProgErr("Unexpected triangles in copied mesh.");
+
+    std::vector<uint> vert_map(pVertsN), tet_map(pTetsN), tri_map(pTrisN);
+    std::iota(vert_map.begin(), vert_map.end(), 0);
+    std::iota(tet_map.begin(), tet_map.end(), 0);
+    std::iota(tri_map.begin(), tri_map.end(), 0);
+    _copyObjects(mesh.get(), vert_map, tet_map, tri_map, wm_comps);
+
+    for (auto const & db: pDiffBoundaries)
+        new DiffBoundary(db.first, mesh.get(), db.second->_getAllTriIndices());
+
+    // Membranes list the triangles of their patches in patch order.
+    for (auto const & memb: pMembs) {
+        std::vector<TmPatch *> patches;
+        for (uint tri: memb.second->_getAllTriIndices()) {
+            TmPatch * patch = dynamic_cast<TmPatch *>(mesh->getPatch(pTri_patches[tri]->getID()));
+            if (std::find(patches.begin(), patches.end(), patch) == patches.end())
+                patches.push_back(patch);
+        }
+        new Memb(memb.first, mesh.get(), patches, false, memb.second->_getOpt_method(),
+                 memb.second->_getSearch_percent(), memb.second->_getOpt_file_name());
+    }
+
+    return mesh.release();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 void stetmesh::Tetmesh::buildBarData() {
     using steps::math::small_sort;
 
     pTri_bars.resize(pTrisN);
 
-    pBars.clear();
-    auto bar_indices = make_unique_indexer<bar_verts>(std::back_inserter(pBars));
+    // Number bars in order of first occurrence, keyed by the packed
+    // sorted vertex pair.
+    std::vector<uint64_t> keys(3 * (size_t)pTrisN);
 
-    for (uint i = 0; i < pTrisN; ++i) {
+    #pragma omp parallel for schedule(static)
+    for (long i = 0; i < (long)pTrisN; ++i) {
         const tri_verts &tri=pTris[i];
         bar_verts bars[3] = {
             small_sort<2>(bar_verts{tri[0],tri[1]}),
@@ -220,15 +718,39 @@ void stetmesh::Tetmesh::buildBarData() {
             small_sort<2>(bar_verts{tri[1],tri[2]}),
         };
 
-        for (int j = 0; j < 3; ++j) 
-            pTri_bars[i][j] = bar_indices[bars[j]];
+        for (int j = 0; j < 3; ++j)
+            keys[3*i+j] = ((uint64_t)bars[j][0] << 32) | bars[j][1];
     }
-    pBars.shrink_to_fit();
+
+    std::vector<uint> index, first;
+    number_unique(keys, index, first);
+
+    for (uint i = 0; i < pTrisN; ++i)
+        for (int j = 0; j < 3; ++j)
+            pTri_bars[i][j] = index[3*i+j];
+
+    pBars.resize(first.size());
+    for (size_t i = 0; i < first.size(); ++i)
+        pBars[i] = bar_verts{(uint)(keys[first[i]] >> 32), (uint)(keys[first[i]] & 0xffffffffu)};
     pBarsN = pBars.size();
 }
 
 ////////////////////////////////////////////////////////////////////////////////
 
+stetmesh::Tetmesh::Tetmesh(void)
+: Geom()
+, pVertsN(0)
+, pBarsN(0)
+, pTrisN(0)
+, pTetsN(0)
+, pMembs()
+, pDiffBoundaries()
+, mROIVersion(0)
+{
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 stetmesh::Tetmesh::Tetmesh(std::vector<double> const & verts,
         std::vector<uint> const & tris,
         std::vector<double> const & tri_areas,
@@ -246,6 +768,7 @@ stetmesh::Tetmesh::Tetmesh(std::vector<double> const & verts,
 , pTetsN(0)
 , pMembs()
 , pDiffBoundaries()
+, mROIVersion(0)
 {
     // check the vectors are of the expected size
     if (verts.size() % 3 || tris.size() % 3 || tets.size() % 4)
@@ -329,6 +852,136 @@ stetmesh::Tetmesh::Tetmesh(std::vector<double> const & verts,
 
 ////////////////////////////////////////////////////////////////////////////////
 
+stetmesh::TetGrid const & stetmesh::Tetmesh::_getTetGrid(void) const
+{
+    std::call_once(pTetGridFlag, [this]() {
+        pTetGrid.reset(new TetGrid(pVerts, pTets));
+    });
+    return *pTetGrid;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stetmesh::Tetmesh::_buildTriTriNeighbs(void) const
+{
+    // Triangles are neighbours if they share a bar: list the triangles of
+    // each bar, then merge the lists of the three bars of each triangle.
+
+    std::vector<uint> bar_offsets(pBarsN + 1, 0);
+    for (tri_bars const & bars: pTri_bars)
+        for (uint bar: bars) ++bar_offsets[bar + 1];
+    for (uint b = 0; b < pBarsN; ++b)
+        bar_offsets[b + 1] += bar_offsets[b];
+
+    std::vector<uint> bar_tris(bar_offsets[pBarsN]);
+    std::vector<uint> fill(bar_offsets.begin(), bar_offsets.end() - 1);
+    for (uint tri = 0; tri < pTrisN; ++tri)
+        for (uint bar: pTri_bars[tri]) bar_tris[fill[bar]++] = tri;
+
+    std::vector<uint> offsets(pTrisN + 1, 0);
+    std::vector<uint> neighbours;
+    neighbours.reserve(bar_tris.size());
+
+    std::vector<uint> neighbs;
+    for (uint tri = 0; tri < pTrisN; ++tri) {
+        neighbs.clear();
+        for (uint bar: pTri_bars[tri])
+            for (uint i = bar_offsets[bar]; i < bar_offsets[bar + 1]; ++i)
+                if (bar_tris[i] != tri) neighbs.push_back(bar_tris[i]);
+
+        std::sort(neighbs.begin(), neighbs.end());
+        auto last = std::unique(neighbs.begin(), neighbs.end());
+        neighbours.insert(neighbours.end(), neighbs.begin(), last);
+        offsets[tri + 1] = neighbours.size();
+    }
+
+    // A rebuild after renumbering gives tables of the same sizes, which
+    // are written into the existing storage as it may have been exported.
+    if (offsets.size() == pTri_tri_offsets.size()
+        && neighbours.size() == pTri_tri_neighbours.size()) {
+        std::copy(offsets.begin(), offsets.end(), pTri_tri_offsets.begin());
+        std::copy(neighbours.begin(), neighbours.end(), pTri_tri_neighbours.begin());
+    }
+    else {
+        pTri_tri_offsets.swap(offsets);
+        pTri_tri_neighbours.swap(neighbours);
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+const int * stetmesh::Tetmesh::_getTetTetNeighbsData(void) const
+{
+    static_assert(sizeof(tet_tets) == 4 * sizeof(int), "tet_tets is not packed");
+    return pTet_tet_neighbours.empty() ? nullptr : pTet_tet_neighbours.front().data();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+const uint * stetmesh::Tetmesh::_getTetTriNeighbsData(void) const
+{
+    static_assert(sizeof(tet_tris) == 4 * sizeof(uint), "tet_tris is not packed");
+    return pTet_tri_neighbours.empty() ? nullptr : pTet_tri_neighbours.front().data();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+const int * stetmesh::Tetmesh::_getTriTetNeighbsData(void) const
+{
+    static_assert(sizeof(tri_tets) == 2 * sizeof(int), "tri_tets is not packed");
+    return pTri_tet_neighbours.empty() ? nullptr : pTri_tet_neighbours.front().data();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+const double * stetmesh::Tetmesh::_getTetVolsData(void) const
+{
+    return pTet_vols.data();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+const double * stetmesh::Tetmesh::_getTetBarycsData(void) const
+{
+    static_assert(sizeof(point3d) == 3 * sizeof(double), "point3d is not packed");
+    return pTet_barycentres.empty() ? nullptr : pTet_barycentres.front().data();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+const double * stetmesh::Tetmesh::_getTriAreasData(void) const
+{
+    return pTri_areas.data();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+const double * stetmesh::Tetmesh::_getTriBarycsData(void) const
+{
+    return pTri_barycs.empty() ? nullptr : pTri_barycs.front().data();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+const double * stetmesh::Tetmesh::_getTriNormsData(void) const
+{
+    return pTri_norms.empty() ? nullptr : pTri_norms.front().data();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stetmesh::Tetmesh::_getTriTriNeighbsCSR(const uint *& offsets,
+    const uint *& neighbours, uint & nneighbours) const
+{
+    std::call_once(pTriTriFlag, [this]() { _buildTriTriNeighbs(); });
+
+    offsets = pTri_tri_offsets.data();
+    neighbours = pTri_tri_neighbours.data();
+    nneighbours = pTri_tri_neighbours.size();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 stetmesh::Tetmesh::~Tetmesh(void)
 {
     for (auto &membs: pMembs) delete membs.second;
@@ -474,25 +1127,12 @@ std::set<uint> stetmesh::Tetmesh::getTriTriNeighbs(uint tidx) const
 
     // Triangles are neighbours if they share a bar
 
-    std::set<uint> neighbours;
-    tri_bars bars = pTri_bars[tidx];
-
-    for (uint tri = 0; tri < pTrisN; ++tri) {
-        if (tri == tidx) continue;
+    const uint * offsets;
+    const uint * neighbours;
+    uint nneighbours;
+    _getTriTriNeighbsCSR(offsets, neighbours, nneighbours);
 
-        tri_bars neighbtribars = pTri_bars[tri];
-        for (int i = 0; i < 3; ++i) {
-            for (int j = 0; j < 3; ++j) {
-                if (neighbtribars[j] != bars[i]) continue;
-
-                neighbours.insert(tri);
-                goto next_tri;
-            }
-        }
-next_tri: ;
-    }
-
-    return neighbours;
+    return std::set<uint>(neighbours + offsets[tidx], neighbours + offsets[tidx + 1]);
 }
 
 ////////////////////////////////////////////////////////////////////////////////
@@ -601,13 +1241,97 @@ int stetmesh::Tetmesh::findTetByPoint(std::vector<double> p) const
     point3d x{p[0],p[1],p[2]};
     if (!pBBox.contains(x)) return -1;
 
-    for (int tidx = 0; tidx < pTetsN; ++tidx) {
-        tet_verts v = pTets[tidx];
-        if (steps::math::tet_inside(pVerts[v[0]], pVerts[v[1]], pVerts[v[2]], pVerts[v[3]], x))
-            return tidx;
+    return _getTetGrid().find(x);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::vector<int> stetmesh::Tetmesh::findTetsByPoints(std::vector<double> const & points) const
+{
+    std::vector<int> tets(points.size() / 3);
+    findTetsByPointsNP(points.data(), points.size(), tets.data(), tets.size());
+    return tets;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stetmesh::Tetmesh::findTetsByPointsNP(const double* points, int input_size, int* tet_indices, int output_size) const
+{
+    if (input_size != output_size * 3)
+        throw steps::ArgErr("Length of input array should be 3 * length of output array.");
+
+    // Build the index before threads share it.
+    TetGrid const & grid = _getTetGrid();
+
+    #pragma omp parallel for schedule(static)
+    for (int i = 0; i < output_size; ++i) {
+        point3d x{points[3 * i], points[3 * i + 1], points[3 * i + 2]};
+        tet_indices[i] = grid.find(x);
     }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+int stetmesh::Tetmesh::findTetByPointWalk(std::vector<double> p, int start_tet) const
+{
+    point3d x{p[0],p[1],p[2]};
+    if (!pBBox.contains(x)) return -1;
 
-    return -1;
+    return _walkToPoint(x, start_tet);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::vector<int> stetmesh::Tetmesh::findTetsByPointsWalk(std::vector<double> const & points, int start_tet) const
+{
+    std::vector<int> tets(points.size() / 3);
+    findTetsByPointsWalkNP(points.data(), points.size(), tets.data(), tets.size(), start_tet);
+    return tets;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stetmesh::Tetmesh::findTetsByPointsWalkNP(const double* points, int input_size, int* tet_indices, int output_size, int start_tet) const
+{
+    if (input_size != output_size * 3)
+        throw steps::ArgErr("Length of input array should be 3 * length of output array.");
+
+    int hint = start_tet;
+    for (int i = 0; i < output_size; ++i) {
+        point3d x{points[3 * i], points[3 * i + 1], points[3 * i + 2]};
+        int tidx = pBBox.contains(x) ? _walkToPoint(x, hint) : -1;
+        tet_indices[i] = tidx;
+        // Keep the last hit as hint across points outside the mesh.
+        if (tidx != -1) hint = tidx;
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+int stetmesh::Tetmesh::_walkToPoint(point3d const & x, int start_tet) const
+{
+    // Longer walks are left to the spatial index.
+    const uint MAX_WALK_STEPS = 64;
+
+    if (start_tet >= 0 && static_cast<uint>(start_tet) < pTetsN) {
+        int tidx = start_tet;
+        for (uint step = 0; step < MAX_WALK_STEPS; ++step) {
+            const tet_verts &v = pTets[tidx];
+            auto b = steps::math::tet_barycentric(pVerts[v[0]], pVerts[v[1]], pVerts[v[2]], pVerts[v[3]], x);
+
+            uint kmin = 0;
+            for (uint k = 1; k < 4; ++k)
+                if (b[k] < b[kmin]) kmin = k;
+            if (b[kmin] >= 0) return tidx;
+
+            // Cross the face opposite the vertex with the most negative
+            // weight; faces are ordered (0,1,2), (0,1,3), (0,2,3), (1,2,3).
+            tidx = pTet_tet_neighbours[tidx][3 - kmin];
+            if (tidx == -1) break;
+        }
+    }
+
+    return _getTetGrid().find(x);
 }
 
 ////////////////////////////////////////////////////////////////////////////////
@@ -1119,8 +1843,10 @@ void stetmesh::Tetmesh::addROI(std::string id, steps::tetmesh::ElementType type,
     }
     else
     {
+        _checkROIIndices(type, indices);
         ROISet data(type, indices);
         mROI[id] = data;
+        ++mROIVersion;
     }
 }
 
@@ -1134,6 +1860,7 @@ void stetmesh::Tetmesh::removeROI(std::string id)
     else
     {
         mROI.erase(it);
+        ++mROIVersion;
     }
 }
 
@@ -1146,8 +1873,10 @@ void stetmesh::Tetmesh::replaceROI(std::string id, steps::tetmesh::ElementType t
     }
     else
     {
+        _checkROIIndices(type, indices);
         it->second.type = type;
         it->second.indices.assign(indices.begin(), indices.end());
+        ++mROIVersion;
     }
 }
 
@@ -1253,6 +1982,41 @@ bool stetmesh::Tetmesh::checkROI(std::string id, steps::tetmesh::ElementType typ
     return true;
 }
 
+////////////////////////////////////////////////////////////////////////////////
+
+stetmesh::ROISet const & stetmesh::Tetmesh::_getROI(std::string const & id, steps::tetmesh::ElementType type) const
+{
+    auto it = mROI.find(id);
+    if (it == mROI.end())
+        throw steps::ArgErr("Unable to find ROI data with id " + id + ".");
+    if (type != ELEM_UNDEFINED && it->second.type != type)
+        throw steps::ArgErr("Element type mismatch for ROI " + id + ".");
+    return it->second;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stetmesh::Tetmesh::_checkROIIndices(steps::tetmesh::ElementType type, std::set<uint> const & indices) const
+{
+    // indices are sorted, so only the largest needs checking
+    if (indices.empty()) return;
+    uint last = *indices.rbegin();
+
+    switch (type) {
+        case ELEM_VERTEX:
+            if (last >= pVertsN) throw steps::ArgErr("ROI refers to nonexistent vertex " + std::to_string(last) + ".");
+            break;
+        case ELEM_TRI:
+            if (last >= pTrisN) throw steps::ArgErr("ROI refers to nonexistent triangle " + std::to_string(last) + ".");
+            break;
+        case ELEM_TET:
+            if (last >= pTetsN) throw steps::ArgErr("ROI refers to nonexistent tetrahedron " + std::to_string(last) + ".");
+            break;
+        default:
+            break;
+    }
+}
+
 ////////////////////////////////////////////////////////////////////////
 // ROI Data Access
 ////////////////////////////////////////////////////////////////////////
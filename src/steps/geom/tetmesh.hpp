@@ -37,10 +37,13 @@
 #include "steps/geom/tmcomp.hpp"
 #include "steps/geom/memb.hpp"
 #include "steps/geom/diffboundary.hpp"
+#include "steps/geom/tetgrid.hpp"
 
 // STL headers
 #include <vector>
 #include <map>
+#include <memory>
+#include <mutex>
 #include <set>
 ////////////////////////////////////////////////////////////////////////////////
 
@@ -54,6 +57,10 @@ class TmPatch;
 class TmComp;
 class Memb;
 class DiffBoundary;
+class Tetmesh;
+
+Tetmesh * loadBinary(std::string const & pathname);
+void saveBinary(std::string const & pathname, Tetmesh * m);
 
 enum ElementType {ELEM_VERTEX, ELEM_TRI, ELEM_TET, ELEM_UNDEFINED = 99};
 
@@ -134,6 +141,19 @@ public:
     Tetmesh(std::vector<double> const & verts, std::vector<uint> const & tets,
             std::vector<uint> const & tris = std::vector<uint>());
 
+    /// Constructor from flat arrays, as for the above but without
+    /// intermediate vectors (used for numpy arrays).
+    ///
+    /// \param verts Vertex coordinates (x0, y0, z0, x1, ...).
+    /// \param verts_size Length of verts (3 * number of vertices).
+    /// \param tets Vertex indices of the tetrahedrons.
+    /// \param tets_size Length of tets (4 * number of tetrahedrons).
+    /// \param tris Vertex indices of the triangles; may be null.
+    /// \param tris_size Length of tris (3 * number of triangles).
+    Tetmesh(const double * verts, int verts_size,
+            const uint * tets, int tets_size,
+            const uint * tris = 0, int tris_size = 0);
+
     /// Constructor
     ///
     /// \param verts
@@ -360,6 +380,41 @@ public:
 
     int findTetByPoint(std::vector<double> p) const;
 
+    /// Find the tetrahedra which encompass a list of points.
+    /// Same result as findTetByPoint for each point. The first call
+    /// builds a spatial index of the mesh; later calls reuse it.
+    /// \param points Coordinates of the points (x0, y0, z0, x1, ...).
+    /// \return Index of the found tetrahedron for each point, or -1.
+    std::vector<int> findTetsByPoints(std::vector<double> const & points) const;
+
+    /// Find the tetrahedra which encompass a list of points, in numpy
+    /// arrays. Points are located in parallel when built with OpenMP.
+    void findTetsByPointsNP(const double* points, int input_size, int* tet_indices, int output_size) const;
+
+    /// Find a tetrahedron which encompasses a given point, starting the
+    /// search from a nearby tetrahedron.
+    /// Walks from start_tet across the faces towards the point; falls
+    /// back to the spatial index if the walk leaves the mesh or does not
+    /// arrive within a few steps. If the point is on a boundary between
+    /// tetrahedra, any one of them may be returned.
+    /// \param p A point given by its coordinates.
+    /// \param start_tet Index of the tetrahedron to start from, or -1.
+    /// \return ID of the found tetrahedron, or -1 if outside the mesh.
+    int findTetByPointWalk(std::vector<double> p, int start_tet) const;
+
+    /// Find the tetrahedra which encompass a sequence of points, each
+    /// search starting from the result of the previous one.
+    /// Suited to trajectories, where consecutive points are close.
+    /// \param points Coordinates of the points (x0, y0, z0, x1, ...).
+    /// \param start_tet Index of the tetrahedron to start from, or -1.
+    /// \return Index of the found tetrahedron for each point, or -1.
+    std::vector<int> findTetsByPointsWalk(std::vector<double> const & points, int start_tet = -1) const;
+
+    /// Find the tetrahedra which encompass a sequence of points, each
+    /// search starting from the result of the previous one, in numpy
+    /// arrays.
+    void findTetsByPointsWalkNP(const double* points, int input_size, int* tet_indices, int output_size, int start_tet = -1) const;
+
     ////////////////////////////////////////////////////////////////////////
     // DATA ACCESS (EXPOSED TO PYTHON): MESH
     ////////////////////////////////////////////////////////////////////////
@@ -458,12 +513,132 @@ public:
     
     /// Get tet neighbors for a list of tets, no duplication
     ///std::vector<int> getTetsTetNeighbSet(std::vector<uint> const & t_indices) const;
-    
+
+    ////////////////////////////////////////////////////////////////////////
+    // BULK TOPOLOGY ACCESS
+    ////////////////////////////////////////////////////////////////////////
+
+    // Pointers to the internal per-element tables, which are stored
+    // contiguously in element order, for exporting them without copying.
+    // They stay valid until the mesh is destroyed; renumber() reorders the
+    // tables in place.
+
+    /// Return the 4 tetrahedron neighbours of every tetrahedron
+    /// (countTets() x 4, -1 for no neighbour).
+    const int * _getTetTetNeighbsData(void) const;
+
+    /// Return the 4 triangle neighbours of every tetrahedron
+    /// (countTets() x 4).
+    const uint * _getTetTriNeighbsData(void) const;
+
+    /// Return the 2 tetrahedron neighbours of every triangle
+    /// (countTris() x 2, -1 for no neighbour).
+    const int * _getTriTetNeighbsData(void) const;
+
+    /// Return the volume of every tetrahedron (countTets()).
+    const double * _getTetVolsData(void) const;
+
+    /// Return the barycentre of every tetrahedron (countTets() x 3).
+    const double * _getTetBarycsData(void) const;
+
+    /// Return the area of every triangle (countTris()).
+    const double * _getTriAreasData(void) const;
+
+    /// Return the barycentre of every triangle (countTris() x 3).
+    const double * _getTriBarycsData(void) const;
+
+    /// Return the normal of every triangle (countTris() x 3).
+    const double * _getTriNormsData(void) const;
+
+    /// Return the triangle neighbours of all triangles in compressed
+    /// sparse row form. The neighbours of triangle t, as returned by
+    /// getTriTriNeighbs, are neighbours[offsets[t]] up to but excluding
+    /// neighbours[offsets[t+1]], in increasing order. The table is built
+    /// on first use.
+    ///
+    /// \param offsets On return, countTris() + 1 offsets into neighbours.
+    /// \param neighbours On return, the concatenated neighbour lists.
+    /// \param nneighbours On return, the total number of neighbours.
+    void _getTriTriNeighbsCSR(const uint *& offsets, const uint *& neighbours,
+                              uint & nneighbours) const;
+
+    ////////////////////////////////////////////////////////////////////////
+    // RENUMBERING
+    ////////////////////////////////////////////////////////////////////////
+
+    /// Renumber the mesh elements for memory locality.
+    ///
+    /// Tetrahedrons are ordered along a Hilbert curve through their
+    /// barycentres, so that neighbouring tetrahedrons get nearby indices.
+    /// Vertices and triangles are then numbered in order of first use by
+    /// the renumbered tetrahedrons and bars are rebuilt. Compartments,
+    /// patches, membranes, diffusion boundaries and ROIs are updated to
+    /// the new indices. Solvers keep the indices they were created with,
+    /// so the mesh should be renumbered before any solver is created.
+    ///
+    /// \param vert_map On return, the new index of each old vertex.
+    /// \param tet_map On return, the new index of each old tetrahedron.
+    /// \param tri_map On return, the new index of each old triangle.
+    /// \param bar_map On return, the new index of each old bar.
+    void renumber(std::vector<uint> & vert_map, std::vector<uint> & tet_map,
+                  std::vector<uint> & tri_map, std::vector<uint> & bar_map);
+
+    ////////////////////////////////////////////////////////////////////////
+    // SUB-MESH EXTRACTION
+    ////////////////////////////////////////////////////////////////////////
+
+    /// Return the parent indices of the elements of the sub-mesh built by
+    /// extractSubmesh(tets): the tetrahedrons in tets and the vertices and
+    /// triangles of those tetrahedrons, each in increasing order.
+    ///
+    /// \param tets Indices of the tetrahedrons of the sub-mesh.
+    /// \param vert_map On return, the parent index of each sub-mesh vertex.
+    /// \param tet_map On return, the parent index of each sub-mesh tetrahedron.
+    /// \param tri_map On return, the parent index of each sub-mesh triangle.
+    void getSubmeshMaps(std::vector<uint> const & tets, std::vector<uint> & vert_map,
+                        std::vector<uint> & tet_map, std::vector<uint> & tri_map) const;
+
+    /// Build a new mesh from some tetrahedrons of this mesh, numbered as
+    /// given by getSubmeshMaps.
+    ///
+    /// Compartments, patches and ROIs are copied to the new mesh under the
+    /// same names, restricted to its elements, with the same volume and
+    /// surface systems. Patch triangles are kept only if they still lie
+    /// between the patch's compartments, and objects left empty are
+    /// dropped, as are patches whose inner or outer compartment is.
+    /// Membranes and diffusion boundaries are not copied.
+    ///
+    /// \param tets Indices of the tetrahedrons of the sub-mesh.
+    /// \return The new mesh, owned by the caller.
+    Tetmesh * extractSubmesh(std::vector<uint> const & tets) const;
+
+    ////////////////////////////////////////////////////////////////////////
+    // WELL-MIXED LUMPING
+    ////////////////////////////////////////////////////////////////////////
+
+    /// Build a copy of this mesh, with the same element indices, in which
+    /// some tetrahedral compartments are replaced by well-mixed ones.
+    ///
+    /// A well-mixed compartment keeps the id, volume and volume systems
+    /// of the compartment it replaces, but none of its tetrahedrons, so
+    /// that solvers treat it as a single voxel. Patches, diffusion
+    /// boundaries, membranes and ROIs are copied unchanged; patches
+    /// couple the well-mixed compartments to their neighbours.
+    /// Compartments connected by a diffusion boundary or forming the
+    /// conduction volume of a membrane can not be made well-mixed.
+    ///
+    /// \param comp_ids Ids of the compartments to make well-mixed.
+    /// \return The new mesh, owned by the caller.
+    Tetmesh * lumpComps(std::vector<std::string> const & comp_ids) const;
+
+    /// Return whether lumpComps can make compartment comp_id well-mixed.
+    bool canLumpComp(std::string const & comp_id) const;
+
     ////////////////////////////////////////////////////////////////////////
     // ROI (Region of Interest) Data
     ////////////////////////////////////////////////////////////////////////
     
-    /// Add a ROI data
+    /// Add a ROI data. Indices must refer to existing elements of the type.
     void addROI(std::string id, ElementType type, std::set<uint> const &indices);
     
     /// Remove a ROI data
@@ -495,6 +670,16 @@ public:
     
     /// check if a ROI enquire is valid
     bool checkROI(std::string id, ElementType type, uint count = 0, bool warning = true) const;
+
+    /// Return the ROI with name id, checking it has the given element
+    /// type unless type is ELEM_UNDEFINED. Throws ArgErr otherwise.
+    ROISet const & _getROI(std::string const & id, ElementType type = ELEM_UNDEFINED) const;
+
+    /// Return a counter that changes whenever a ROI is added, removed or
+    /// replaced, or the mesh is renumbered, so that solvers can tell when
+    /// to discard data they cache per ROI.
+    inline uint _getROIVersion(void) const
+    { return mROIVersion; }
     
     ////////////////////////////////////////////////////////////////////////
     // ROI Data Access
@@ -713,6 +898,13 @@ public:
     steps::tetmesh::DiffBoundary * _getDiffBoundary(uint gidx) const;
 
 private:
+    // The binary mesh reader and writer copy the tables below directly.
+    friend Tetmesh * loadBinary(std::string const & pathname);
+    friend void saveBinary(std::string const & pathname, Tetmesh * m);
+
+    /// Construct an empty mesh, to be filled in by loadBinary.
+    Tetmesh(void);
+
     typedef std::array<uint,2> bar_verts;
     typedef std::array<uint,3> tri_verts;
     typedef std::array<uint,4> tet_verts;
@@ -726,6 +918,33 @@ private:
     /// Build pBars, pBarsN, pTri_bars from pTris.
     void buildBarData();
 
+    /// Return the point location index, building it on first use.
+    steps::tetmesh::TetGrid const & _getTetGrid(void) const;
+
+    /// Build pTri_tri_offsets and pTri_tri_neighbours from pTri_bars.
+    void _buildTriTriNeighbs(void) const;
+
+    /// Copy the compartments, patches and ROIs of this mesh to mesh,
+    /// restricted to its elements. new_vert, new_tet and new_tri give the
+    /// index in mesh of each element of this mesh, or the largest uint if
+    /// it is not in mesh. Compartments with ids in wm_comps are copied as
+    /// well-mixed compartments.
+    void _copyObjects(Tetmesh * mesh, std::vector<uint> const & new_vert,
+                      std::vector<uint> const & new_tet, std::vector<uint> const & new_tri,
+                      std::set<std::string> const & wm_comps) const;
+
+    /// Return why lumpComps can not make compartment comp_id well-mixed,
+    /// or an empty string if it can.
+    std::string _lumpError(std::string const & comp_id) const;
+
+    /// Locate x by walking from tetrahedron start_tet; see
+    /// findTetByPointWalk.
+    int _walkToPoint(point3d const & x, int start_tet) const;
+
+    /// Throw ArgErr if indices are not all valid indices of elements of
+    /// the given type.
+    void _checkROIIndices(ElementType type, std::set<uint> const & indices) const;
+
     ///////////////////////// DATA: VERTICES ///////////////////////////////
     ///
     /// The total number of vertices in the mesh
@@ -763,6 +982,12 @@ private:
     /// The tetrahedron neighbours of each triangle (by index)
     std::vector<tri_tets>               pTri_tet_neighbours;
 
+    /// The triangle neighbours of each triangle in compressed sparse row
+    /// form, built lazily (see _getTriTriNeighbsCSR).
+    mutable std::vector<uint>           pTri_tri_offsets;
+    mutable std::vector<uint>           pTri_tri_neighbours;
+    mutable std::once_flag              pTriTriFlag;
+
     ///////////////////////// DATA: TETRAHEDRA /////////////////////////////
     ///
     /// The total number of tetrahedron in the mesh
@@ -785,6 +1010,10 @@ private:
     /// Information about the minimal and maximal boundary values
     steps::math::bounding_box           pBBox;
 
+    /// Spatial index for point location, built lazily (see _getTetGrid).
+    mutable std::unique_ptr<steps::tetmesh::TetGrid> pTetGrid;
+    mutable std::once_flag                           pTetGridFlag;
+
     ////////////////////////////////////////////////////////////////////////
 
     // List of contained membranes. Members of this class because they
@@ -794,6 +1023,7 @@ private:
     
     ////////////////////////// ROI Dataset /////////////////////////////////
     std::map<std::string, ROISet>                       mROI;
+    uint                                                mROIVersion;
 };
 
 ////////////////////////////////////////////////////////////////////////////////
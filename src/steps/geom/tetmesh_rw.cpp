@@ -26,10 +26,15 @@
 
 
 // STL headers.
+#include <algorithm>
 #include <cassert>
+#include <cmath>
+#include <cstdint>
+#include <cstring>
 #include <fstream>
 #include <iostream>
 #include <map>
+#include <memory>
 #include <set>
 #include <sstream>
 #include <vector>
@@ -44,6 +49,12 @@
 #include "steps/geom/tmcomp.hpp"
 #include "steps/geom/tmpatch.hpp"
 
+// System headers.
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
 USING(std, endl);
 USING(std, map);
 USING(std, ifstream);
@@ -254,7 +265,7 @@ void steps::tetmesh::saveASCII(string pathname, Tetmesh * m)
     mf << nverts << endl;
     for (uint i = 0; i < nverts; ++i)
     {
-        double * verts = m->_getVertex(i);
+        const double * verts = m->_getVertex(i).data();
         mf.width(20);
         mf << verts[0] << "    ";
         mf.width(20);
@@ -269,7 +280,7 @@ void steps::tetmesh::saveASCII(string pathname, Tetmesh * m)
     mf << ntris << endl;
     for (uint i = 0; i < ntris; ++i)
     {
-        uint * tri = m->_getTri(i);
+        const uint * tri = m->_getTri(i);
         mf.width(8);
         mf << tri[0] << "  ";
         mf.width(8);
@@ -284,7 +295,7 @@ void steps::tetmesh::saveASCII(string pathname, Tetmesh * m)
     mf << ntets << endl;
     for (uint i = 0; i < ntets; ++i)
     {
-        uint * tet = m->_getTet(i);
+        const uint * tet = m->_getTet(i);
         mf.width(8);
         mf << tet[0] << "  ";
         mf.width(8);
@@ -301,7 +312,7 @@ void steps::tetmesh::saveASCII(string pathname, Tetmesh * m)
     mf << ncomps << endl;
     for (uint cidx = 0; cidx < ncomps; ++cidx)
     {
-        TmComp * comp = m->getTetComp(cidx);
+        TmComp * comp = dynamic_cast<TmComp *>(m->_getComp(cidx));
         mf << comp->getID() << endl;
 
         strset volsys = comp->getVolsys();
@@ -340,7 +351,7 @@ void steps::tetmesh::saveASCII(string pathname, Tetmesh * m)
     mf << npatches << endl;
     for (uint pidx = 0; pidx < npatches; ++pidx)
     {
-        TmPatch * patch = m->getTriPatch(pidx);
+        TmPatch * patch = dynamic_cast<TmPatch *>(m->_getPatch(pidx));
         mf << patch->getID() << endl;
 
         Comp * icomp = patch->getIComp();
@@ -385,6 +396,579 @@ void steps::tetmesh::saveASCII(string pathname, Tetmesh * m)
     mf.close();
 }
 
+////////////////////////////////////////////////////////////////////////////////
+// BINARY FORMAT
+////////////////////////////////////////////////////////////////////////////////
+
+namespace {
+
+// Sections of a binary mesh file, in file order. Keep in sync with
+// _BINARY_SECTIONS in steps/utilities/meshio.py.
+enum BinSection {
+    BIN_VERTS,              // double[nverts][3]
+    BIN_BARS,               // uint32[nbars][2]
+    BIN_TRIS,               // uint32[ntris][3]
+    BIN_TRI_BARS,           // uint32[ntris][3]
+    BIN_TRI_AREAS,          // double[ntris]
+    BIN_TRI_BARYCS,         // double[ntris][3]
+    BIN_TRI_NORMS,          // double[ntris][3]
+    BIN_TRI_TET_NEIGHBS,    // int32[ntris][2]
+    BIN_TETS,               // uint32[ntets][4]
+    BIN_TET_VOLS,           // double[ntets]
+    BIN_TET_BARYCS,         // double[ntets][3]
+    BIN_TET_TRI_NEIGHBS,    // uint32[ntets][4]
+    BIN_TET_TET_NEIGHBS,    // int32[ntets][4]
+    BIN_COMP_TETS,          // uint32[], tets of each comp in turn
+    BIN_PATCH_TRIS,         // uint32[], tris of each patch in turn
+    BIN_ROI_INDICES,        // uint32[], indices of each ROI in turn
+    BIN_META,               // bytes, see below
+    BIN_NSECTIONS
+};
+
+const char BIN_MAGIC[8] = {'S','T','E','P','S','T','M','B'};
+// Version 1 files have no comp kinds and only tetrahedral comps.
+const uint32_t BIN_VERSION = 2;
+
+// Kinds of comps in the meta section.
+enum BinCompKind {
+    BIN_COMP_TET,           // a TmComp
+    BIN_COMP_WM             // a well-mixed comp, as made by lumpComps
+};
+
+struct BinHeader {
+    char     magic[8];
+    uint32_t version;
+    uint32_t nsections;
+    uint64_t nverts;
+    uint64_t nbars;
+    uint64_t ntris;
+    uint64_t ntets;
+    // Byte offset from the start of the file and byte size of each
+    // section; offsets are multiples of 8.
+    uint64_t offset[BIN_NSECTIONS];
+    uint64_t size[BIN_NSECTIONS];
+};
+
+bool hostIsLittleEndian(void)
+{
+    const uint16_t one = 1;
+    return *reinterpret_cast<const unsigned char *>(&one) == 1;
+}
+
+// The meta section holds the names that cannot live in flat arrays:
+//
+//   uint32 ncomps, then per comp:
+//       string id; uint32 kind; uint32 nvolsys; string volsys[nvolsys];
+//       uint64 ntets if kind is BIN_COMP_TET, double vol if BIN_COMP_WM
+//   uint32 npatches, then per patch:
+//       string id; int32 icomp; int32 ocomp;
+//       uint32 nsurfsys; string surfsys[nsurfsys]; uint64 ntris
+//   uint32 nrois, then per ROI:
+//       string id; uint32 type; uint64 nindices
+//
+// where a string is a uint32 length followed by its bytes, and icomp,
+// ocomp are comp positions in this list (-1 for none).
+
+class MetaWriter
+{
+public:
+    template <typename T>
+    void put(T v)
+    {
+        const char * b = reinterpret_cast<const char *>(&v);
+        pBuf.insert(pBuf.end(), b, b + sizeof(T));
+    }
+
+    void put(string const & str)
+    {
+        put(static_cast<uint32_t>(str.size()));
+        pBuf.insert(pBuf.end(), str.begin(), str.end());
+    }
+
+    vector<char> const & data(void) const
+    { return pBuf; }
+
+private:
+    vector<char> pBuf;
+};
+
+class MetaReader
+{
+public:
+    MetaReader(const char * b, uint64_t n)
+    : pPos(b), pEnd(b + n)
+    {}
+
+    template <typename T>
+    T get(void)
+    {
+        _need(sizeof(T));
+        T v;
+        std::memcpy(&v, pPos, sizeof(T));
+        pPos += sizeof(T);
+        return v;
+    }
+
+    // Read a count of items that each take at least 4 bytes.
+    uint32_t getCount(void)
+    {
+        uint32_t n = get<uint32_t>();
+        _need(4 * static_cast<uint64_t>(n));
+        return n;
+    }
+
+    string getString(void)
+    {
+        uint32_t n = get<uint32_t>();
+        _need(n);
+        string str(pPos, n);
+        pPos += n;
+        return str;
+    }
+
+private:
+    void _need(uint64_t n)
+    {
+        if (static_cast<uint64_t>(pEnd - pPos) < n)
+            throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+    }
+
+    const char * pPos;
+    const char * pEnd;
+};
+
+// Read-only memory map of a whole file, unmapped on scope exit.
+class MappedFile
+{
+public:
+    MappedFile(string const & pathname)
+    : pData(0), pSize(0)
+    {
+        int fd = ::open(pathname.c_str(), O_RDONLY);
+        if (fd < 0)
+        {
+            ostringstream os;
+            os << "Cannot open file \"" << pathname << "\"";
+            throw steps::IOErr(os.str());
+        }
+        struct stat st;
+        if (::fstat(fd, &st) != 0 || st.st_size == 0)
+        {
+            ::close(fd);
+            ostringstream os;
+            os << "Cannot read file \"" << pathname << "\"";
+            throw steps::IOErr(os.str());
+        }
+        pSize = st.st_size;
+        void * addr = ::mmap(0, pSize, PROT_READ, MAP_PRIVATE, fd, 0);
+        ::close(fd);
+        if (addr == MAP_FAILED)
+        {
+            ostringstream os;
+            os << "Cannot map file \"" << pathname << "\"";
+            throw steps::IOErr(os.str());
+        }
+        pData = static_cast<const char *>(addr);
+    }
+
+    ~MappedFile(void)
+    {
+        ::munmap(const_cast<char *>(pData), pSize);
+    }
+
+    const char * data(void) const
+    { return pData; }
+
+    uint64_t size(void) const
+    { return pSize; }
+
+private:
+    const char * pData;
+    uint64_t     pSize;
+};
+
+// Copy section sec into vector v, checking it holds exactly n elements.
+template <typename T>
+void copySection(MappedFile const & mf, BinHeader const & h, BinSection sec,
+                 uint64_t n, vector<T> & v)
+{
+    if (h.size[sec] != n * sizeof(T) || h.offset[sec] + h.size[sec] > mf.size())
+        throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+    v.resize(n);
+    if (n != 0) std::memcpy(v.data(), mf.data() + h.offset[sec], h.size[sec]);
+}
+
+// Check that every value in the table v is finite and, if positive is
+// set, greater than zero.
+template <typename T>
+void checkValues(vector<T> const & v, bool positive)
+{
+    for (auto const & elem: v)
+        for (double x: elem)
+            if (!std::isfinite(x) || (positive && !(x > 0.0)))
+                throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+}
+
+// Check that every index in the element table v lies in [lo, n).
+template <typename T>
+void checkIndices(vector<T> const & v, int64_t lo, uint64_t n)
+{
+    for (auto const & elem: v)
+        for (int64_t idx: elem)
+            if (idx < lo || idx >= static_cast<int64_t>(n))
+                throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+}
+
+template <typename T>
+void writeSection(ofstream & mf, BinHeader const & h, BinSection sec, const T * data)
+{
+    uint64_t pos = mf.tellp();
+    static const char zeros[8] = {0};
+    mf.write(zeros, h.offset[sec] - pos);
+    mf.write(reinterpret_cast<const char *>(data), h.size[sec]);
+}
+
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void steps::tetmesh::saveBinary(string const & pathname, Tetmesh * m)
+{
+    if (m == 0)
+    {
+        ostringstream os;
+        os << "No model specified";
+        throw steps::ArgErr(os.str());
+    }
+    if (!hostIsLittleEndian())
+        throw steps::NotImplErr("Binary mesh files are only supported on little-endian hosts.");
+
+    static_assert(sizeof(steps::math::point3d) == 3 * sizeof(double), "unexpected point3d layout");
+    static_assert(sizeof(uint) == sizeof(uint32_t), "unexpected uint size");
+
+    // Gather comp, patch and ROI data.
+    MetaWriter meta;
+    vector<uint> comp_tets, patch_tris, roi_indices;
+    map<Comp *, int32_t> comp_pos;
+
+    vector<Comp *> comps = m->getAllComps();
+    meta.put(static_cast<uint32_t>(comps.size()));
+    for (uint c = 0; c < comps.size(); ++c)
+    {
+        Comp * comp = comps[c];
+        TmComp * tmcomp = dynamic_cast<TmComp *>(comp);
+        comp_pos[comp] = c;
+
+        meta.put(comp->getID());
+        meta.put(static_cast<uint32_t>(tmcomp ? BIN_COMP_TET : BIN_COMP_WM));
+        set<string> volsys = comp->getVolsys();
+        meta.put(static_cast<uint32_t>(volsys.size()));
+        for (auto const & v: volsys) meta.put(v);
+
+        if (tmcomp == 0)
+        {
+            meta.put(comp->getVol());
+            continue;
+        }
+        vector<uint> const & tets = tmcomp->_getAllTetIndices();
+        meta.put(static_cast<uint64_t>(tets.size()));
+        comp_tets.insert(comp_tets.end(), tets.begin(), tets.end());
+    }
+
+    vector<Patch *> patches = m->getAllPatches();
+    meta.put(static_cast<uint32_t>(patches.size()));
+    for (Patch * p: patches)
+    {
+        TmPatch * patch = dynamic_cast<TmPatch *>(p);
+        if (patch == 0)
+            throw steps::ArgErr("Patch " + p->getID() + " is not a TmPatch.");
+
+        meta.put(patch->getID());
+        meta.put(patch->getIComp() ? comp_pos[patch->getIComp()] : int32_t(-1));
+        meta.put(patch->getOComp() ? comp_pos[patch->getOComp()] : int32_t(-1));
+        set<string> surfsys = patch->getSurfsys();
+        meta.put(static_cast<uint32_t>(surfsys.size()));
+        for (auto const & v: surfsys) meta.put(v);
+
+        vector<uint> const & tris = patch->_getAllTriIndices();
+        meta.put(static_cast<uint64_t>(tris.size()));
+        patch_tris.insert(patch_tris.end(), tris.begin(), tris.end());
+    }
+
+    meta.put(static_cast<uint32_t>(m->mROI.size()));
+    for (auto const & roi: m->mROI)
+    {
+        meta.put(roi.first);
+        meta.put(static_cast<uint32_t>(roi.second.type));
+        meta.put(static_cast<uint64_t>(roi.second.indices.size()));
+        roi_indices.insert(roi_indices.end(), roi.second.indices.begin(), roi.second.indices.end());
+    }
+
+    // Lay out the sections.
+    BinHeader h;
+    std::memset(&h, 0, sizeof(h));
+    std::memcpy(h.magic, BIN_MAGIC, sizeof(BIN_MAGIC));
+    h.version   = BIN_VERSION;
+    h.nsections = BIN_NSECTIONS;
+    h.nverts    = m->pVertsN;
+    h.nbars     = m->pBarsN;
+    h.ntris     = m->pTrisN;
+    h.ntets     = m->pTetsN;
+
+    h.size[BIN_VERTS]           = h.nverts * 3 * sizeof(double);
+    h.size[BIN_BARS]            = h.nbars * 2 * sizeof(uint32_t);
+    h.size[BIN_TRIS]            = h.ntris * 3 * sizeof(uint32_t);
+    h.size[BIN_TRI_BARS]        = h.ntris * 3 * sizeof(uint32_t);
+    h.size[BIN_TRI_AREAS]       = h.ntris * sizeof(double);
+    h.size[BIN_TRI_BARYCS]      = h.ntris * 3 * sizeof(double);
+    h.size[BIN_TRI_NORMS]       = h.ntris * 3 * sizeof(double);
+    h.size[BIN_TRI_TET_NEIGHBS] = h.ntris * 2 * sizeof(int32_t);
+    h.size[BIN_TETS]            = h.ntets * 4 * sizeof(uint32_t);
+    h.size[BIN_TET_VOLS]        = h.ntets * sizeof(double);
+    h.size[BIN_TET_BARYCS]      = h.ntets * 3 * sizeof(double);
+    h.size[BIN_TET_TRI_NEIGHBS] = h.ntets * 4 * sizeof(uint32_t);
+    h.size[BIN_TET_TET_NEIGHBS] = h.ntets * 4 * sizeof(int32_t);
+    h.size[BIN_COMP_TETS]       = comp_tets.size() * sizeof(uint32_t);
+    h.size[BIN_PATCH_TRIS]      = patch_tris.size() * sizeof(uint32_t);
+    h.size[BIN_ROI_INDICES]     = roi_indices.size() * sizeof(uint32_t);
+    h.size[BIN_META]            = meta.data().size();
+
+    uint64_t pos = sizeof(BinHeader);
+    for (uint i = 0; i < BIN_NSECTIONS; ++i)
+    {
+        pos = (pos + 7) & ~uint64_t(7);
+        h.offset[i] = pos;
+        pos += h.size[i];
+    }
+
+    ofstream mf(pathname.c_str(), std::ios::binary | std::ios::trunc);
+    if (!mf)
+    {
+        ostringstream os;
+        os << "Cannot open file \"" << pathname << "\"";
+        throw steps::IOErr(os.str());
+    }
+
+    mf.write(reinterpret_cast<const char *>(&h), sizeof(h));
+    writeSection(mf, h, BIN_VERTS,           m->pVerts.data());
+    writeSection(mf, h, BIN_BARS,            m->pBars.data());
+    writeSection(mf, h, BIN_TRIS,            m->pTris.data());
+    writeSection(mf, h, BIN_TRI_BARS,        m->pTri_bars.data());
+    writeSection(mf, h, BIN_TRI_AREAS,       m->pTri_areas.data());
+    writeSection(mf, h, BIN_TRI_BARYCS,      m->pTri_barycs.data());
+    writeSection(mf, h, BIN_TRI_NORMS,       m->pTri_norms.data());
+    writeSection(mf, h, BIN_TRI_TET_NEIGHBS, m->pTri_tet_neighbours.data());
+    writeSection(mf, h, BIN_TETS,            m->pTets.data());
+    writeSection(mf, h, BIN_TET_VOLS,        m->pTet_vols.data());
+    writeSection(mf, h, BIN_TET_BARYCS,      m->pTet_barycentres.data());
+    writeSection(mf, h, BIN_TET_TRI_NEIGHBS, m->pTet_tri_neighbours.data());
+    writeSection(mf, h, BIN_TET_TET_NEIGHBS, m->pTet_tet_neighbours.data());
+    writeSection(mf, h, BIN_COMP_TETS,       comp_tets.data());
+    writeSection(mf, h, BIN_PATCH_TRIS,      patch_tris.data());
+    writeSection(mf, h, BIN_ROI_INDICES,     roi_indices.data());
+    writeSection(mf, h, BIN_META,            meta.data().data());
+
+    if (!mf)
+    {
+        ostringstream os;
+        os << "Error while writing file \"" << pathname << "\"";
+        throw steps::IOErr(os.str());
+    }
+    mf.close();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+Tetmesh * steps::tetmesh::loadBinary(string const & pathname)
+{
+    if (!hostIsLittleEndian())
+        throw steps::NotImplErr("Binary mesh files are only supported on little-endian hosts.");
+
+    MappedFile mf(pathname);
+
+    BinHeader h;
+    if (mf.size() < sizeof(h))
+        throw steps::IOErr("File \"" + pathname + "\" is not a STEPS binary mesh.");
+    std::memcpy(&h, mf.data(), sizeof(h));
+    if (std::memcmp(h.magic, BIN_MAGIC, sizeof(BIN_MAGIC)) != 0)
+        throw steps::IOErr("File \"" + pathname + "\" is not a STEPS binary mesh.");
+    if (h.version < 1 || h.version > BIN_VERSION || h.nsections != BIN_NSECTIONS)
+    {
+        ostringstream os;
+        os << "Unsupported binary mesh version " << h.version << " in \"" << pathname << "\"";
+        throw steps::IOErr(os.str());
+    }
+    for (uint i = 0; i < BIN_NSECTIONS; ++i)
+        if (h.offset[i] + h.size[i] > mf.size())
+            throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+
+    std::unique_ptr<Tetmesh> m(new Tetmesh());
+    m->pVertsN = h.nverts;
+    m->pBarsN  = h.nbars;
+    m->pTrisN  = h.ntris;
+    m->pTetsN  = h.ntets;
+
+    copySection(mf, h, BIN_VERTS,           h.nverts, m->pVerts);
+    copySection(mf, h, BIN_BARS,            h.nbars,  m->pBars);
+    copySection(mf, h, BIN_TRIS,            h.ntris,  m->pTris);
+    copySection(mf, h, BIN_TRI_BARS,        h.ntris,  m->pTri_bars);
+    copySection(mf, h, BIN_TRI_AREAS,       h.ntris,  m->pTri_areas);
+    copySection(mf, h, BIN_TRI_BARYCS,      h.ntris,  m->pTri_barycs);
+    copySection(mf, h, BIN_TRI_NORMS,       h.ntris,  m->pTri_norms);
+    copySection(mf, h, BIN_TRI_TET_NEIGHBS, h.ntris,  m->pTri_tet_neighbours);
+    copySection(mf, h, BIN_TETS,            h.ntets,  m->pTets);
+    copySection(mf, h, BIN_TET_VOLS,        h.ntets,  m->pTet_vols);
+    copySection(mf, h, BIN_TET_BARYCS,      h.ntets,  m->pTet_barycentres);
+    copySection(mf, h, BIN_TET_TRI_NEIGHBS, h.ntets,  m->pTet_tri_neighbours);
+    copySection(mf, h, BIN_TET_TET_NEIGHBS, h.ntets,  m->pTet_tet_neighbours);
+
+    checkIndices(m->pBars,               0,  h.nverts);
+    checkIndices(m->pTris,               0,  h.nverts);
+    checkIndices(m->pTri_bars,           0,  h.nbars);
+    checkIndices(m->pTri_tet_neighbours, -1, h.ntets);
+    checkIndices(m->pTets,               0,  h.nverts);
+    checkIndices(m->pTet_tri_neighbours, 0,  h.ntris);
+    checkIndices(m->pTet_tet_neighbours, -1, h.ntets);
+
+    // Solvers assume positive measures and mutually consistent neighbours.
+    checkValues(m->pVerts, false);
+    checkValues(m->pTri_barycs, false);
+    checkValues(m->pTri_norms, false);
+    checkValues(m->pTet_barycentres, false);
+    for (double a: m->pTri_areas)
+        if (!std::isfinite(a) || !(a > 0.0))
+            throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+    for (double v: m->pTet_vols)
+        if (!std::isfinite(v) || !(v > 0.0))
+            throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+    for (uint t = 0; t < m->pTrisN; ++t)
+        for (int tet: m->pTri_tet_neighbours[t])
+        {
+            if (tet < 0) continue;
+            auto const & tris = m->pTet_tri_neighbours[tet];
+            if (std::find(tris.begin(), tris.end(), t) == tris.end())
+                throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+        }
+    for (uint t = 0; t < m->pTetsN; ++t)
+        for (uint k = 0; k < 4; ++k)
+        {
+            // the neighbour across each face is the other tet of its tri
+            auto const & tets = m->pTri_tet_neighbours[m->pTet_tri_neighbours[t][k]];
+            int other;
+            if (tets[0] == static_cast<int>(t)) other = tets[1];
+            else if (tets[1] == static_cast<int>(t)) other = tets[0];
+            else throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+            if (m->pTet_tet_neighbours[t][k] != other)
+                throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+        }
+    for (auto const & bar: m->pBars)
+        if (!(steps::math::distance(m->pVerts[bar[0]], m->pVerts[bar[1]]) > 0.0))
+            throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+
+    m->pBBox = steps::math::bounding_box(m->pVerts.begin(), m->pVerts.end());
+    m->pTri_patches.assign(m->pTrisN, nullptr);
+    m->pTri_diffboundaries.assign(m->pTrisN, nullptr);
+    m->pTet_comps.assign(m->pTetsN, nullptr);
+
+    // Comps, patches and ROIs.
+    MetaReader meta(mf.data() + h.offset[BIN_META], h.size[BIN_META]);
+    const uint32_t * comp_tets = reinterpret_cast<const uint32_t *>(mf.data() + h.offset[BIN_COMP_TETS]);
+    const uint32_t * comp_tets_end = comp_tets + h.size[BIN_COMP_TETS] / sizeof(uint32_t);
+    const uint32_t * patch_tris = reinterpret_cast<const uint32_t *>(mf.data() + h.offset[BIN_PATCH_TRIS]);
+    const uint32_t * patch_tris_end = patch_tris + h.size[BIN_PATCH_TRIS] / sizeof(uint32_t);
+    const uint32_t * roi_indices = reinterpret_cast<const uint32_t *>(mf.data() + h.offset[BIN_ROI_INDICES]);
+    const uint32_t * roi_indices_end = roi_indices + h.size[BIN_ROI_INDICES] / sizeof(uint32_t);
+
+    vector<Comp *> comps(meta.getCount());
+    for (uint c = 0; c < comps.size(); ++c)
+    {
+        string id = meta.getString();
+        uint32_t kind = h.version < 2 ? uint32_t(BIN_COMP_TET) : meta.get<uint32_t>();
+        vector<string> volsys(meta.getCount());
+        for (auto & v: volsys) v = meta.getString();
+
+        try {
+            if (kind == BIN_COMP_TET)
+            {
+                uint64_t n = meta.get<uint64_t>();
+                if (n > static_cast<uint64_t>(comp_tets_end - comp_tets))
+                    throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+                comps[c] = new TmComp(id, m.get(), vector<uint>(comp_tets, comp_tets + n));
+                comp_tets += n;
+            }
+            else if (kind == BIN_COMP_WM)
+            {
+                double vol = meta.get<double>();
+                if (!std::isfinite(vol))
+                    throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+                comps[c] = new Comp(id, m.get(), vol);
+            }
+            else throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+        }
+        catch (steps::ArgErr &) {
+            throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+        }
+        for (auto const & v: volsys) comps[c]->addVolsys(v);
+    }
+
+    uint32_t npatches = meta.getCount();
+    for (uint p = 0; p < npatches; ++p)
+    {
+        string id = meta.getString();
+        int32_t icomp = meta.get<int32_t>();
+        int32_t ocomp = meta.get<int32_t>();
+        if (icomp < 0 || icomp >= static_cast<int32_t>(comps.size())
+            || ocomp < -1 || ocomp >= static_cast<int32_t>(comps.size()))
+            throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+        vector<string> surfsys(meta.getCount());
+        for (auto & v: surfsys) v = meta.getString();
+
+        uint64_t n = meta.get<uint64_t>();
+        if (n > static_cast<uint64_t>(patch_tris_end - patch_tris))
+            throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+        TmPatch * patch;
+        try {
+            patch = new TmPatch(id, m.get(), vector<uint>(patch_tris, patch_tris + n),
+                                comps[icomp], ocomp < 0 ? 0 : comps[ocomp]);
+        }
+        catch (steps::ArgErr &) {
+            throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+        }
+        patch_tris += n;
+        for (auto const & v: surfsys) patch->addSurfsys(v);
+    }
+
+    uint32_t nrois = meta.getCount();
+    for (uint r = 0; r < nrois; ++r)
+    {
+        string id = meta.getString();
+        ROISet roi;
+        uint32_t type = meta.get<uint32_t>();
+        uint64_t nelems;
+        switch (type)
+        {
+            case ELEM_VERTEX:    nelems = h.nverts; break;
+            case ELEM_TRI:       nelems = h.ntris;  break;
+            case ELEM_TET:       nelems = h.ntets;  break;
+            // indices of an ROI of undefined type refer to no elements
+            case ELEM_UNDEFINED: nelems = UINT32_MAX + uint64_t(1); break;
+            default: throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+        }
+        roi.type = static_cast<ElementType>(type);
+        uint64_t n = meta.get<uint64_t>();
+        if (n > static_cast<uint64_t>(roi_indices_end - roi_indices))
+            throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+        for (uint64_t i = 0; i < n; ++i)
+            if (roi_indices[i] >= nelems)
+                throw steps::IOErr("Binary mesh file is truncated or corrupt.");
+        roi.indices.assign(roi_indices, roi_indices + n);
+        roi_indices += n;
+        m->mROI[id] = std::move(roi);
+    }
+
+    return m.release();
+}
+
 ////////////////////////////////////////////////////////////////////////////////
 
 // END
@@ -108,6 +108,36 @@ void saveASCII(std::string pathname, Tetmesh * m);
 
 ////////////////////////////////////////////////////////////////////////////////
 
+//@{
+/// loadBinary() and saveBinary() read and write a tetmesh in a binary
+/// format meant for large meshes. The file holds a fixed header followed
+/// by the mesh tables exactly as Tetmesh stores them, as contiguous
+/// little-endian arrays aligned to 8 bytes:
+///
+/// <OL>
+/// <LI>Vertex coordinates, bars, triangles and tetrahedrons.
+/// <LI>The derived data: triangle bars, areas, barycentres and normals,
+///     tetrahedron volumes and barycentres, and the triangle/tetrahedron
+///     neighbour tables.
+/// <LI>The member tetrahedrons of each compartment, the member triangles
+///     of each patch and the indices of each ROI, one list after another.
+/// <LI>A small section with the compartment, patch and ROI names, their
+///     volume and surface systems, the length of each list above and the
+///     volume of each well-mixed compartment, as made by lumpComps().
+/// </OL>
+///
+/// The header records the byte offset and size of every section, so
+/// other programs (or numpy.memmap, see steps.utilities.meshio) can
+/// map the arrays without parsing the file. loadBinary() maps the file
+/// and copies the tables straight into a new Tetmesh; nothing is
+/// recomputed. Membranes and diffusion boundaries are not stored.
+///
+Tetmesh * loadBinary(std::string const & pathname);
+void saveBinary(std::string const & pathname, Tetmesh * m);
+//@}
+
+////////////////////////////////////////////////////////////////////////////////
+
 }
 }
 
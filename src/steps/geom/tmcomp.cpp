@@ -121,5 +121,13 @@ std::vector<bool> stetmesh::TmComp::isTetInside(const std::vector<uint> &tets) c
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void stetmesh::TmComp::_renumberTets(std::vector<uint> const & tet_map)
+{
+    for (uint & tet: pTet_indices) tet = tet_map[tet];
+    std::sort(pTet_indices.begin(), pTet_indices.end());
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 // END
 
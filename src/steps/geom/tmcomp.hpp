@@ -124,6 +124,12 @@ public:
     inline std::vector<uint> const & _getAllTetIndices(void) const
     { return pTet_indices; }
 
+    /// Replace each tetrahedron index t by tet_map[t], keeping the
+    /// indices sorted (see Tetmesh::renumber).
+    ///
+    /// \param tet_map New index of each tetrahedron in the mesh.
+    void _renumberTets(std::vector<uint> const & tet_map);
+
 private:
 
     Tetmesh                           * pTetmesh;
@@ -145,4 +145,12 @@ std::vector<double> stetmesh::TmPatch::getBoundMax(void) const
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void stetmesh::TmPatch::_renumberTris(std::vector<uint> const & tri_map)
+{
+    for (uint & tri: pTri_indices) tri = tri_map[tri];
+    std::sort(pTri_indices.begin(), pTri_indices.end());
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 // END
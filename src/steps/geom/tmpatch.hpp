@@ -125,6 +125,12 @@ public:
     inline std::vector<uint> const & _getAllTriIndices(void) const
     { return pTri_indices; }
 
+    /// Replace each triangle index t by tri_map[t], keeping the
+    /// indices sorted (see Tetmesh::renumber).
+    ///
+    /// \param tri_map New index of each triangle in the mesh.
+    void _renumberTris(std::vector<uint> const & tri_map);
+
     ////////////////////////////////////////////////////////////////////////
 
 private:
@@ -0,0 +1,93 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+
+ */
+
+#ifndef STEPS_MATH_HILBERT_HPP
+#define STEPS_MATH_HILBERT_HPP 1
+
+#include <cstdint>
+
+#include "steps/math/bbox.hpp"
+#include "steps/math/point.hpp"
+
+namespace steps {
+namespace math {
+
+/** Return the position of a point along a 3-d Hilbert curve.
+ *
+ * \param x     Point.
+ * \param box   Bounding box mapped onto the curve; x should lie in it.
+ * \return      Index along a curve of 2^63 cells, 2^21 along each axis.
+ *
+ * Points that are close along the curve are close in space, so sorting
+ * mesh elements by this index improves the locality of neighbour access.
+ * Coordinates are transformed with J. Skilling's algorithm (Programming
+ * the Hilbert curve, AIP Conf. Proc. 707, 2004).
+ */
+
+inline uint64_t hilbert_index(const point3d &x, const bounding_box &box) {
+    const int bits = 21;
+    const uint32_t cells = 1u << bits;
+
+    uint32_t X[3];
+    for (int i = 0; i < 3; ++i) {
+        double w = box.max()[i] - box.min()[i];
+        double s = w > 0 ? (x[i] - box.min()[i]) / w : 0;
+        int64_t c = (int64_t)(s * cells);
+        X[i] = c < 0 ? 0 : c >= cells ? cells - 1 : (uint32_t)c;
+    }
+
+    // inverse undo
+    for (uint32_t Q = cells >> 1; Q > 1; Q >>= 1) {
+        uint32_t P = Q - 1;
+        for (int i = 0; i < 3; ++i) {
+            if (X[i] & Q) X[0] ^= P;
+            else {
+                uint32_t t = (X[0] ^ X[i]) & P;
+                X[0] ^= t;
+                X[i] ^= t;
+            }
+        }
+    }
+
+    // Gray encode
+    X[1] ^= X[0];
+    X[2] ^= X[1];
+    uint32_t t = 0;
+    for (uint32_t Q = cells >> 1; Q > 1; Q >>= 1)
+        if (X[2] & Q) t ^= Q - 1;
+    for (int i = 0; i < 3; ++i) X[i] ^= t;
+
+    // interleave the transposed bits, most significant first
+    uint64_t h = 0;
+    for (int j = bits - 1; j >= 0; --j)
+        for (int i = 0; i < 3; ++i)
+            h = (h << 1) | ((X[i] >> j) & 1);
+    return h;
+}
+
+}} // namespace steps::math
+
+#endif // ndef STEPS_MATH_HILBERT_HPP
@@ -38,8 +38,8 @@ namespace math {
 
 ////////////////////////////////////////////////////////////////////////////////
 
-static std::array<double,4> tet_barycentric(const point3d &p0, point3d p1,
-                                            point3d p2, point3d p3, point3d pi) 
+std::array<double,4> tet_barycentric(const point3d &p0, point3d p1,
+                                     point3d p2, point3d p3, point3d pi)
 {
     // Translate to p0 at origin
     p1-=p0;
@@ -53,6 +53,16 @@ double tet_vol(const point3d &p0, const point3d &p1,
 point3d tet_barycenter(const point3d &p0, const point3d &p1,
                        const point3d &p2, const point3d &p3);
 
+/** Calculate barycentric coordinates of a point in tetrahedron.
+ *
+ * \param p0,p1,p2,p3 Vertices of tetrahedron.
+ * \param pi Point.
+ * \return Weights of p0, p1, p2, p3; all non-negative iff pi lies within
+ *         the tetrahedron.
+ */
+std::array<double,4> tet_barycentric(const point3d &p0, point3d p1,
+                                     point3d p2, point3d p3, point3d pi);
+
 /** Test for point inclusion in tetrahedron.
  *
  * \param p0,p1,p2,p3 Vertices of tetrahedron.
@@ -34,6 +34,7 @@
 #include <sstream>
 #include <string>
 #include <iostream>
+#include <vector>
 
 // STEPS headers.
 #include "steps/common.h"
@@ -70,6 +71,9 @@ GHKcurr::GHKcurr(string const & id, Surfsys * surfsys, ChanState * chanstate,
 , pVshift(vshift)
 , pInfoSupplied(false)
 , pVirtual_conc(virtual_oconc)
+, pVMin(0.0)
+, pVMax(0.0)
+, pDV(0.0)
 {
     if (pSurfsys == 0)
     {
@@ -273,6 +277,60 @@ void GHKcurr::setPInfo(double g, double V, double T, double oconc, double iconc)
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void GHKcurr::setVRange(vector<double> const & vrange)
+{
+    assert(pSurfsys != 0);
+
+    if (vrange.empty())
+    {
+        pVMin = 0.0;
+        pVMax = 0.0;
+        pDV = 0.0;
+        return;
+    }
+
+    if (vrange.size() != 3)
+    {
+        ostringstream os;
+        os << "Voltage range provided to GHKcurr::setVRange function must be ";
+        os << "[minimum voltage, maximum voltage, voltage step]";
+        throw steps::ArgErr(os.str());
+    }
+    if (vrange[2] <= 0.0)
+    {
+        ostringstream os;
+        os << "Voltage step provided to GHKcurr::setVRange function must be positive";
+        throw steps::ArgErr(os.str());
+    }
+    if (vrange[1] <= vrange[0])
+    {
+        ostringstream os;
+        os << "Maximum voltage provided to GHKcurr::setVRange function must be ";
+        os << "greater than minimum voltage";
+        throw steps::ArgErr(os.str());
+    }
+
+    pVMin = vrange[0];
+    pVMax = vrange[1];
+    pDV = vrange[2];
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+vector<double> GHKcurr::getVRange(void) const
+{
+    vector<double> vrange;
+    if (pDV > 0.0)
+    {
+        vrange.push_back(pVMin);
+        vrange.push_back(pVMax);
+        vrange.push_back(pDV);
+    }
+    return vrange;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 double GHKcurr::_G(void) const
 {
     assert (_infosupplied() == true);
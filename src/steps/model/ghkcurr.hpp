@@ -183,6 +183,22 @@ public:
     /// \param ginfo Permeability.
     void setP(double p);
 
+    /// Tabulate the voltage-dependent part of the GHK flux equation.
+    ///
+    /// The solvers then interpolate linearly in the table instead of
+    /// evaluating the exponentials of the flux equation, and use the
+    /// exact equation outside the tabulated range.
+    ///
+    /// \param vrange [minimum voltage, maximum voltage, voltage step] (in
+    ///               volts), or an empty list to always use the exact equation.
+    void setVRange(std::vector<double> const & vrange);
+
+    /// Return the tabulated voltage range.
+    ///
+    /// \return [minimum voltage, maximum voltage, voltage step], or an
+    ///         empty list if the flux is not tabulated.
+    std::vector<double> getVRange(void) const;
+
     ////////////////////////////////////////////////////////////////////////
     // INTERNAL (NON-EXPOSED) OPERATIONS: DELETION
     ////////////////////////////////////////////////////////////////////////
@@ -223,6 +239,16 @@ public:
     double _vshift(void) const
     { return pVshift; }
 
+    // Voltage table of the flux equation; pDV is zero if not tabulated
+    double _getVMin(void) const
+    { return pVMin; }
+
+    double _getVMax(void) const
+    { return pVMax; }
+
+    double _getDV(void) const
+    { return pDV; }
+
     ////////////////////////////////////////////////////////////////////////
 
 private:
@@ -270,6 +296,11 @@ private:
     // some models
     double                                 pVshift;
 
+    // Voltage range of the flux table
+    double                                 pVMin;
+    double                                 pVMax;
+    double                                 pDV;
+
     ////////////////////////////////////////////////////////////////////////
 
 };
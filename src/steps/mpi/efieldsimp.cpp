@@ -0,0 +1,67 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+
+ */
+
+
+// MPI headers.
+#include <mpi.h>
+
+// STEPS headers.
+#include "steps/common.h"
+#include "steps/mpi/efieldsimp.hpp"
+#include "steps/solver/efield/dVsolver_slu.hpp"
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace smpi = steps::mpi;
+namespace sefield = steps::solver::efield;
+using steps::solver::API;
+
+////////////////////////////////////////////////////////////////////////////////
+
+smpi::EFieldSimP::EFieldSimP(steps::tetmesh::Tetmesh * mesh, int efield_solver)
+: sefield::EFieldSim(mesh, _makeSolverP(efield_solver))
+{
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+smpi::EFieldSimP::~EFieldSimP(void)
+{
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::unique_ptr<sefield::EFieldSolver> smpi::EFieldSimP::_makeSolverP(int efield_solver)
+{
+    if (efield_solver == API::EF_DV_SLUSYS) {
+        return std::unique_ptr<sefield::EFieldSolver>(new sefield::dVSolverSLU(MPI_COMM_WORLD));
+    }
+    return _makeSolver(efield_solver);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+// END
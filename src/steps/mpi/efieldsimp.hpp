@@ -0,0 +1,79 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+
+ */
+
+
+#ifndef STEPS_MPI_EFIELDSIMP_HPP
+#define STEPS_MPI_EFIELDSIMP_HPP 1
+
+// STEPS headers.
+#include "steps/common.h"
+#include "steps/solver/api.hpp"
+#include "steps/solver/efield/efieldsim.hpp"
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace steps {
+namespace mpi {
+
+////////////////////////////////////////////////////////////////////////////////
+
+/// Standalone membrane potential simulation with the parallel solvers.
+///
+/// As steps::solver::efield::EFieldSim, with API::EF_DV_SLUSYS also
+/// available. The potential is replicated on every process, so all
+/// processes must make the same calls in the same order.
+class EFieldSimP: public steps::solver::efield::EFieldSim
+{
+
+public:
+
+    /// Constructor
+    ///
+    /// \param mesh Tetrahedral mesh with exactly one membrane.
+    /// \param efield_solver EField solver: API::EF_DEFAULT, API::EF_DV_BDSYS,
+    ///                      API::EF_DV_SLUSYS, API::EF_DV_PCG or
+    ///                      API::EF_DV_BDSYS_LAPACK.
+    EFieldSimP(steps::tetmesh::Tetmesh * mesh,
+               int efield_solver = steps::solver::API::EF_DEFAULT);
+
+    ~EFieldSimP(void);
+
+private:
+
+    static std::unique_ptr<steps::solver::efield::EFieldSolver>
+    _makeSolverP(int efield_solver);
+
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
+}
+}
+
+#endif
+// STEPS_MPI_EFIELDSIMP_HPP
+
+// END
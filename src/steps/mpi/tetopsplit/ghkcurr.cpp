@@ -298,8 +298,7 @@ double smtos::GHKcurr::rate(steps::mpi::tetopsplit::TetOpSplitP * solver)
     double v = solver->getTriV(pTri->idx());
     double T = solver->getTemp();
 
-    double flux = sm::GHKcurrent(pGHKcurrdef->perm(), v+pGHKcurrdef->vshift(), pGHKcurrdef->valence(),
-                                 T, iconc, oconc);
+    double flux = pGHKcurrdef->GHKcurrent(v, T, iconc, oconc);
 
     // Note: For a positive flux, this could be an efflux of +ve cations,
     // or an influx of -ve anions. Need to check the valence.
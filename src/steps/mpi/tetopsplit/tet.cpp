@@ -394,7 +394,7 @@ void smtos::Tet::incCount(uint lidx, int inc, double period)
             throw steps::ProgErr(os.str());
         }
         
-        bufferLocations[lidx] = pSol->registerRemoteMoleculeChange(hostRank, bufferLocations[lidx], SUB_TET, pIdx, lidx, inc);
+        pSol->registerRemoteMoleculeChange(hostRank, bufferLocations[lidx], inc);
         // does not need to check sync
     }
     // local change
@@ -474,7 +474,10 @@ void smtos::Tet::repartition(smtos::TetOpSplitP * tex, int rank, int host_rank)
 void smtos::Tet::setupBufferLocations(void)
 {
     uint nspecs = pCompdef->countSpecs();
-    bufferLocations.assign(nspecs, std::numeric_limits<uint>::max());
+    bufferLocations.resize(nspecs);
+    for (uint lidx = 0; lidx < nspecs; ++lidx) {
+        bufferLocations[lidx] = pSol->registerBoundarySlot(hostRank, SUB_TET, pIdx, lidx);
+    }
 }
 
 ////////////////////////////////////////////////////////////////////////////////
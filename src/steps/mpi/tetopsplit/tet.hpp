@@ -218,7 +218,7 @@ private:
     /// Structure to store time since last update, used to calculate occupancy
     double 							  *	pLastUpdate;
     
-    /// location of where the change of this species is stored in  the solver buffer
+    /// boundary slot of each species in the solver's change buffer to the host
     std::vector<uint>                   bufferLocations;
     // local kprocs update list when spec is changed
     std::vector<std::vector<smtos::KProc *>> localSpecUpdKProcs;
@@ -39,6 +39,7 @@
 #include <algorithm>
 #include <iterator>
 #include <numeric>
+#include <cstring>
 
 #include <mpi.h>
 
@@ -93,6 +94,34 @@ using steps::math::point3d;
 
 ////////////////////////////////////////////////////////////////////////////////
 
+namespace {
+
+const char PCP_MAGIC[8] = {'S', 'T', 'E', 'P', 'S', 'P', 'C', 'P'};
+const uint32_t PCP_VERSION = 1;
+
+// An fstream whose buffer is redirected to memory, so that the checkpoint()
+// and restore() methods of the solver objects can (de)serialise to a string.
+class MemFStream : public std::fstream
+{
+public:
+    explicit MemFStream(std::string const & data = std::string())
+    : std::fstream()
+    , pBuf(data, std::ios::in | std::ios::out | std::ios::binary)
+    {
+        std::basic_ios<char>::rdbuf(&pBuf);
+    }
+
+    std::string str(void) const
+    { return pBuf.str(); }
+
+private:
+    std::stringbuf pBuf;
+};
+
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 void smtos::schedIDXSet_To_Vec(smtos::SchedIDXSet const & s, smtos::SchedIDXVec & v)
 {
     v.resize(s.size());
@@ -127,6 +156,13 @@ smtos::TetOpSplitP::TetOpSplitP(steps::model::Model * m, steps::wm::Geom * g, st
 , pEFTet_GtoL()
 , pEFTri_LtoG()
 , pEFTrisVStale(true)
+, pVDepKProcs()
+, pEFOverlap(false)
+, pEFDTControl()
+, pEFDTTris()
+, pROIPools()
+, pROIMeasures()
+, pROICacheVersion(0)
 , tetHosts(tet_hosts)
 , triHosts(tri_hosts)
 , wmHosts(wm_hosts)
@@ -135,6 +171,7 @@ smtos::TetOpSplitP::TetOpSplitP(steps::model::Model * m, steps::wm::Geom * g, st
 , sdiffSep(0)
 , updPeriod(0.0)
 , recomputeUpdPeriod(true)
+, neighbComm(NULL)
 , reacExtent(0.0)
 , diffExtent(0.0)
 , nIteration(0.0)
@@ -181,6 +218,8 @@ smtos::TetOpSplitP::~TetOpSplitP(void)
         delete g;
     }
 
+    _freeNeighbComm();
+
     if (efflag())
     {
         delete[] pEFVert_GtoL;
@@ -194,242 +233,329 @@ smtos::TetOpSplitP::~TetOpSplitP(void)
 
 void smtos::TetOpSplitP::checkpoint(std::string const & file_name)
 {
-    std::ostringstream os;
-    os << "This function has not been implemented!";
-    throw steps::NotImplErr(os.str());
-    
-    std::cout << "Checkpoint to " << file_name  << "...";
-    std::fstream cp_file;
-
-    cp_file.open(file_name.c_str(),
-                std::fstream::out | std::fstream::binary | std::fstream::trunc);
-
-    statedef()->checkpoint(cp_file);
-
-    CompPVecCI comp_e = pComps.end();
-    for (CompPVecCI c = pComps.begin(); c != comp_e; ++c) (*c)->checkpoint(cp_file);
-
-    PatchPVecCI patch_e = pPatches.end();
-    for (PatchPVecCI p = pPatches.begin(); p != patch_e; ++p) (*p)->checkpoint(cp_file);
-
-    DiffBoundaryPVecCI db_e = pDiffBoundaries.end();
-    for (DiffBoundaryPVecCI db = pDiffBoundaries.begin(); db != db_e; ++db) {
-        (*db)->checkpoint(cp_file);
-    }
+    // Parallel checkpoint layout (one shared file for all ranks):
+    //
+    //   PCPHeader                              fixed size, written by rank 0
+    //   partition table                        3 x uint64 per writing rank:
+    //                                          block offset, block size, nrecords
+    //   global section                         statedef, comps, patches,
+    //                                          diffusion boundaries, EField
+    //   rank blocks                            one contiguous block per rank,
+    //                                          at offsets from an exclusive scan
+    //
+    // Each rank block is a sequence of element records (see _checkpointElement),
+    // keyed by element type and global index so that a restart with a
+    // different partition (or rank count) can route them to their new hosts.
 
-    WmVolPVecCI wmv_e = pWmVols.end();
-    for (WmVolPVecCI wmv = pWmVols.begin(); wmv != wmv_e; ++wmv)
-    {
-        if ((*wmv) != 0) {
-            (*wmv)->checkpoint(cp_file);
+    MemFStream global_buf;
+    if (myRank == 0) {
+        statedef()->checkpoint(global_buf);
+        for (auto c: pComps) c->checkpoint(global_buf);
+        for (auto p: pPatches) p->checkpoint(global_buf);
+        for (auto db: pDiffBoundaries) db->checkpoint(global_buf);
+        if (efflag()) {
+            global_buf.write((char*)&pTemp, sizeof(double));
+            global_buf.write((char*)&pEFDT, sizeof(double));
+            pEField->checkpoint(global_buf);
         }
     }
 
-
-    TetPVecCI tet_e = pTets.end();
-    for (TetPVecCI t = pTets.begin(); t != tet_e; ++t)
-    {
-        if ((*t) != 0) {
-        (*t)->checkpoint(cp_file);
+    MemFStream block_buf;
+    uint64_t local_nrecords = 0;
+    for (auto wmv: pWmVols) {
+        if (wmv && wmv->getInHost()) {
+            _checkpointElement(block_buf, SUB_WM, wmv->idx(), wmv, wmv->kprocs());
+            ++local_nrecords;
         }
     }
-
-    TriPVecCI tri_e = pTris.end();
-    for (TriPVecCI t = pTris.begin(); t != tri_e; ++t)
-    {
-        if ((*t) != 0) {
-            (*t)->checkpoint(cp_file);
+    for (auto t: pTets) {
+        if (t && t->getInHost()) {
+            _checkpointElement(block_buf, SUB_TET, t->idx(), t, t->kprocs());
+            ++local_nrecords;
         }
     }
-
-    KProcPVecCI e = pKProcs.end();
-    for (KProcPVecCI i = pKProcs.begin(); i != e; ++i) (*i)->checkpoint(cp_file);
-
-    if (efflag()) {
-        cp_file.write((char*)&pTemp, sizeof(double));
-        cp_file.write((char*)&pEFDT, sizeof(double));
-        pEField->checkpoint(cp_file);
+    for (auto t: pTris) {
+        if (t && t->getInHost()) {
+            _checkpointElement(block_buf, SUB_TRI, t->idx(), t, t->kprocs());
+            ++local_nrecords;
+        }
     }
 
-    cp_file.write((char*)&nEntries, sizeof(uint));
+    std::string global_data = global_buf.str();
+    std::string block_data = block_buf.str();
 
-    // checkpoint CR SSA
+    uint64_t global_size = global_data.size();
+    MPI_Bcast(&global_size, 1, MPI_UINT64_T, 0, MPI_COMM_WORLD);
 
-    cp_file.write((char*)&pSum, sizeof(double));
-    cp_file.write((char*)&nSum, sizeof(double));
-    cp_file.write((char*)&pA0, sizeof(double));
+    // Per-rank offsets of the rank blocks by exclusive prefix sum.
+    uint64_t local_size = block_data.size();
+    uint64_t local_offset = 0;
+    MPI_Exscan(&local_size, &local_offset, 1, MPI_UINT64_T, MPI_SUM, MPI_COMM_WORLD);
+    if (myRank == 0) local_offset = 0;
 
-    uint n_ngroups = nGroups.size();
-    uint n_pgroups = pGroups.size();
+    uint64_t local_entry[3] = {local_offset, local_size, local_nrecords};
+    std::vector<uint64_t> table(myRank == 0 ? 3 * nHosts : 0);
+    MPI_Gather(local_entry, 3, MPI_UINT64_T, table.data(), 3, MPI_UINT64_T, 0, MPI_COMM_WORLD);
 
-    cp_file.write((char*)&n_ngroups, sizeof(uint));
-    cp_file.write((char*)&n_pgroups, sizeof(uint));
+    PCPHeader header;
+    std::fill_n(header.magic, sizeof(header.magic), 0);
+    std::copy(PCP_MAGIC, PCP_MAGIC + sizeof(header.magic), header.magic);
+    header.version = PCP_VERSION;
+    header.nhosts = nHosts;
+    header.ntets = pTets.size();
+    header.ntris = pTris.size();
+    header.nwmvols = pWmVols.size();
+    header.efield = efflag() ? 1 : 0;
+    header.global_size = global_size;
 
-    for (uint i = 0; i < n_ngroups; i++) {
-        CRGroup* group = nGroups[i];
-        cp_file.write((char*)&(group->capacity), sizeof(unsigned));
-        cp_file.write((char*)&(group->size), sizeof(unsigned));
-        cp_file.write((char*)&(group->max), sizeof(double));
-        cp_file.write((char*)&(group->sum), sizeof(double));
+    uint64_t table_size = 3 * sizeof(uint64_t) * nHosts;
+    uint64_t data_start = sizeof(PCPHeader) + table_size + global_size;
 
-        for (uint j = 0; j < group->size; j++) {
-            uint idx = group->indices[j]->schedIDX();
-            cp_file.write((char*)&idx, sizeof(uint));
-        }
+    MPI_File fh;
+    int err = MPI_File_open(MPI_COMM_WORLD, const_cast<char*>(file_name.c_str()),
+                            MPI_MODE_CREATE | MPI_MODE_WRONLY, MPI_INFO_NULL, &fh);
+    if (err != MPI_SUCCESS) {
+        std::ostringstream os;
+        os << "Unable to open checkpoint file " << file_name << " for writing.";
+        throw steps::ArgErr(os.str());
     }
+    MPI_File_set_size(fh, 0);
 
-    for (uint i = 0; i < n_pgroups; i++) {
-        CRGroup* group = pGroups[i];
-        cp_file.write((char*)&(group->capacity), sizeof(unsigned));
-        cp_file.write((char*)&(group->size), sizeof(unsigned));
-        cp_file.write((char*)&(group->max), sizeof(double));
-        cp_file.write((char*)&(group->sum), sizeof(double));
-
-        for (uint j = 0; j < group->size; j++) {
-            uint idx = group->indices[j]->schedIDX();
-            cp_file.write((char*)&idx, sizeof(uint));
-        }
+    if (myRank == 0) {
+        MPI_File_write_at(fh, 0, &header, sizeof(PCPHeader), MPI_BYTE, MPI_STATUS_IGNORE);
+        MPI_File_write_at(fh, sizeof(PCPHeader), table.data(), 3 * nHosts, MPI_UINT64_T, MPI_STATUS_IGNORE);
     }
+    _collectiveFileIO(&fh, sizeof(PCPHeader) + table_size, &global_data[0],
+                      myRank == 0 ? global_size : 0, true);
+    _collectiveFileIO(&fh, data_start + local_offset, &block_data[0], local_size, true);
 
-    cp_file.close();
-    //std::cout << "complete.\n";
+    MPI_File_close(&fh);
 }
 
 ///////////////////////////////////////////////////////////////////////////////
 
 void smtos::TetOpSplitP::restore(std::string const & file_name)
 {
-    std::ostringstream os;
-    os << "This function has not been implemented!";
-    throw steps::NotImplErr(os.str());
-    
-    std::cout << "Restore from " << file_name << "...";
-    std::fstream cp_file;
-
-    cp_file.open(file_name.c_str(),
-                std::fstream::in | std::fstream::binary);
-
-    cp_file.seekg(0);
-
-    statedef()->restore(cp_file);
-
-    CompPVecCI comp_e = pComps.end();
-    for (CompPVecCI c = pComps.begin(); c != comp_e; ++c) (*c)->restore(cp_file);
+    MPI_File fh;
+    int err = MPI_File_open(MPI_COMM_WORLD, const_cast<char*>(file_name.c_str()),
+                            MPI_MODE_RDONLY, MPI_INFO_NULL, &fh);
+    if (err != MPI_SUCCESS) {
+        std::ostringstream os;
+        os << "Unable to open checkpoint file " << file_name << " for reading.";
+        throw steps::ArgErr(os.str());
+    }
 
-    PatchPVecCI patch_e = pPatches.end();
-    for (PatchPVecCI p = pPatches.begin(); p != patch_e; ++p) (*p)->restore(cp_file);
+    PCPHeader header;
+    MPI_File_read_at_all(fh, 0, &header, sizeof(PCPHeader), MPI_BYTE, MPI_STATUS_IGNORE);
 
-    DiffBoundaryPVecCI db_e = pDiffBoundaries.end();
-    for (DiffBoundaryPVecCI db = pDiffBoundaries.begin(); db != db_e; ++db) {
-        (*db)->restore(cp_file);
+    std::ostringstream os;
+    if (!std::equal(PCP_MAGIC, PCP_MAGIC + sizeof(header.magic), header.magic) ||
+        header.version != PCP_VERSION) {
+        os << file_name << " is not a TetOpSplitP checkpoint file.";
     }
-
-    WmVolPVecCI wmv_e = pWmVols.end();
-    for (WmVolPVecCI wmv = pWmVols.begin(); wmv != wmv_e; ++wmv)
-    {
-        if ((*wmv) != 0) {
-            (*wmv)->restore(cp_file);
-        }
+    else if (header.ntets != pTets.size() || header.ntris != pTris.size() ||
+             header.nwmvols != pWmVols.size()) {
+        os << "Checkpoint file " << file_name << " was written for a different geometry.";
     }
-
-    TetPVecCI tet_e = pTets.end();
-    for (TetPVecCI t = pTets.begin(); t != tet_e; ++t)
-    {
-        if ((*t) != 0) {
-            (*t)->restore(cp_file);
-        }
+    else if (header.efield != (efflag() ? 1 : 0)) {
+        os << "Checkpoint file " << file_name << " was written with a different EField setting.";
     }
-    TriPVecCI tri_e = pTris.end();
-    for (TriPVecCI t = pTris.begin(); t != tri_e; ++t)
-    {
-        if ((*t) != 0) {
-            (*t)->restore(cp_file);
-        }
+    if (!os.str().empty()) {
+        MPI_File_close(&fh);
+        throw steps::ArgErr(os.str());
     }
 
-    KProcPVecCI e = pKProcs.end();
-    for (KProcPVecCI i = pKProcs.begin(); i != e; ++i) (*i)->restore(cp_file);
+    // Partition table of the writing ranks.
+    uint nwriters = header.nhosts;
+    std::vector<uint64_t> table(3 * nwriters);
+    MPI_File_read_at_all(fh, sizeof(PCPHeader), table.data(), 3 * nwriters,
+                         MPI_UINT64_T, MPI_STATUS_IGNORE);
 
+    uint64_t table_size = 3 * sizeof(uint64_t) * nwriters;
+    uint64_t data_start = sizeof(PCPHeader) + table_size + header.global_size;
 
+    // Every rank restores the replicated global state.
+    std::string global_data(header.global_size, '\0');
+    _collectiveFileIO(&fh, sizeof(PCPHeader) + table_size, &global_data[0], header.global_size, false);
 
+    MemFStream global_buf(global_data);
+    statedef()->restore(global_buf);
+    for (auto c: pComps) c->restore(global_buf);
+    for (auto p: pPatches) p->restore(global_buf);
+    for (auto db: pDiffBoundaries) db->restore(global_buf);
     if (efflag()) {
-        cp_file.read((char*)&pTemp, sizeof(double));
-        cp_file.read((char*)&pEFDT, sizeof(double));
-        pEField->restore(cp_file);
+        global_buf.read((char*)&pTemp, sizeof(double));
+        global_buf.read((char*)&pEFDT, sizeof(double));
+        pEField->restore(global_buf);
+    }
+
+    // Each rank reads a contiguous range of the writers' blocks; the blocks
+    // are contiguous in the file so this is a single read.
+    uint wbegin = (uint64_t)nwriters * myRank / nHosts;
+    uint wend = (uint64_t)nwriters * (myRank + 1) / nHosts;
+    uint64_t read_offset = 0;
+    uint64_t read_size = 0;
+    if (wbegin < wend) {
+        read_offset = table[3 * wbegin];
+        read_size = table[3 * (wend - 1)] + table[3 * (wend - 1) + 1] - read_offset;
+    }
+    std::string block_data(read_size, '\0');
+    _collectiveFileIO(&fh, data_start + read_offset, &block_data[0], read_size, false);
+    MPI_File_close(&fh);
+
+    // Route every record to the rank that now hosts its element.
+    std::vector<std::string> outgoing(nHosts);
+    uint64_t pos = 0;
+    while (pos < read_size) {
+        PCPRecord rec;
+        std::memcpy(&rec, &block_data[pos], sizeof(PCPRecord));
+        uint64_t rec_size = sizeof(PCPRecord) + rec.nbytes;
+        if (pos + rec_size > read_size) {
+            throw steps::ProgErr("Corrupted record in checkpoint file.");
+        }
+
+        uint dest = 0;
+        bool valid_idx = (rec.type == SUB_WM && rec.idx < pWmVols.size()) ||
+                         (rec.type == SUB_TET && rec.idx < pTets.size()) ||
+                         (rec.type == SUB_TRI && rec.idx < pTris.size());
+        if (!valid_idx) {
+            throw steps::ProgErr("Unknown record in checkpoint file.");
+        }
+        switch (rec.type) {
+            case SUB_WM:  dest = wmHosts[rec.idx]; break;
+            case SUB_TET: dest = tetHosts[rec.idx]; break;
+            case SUB_TRI: dest = triHosts[rec.idx]; break;
+        }
+        outgoing[dest].append(block_data, pos, rec_size);
+        pos += rec_size;
+    }
+    block_data.clear();
+
+    std::vector<int> send_counts(nHosts), send_displs(nHosts, 0);
+    for (int h = 0; h < nHosts; ++h) {
+        if (outgoing[h].size() > static_cast<uint64_t>(std::numeric_limits<int>::max())) {
+            throw steps::ProgErr("Checkpoint data per rank pair exceeds the MPI message limit.");
+        }
+        send_counts[h] = outgoing[h].size();
+    }
+    std::vector<int> recv_counts(nHosts), recv_displs(nHosts, 0);
+    MPI_Alltoall(send_counts.data(), 1, MPI_INT, recv_counts.data(), 1, MPI_INT, MPI_COMM_WORLD);
+
+    std::string send_data;
+    for (int h = 0; h < nHosts; ++h) {
+        send_displs[h] = send_data.size();
+        send_data += outgoing[h];
+    }
+    outgoing.clear();
+    std::partial_sum(recv_counts.begin(), recv_counts.end() - 1, recv_displs.begin() + 1);
+    std::string recv_data(recv_displs.back() + recv_counts.back(), '\0');
+
+    MPI_Alltoallv(&send_data[0], send_counts.data(), send_displs.data(), MPI_BYTE,
+                  &recv_data[0], recv_counts.data(), recv_displs.data(), MPI_BYTE, MPI_COMM_WORLD);
+    send_data.clear();
+
+    pos = 0;
+    while (pos < recv_data.size()) {
+        PCPRecord rec;
+        std::memcpy(&rec, &recv_data[pos], sizeof(PCPRecord));
+        MemFStream rec_buf(recv_data.substr(pos + sizeof(PCPRecord), rec.nbytes));
+        switch (rec.type) {
+            case SUB_WM:
+                _restoreElement(rec_buf, rec, pWmVols[rec.idx], pWmVols[rec.idx]->kprocs());
+                break;
+            case SUB_TET:
+                _restoreElement(rec_buf, rec, pTets[rec.idx], pTets[rec.idx]->kprocs());
+                break;
+            case SUB_TRI:
+                _restoreElement(rec_buf, rec, pTris[rec.idx], pTris[rec.idx]->kprocs());
+                break;
+        }
+        pos += sizeof(PCPRecord) + rec.nbytes;
     }
 
-    uint stored_entries = 0;
-    cp_file.read((char*)&stored_entries, sizeof(uint));
-
-    if (stored_entries != nEntries) {
-        std::ostringstream os;
-        os << "Unknown Restore Error!";
-        throw steps::ArgErr(os.str());
+    // The CR groups index KProcs by rank-local positions, so they are rebuilt
+    // from the restored rates rather than read back.
+    for (auto kp: pKProcs) {
+        if (kp != NULL) kp->crData = CRKProcData();
     }
+    for (auto g: nGroups) {
+        g->free_indices();
+        delete g;
+    }
+    nGroups.clear();
+    for (auto g: pGroups) {
+        g->free_indices();
+        delete g;
+    }
+    pGroups.clear();
 
-    // restore CR SSA
-    cp_file.read((char*)&pSum, sizeof(double));
-    cp_file.read((char*)&nSum, sizeof(double));
-    cp_file.read((char*)&pA0, sizeof(double));
-
-    uint n_ngroups;
-    uint n_pgroups;
+    recomputeUpdPeriod = true;
+    pEFTrisVStale = true;
+    _updateLocal();
 
-    cp_file.read((char*)&n_ngroups, sizeof(uint));
-    cp_file.read((char*)&n_pgroups, sizeof(uint));
+    MPI_Barrier(MPI_COMM_WORLD);
+}
 
-    nGroups.resize(n_ngroups);
-    pGroups.resize(n_pgroups);
+///////////////////////////////////////////////////////////////////////////////
 
-    for (uint i = 0; i < n_ngroups; i++) {
-        unsigned capacity;
-        unsigned size;
-        double max;
-        double sum;
+template <typename Element>
+void smtos::TetOpSplitP::_checkpointElement(std::fstream & cp_file, SubVolType type, uint idx,
+                                            Element * elem, std::vector<KProc*> const & kprocs)
+{
+    MemFStream elem_buf;
+    elem->checkpoint(elem_buf);
+    for (auto kp: kprocs) kp->checkpoint(elem_buf);
+    std::string payload = elem_buf.str();
 
-        cp_file.read((char*)&capacity, sizeof(unsigned));
-        cp_file.read((char*)&size, sizeof(unsigned));
-        cp_file.read((char*)&max, sizeof(double));
-        cp_file.read((char*)&sum, sizeof(double));
+    PCPRecord rec;
+    rec.type = type;
+    rec.idx = idx;
+    rec.nkprocs = kprocs.size();
+    rec.reserved = 0;
+    rec.nbytes = payload.size();
+    cp_file.write((char*)&rec, sizeof(PCPRecord));
+    cp_file.write(payload.data(), payload.size());
+}
 
-        nGroups[i] = new CRGroup(0, capacity);
-        nGroups[i]->size = size;
-        nGroups[i]->max = max;
-        nGroups[i]->sum = sum;
+///////////////////////////////////////////////////////////////////////////////
 
-        for (uint j = 0; j < size; j++) {
-            uint idx;
-            cp_file.read((char*)&idx, sizeof(uint));
-            nGroups[i]->indices[j] = pKProcs[idx];
-        }
+template <typename Element>
+void smtos::TetOpSplitP::_restoreElement(std::fstream & cp_file, PCPRecord const & rec,
+                                         Element * elem, std::vector<KProc*> const & kprocs)
+{
+    if (elem == 0 || !elem->getInHost() || rec.nkprocs != kprocs.size()) {
+        std::ostringstream os;
+        os << "Checkpoint record for element " << rec.idx << " does not match the solver state.";
+        throw steps::ProgErr(os.str());
     }
+    elem->restore(cp_file);
+    for (auto kp: kprocs) kp->restore(cp_file);
+}
 
-    for (uint i = 0; i < n_pgroups; i++) {
-        unsigned capacity;
-        unsigned size;
-        double max;
-        double sum;
+///////////////////////////////////////////////////////////////////////////////
 
-        cp_file.read((char*)&capacity, sizeof(unsigned));
-        cp_file.read((char*)&size, sizeof(unsigned));
-        cp_file.read((char*)&max, sizeof(double));
-        cp_file.read((char*)&sum, sizeof(double));
+void smtos::TetOpSplitP::_collectiveFileIO(void * file_handle, uint64_t offset, char * data,
+                                           uint64_t size, bool write)
+{
+    MPI_File fh = *static_cast<MPI_File*>(file_handle);
 
-        pGroups[i] = new CRGroup(0, capacity);
-        pGroups[i]->size = size;
-        pGroups[i]->max = max;
-        pGroups[i]->sum = sum;
+    // MPI counts are ints, so large blocks are transferred in chunks. Collective
+    // calls must match across ranks, so all ranks do the same number of rounds.
+    const uint64_t chunk = std::numeric_limits<int>::max();
+    uint64_t local_rounds = (size + chunk - 1) / chunk;
+    uint64_t rounds = 0;
+    MPI_Allreduce(&local_rounds, &rounds, 1, MPI_UINT64_T, MPI_MAX, MPI_COMM_WORLD);
 
-        for (uint j = 0; j < size; j++) {
-            uint idx;
-            cp_file.read((char*)&idx, sizeof(uint));
-            pGroups[i]->indices[j] = pKProcs[idx];
+    for (uint64_t r = 0; r < rounds; ++r) {
+        uint64_t begin = std::min(r * chunk, size);
+        int count = static_cast<int>(std::min(chunk, size - begin));
+        if (write) {
+            MPI_File_write_at_all(fh, offset + begin, data + begin, count, MPI_BYTE, MPI_STATUS_IGNORE);
+        }
+        else {
+            MPI_File_read_at_all(fh, offset + begin, data + begin, count, MPI_BYTE, MPI_STATUS_IGNORE);
         }
     }
-
-    cp_file.close();
-
-    //std::cout << "complete.\n";
 }
 
 ////////////////////////////////////////////////////////////////////////////////
@@ -890,22 +1016,8 @@ void smtos::TetOpSplitP::_setup(void)
     // Create EField structures if EField is to be calculated
     if (efflag() == true) _setupEField();
     
-    for (auto tet : boundaryTets) {
-        tet->setupBufferLocations();
-    }
-    for (auto tri : boundaryTris) {
-        tri->setupBufferLocations();
-    }
-    // just in case
-    neighbHosts.erase(myRank);
-    nNeighbHosts = neighbHosts.size();
-    
-    // construct remote molecule change buffers
-    remoteChanges.clear();
-    for (auto neighbor : neighbHosts) {
-        remoteChanges[neighbor] = std::vector<uint> ();
-    }
-    
+    _setupNeighbComm();
+
     nEntries = pKProcs.size();
     diffSep=pDiffs.size();
     sdiffSep=pSDiffs.size();
@@ -930,6 +1042,12 @@ void smtos::TetOpSplitP::_setupEField(void)
     case EF_DV_BDSYS:
         pEField = make_EField<dVSolverBanded>();
         break;
+    case EF_DV_PCG:
+        pEField = make_EField<dVSolverPCG>();
+        break;
+    case EF_DV_BDSYS_LAPACK:
+        pEField = make_EField<dVSolverBanded>(true);
+        break;
     case EF_DV_SLUSYS:
         pEField = make_EField<dVSolverSLU>(MPI_COMM_WORLD);
         break;
@@ -1035,6 +1153,7 @@ void smtos::TetOpSplitP::_setupEField(void)
 
     EFTrisI_permuted.resize(pEFNTris);
     EFTrisI_idx.resize(pEFNTris);
+    EFTrisI.resize(pEFNTris);
 
     EFTrisI_offset.assign(nHosts,0);
     EFTrisI_count.assign(nHosts,0);
@@ -1069,9 +1188,33 @@ void smtos::TetOpSplitP::_setupEField(void)
         smtos::Tri *tri_p = pTris[triidx];
         pEFTris_vec[eft] = tri_p;
 
+        ssolver::Patchdef * tri_pdef = tri_p->patchdef();
+        if (tri_pdef->countVDepTrans() + tri_pdef->countVDepSReacs() + tri_pdef->countGHKcurrs() != 0)
+        {
+            pEFDTTris.push_back(eft);
+        }
+
         int tri_host = tri_p->getHost();
         ++EFTrisI_count[tri_host];
-        if (myRank == tri_host) local_eftri_indices.push_back(eft);
+        if (myRank == tri_host)
+        {
+            local_eftri_indices.push_back(eft);
+
+            ssolver::Patchdef * pdef = tri_p->patchdef();
+            for (uint i = 0; i < pdef->countVDepTrans(); ++i)
+                pVDepKProcs.push_back(tri_p->vdeptrans(i));
+            for (uint i = 0; i < pdef->countVDepSReacs(); ++i)
+                pVDepKProcs.push_back(tri_p->vdepsreac(i));
+            for (uint i = 0; i < pdef->countGHKcurrs(); ++i)
+                pVDepKProcs.push_back(tri_p->ghkcurr(i));
+        }
+    }
+
+    // Without voltage-dependent processes, adaptive stepping follows
+    // the potential of the whole membrane.
+    if (pEFDTTris.empty())
+    {
+        for (uint eft = 0; eft < pEFNTris; ++eft) pEFDTTris.push_back(eft);
     }
 
     const int *count_begin=&EFTrisI_count[0];
@@ -1253,6 +1396,8 @@ void smtos::TetOpSplitP::reset(void)
     statedef()->resetTime();
     statedef()->resetNSteps();
 	_updateLocal();
+
+    pEFDTControl.clearHistory();
     
     compTime = 0.0;
     syncTime = 0.0;
@@ -1293,9 +1438,6 @@ void smtos::TetOpSplitP::_runWithoutEField(double sim_endtime)
     
     double update_period = updPeriod;
     
-    
-    MPI_Request* requests = NULL;
-    
     // here we assume that all molecule counts have been updated so the rates are accurate
     while (statedef()->time() < sim_endtime and not aligned) {
         #ifdef MPI_DEBUG
@@ -1363,31 +1505,6 @@ void smtos::TetOpSplitP::_runWithoutEField(double sim_endtime)
         compTime += (endtime - starttime);
         starttime = MPI_Wtime();
         #endif
-
-        // wait until previous loop finishes sending diffusion data
-        if (requests != NULL) {
-            MPI_Waitall(nNeighbHosts, requests, MPI_STATUSES_IGNORE);
-            delete[] requests;
-        }
-        
-        // create new requests for this loop
-        requests = new MPI_Request[nNeighbHosts];
-#ifdef MPI_DEBUG
-        for (uint i = 0; i < nNeighbHosts; i++) {
-            CLOG(DEBUG, "mpi_debug") << "request address" << &(requests[i]) << "\n";
-        }
-        
-#endif
-        
-        for (auto neighbor : neighbHosts) {
-            remoteChanges[neighbor].clear();
-        }
-        
-        #ifdef MPI_PROFILING
-        endtime = MPI_Wtime();
-        idleTime += (endtime - starttime);
-        starttime = MPI_Wtime();
-        #endif
         
         // Track how many diffusion 'steps' we do, simply for bookkeeping
         uint nsteps=0;
@@ -1400,6 +1517,10 @@ void smtos::TetOpSplitP::_runWithoutEField(double sim_endtime)
         CLOG(DEBUG, "mpi_debug") << "Diffusion for period: " << update_period << "\n";
         #endif
         
+        pBinomPos.clear();
+        pBinomN.clear();
+        pBinomP.clear();
+
         for (uint pos = 0; pos < diffSep; pos++)
         {
             Diff* d = pDiffs[pos];
@@ -1447,9 +1568,26 @@ void smtos::TetOpSplitP::_runWithoutEField(double sim_endtime)
                 if (rand01 < n_frc) mean_n++;
             }
             
-            // Find the binomial n
-            uint nmolcs = rng()->getBinom(mean_n, t1);
-            
+            if (mean_n == 0) continue;
+
+            pBinomPos.push_back(pos);
+            pBinomN.push_back(mean_n);
+            pBinomP.push_back(t1);
+        }
+
+        // Find the binomial n for all candidate diffusions in one pass
+        uint nbinom = pBinomPos.size();
+        pBinomDraws.resize(nbinom);
+        if (nbinom != 0)
+        {
+            rng()->getBinomBatch(nbinom, &pBinomN[0], &pBinomP[0], &pBinomDraws[0]);
+        }
+
+        for (uint bi = 0; bi < nbinom; bi++)
+        {
+            Diff* d = pDiffs[pBinomPos[bi]];
+            uint nmolcs = pBinomDraws[bi];
+
             if (nmolcs == 0) continue;
             
             // we apply here
@@ -1479,6 +1617,10 @@ void smtos::TetOpSplitP::_runWithoutEField(double sim_endtime)
         
         // surface diffusion
         
+        pBinomPos.clear();
+        pBinomN.clear();
+        pBinomP.clear();
+
         for (uint pos = 0; pos < sdiffSep; pos++)
         {
             SDiff* d = pSDiffs[pos];
@@ -1526,9 +1668,26 @@ void smtos::TetOpSplitP::_runWithoutEField(double sim_endtime)
                 if (rand01 < n_frc) mean_n++;
             }
             
-            // Find the binomial n
-            uint nmolcs = rng()->getBinom(mean_n, t1);
-            
+            if (mean_n == 0) continue;
+
+            pBinomPos.push_back(pos);
+            pBinomN.push_back(mean_n);
+            pBinomP.push_back(t1);
+        }
+
+        // Find the binomial n for all candidate diffusions in one pass
+        nbinom = pBinomPos.size();
+        pBinomDraws.resize(nbinom);
+        if (nbinom != 0)
+        {
+            rng()->getBinomBatch(nbinom, &pBinomN[0], &pBinomP[0], &pBinomDraws[0]);
+        }
+
+        for (uint bi = 0; bi < nbinom; bi++)
+        {
+            SDiff* d = pSDiffs[pBinomPos[bi]];
+            uint nmolcs = pBinomDraws[bi];
+
             if (nmolcs == 0) continue;
             
             // we apply here
@@ -1560,7 +1719,7 @@ void smtos::TetOpSplitP::_runWithoutEField(double sim_endtime)
         compTime += (endtime - starttime);
         #endif
         
-        _remoteSyncAndUpdate(requests, applied_diffs, directions);
+        _remoteSyncAndUpdate(applied_diffs, directions);
         
         // *********************** Operator Split: SSA *********************************
         #ifdef MPI_PROFILING
@@ -1586,10 +1745,6 @@ void smtos::TetOpSplitP::_runWithoutEField(double sim_endtime)
         compTime += (endtime - starttime);
         #endif
     }
-    if (requests != NULL) {
-        MPI_Waitall(nNeighbHosts, requests, MPI_STATUSES_IGNORE);
-        delete[] requests;
-    }
     MPI_Barrier(MPI_COMM_WORLD);
 
 }
@@ -1611,45 +1766,132 @@ void smtos::TetOpSplitP::_runWithEField(double endtime)
     
     if (pEFTrisVStale) _refreshEFTrisV();
 
+    if (pEFOverlap) {
+        _runWithEFieldOverlap(endtime);
+        return;
+    }
+
     while (statedef()->time() < endtime) {
         double t0 = statedef()->time();
-        _runWithoutEField( std::min(t0+pEFDT, endtime));
+        _runWithoutEField( std::min(t0+pEFDTControl.dt(pEFDT), endtime));
         
-        // update host-local currents
-        int i_begin = EFTrisI_offset[myRank];
-        int i_end = i_begin + EFTrisI_count[myRank];
-
-        double sttime = statedef()->time();
-        for (int i = i_begin; i < i_end; ++i) {
-            int tlidx = EFTrisI_idx[i];
-            EFTrisI_permuted[i] = pEFTris_vec[tlidx]->computeI(EFTrisV[tlidx], sttime-t0, sttime);
-        }
+        _computeLocalEFTrisI(t0);
 
         MPI_Allgatherv(MPI_IN_PLACE, 0, MPI_DATATYPE_NULL,
                 &EFTrisI_permuted[0], &EFTrisI_count[0], &EFTrisI_offset[0], MPI_DOUBLE, MPI_COMM_WORLD);
 
-        if (myRank == 0) {
-            #ifdef SERIAL_EFIELD_DEBUG
-            CLOG(DEBUG, "steps_debug") << "Received currents: \n";
-            #endif
-            for (uint i = 0; i < pEFNTris; i++) {
-                #ifdef SERIAL_EFIELD_DEBUG
-                CLOG(DEBUG, "steps_debug") << "lid: " << EFTrisI_idx[i] << " cur: " << EFTrisI_permuted[i];
-                #endif
-            }
-        }
+        _advanceEField(statedef()->time()-t0);
+    }
+    MPI_Barrier(MPI_COMM_WORLD);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::_runWithEFieldOverlap(double endtime)
+{
+    // Step k of the pipeline gathers the currents of EField step k while
+    // the SSA and diffusion of step k+1 run on the potential of step k,
+    // then solves for the potential at the end of step k. Currents are
+    // always computed with the potential at the start of their own step,
+    // as in the blocking scheme.
 
-        for (uint i = 0; i < pEFNTris; i++)
-                pEField->setTriI(EFTrisI_idx[i], EFTrisI_permuted[i]);
+    double t0 = statedef()->time();
+    if (t0 >= endtime) {
+        MPI_Barrier(MPI_COMM_WORLD);
+        return;
+    }
+    _runWithoutEField(std::min(t0+pEFDTControl.dt(pEFDT), endtime));
+
+    while (true) {
+        double t1 = statedef()->time();
+        _computeLocalEFTrisI(t0);
+
+        MPI_Request request;
+        MPI_Iallgatherv(MPI_IN_PLACE, 0, MPI_DATATYPE_NULL,
+                &EFTrisI_permuted[0], &EFTrisI_count[0], &EFTrisI_offset[0], MPI_DOUBLE, MPI_COMM_WORLD,
+                &request);
+
+        // every rank sees the same times, so this decision is global
+        bool last = !(t1 < endtime);
+        if (!last) _runWithoutEField(std::min(t1+pEFDTControl.dt(pEFDT), endtime));
+
+        #ifdef MPI_PROFILING
+        double starttime = MPI_Wtime();
+        #endif
+
+        MPI_Wait(&request, MPI_STATUS_IGNORE);
+
+        #ifdef MPI_PROFILING
+        idleTime += (MPI_Wtime() - starttime);
+        #endif
 
-        pEField->advance(sttime-t0);
-        _refreshEFTrisV();
-        // TODO: Replace this with something that only resets voltage-dependent things
-        _updateLocal();
+        _advanceEField(t1-t0);
+        if (last) break;
+        t0 = t1;
     }
     MPI_Barrier(MPI_COMM_WORLD);
 }
 
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::_computeLocalEFTrisI(double t0)
+{
+    // update host-local currents
+    int i_begin = EFTrisI_offset[myRank];
+    int i_end = i_begin + EFTrisI_count[myRank];
+
+    double sttime = statedef()->time();
+    for (int i = i_begin; i < i_end; ++i) {
+        int tlidx = EFTrisI_idx[i];
+        EFTrisI_permuted[i] = pEFTris_vec[tlidx]->computeI(EFTrisV[tlidx], sttime-t0, sttime);
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::_advanceEField(double dt)
+{
+    #ifdef SERIAL_EFIELD_DEBUG
+    if (myRank == 0) {
+        CLOG(DEBUG, "steps_debug") << "Received currents: \n";
+        for (uint i = 0; i < pEFNTris; i++) {
+            CLOG(DEBUG, "steps_debug") << "lid: " << EFTrisI_idx[i] << " cur: " << EFTrisI_permuted[i];
+        }
+    }
+    #endif
+
+    for (uint i = 0; i < pEFNTris; i++)
+        EFTrisI[EFTrisI_idx[i]] = EFTrisI_permuted[i];
+    pEField->setTriIs(EFTrisI.data());
+
+    pEField->advance(dt);
+
+    if (pEFDTControl.adaptive()) {
+        // EFTrisV still holds the potential from before the step. Every
+        // rank solves the same system, but the step size must agree
+        // exactly, so the change is reduced over all ranks.
+        double max_dv = 0.0;
+        for (uint i = 0; i < pEFDTTris.size(); i++) {
+            uint tlidx = pEFDTTris[i];
+            max_dv = std::max(max_dv, std::fabs(pEField->getTriV(tlidx) - EFTrisV[tlidx]));
+        }
+        MPI_Allreduce(MPI_IN_PLACE, &max_dv, 1, MPI_DOUBLE, MPI_MAX, MPI_COMM_WORLD);
+        pEFDTControl.update(dt, max_dv);
+    }
+
+    _refreshEFTrisV();
+    _updateVDepKProcs();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::_updateVDepKProcs(void)
+{
+    // Only the membrane potential has changed since the last update,
+    // so every other rate is still current.
+    _updateLocal(pVDepKProcs);
+}
+
 ////////////////////////////////////////////////////////////////////////
 
 void smtos::TetOpSplitP::advance(double adv)
@@ -4688,6 +4930,32 @@ void smtos::TetOpSplitP::setEfieldDT(double efdt)
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void smtos::TetOpSplitP::setEfieldAdaptiveDT(bool adaptive, double dt_min, double dt_max, double dv_tol)
+{
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+    pEFDTControl.setAdaptive(adaptive, dt_min, dt_max, dv_tol, pEFDT);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::setEfieldOverlap(bool overlap)
+{
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+    pEFOverlap = overlap;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 double smtos::TetOpSplitP::_getTetV(uint tidx) const
 {
     if (efflag() != true)
@@ -5776,25 +6044,328 @@ void smtos::TetOpSplitP::getBatchTriCountsNP(unsigned int* indices, int input_si
 
 ////////////////////////////////////////////////////////////////////////////////
 
-double smtos::TetOpSplitP::sumBatchTetCountsNP(unsigned int* indices, int input_size, std::string const & s)
+void smtos::TetOpSplitP::getBatchTriVsNP(unsigned int* indices, int input_size, double* values, int output_size) const
 {
-    bool has_tet_warning = false;
-    bool has_spec_warning = false;
-    std::ostringstream tet_not_assign;
-    std::ostringstream spec_undefined;
-    
-    uint sgidx = statedef()->getSpecIdx(s);
-    double partial_sum = 0.0;
-    for (int t = 0; t < input_size; t++) {
-        uint tidx = indices[t];
-        
-        if (tidx >= pTets.size())
-        {
-            std::ostringstream os;
-            os << "Error (Index Overbound): There is no tetrahedron with index " << tidx << ".\n";
-            throw steps::ArgErr(os.str());
-        }
-        
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+
+    bool has_tri_warning = false;
+    std::ostringstream tri_not_assign;
+
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+
+        if (tidx >= mesh()->countTris())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+
+        int loctidx = pEFTri_GtoL[tidx];
+        if (loctidx == -1)
+        {
+            values[t] = 0.0;
+            tri_not_assign << tidx << " ";
+            has_tri_warning = true;
+            continue;
+        }
+
+        values[t] = EFTrisV[loctidx];
+    }
+
+    if (has_tri_warning) {
+        std::cerr << "Warning: The following triangles have not been assigned to a membrane, fill in zeros at target positions:\n";
+        std::cerr << tri_not_assign.str() << "\n";
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::getBatchVertVsNP(unsigned int* indices, int input_size, double* values, int output_size) const
+{
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+
+    bool has_vert_warning = false;
+    std::ostringstream vert_not_assign;
+
+    for (int v = 0; v < input_size; v++) {
+        uint vidx = indices[v];
+
+        if (vidx >= mesh()->countVertices())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no vertex with index " << vidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+
+        int locvidx = pEFVert_GtoL[vidx];
+        if (locvidx == -1)
+        {
+            values[v] = 0.0;
+            vert_not_assign << vidx << " ";
+            has_vert_warning = true;
+            continue;
+        }
+
+        values[v] = pEField->getVertV(locvidx);
+    }
+
+    if (has_vert_warning) {
+        std::cerr << "Warning: The following vertices have not been assigned to a conduction volume or membrane, fill in zeros at target positions:\n";
+        std::cerr << vert_not_assign.str() << "\n";
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::getBatchTriIsNP(unsigned int* indices, int input_size, double* values, int output_size) const
+{
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+
+    bool has_tri_warning = false;
+    std::ostringstream tri_not_assign;
+
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+
+        if (tidx >= mesh()->countTris())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+
+        int loctidx = pEFTri_GtoL[tidx];
+        if (loctidx == -1)
+        {
+            values[t] = 0.0;
+            tri_not_assign << tidx << " ";
+            has_tri_warning = true;
+            continue;
+        }
+
+        values[t] = pEField->getTriI(loctidx);
+    }
+
+    if (has_tri_warning) {
+        std::cerr << "Warning: The following triangles have not been assigned to a membrane, fill in zeros at target positions:\n";
+        std::cerr << tri_not_assign.str() << "\n";
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::getBatchTriOhmicIsNP(unsigned int* indices, int input_size, std::string const & oc, double* values, int output_size) const
+{
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+
+    // the following may raise exception if string is unknown
+    uint ocidx = statedef()->getOhmicCurrIdx(oc);
+
+    bool has_curr_warning = false;
+    std::ostringstream curr_undefined;
+
+    // Each rank fills in the currents of its own triangles, then a single
+    // reduction gathers them on all ranks.
+    std::vector<double> local_values(input_size, 0.0);
+
+    bool has_tri_warning = false;
+    std::ostringstream tri_not_assign;
+
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+
+        if (tidx >= mesh()->countTris())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+
+        int loctidx = pEFTri_GtoL[tidx];
+        if (loctidx == -1)
+        {
+            local_values[t] = 0.0;
+            tri_not_assign << tidx << " ";
+            has_tri_warning = true;
+            continue;
+        }
+
+        smtos::Tri * tri = pTris[tidx];
+        uint locidx = tri->patchdef()->ohmiccurrG2L(ocidx);
+        if (locidx == ssolver::LIDX_UNDEFINED)
+        {
+            local_values[t] = 0.0;
+            curr_undefined << tidx << " ";
+            has_curr_warning = true;
+            continue;
+        }
+
+        if (tri->getInHost()) {
+            local_values[t] = tri->getOhmicI(locidx, EFTrisV[loctidx], efdt());
+        }
+    }
+
+    if (has_tri_warning) {
+        std::cerr << "Warning: The following triangles have not been assigned to a membrane, fill in zeros at target positions:\n";
+        std::cerr << tri_not_assign.str() << "\n";
+    }
+
+    if (has_curr_warning) {
+        std::cerr << "Warning: Ohmic current " << oc << " has not been defined in the following triangles, fill in zeros at target positions:\n";
+        std::cerr << curr_undefined.str() << "\n";
+    }
+
+    MPI_Allreduce(local_values.data(), values, input_size, MPI_DOUBLE, MPI_SUM, MPI_COMM_WORLD);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::getBatchTriGHKIsNP(unsigned int* indices, int input_size, std::string const & ghk, double* values, int output_size) const
+{
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+
+    // the following may raise exception if string is unknown
+    uint ghkidx = statedef()->getGHKcurrIdx(ghk);
+
+    bool has_curr_warning = false;
+    std::ostringstream curr_undefined;
+
+    // Each rank fills in the currents of its own triangles, then a single
+    // reduction gathers them on all ranks.
+    std::vector<double> local_values(input_size, 0.0);
+
+    bool has_tri_warning = false;
+    std::ostringstream tri_not_assign;
+
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+
+        if (tidx >= mesh()->countTris())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+
+        int loctidx = pEFTri_GtoL[tidx];
+        if (loctidx == -1)
+        {
+            local_values[t] = 0.0;
+            tri_not_assign << tidx << " ";
+            has_tri_warning = true;
+            continue;
+        }
+
+        smtos::Tri * tri = pTris[tidx];
+        uint locidx = tri->patchdef()->ghkcurrG2L(ghkidx);
+        if (locidx == ssolver::LIDX_UNDEFINED)
+        {
+            local_values[t] = 0.0;
+            curr_undefined << tidx << " ";
+            has_curr_warning = true;
+            continue;
+        }
+
+        if (tri->getInHost()) {
+            local_values[t] = tri->getGHKI(locidx, efdt());
+        }
+    }
+
+    if (has_tri_warning) {
+        std::cerr << "Warning: The following triangles have not been assigned to a membrane, fill in zeros at target positions:\n";
+        std::cerr << tri_not_assign.str() << "\n";
+    }
+
+    if (has_curr_warning) {
+        std::cerr << "Warning: GHK current " << ghk << " has not been defined in the following triangles, fill in zeros at target positions:\n";
+        std::cerr << curr_undefined.str() << "\n";
+    }
+
+    MPI_Allreduce(local_values.data(), values, input_size, MPI_DOUBLE, MPI_SUM, MPI_COMM_WORLD);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double smtos::TetOpSplitP::sumBatchTetCountsNP(unsigned int* indices, int input_size, std::string const & s)
+{
+    bool has_tet_warning = false;
+    bool has_spec_warning = false;
+    std::ostringstream tet_not_assign;
+    std::ostringstream spec_undefined;
+    
+    uint sgidx = statedef()->getSpecIdx(s);
+    double partial_sum = 0.0;
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+        
+        if (tidx >= pTets.size())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no tetrahedron with index " << tidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+        
         if (pTets[tidx] == 0)
         {
             tet_not_assign << tidx << " ";
@@ -5986,209 +6557,287 @@ double smtos::TetOpSplitP::sumBatchTriOhmicIsNP(unsigned int* indices, int input
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void smtos::TetOpSplitP::_checkROICaches(void) const
+{
+    uint version = mesh()->_getROIVersion();
+    if (version == pROICacheVersion) return;
+
+    pROIPools.clear();
+    pROIMeasures.clear();
+    pROICacheVersion = version;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::_checkROIBounds(steps::tetmesh::ROISet const & roi) const
+{
+    // The mesh checks ROI indices when they are added, but the cached
+    // pools index the element tables directly, so check them once here.
+    for (uint idx: roi.indices) {
+        if (roi.type == steps::tetmesh::ELEM_TET && idx >= pTets.size()) {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no tetrahedron with index " << idx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+        if (roi.type == steps::tetmesh::ELEM_TRI && idx >= pTris.size()) {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no triangle with index " << idx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::vector<const uint *> const & smtos::TetOpSplitP::_getROIPools(std::string const & ROI_id,
+    std::string const & s, steps::tetmesh::ElementType type) const
+{
+    _checkROICaches();
+
+    auto key = std::make_pair(ROI_id, s);
+    auto it = pROIPools.find(key);
+    if (it != pROIPools.end()) {
+        if (type != steps::tetmesh::ELEM_UNDEFINED && it->second.type != type)
+            throw steps::ArgErr("Element type mismatch for ROI " + ROI_id + ".");
+        return it->second.counts;
+    }
+
+    const steps::tetmesh::ROISet & roi = mesh()->_getROI(ROI_id, type);
+    if (roi.type != steps::tetmesh::ELEM_TET && roi.type != steps::tetmesh::ELEM_TRI)
+        throw steps::ArgErr("ROI " + ROI_id + " is not a tetrahedron or triangle ROI.");
+    _checkROIBounds(roi);
+    uint sgidx = statedef()->getSpecIdx(s);
+
+    // Elements without the species, or hosted elsewhere, count as zero.
+    static const uint zero = 0;
+
+    ROIPools & pools = pROIPools[key];
+    pools.type = roi.type;
+    pools.counts.assign(roi.indices.size(), &zero);
+
+    std::ostringstream not_assigned;
+    std::ostringstream spec_undefined;
+    bool has_elem_warning = false;
+    bool has_spec_warning = false;
+
+    for (uint t = 0; t < roi.indices.size(); t++) {
+        uint idx = roi.indices[t];
+        const uint * elem_pools = nullptr;
+        uint slidx = ssolver::LIDX_UNDEFINED;
+        bool in_host = false;
+
+        if (roi.type == steps::tetmesh::ELEM_TET) {
+            smtos::Tet * tet = pTets[idx];
+            if (tet != nullptr) {
+                elem_pools = tet->pools();
+                slidx = tet->compdef()->specG2L(sgidx);
+                in_host = tet->getInHost();
+            }
+        }
+        else {
+            smtos::Tri * tri = pTris[idx];
+            if (tri != nullptr) {
+                elem_pools = tri->pools();
+                slidx = tri->patchdef()->specG2L(sgidx);
+                in_host = tri->getInHost();
+            }
+        }
+
+        if (elem_pools == nullptr) {
+            not_assigned << idx << " ";
+            has_elem_warning = true;
+        }
+        else if (slidx == ssolver::LIDX_UNDEFINED) {
+            spec_undefined << idx << " ";
+            has_spec_warning = true;
+        }
+        else if (in_host) pools.counts[t] = elem_pools + slidx;
+    }
+
+    const char * elems = roi.type == steps::tetmesh::ELEM_TET ? "tetrahedrons" : "triangles";
+    if (has_elem_warning) {
+        std::cerr << "Warning: The following " << elems << " have not been assigned to a "
+                  << (roi.type == steps::tetmesh::ELEM_TET ? "compartment" : "patch")
+                  << ", fill in zeros at target positions:\n";
+        std::cerr << not_assigned.str() << "\n";
+    }
+
+    if (has_spec_warning) {
+        std::cerr << "Warning: Species " << s << " has not been defined in the following " << elems
+                  << ", fill in zeros at target positions:\n";
+        std::cerr << spec_undefined.str() << "\n";
+    }
+
+    return pools.counts;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double smtos::TetOpSplitP::_getROIMeasure(std::string const & ROI_id, steps::tetmesh::ElementType type) const
+{
+    _checkROICaches();
+
+    auto it = pROIMeasures.find(ROI_id);
+    if (it != pROIMeasures.end() && it->second.first == type)
+        return it->second.second;
+
+    const steps::tetmesh::ROISet & roi = mesh()->_getROI(ROI_id, type);
+    _checkROIBounds(roi);
+
+    double sum = 0.0;
+    for (uint idx: roi.indices) {
+        if (type == steps::tetmesh::ELEM_TET) {
+            if (pTets[idx] == nullptr)
+                throw steps::ArgErr("Tetrahedron " + std::to_string(idx) + " has not been assigned to a compartment.");
+            sum += pTets[idx]->vol();
+        }
+        else {
+            if (pTris[idx] == nullptr)
+                throw steps::ArgErr("Triangle " + std::to_string(idx) + " has not been assigned to a patch.");
+            sum += pTris[idx]->area();
+        }
+    }
+
+    pROIMeasures[ROI_id] = std::make_pair(type, sum);
+    return sum;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 std::vector<double> smtos::TetOpSplitP::getROITetCounts(std::string ROI_id, std::string const & s) const
 {
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TET)) throw steps::ArgErr();
-    
-    uint *indices = mesh()->_getROIData(ROI_id);
-    int inputsize = mesh()->getROIDataSize(ROI_id);
-    std::vector<double> data(inputsize);
-    
-    getBatchTetCountsNP(indices, inputsize, s, const_cast<double*>(&data.front()), data.size());
+    std::vector<double> data(mesh()->_getROI(ROI_id, steps::tetmesh::ELEM_TET).indices.size());
+    getROITetCountsNP(ROI_id, s, data.data(), data.size());
     return data;
 }
 
 ////////////////////////////////////////////////////////////////////////////////
 
 std::vector<double> smtos::TetOpSplitP::getROITriCounts(std::string ROI_id, std::string const & s) const
+{
+    std::vector<double> data(mesh()->_getROI(ROI_id, steps::tetmesh::ELEM_TRI).indices.size());
+    getROITriCountsNP(ROI_id, s, data.data(), data.size());
+    return data;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::getROITetCountsNP(std::string ROI_id, std::string const & s, double* counts, int output_size) const
+{
+    auto const & pools = _getROIPools(ROI_id, s, steps::tetmesh::ELEM_TET);
+    if (output_size != pools.size())
+    {
+        std::ostringstream os;
+        os << "Error: output array (counts) size should be the same as the ROI size.\n";
+        throw steps::ArgErr(os.str());
+    }
+    std::vector<double> local_counts(output_size);
+    for (uint t = 0; t < pools.size(); t++) local_counts[t] = *pools[t];
+    MPI_Allreduce(local_counts.data(), counts, output_size, MPI_DOUBLE, MPI_MAX, MPI_COMM_WORLD);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::getROITriCountsNP(std::string ROI_id, std::string const & s, double* counts, int output_size) const
+{
+    auto const & pools = _getROIPools(ROI_id, s, steps::tetmesh::ELEM_TRI);
+    if (output_size != pools.size())
+    {
+        std::ostringstream os;
+        os << "Error: output array (counts) size should be the same as the ROI size.\n";
+        throw steps::ArgErr(os.str());
+    }
+    std::vector<double> local_counts(output_size);
+    for (uint t = 0; t < pools.size(); t++) local_counts[t] = *pools[t];
+    MPI_Allreduce(local_counts.data(), counts, output_size, MPI_DOUBLE, MPI_MAX, MPI_COMM_WORLD);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::getROITriVsNP(std::string ROI_id, double* values, int output_size) const
 {
     if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
-    
+
     uint *indices = mesh()->_getROIData(ROI_id);
     int inputsize = mesh()->getROIDataSize(ROI_id);
-    std::vector<double> data(inputsize);
-    
-    getBatchTriCountsNP(indices, inputsize, s, const_cast<double*>(&data.front()), data.size());
-    return data;
+
+    getBatchTriVsNP(indices, inputsize, values, output_size);
 }
 
 ////////////////////////////////////////////////////////////////////////////////
 
-void smtos::TetOpSplitP::getROITetCountsNP(std::string ROI_id, std::string const & s, double* counts, int output_size) const
+void smtos::TetOpSplitP::getROIVertVsNP(std::string ROI_id, double* values, int output_size) const
 {
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TET)) throw steps::ArgErr();
-    
+    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_VERTEX)) throw steps::ArgErr();
+
     uint *indices = mesh()->_getROIData(ROI_id);
     int inputsize = mesh()->getROIDataSize(ROI_id);
-    
-    getBatchTetCountsNP(indices, inputsize, s, counts, output_size);
+
+    getBatchVertVsNP(indices, inputsize, values, output_size);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::getROITriIsNP(std::string ROI_id, double* values, int output_size) const
+{
+    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
+
+    uint *indices = mesh()->_getROIData(ROI_id);
+    int inputsize = mesh()->getROIDataSize(ROI_id);
+
+    getBatchTriIsNP(indices, inputsize, values, output_size);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::getROITriOhmicIsNP(std::string ROI_id, std::string const & oc, double* values, int output_size) const
+{
+    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
+
+    uint *indices = mesh()->_getROIData(ROI_id);
+    int inputsize = mesh()->getROIDataSize(ROI_id);
+
+    getBatchTriOhmicIsNP(indices, inputsize, oc, values, output_size);
 }
 
 ////////////////////////////////////////////////////////////////////////////////
 
-void smtos::TetOpSplitP::getROITriCountsNP(std::string ROI_id, std::string const & s, double* counts, int output_size) const
+void smtos::TetOpSplitP::getROITriGHKIsNP(std::string ROI_id, std::string const & ghk, double* values, int output_size) const
 {
     if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
-    
+
     uint *indices = mesh()->_getROIData(ROI_id);
     int inputsize = mesh()->getROIDataSize(ROI_id);
-    
-    getBatchTriCountsNP(indices, inputsize, s, counts, output_size);
+
+    getBatchTriGHKIsNP(indices, inputsize, ghk, values, output_size);
 }
 
 ////////////////////////////////////////////////////////////////////////////////
 
 double smtos::TetOpSplitP::getROIVol(std::string ROI_id) const
 {
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TET)) throw steps::ArgErr();
-    
-    uint *indices = mesh()->_getROIData(ROI_id);
-    int datasize = mesh()->getROIDataSize(ROI_id);
-    
-    double sum = 0.0;
-    for (uint t = 0; t < datasize; t++) {
-        sum += pTets[indices[t]]->vol();
-    }
-    return sum;
+    return _getROIMeasure(ROI_id, steps::tetmesh::ELEM_TET);
 }
 
 ////////////////////////////////////////////////////////////////////////////////
 
 double smtos::TetOpSplitP::getROIArea(std::string ROI_id) const
 {
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
-    
-    uint *indices = mesh()->_getROIData(ROI_id);
-    int datasize = mesh()->getROIDataSize(ROI_id);
-    
-    double sum = 0.0;
-    for (uint t = 0; t < datasize; t++) {
-        sum += pTris[indices[t]]->area();
-    }
-    return sum;
+    return _getROIMeasure(ROI_id, steps::tetmesh::ELEM_TRI);
 }
 
 ////////////////////////////////////////////////////////////////////////////////
 
 double smtos::TetOpSplitP::getROICount(std::string ROI_id, std::string const & s) const
 {
-    steps::tetmesh::ElementType type = mesh()->getROIType(ROI_id);
-    
-    uint *indices = mesh()->_getROIData(ROI_id);
-    int datasize = mesh()->getROIDataSize(ROI_id);
+    // compute local sum for each process
     double local_sum = 0.0;
+    for (const uint * count: _getROIPools(ROI_id, s, steps::tetmesh::ELEM_UNDEFINED))
+        local_sum += *count;
+
+    // gather global sum
     double global_sum = 0.0;
-    
-    if (type == steps::tetmesh::ELEM_TRI) {
-        bool has_tri_warning = false;
-        bool has_spec_warning = false;
-        std::ostringstream tri_not_assign;
-        std::ostringstream spec_undefined;
-        
-        uint sgidx = statedef()->getSpecIdx(s);
-        
-        for (uint t = 0; t < datasize; t++) {
-            uint tidx = indices[t];
-            
-            if (tidx >= pTris.size())
-            {
-                std::ostringstream os;
-                os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
-                throw steps::ArgErr(os.str());
-            }
-            
-            if (pTris[tidx] == 0)
-            {
-                tri_not_assign << tidx << " ";
-                has_tri_warning = true;
-                continue;
-            }
-            
-            smtos::Tri * tri = pTris[tidx];
-            uint slidx = tri->patchdef()->specG2L(sgidx);
-            if (slidx == ssolver::LIDX_UNDEFINED)
-            {
-                spec_undefined << tidx << " ";
-                has_spec_warning = true;
-                continue;
-            }
-            
-            // compute local sum for each process
-            if (tri->getInHost()) local_sum += tri->pools()[slidx];
-        }
-        
-        // gather global sum
-        MPI_Allreduce(&local_sum, &global_sum, 1, MPI_DOUBLE, MPI_SUM,
-                      MPI_COMM_WORLD);
-        
-        if (has_tri_warning) {
-            std::cerr << "Warning: The following triangles have not been assigned to a patch, fill in zeros at target positions:\n";
-            std::cerr << tri_not_assign.str() << "\n";
-        }
-        
-        if (has_spec_warning) {
-            std::cerr << "Warning: Species " << s << " has not been defined in the following triangles, fill in zeros at target positions:\n";
-            std::cerr << spec_undefined.str() << "\n";
-        }
-    }
-    else if (type == steps::tetmesh::ELEM_TET) {
-        bool has_tet_warning = false;
-        bool has_spec_warning = false;
-        std::ostringstream tet_not_assign;
-        std::ostringstream spec_undefined;
-        
-        uint sgidx = statedef()->getSpecIdx(s);
-        
-        for (uint t = 0; t < datasize; t++) {
-            uint tidx = indices[t];
-            
-            if (tidx >= pTets.size())
-            {
-                std::ostringstream os;
-                os << "Error (Index Overbound): There is no tetrahedron with index " << tidx << ".\n";
-                throw steps::ArgErr(os.str());
-            }
-            
-            if (pTets[tidx] == 0)
-            {
-                tet_not_assign << tidx << " ";
-                has_tet_warning = true;
-                continue;
-            }
-            
-            smtos::Tet * tet = pTets[tidx];
-            uint slidx = tet->compdef()->specG2L(sgidx);
-            if (slidx == ssolver::LIDX_UNDEFINED)
-            {
-                spec_undefined << tidx << " ";
-                has_spec_warning = true;
-                continue;
-            }
-            
-            // compute local sum for each process
-            if (tet->getInHost()) local_sum += tet->pools()[slidx];
-        }
-        
-        // gather global sum
-        MPI_Allreduce(&local_sum, &global_sum, 1, MPI_DOUBLE, MPI_SUM,
-                      MPI_COMM_WORLD);
-        
-        if (has_tet_warning) {
-            std::cerr << "Warning: The following tetrahedrons have not been assigned to a compartment, fill in zeros at target positions:\n";
-            std::cerr << tet_not_assign.str() << "\n";
-        }
-        
-        if (has_spec_warning) {
-            std::cerr << "Warning: Species " << s << " has not been defined in the following tetrahedrons, fill in zeros at target positions:\n";
-            std::cerr << spec_undefined.str() << "\n";
-        }
-    }
-    else {
-        std::ostringstream os;
-        os << "Error: Cannot find suitable ROI for the function call getROICount.\n";
-        throw steps::ArgErr(os.str());
-    }
-    
+    MPI_Allreduce(&local_sum, &global_sum, 1, MPI_DOUBLE, MPI_SUM, MPI_COMM_WORLD);
     return global_sum;
 }
 
@@ -6540,8 +7189,12 @@ void smtos::TetOpSplitP::setROIConc(std::string ROI_id, std::string const & s, d
 
 double smtos::TetOpSplitP::getROIConc(std::string ROI_id, std::string const & s) const
 {
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TET)) throw steps::ArgErr();
-    double count = getROICount(ROI_id, s);
+    double local_count = 0.0;
+    for (const uint * c: _getROIPools(ROI_id, s, steps::tetmesh::ELEM_TET))
+        local_count += *c;
+
+    double count = 0.0;
+    MPI_Allreduce(&local_count, &count, 1, MPI_DOUBLE, MPI_SUM, MPI_COMM_WORLD);
     double vol = getROIVol(ROI_id);
     return count/ (1.0e3 * vol * steps::math::AVOGADRO);
 }
@@ -7577,33 +8230,148 @@ void smtos::TetOpSplitP::registerBoundaryTri(smtos::Tri* tri)
 
 ////////////////////////////////////////////////////////////////////////////////
 
-uint smtos::TetOpSplitP::registerRemoteMoleculeChange(int svol_host, uint loc, SubVolType svol_type, uint idx, uint slidx, uint change)
+uint smtos::TetOpSplitP::registerBoundarySlot(int svol_host, SubVolType svol_type, uint idx, uint slidx)
 {
-    uint new_loc = remoteChanges[svol_host].size();
+    int dest = hostToDest[svol_host];
+    assert(dest >= 0);
 
-    if (new_loc == 0 || new_loc - 4 < loc) {
-        remoteChanges[svol_host].push_back(svol_type);
-        remoteChanges[svol_host].push_back(idx);
-        remoteChanges[svol_host].push_back(slidx);
-        remoteChanges[svol_host].push_back(change);
-    }
-    else {
-        uint stored_type = remoteChanges[svol_host][loc];
-        uint stored_idx = remoteChanges[svol_host][loc + 1];
-        uint stored_slidx = remoteChanges[svol_host][loc + 2];
+    BoundarySlot slot = {static_cast<uint>(svol_type), idx, slidx};
+    sendSlots[dest].push_back(slot);
+    return sendSlots[dest].size() - 1;
+}
 
-        if (stored_type == svol_type && stored_idx ==idx && stored_slidx == slidx) {
-            remoteChanges[svol_host][loc + 3] += change;
-            new_loc = loc;
-        }
-        else {
-            remoteChanges[svol_host].push_back(svol_type);
-            remoteChanges[svol_host].push_back(idx);
-            remoteChanges[svol_host].push_back(slidx);
-            remoteChanges[svol_host].push_back(change);
-        }
-    }
-    return new_loc;
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::registerRemoteMoleculeChange(int svol_host, uint slot, uint change)
+{
+    int dest = hostToDest[svol_host];
+    assert(dest >= 0);
+    assert(slot < slotDeltas[dest].size());
+
+    uint & delta = slotDeltas[dest][slot];
+    if (delta == 0) changedSlots[dest].push_back(slot);
+    delta += change;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::_freeNeighbComm(void)
+{
+    if (neighbComm == NULL) return;
+
+    MPI_Comm * comm = static_cast<MPI_Comm*>(neighbComm);
+    // the communicator cannot be freed once MPI has been finalized
+    int finalized = 0;
+    MPI_Finalized(&finalized);
+    if (!finalized) MPI_Comm_free(comm);
+    delete comm;
+    neighbComm = NULL;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void smtos::TetOpSplitP::_setupNeighbComm(void)
+{
+    _freeNeighbComm();
+
+    // just in case
+    neighbHosts.erase(myRank);
+    nNeighbHosts = neighbHosts.size();
+
+    neighbDests.assign(neighbHosts.begin(), neighbHosts.end());
+    hostToDest.assign(nHosts, -1);
+    for (uint d = 0; d < nNeighbHosts; ++d) hostToDest[neighbDests[d]] = d;
+
+    // Assign the boundary slots, in index order of the boundary sub-volumes.
+    sendSlots.assign(nNeighbHosts, std::vector<BoundarySlot>());
+
+    std::vector<Tet*> btets(boundaryTets.begin(), boundaryTets.end());
+    std::sort(btets.begin(), btets.end(), [](Tet* a, Tet* b) { return a->idx() < b->idx(); });
+    for (auto tet : btets) tet->setupBufferLocations();
+
+    std::vector<Tri*> btris(boundaryTris.begin(), boundaryTris.end());
+    std::sort(btris.begin(), btris.end(), [](Tri* a, Tri* b) { return a->idx() < b->idx(); });
+    for (auto tri : btris) tri->setupBufferLocations();
+
+    // A rank only knows whom it sends changes to; find the ranks that send to it.
+    std::vector<int> sends_to(nHosts, 0), recvs_from(nHosts, 0);
+    for (auto dest : neighbDests) sends_to[dest] = 1;
+    MPI_Alltoall(sends_to.data(), 1, MPI_INT, recvs_from.data(), 1, MPI_INT, MPI_COMM_WORLD);
+
+    neighbSrcs.clear();
+    for (int h = 0; h < nHosts; ++h) {
+        if (recvs_from[h]) neighbSrcs.push_back(h);
+    }
+    uint nsrcs = neighbSrcs.size();
+
+    MPI_Comm * comm = new MPI_Comm;
+    MPI_Dist_graph_create_adjacent(MPI_COMM_WORLD,
+                                   nsrcs, neighbSrcs.data(), MPI_UNWEIGHTED,
+                                   nNeighbHosts, neighbDests.data(), MPI_UNWEIGHTED,
+                                   MPI_INFO_NULL, 0, comm);
+    neighbComm = comm;
+
+    // Exchange the slot lists once, so that changes can later be sent as
+    // (boundary index, delta) pairs.
+    changeSendCounts.assign(nNeighbHosts, 0);
+    changeSendDispls.assign(nNeighbHosts, 0);
+    changeRecvCounts.assign(nsrcs, 0);
+    changeRecvDispls.assign(nsrcs, 0);
+
+    std::vector<uint> slot_data;
+    for (uint d = 0; d < nNeighbHosts; ++d) {
+        changeSendDispls[d] = slot_data.size();
+        changeSendCounts[d] = 3 * sendSlots[d].size();
+        for (auto const & slot : sendSlots[d]) {
+            slot_data.push_back(slot.type);
+            slot_data.push_back(slot.idx);
+            slot_data.push_back(slot.slidx);
+        }
+    }
+    MPI_Neighbor_alltoall(changeSendCounts.data(), 1, MPI_INT,
+                          changeRecvCounts.data(), 1, MPI_INT, *comm);
+
+    uint recv_total = 0;
+    for (uint s = 0; s < nsrcs; ++s) {
+        changeRecvDispls[s] = recv_total;
+        recv_total += changeRecvCounts[s];
+    }
+    std::vector<uint> recv_slot_data(recv_total);
+    MPI_Neighbor_alltoallv(slot_data.data(), changeSendCounts.data(), changeSendDispls.data(), MPI_UNSIGNED,
+                           recv_slot_data.data(), changeRecvCounts.data(), changeRecvDispls.data(), MPI_UNSIGNED,
+                           *comm);
+
+    recvSlots.assign(nsrcs, std::vector<BoundarySlot>());
+    for (uint s = 0; s < nsrcs; ++s) {
+        uint nslots = changeRecvCounts[s] / 3;
+        recvSlots[s].resize(nslots);
+        for (uint i = 0; i < nslots; ++i) {
+            uint pos = changeRecvDispls[s] + 3 * i;
+            recvSlots[s][i].type = recv_slot_data[pos];
+            recvSlots[s][i].idx = recv_slot_data[pos + 1];
+            recvSlots[s][i].slidx = recv_slot_data[pos + 2];
+        }
+    }
+
+    // Fixed-size change buffers: at most one (index, delta) pair per slot.
+    slotDeltas.resize(nNeighbHosts);
+    changedSlots.resize(nNeighbHosts);
+    uint send_total = 0;
+    for (uint d = 0; d < nNeighbHosts; ++d) {
+        uint nslots = sendSlots[d].size();
+        slotDeltas[d].assign(nslots, 0);
+        changedSlots[d].clear();
+        changedSlots[d].reserve(nslots);
+        changeSendDispls[d] = send_total;
+        send_total += 2 * nslots;
+    }
+    recv_total = 0;
+    for (uint s = 0; s < nsrcs; ++s) {
+        changeRecvDispls[s] = recv_total;
+        recv_total += 2 * recvSlots[s].size();
+    }
+    changeSendBuf.assign(send_total, 0);
+    changeRecvBuf.assign(recv_total, 0);
 }
 
 ////////////////////////////////////////////////////////////////////////////////
@@ -7640,7 +8408,7 @@ void smtos::TetOpSplitP::registerSyncTri(smtos::Tri * tri)
 
 ////////////////////////////////////////////////////////////////////////////////
 
-void smtos::TetOpSplitP:: _remoteSyncAndUpdate(void* requests, std::vector<KProc*> & applied_diffs, std::vector<int> & directions)
+void smtos::TetOpSplitP:: _remoteSyncAndUpdate(std::vector<KProc*> & applied_diffs, std::vector<int> & directions)
 {
     #ifdef MPI_DEBUG
     CLOG(DEBUG, "mpi_debug") << "Start applying molecule changes.\n";
@@ -7649,119 +8417,99 @@ void smtos::TetOpSplitP:: _remoteSyncAndUpdate(void* requests, std::vector<KProc
     #ifdef MPI_PROFILING
     double starttime = MPI_Wtime();
     #endif
-    
-    #ifdef MPI_DEBUG
-    CLOG(DEBUG, "mpi_debug") << "change buffer:" << remoteChanges;
-    #endif
-    
-    MPI_Request* requestsPtr = static_cast<MPI_Request*>(requests);
-    
-    uint request_count = 0;
-    for (auto dest : neighbHosts) {
-#ifdef MPI_DEBUG
-        CLOG(DEBUG, "mpi_debug") << "request pointer:" << &(requestsPtr[request_count]);
-#endif
-        MPI_Isend(&remoteChanges[dest].front(), remoteChanges[dest].size(), MPI_UNSIGNED, dest, OPSPLIT_MOLECULE_CHANGE, MPI_COMM_WORLD, &(requestsPtr[request_count]));
-        request_count ++;
+
+    MPI_Comm comm = *static_cast<MPI_Comm*>(neighbComm);
+
+    // pack the accumulated changes as (boundary index, delta) pairs
+    for (uint d = 0; d < nNeighbHosts; ++d) {
+        uint * buf = &changeSendBuf[changeSendDispls[d]];
+        std::vector<uint> & deltas = slotDeltas[d];
+        uint npairs = 0;
+        for (auto slot : changedSlots[d]) {
+            buf[2 * npairs] = slot;
+            buf[2 * npairs + 1] = deltas[slot];
+            deltas[slot] = 0;
+            ++npairs;
+        }
+        changedSlots[d].clear();
+        changeSendCounts[d] = 2 * npairs;
     }
-    
-    uint remain_comfirm = nNeighbHosts;
-    MPI_Status status;
-    std::set<KProc*> upd_kprocs;
-    
-    std::set<int> await_neighbors(neighbHosts);
-    
+
+    MPI_Neighbor_alltoall(changeSendCounts.data(), 1, MPI_INT,
+                          changeRecvCounts.data(), 1, MPI_INT, comm);
+
+    MPI_Request request;
+    MPI_Ineighbor_alltoallv(changeSendBuf.data(), changeSendCounts.data(), changeSendDispls.data(), MPI_UNSIGNED,
+                            changeRecvBuf.data(), changeRecvCounts.data(), changeRecvDispls.data(), MPI_UNSIGNED,
+                            comm, &request);
+
     #ifdef MPI_PROFILING
     double endtime = MPI_Wtime();
     syncTime += (endtime - starttime);
+    starttime = MPI_Wtime();
     #endif
-    
-    while (!await_neighbors.empty()) {
-        #ifdef MPI_PROFILING
-        starttime = MPI_Wtime();
-        #endif
-        int flag = 0;
-        int data_source = 0;
-        for (auto neighbor : await_neighbors) {
-            MPI_Iprobe(neighbor, OPSPLIT_MOLECULE_CHANGE, MPI_COMM_WORLD, &flag, &status);
-            if (flag) {
-                data_source = neighbor;
-                break;
-            }
+
+    // update local kprocs while the changes are in flight
+    uint napply = applied_diffs.size();
+    for (uint i = 0; i < napply; i++) {
+        KProc* kp = applied_diffs[i];
+        int direction = directions[i];
+
+        std::vector<smtos::KProc*> const & local_upd = kp->getLocalUpdVec(direction);
+
+        for (auto & upd_kp : local_upd) {
+            _updateElement(upd_kp);
         }
-        #ifdef MPI_PROFILING
-        endtime = MPI_Wtime();
-        idleTime += (endtime - starttime);
-        #endif
-        if (!flag) continue;
+    }
 
-        #ifdef MPI_PROFILING
-        starttime = MPI_Wtime();
-        #endif
-        // receive data
-        int change_size = 0;
-        MPI_Get_count(&status, MPI_UNSIGNED, &change_size);
-        std::vector<uint> changes(change_size);
-        MPI_Recv(&changes.front(), change_size, MPI_UNSIGNED, status.MPI_SOURCE, OPSPLIT_MOLECULE_CHANGE, MPI_COMM_WORLD, MPI_STATUS_IGNORE);
+    #ifdef MPI_PROFILING
+    endtime = MPI_Wtime();
+    compTime += (endtime - starttime);
+    starttime = MPI_Wtime();
+    #endif
+
+    MPI_Wait(&request, MPI_STATUS_IGNORE);
+
+    #ifdef MPI_PROFILING
+    endtime = MPI_Wtime();
+    idleTime += (endtime - starttime);
+    starttime = MPI_Wtime();
+    #endif
+
+    // apply changes
+    std::set<KProc*> upd_kprocs;
+    uint nsrcs = neighbSrcs.size();
+    for (uint s = 0; s < nsrcs; ++s) {
+        uint const * buf = &changeRecvBuf[changeRecvDispls[s]];
+        uint npairs = changeRecvCounts[s] / 2;
+        for (uint c = 0; c < npairs; c++) {
+            BoundarySlot const & slot = recvSlots[s][buf[2 * c]];
+            uint value = buf[2 * c + 1];
 
-        #ifdef MPI_DEBUG
-        CLOG(DEBUG, "mpi_debug") << "Recving change "<< changes << " from " << status.MPI_SOURCE << ".\n";
-        #endif
-        
-        // apply changes
-        uint nchanges = change_size / 4;
-        for (uint c = 0; c < nchanges; c++) {
-            uint type = changes[c * 4];
-            uint idx = changes[c * 4 + 1];
-            uint slidx = changes[c * 4 + 2];
-            uint value = changes[c * 4 + 3];
-            
             #ifdef MPI_DEBUG
-            CLOG(DEBUG, "mpi_debug") << "unpack: idx "<< idx << " slidx " << slidx << " value " << value << ".\n";
+            CLOG(DEBUG, "mpi_debug") << "unpack: idx "<< slot.idx << " slidx " << slot.slidx << " value " << value << ".\n";
             #endif
-            
-            if (type == SUB_WM) {
-                pWmVols[idx]->incCount(slidx, value);
+
+            if (slot.type == SUB_WM) {
+                pWmVols[slot.idx]->incCount(slot.slidx, value);
             }
-            if (type == SUB_TET) {
-                pTets[idx]->incCount(slidx, value);
-                std::vector<smtos::KProc*> const & remote_upd = pTets[idx]->getSpecUpdKProcs(slidx);
+            if (slot.type == SUB_TET) {
+                pTets[slot.idx]->incCount(slot.slidx, value);
+                std::vector<smtos::KProc*> const & remote_upd = pTets[slot.idx]->getSpecUpdKProcs(slot.slidx);
                 upd_kprocs.insert(remote_upd.begin(), remote_upd.end());
             }
-            if (type == SUB_TRI) {
-                pTris[idx]->incCount(slidx, value);
-                std::vector<smtos::KProc*> const & remote_upd = pTris[idx]->getSpecUpdKProcs(slidx);
+            if (slot.type == SUB_TRI) {
+                pTris[slot.idx]->incCount(slot.slidx, value);
+                std::vector<smtos::KProc*> const & remote_upd = pTris[slot.idx]->getSpecUpdKProcs(slot.slidx);
                 upd_kprocs.insert(remote_upd.begin(), remote_upd.end());
             }
         }
-        
-        await_neighbors.erase(data_source);
-        #ifdef MPI_PROFILING
-        endtime = MPI_Wtime();
-        syncTime += (endtime - starttime);
-        #endif
     }
-    
-    #ifdef MPI_PROFILING
-    starttime = MPI_Wtime();
-    #endif
-    
+
     #ifdef MPI_DEBUG
     CLOG(DEBUG, "mpi_debug") << "Molecule changes have been applied.\n";
     #endif
-    
-    uint napply = applied_diffs.size();
-    for (uint i = 0; i < napply; i++) {
-        KProc* kp = applied_diffs[i];
-        int direction = directions[i];
 
-        std::vector<smtos::KProc*> const & local_upd = kp->getLocalUpdVec(direction);
-
-        for (auto & upd_kp : local_upd) {
-            _updateElement(upd_kp);
-        }
-    }
-    
     // update kprocs caused by remote molecule changes
     for (auto & upd_kp : upd_kprocs) {
         _updateElement(upd_kp);
@@ -7774,7 +8522,7 @@ void smtos::TetOpSplitP:: _remoteSyncAndUpdate(void* requests, std::vector<KProc
 
     #ifdef MPI_PROFILING
     endtime = MPI_Wtime();
-    compTime += (endtime - starttime);
+    syncTime += (endtime - starttime);
     #endif
 }
 
@@ -7788,6 +8536,8 @@ void smtos::TetOpSplitP::repartitionAndReset(std::vector<uint> const &tet_hosts,
     pDiffs.clear();
     pSDiffs.clear();
     neighbHosts.clear();
+    pROIPools.clear();
+    pROIMeasures.clear();
     boundaryTets.clear();
     boundaryTris.clear();
     
@@ -7840,28 +8590,14 @@ void smtos::TetOpSplitP::repartitionAndReset(std::vector<uint> const &tet_hosts,
     for (auto t: pTris)
     if (t && t->getInHost()) t->setupDeps();
 
-    for (auto tet : boundaryTets) {
-        tet->setupBufferLocations();
-    }
-    for (auto tri : boundaryTris) {
-        tri->setupBufferLocations();
-    }
-    
     if (efflag() == true) {
         std::ostringstream os;
         os << "Repartition of EField is not implemented:\n";
         throw steps::ArgErr(os.str());
     }
-    
-    neighbHosts.erase(myRank);
-    nNeighbHosts = neighbHosts.size();
-    
-    // construct remote molecule change buffers
-    remoteChanges.clear();
-    for (auto neighbor : neighbHosts) {
-        remoteChanges[neighbor] = std::vector<uint> ();
-    }
-    
+
+    _setupNeighbComm();
+
     nEntries = pKProcs.size();
     diffSep=pDiffs.size();
     sdiffSep=pSDiffs.size();
@@ -38,6 +38,7 @@
 #include <fstream>
 #include <memory>
 #include <random>
+#include <cstdint>
 
 // STEPS headers.
 #include "steps/common.h"
@@ -55,6 +56,7 @@
 
 
 #include "steps/solver/efield/efield.hpp"
+#include "steps/solver/efield/dtcontrol.hpp"
 
 ////////////////////////////////////////////////////////////////////////////////
 
@@ -89,6 +91,39 @@ enum SubVolType {SUB_WM, SUB_TET, SUB_TRI};
 
 ////////////////////////////////////////////////////////////////////////////////
 
+/// Fixed-size header of a parallel checkpoint file.
+///
+/// The header is followed by the partition table of the writing ranks
+/// (offset, size and number of records of each rank block, relative to
+/// the start of the rank blocks), the global section and the rank blocks.
+///
+struct PCPHeader
+{
+    char                                        magic[8];
+    uint32_t                                    version;
+    uint32_t                                    nhosts;
+    uint32_t                                    ntets;
+    uint32_t                                    ntris;
+    uint32_t                                    nwmvols;
+    uint32_t                                    efield;
+    uint64_t                                    global_size;
+};
+
+/// Header of an element record in a rank block of a parallel checkpoint file.
+/// The record payload holds the checkpoint data of the element followed by
+/// that of each of its KProcs.
+///
+struct PCPRecord
+{
+    uint32_t                                    type;
+    uint32_t                                    idx;
+    uint32_t                                    nkprocs;
+    uint32_t                                    reserved;
+    uint64_t                                    nbytes;
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
 class TetOpSplitP: public steps::solver::API
 {
 public:
@@ -124,8 +159,22 @@ public:
 
     void setEfieldDT(double efdt);
 
+    /// EField dt of the last step, which is pEFDT unless adaptive time
+    /// stepping is enabled.
     inline double efdt(void) const
-    { return pEFDT; }
+    { return pEFDTControl.lastDT(pEFDT); }
+
+    void setEfieldAdaptiveDT(bool adaptive, double dt_min = 1.0e-6,
+                             double dt_max = 1.0e-4, double dv_tol = 1.0e-4);
+
+    inline bool getEfieldAdaptiveDT(void) const
+    { return pEFDTControl.adaptive(); }
+
+    inline std::vector<double> getEfieldDTHistory(void) const
+    { return pEFDTControl.history(); }
+
+    inline void clearEfieldDTHistory(void)
+    { pEFDTControl.clearHistory(); }
 
     void setTemp(double t);
 
@@ -135,6 +184,15 @@ public:
     // save the optimal vertex indexing
     void saveMembOpt(std::string const & opt_file_name);
 
+    // If true, gather the membrane currents of an EField step with a
+    // non-blocking collective and run the SSA and diffusion of the
+    // next step while it is in flight. Voltage-dependent processes then
+    // see the membrane potential one EField step late.
+    void setEfieldOverlap(bool overlap);
+
+    inline bool getEfieldOverlap(void) const
+    { return pEFOverlap; }
+
     ////////////////////////////////////////////////////////////////////////
 
     ////////////////////////////////////////////////////////////////////////
@@ -426,9 +484,21 @@ public:
 
     void _runWithoutEField(double endtime);
     void _runWithEField(double endtime);
+    void _runWithEFieldOverlap(double endtime);
     //void _build(void);
     void _refreshEFTrisV();
 
+    // Compute the currents of the locally hosted membrane triangles over
+    // the EField step that started at t0 into EFTrisI_permuted.
+    void _computeLocalEFTrisI(double t0);
+
+    // Apply the gathered currents, advance the EField by dt and update
+    // the processes whose rates depend on the new potential.
+    void _advanceEField(double dt);
+
+    // Update the rates of the local voltage-dependent kprocs.
+    void _updateVDepKProcs(void);
+
     double _getRate(uint i) const
     { return pKProcs[i]->rate(); }
 
@@ -477,6 +547,16 @@ public:
     void getBatchTetCountsNP(unsigned int* indices, int input_size, std::string const & s, double* counts, int output_size) const;
     
     void getBatchTriCountsNP(unsigned int* indices, int input_size, std::string const & s, double* counts, int output_size) const;
+
+    void getBatchTriVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    void getBatchVertVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    void getBatchTriIsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    void getBatchTriOhmicIsNP(unsigned int* indices, int input_size, std::string const & oc, double* values, int output_size) const;
+
+    void getBatchTriGHKIsNP(unsigned int* indices, int input_size, std::string const & ghk, double* values, int output_size) const;
     
     double sumBatchTetCountsNP(unsigned int* indices, int input_size, std::string const & s);
     
@@ -502,6 +582,16 @@ public:
     /// Get species counts of a list of triangles
     void getROITriCountsNP(std::string ROI_id, std::string const & s, double* counts, int output_size) const;
 
+    void getROITriVsNP(std::string ROI_id, double* values, int output_size) const;
+
+    void getROIVertVsNP(std::string ROI_id, double* values, int output_size) const;
+
+    void getROITriIsNP(std::string ROI_id, double* values, int output_size) const;
+
+    void getROITriOhmicIsNP(std::string ROI_id, std::string const & oc, double* values, int output_size) const;
+
+    void getROITriGHKIsNP(std::string ROI_id, std::string const & ghk, double* values, int output_size) const;
+
      double getROIVol(std::string ROI_id) const;
     double getROIArea(std::string ROI_id) const;
     
@@ -547,7 +637,11 @@ public:
     void addNeighHost(int host);
     void registerBoundaryTet(steps::mpi::tetopsplit::Tet *tet);
     void registerBoundaryTri(steps::mpi::tetopsplit::Tri *tri);
-    uint registerRemoteMoleculeChange(int svol_host, uint loc, SubVolType svol_type, uint idx, uint slidx, uint change);
+    /// Register species slidx of remote sub-volume idx as a boundary slot in
+    /// the change buffer to svol_host; returns the boundary index of the slot.
+    uint registerBoundarySlot(int svol_host, SubVolType svol_type, uint idx, uint slidx);
+    /// Accumulate a molecule change for boundary slot slot of svol_host.
+    void registerRemoteMoleculeChange(int svol_host, uint slot, uint change);
     
     double getReacExtent(bool local = false);
     double getDiffExtent(bool local = false);
@@ -565,6 +659,30 @@ public:
     
 private:
 
+    ////////////////////////////////////////////////////////////////////////
+    // ROI DATA CACHES
+    ////////////////////////////////////////////////////////////////////////
+
+    /// Return the count of species s in each element of ROI ROI_id hosted
+    /// by this process. The list is resolved and checked on first use and
+    /// cached until the ROIs of the mesh change or the mesh is
+    /// repartitioned. Other elements point to a zero count.
+    ///
+    /// \param type Required element type of the ROI, or ELEM_UNDEFINED to
+    ///             accept tetrahedron and triangle ROIs.
+    std::vector<const uint *> const & _getROIPools(std::string const & ROI_id,
+        std::string const & s, steps::tetmesh::ElementType type) const;
+
+    /// Return the total volume of a tetrahedron ROI or area of a triangle
+    /// ROI, cached like _getROIPools.
+    double _getROIMeasure(std::string const & ROI_id, steps::tetmesh::ElementType type) const;
+
+    /// Discard the ROI caches if the ROIs of the mesh have changed.
+    void _checkROICaches(void) const;
+
+    /// Throw if an index of a tetrahedron or triangle ROI is out of range.
+    void _checkROIBounds(steps::tetmesh::ROISet const & roi) const;
+
     ////////////////////////////////////////////////////////////////////////
 
     steps::tetmesh::Tetmesh *                    pMesh;
@@ -609,6 +727,14 @@ private:
     // separator for non-zero and zero propensity diffusions
     uint                                        sdiffSep;
 
+    // Scratch arrays for the batched binomial draws of the diffusion
+    // step: index into pDiffs/pSDiffs, trial count, probability and draw.
+    // Kept as members so that the per-period loop does not reallocate.
+    std::vector<uint>                           pBinomPos;
+    std::vector<uint>                           pBinomN;
+    std::vector<double>                         pBinomP;
+    std::vector<uint>                           pBinomDraws;
+
     ////////////////////////////////////////////////////////////////////////
     // CR SSA Kernel Data and Methods
     ////////////////////////////////////////////////////////////////////////
@@ -674,6 +800,10 @@ private:
     // Translate from permuted vector of triangle currents to local EFTri indices.
     std::vector<int>                            EFTrisI_idx;
 
+    // Gathered triangle currents by local EFTri index, passed to the
+    // EField object in one call.
+    std::vector<double>                         EFTrisI;
+
     // Per-rank counts of EFTris.
     std::vector<int>                            EFTrisI_count;
 
@@ -700,6 +830,32 @@ private:
     // True if our copy of tri voltages from EField solver is out of date.
     bool                                        pEFTrisVStale;
 
+    // Local kprocs with voltage-dependent rates: VDepTrans, VDepSReac and
+    // GHKcurr of hosted membrane triangles.
+    std::vector<steps::mpi::tetopsplit::KProc *> pVDepKProcs;
+
+    // Whether to overlap the current gather with the next EField step.
+    bool                                        pEFOverlap;
+
+    // Adaptive time stepping, and the EField local indices of the
+    // triangles with voltage-dependent processes it monitors.
+    steps::solver::efield::DtControl            pEFDTControl;
+    std::vector<uint>                           pEFDTTris;
+
+    ////////////////////////////////////////////////////////////////////////
+
+    // Per (ROI, species) count pointers and per ROI volume or area, with
+    // the ROI type they were resolved for, and the mesh ROI version they
+    // are valid for. Elements hosted by other processes point to a zero
+    // count.
+    struct ROIPools {
+        steps::tetmesh::ElementType            type;
+        std::vector<const uint *>              counts;
+    };
+    mutable std::map<std::pair<std::string, std::string>, ROIPools> pROIPools;
+    mutable std::map<std::string, std::pair<steps::tetmesh::ElementType, double>> pROIMeasures;
+    mutable uint                               pROICacheVersion;
+
     
     ////////////////////////// MPI STUFFS ////////////////////////////
     
@@ -723,9 +879,57 @@ private:
     std::set<steps::mpi::tetopsplit::Tet *>     boundaryTets;
     std::set<steps::mpi::tetopsplit::Tri *>     boundaryTris;
     
-    std::map<int, std::vector<uint> >           remoteChanges;
-    
-    void _remoteSyncAndUpdate(void* requests, std::vector<KProc*> & applied_diffs, std::vector<int> & directions);
+    // Neighbour exchange of molecule changes caused by diffusion across
+    // partition boundaries. Every (remote sub-volume, species) pair that local
+    // diffusion can change is a boundary slot of the sub-volume's host; the
+    // slot lists are exchanged once in _setupNeighbComm() so that changes are
+    // sent as (boundary index, delta) pairs over a neighbourhood communicator
+    // with preallocated buffers.
+    struct BoundarySlot
+    {
+        uint                                    type;
+        uint                                    idx;
+        uint                                    slidx;
+    };
+
+    // MPI_Comm with the neighbourhood topology, allocated in _setupNeighbComm().
+    void                                      * neighbComm;
+    std::vector<int>                            neighbDests;
+    std::vector<int>                            neighbSrcs;
+    // Index into neighbDests of each rank, or -1.
+    std::vector<int>                            hostToDest;
+    // Boundary slots this rank sends to / receives from each neighbour.
+    std::vector<std::vector<BoundarySlot> >     sendSlots;
+    std::vector<std::vector<BoundarySlot> >     recvSlots;
+    // Accumulated change of each send slot, and the slots changed this period.
+    std::vector<std::vector<uint> >             slotDeltas;
+    std::vector<std::vector<uint> >             changedSlots;
+    std::vector<uint>                           changeSendBuf;
+    std::vector<uint>                           changeRecvBuf;
+    std::vector<int>                            changeSendCounts;
+    std::vector<int>                            changeSendDispls;
+    std::vector<int>                            changeRecvCounts;
+    std::vector<int>                            changeRecvDispls;
+
+    void _setupNeighbComm(void);
+    void _freeNeighbComm(void);
+
+    void _remoteSyncAndUpdate(std::vector<KProc*> & applied_diffs, std::vector<int> & directions);
+
+    ////////////////////////// PARALLEL CHECKPOINT ////////////////////////////
+
+    template <typename Element>
+    void _checkpointElement(std::fstream & cp_file, SubVolType type, uint idx,
+                            Element * elem, std::vector<KProc*> const & kprocs);
+
+    template <typename Element>
+    void _restoreElement(std::fstream & cp_file, PCPRecord const & rec,
+                         Element * elem, std::vector<KProc*> const & kprocs);
+
+    // Collective MPI-IO read or write of size bytes at offset; file_handle
+    // points to an MPI_File.
+    void _collectiveFileIO(void * file_handle, uint64_t offset, char * data,
+                           uint64_t size, bool write);
     
     //void _applyRemoteMoleculeChanges(std::vector<MPI_Request> & requests);
     //void _syncPoolCounts(void);
@@ -600,7 +600,7 @@ void smtos::Tri::incCount(uint lidx, int inc, double period)
             os << "Fail because molecule change of receiving end should always be non-negative.\n";
             throw steps::ProgErr(os.str());
         }
-        bufferLocations[lidx] = pSol->registerRemoteMoleculeChange(hostRank, bufferLocations[lidx], SUB_TRI, pIdx, lidx, inc);
+        pSol->registerRemoteMoleculeChange(hostRank, bufferLocations[lidx], inc);
     }
     // local change by reac or diff
     else {
@@ -892,7 +892,10 @@ void smtos::Tri::repartition(smtos::TetOpSplitP * tex, int rank, int host_rank)
 void smtos::Tri::setupBufferLocations(void)
 {
     uint nspecs = pPatchdef->countSpecs();
-    bufferLocations.assign(nspecs, std::numeric_limits<uint>::max());
+    bufferLocations.resize(nspecs);
+    for (uint lidx = 0; lidx < nspecs; ++lidx) {
+        bufferLocations[lidx] = pSol->registerBoundarySlot(hostRank, SUB_TRI, pIdx, lidx);
+    }
 }
 
 
@@ -348,6 +348,7 @@ private:
     /// Structure to store time since last update, used to calculate occupancy
     double 							  *	pLastUpdate;
     
+    /// boundary slot of each species in the solver's change buffer to the host
     std::vector<uint>                   bufferLocations;
     std::vector<std::vector<smtos::KProc *>> localSpecUpdKProcs;
     
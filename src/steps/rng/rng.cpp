@@ -30,7 +30,6 @@
 #include <cmath>
 #include <string>
 #include <iostream>
-#include <random>
 
 // STEPS headers.
 #include "steps/common.h"
@@ -458,10 +457,195 @@ double RNG::getExp(double lambda)
 }
 
 
+////////////////////////////////////////////////////////////////////////////////
+
+// Below this value of t*min(p,1-p) sequential inversion is cheaper than
+// the setup of the BTPE hat function.
+static const double BINOM_INVERSION_LIMIT = 30.0;
+
 uint RNG::getBinom(uint t, double p)
 {
-    std::binomial_distribution<uint> distribution(t, p);
-    return distribution(*this);
+    if (t == 0 || p <= 0.0) return 0;
+    if (p >= 1.0) return t;
+
+    if (p <= 0.5)
+    {
+        if (t * p < BINOM_INVERSION_LIMIT) return _binomInversion(t, p);
+        return _binomBTPE(t, p);
+    }
+    else
+    {
+        double q = 1.0 - p;
+        if (t * q < BINOM_INVERSION_LIMIT) return t - _binomInversion(t, q);
+        return t - _binomBTPE(t, q);
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void RNG::getBinomBatch(uint n, uint const * t, double const * p, uint * out)
+{
+    for (uint i = 0; i < n; ++i)
+    {
+        out[i] = getBinom(t[i], p[i]);
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+// Sequential search of the inverse CDF, starting from P(X=0) = q^t.
+// Only used for p <= 0.5 and t*p < BINOM_INVERSION_LIMIT, so q^t
+// cannot underflow.
+uint RNG::_binomInversion(uint t, double p)
+{
+    double q = 1.0 - p;
+    double qn = exp(t * log(q));
+    double g = p / q;
+    double tp = t * p;
+    double bound = smath::min(static_cast<double>(t), tp + 10.0 * sqrt(tp * q + 1.0));
+
+    uint x = 0;
+    double px = qn;
+    double u = getUnfEE();
+
+    while (u > px)
+    {
+        ++x;
+        if (x > bound)
+        {
+            // Ran off the numerically relevant tail: restart.
+            x = 0;
+            px = qn;
+            u = getUnfEE();
+        }
+        else
+        {
+            u -= px;
+            px *= ((t - x + 1) * g) / x;
+        }
+    }
+    return x;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+// FOR DETAILS SEE:
+//     KACHITVICHYANUKUL, V. AND SCHMEISER, B.W.
+//     BINOMIAL RANDOM VARIATE GENERATION.
+//     COMMUN. ACM, 31,2 (FEB. 1988), 216 - 222.
+//
+// ALGORITHM BTPE (TRIANGLE, PARALLELOGRAM, EXPONENTIAL TAILS), ONLY
+// USED FOR p <= 0.5; THE CALLER APPLIES THE SYMMETRY FOR p > 0.5.
+uint RNG::_binomBTPE(uint t, double p)
+{
+    double n = static_cast<double>(t);
+    double r = p;
+    double q = 1.0 - r;
+
+    // SETUP
+    double fm = n * r + r;
+    double m = floor(fm);
+    double nrq = n * r * q;
+    double p1 = floor(2.195 * sqrt(nrq) - 4.6 * q) + 0.5;
+    double xm = m + 0.5;
+    double xl = xm - p1;
+    double xr = xm + p1;
+    double c = 0.134 + 20.5 / (15.3 + m);
+    double a = (fm - xl) / (fm - xl * r);
+    double laml = a * (1.0 + a / 2.0);
+    a = (xr - fm) / (xr * q);
+    double lamr = a * (1.0 + a / 2.0);
+    double p2 = p1 * (1.0 + 2.0 * c);
+    double p3 = p2 + c / laml;
+    double p4 = p3 + c / lamr;
+
+    double u, v, x, y, k;
+
+S10:
+    // STEP 1. TRIANGULAR REGION, IMMEDIATE ACCEPTANCE.
+    u = getUnfEE() * p4;
+    v = getUnfEE();
+    if (u <= p1)
+    {
+        y = floor(xm - p1 * v + u);
+        goto S60;
+    }
+
+    // STEP 2. PARALLELOGRAM REGION.
+    if (u <= p2)
+    {
+        x = xl + (u - p1) / c;
+        v = v * c + 1.0 - fabs(m - x + 0.5) / p1;
+        if (v > 1.0) goto S10;
+        y = floor(x);
+        goto S50;
+    }
+
+    // STEP 3/4. LEFT AND RIGHT EXPONENTIAL TAILS.
+    if (u <= p3)
+    {
+        y = floor(xl + log(v) / laml);
+        if (y < 0.0) goto S10;
+        v = v * (u - p2) * laml;
+    }
+    else
+    {
+        y = floor(xr - log(v) / lamr);
+        if (y > n) goto S10;
+        v = v * (u - p3) * lamr;
+    }
+
+S50:
+    // STEP 5.0. ACCEPTANCE/REJECTION COMPARISON.
+    k = fabs(y - m);
+    if (k > 20.0 && k < (nrq / 2.0 - 1.0)) goto S52;
+
+    // STEP 5.1. EXPLICIT EVALUATION OF f(y)/f(M) BY RECURSION.
+    {
+        double s = r / q;
+        double aa = s * (n + 1.0);
+        double f = 1.0;
+        if (m < y)
+        {
+            for (double i = m + 1.0; i <= y; i += 1.0) f *= (aa / i - s);
+        }
+        else if (m > y)
+        {
+            for (double i = y + 1.0; i <= m; i += 1.0) f /= (aa / i - s);
+        }
+        if (v > f) goto S10;
+        goto S60;
+    }
+
+S52:
+    // STEP 5.2. SQUEEZING USING UPPER AND LOWER BOUNDS ON log(f(y)).
+    {
+        double rho = (k / nrq) * ((k * (k / 3.0 + 0.625) + 0.1666666666666) / nrq + 0.5);
+        double tt = -k * k / (2.0 * nrq);
+        double alv = log(v);
+        if (alv < tt - rho) goto S60;
+        if (alv > tt + rho) goto S10;
+
+        // STEP 5.3. FINAL ACCEPTANCE/REJECTION TEST (STIRLING'S FORMULA).
+        double x1 = y + 1.0;
+        double f1 = m + 1.0;
+        double z = n + 1.0 - m;
+        double w = n - y + 1.0;
+        double x2 = x1 * x1;
+        double f2 = f1 * f1;
+        double z2 = z * z;
+        double w2 = w * w;
+        double bound = xm * log(f1 / x1) + (n - m + 0.5) * log(z / w)
+            + (y - m) * log(w * r / (x1 * q))
+            + (13860.0 - (462.0 - (132.0 - (99.0 - 140.0 / f2) / f2) / f2) / f2) / f1 / 166320.0
+            + (13860.0 - (462.0 - (132.0 - (99.0 - 140.0 / z2) / z2) / z2) / z2) / z / 166320.0
+            + (13860.0 - (462.0 - (132.0 - (99.0 - 140.0 / x2) / x2) / x2) / x2) / x1 / 166320.0
+            + (13860.0 - (462.0 - (132.0 - (99.0 - 140.0 / w2) / w2) / w2) / w2) / w / 166320.0;
+        if (alv > bound) goto S10;
+    }
+
+S60:
+    return static_cast<uint>(y);
 }
 
 ////////////////////////////////////////////////////////////////////////////////
@@ -125,8 +125,17 @@ public:
 
     /// Get a binomially distributed number with parameters t and p.
     ///
+    /// Uses inversion when t*min(p,1-p) is small and the BTPE
+    /// acceptance/rejection algorithm otherwise. Uniform deviates are
+    /// drawn directly from the buffer, with no per-call object setup.
+    ///
     uint getBinom(uint t, double p);
 
+    /// Fill out[0..n) with binomially distributed numbers, the i-th one
+    /// drawn with parameters t[i] and p[i].
+    ///
+    void getBinomBatch(uint n, uint const * t, double const * p, uint * out);
+
 protected:
 
     uint                      * rBuffer;
@@ -143,6 +152,12 @@ protected:
 
 private:
 
+    /// Binomial sampling by sequential search (for small t*p, p <= 0.5).
+    uint _binomInversion(uint t, double p);
+
+    /// Binomial sampling by the BTPE algorithm (for large t*p, p <= 0.5).
+    uint _binomBTPE(uint t, double p);
+
     bool                        pInitialized;
 
 };
@@ -32,6 +32,7 @@
 // STL headers.
 #include <string>
 #include <limits> 
+#include <vector>
 
 // STEPS headers.
 #include "steps/common.h"
@@ -70,6 +71,8 @@ public:
         EF_DEFAULT = 1, // must be one for API compatibility
         EF_DV_BDSYS,
         EF_DV_SLUSYS,
+        EF_DV_PCG,
+        EF_DV_BDSYS_LAPACK,
     };
 
     /// Constructor
@@ -138,6 +141,29 @@ public:
     /// \ param dt EField DT
     virtual void setEfieldDT(double efdt);
 
+    /// Enable or disable adaptive EField time stepping.
+    ///
+    /// \param adaptive Whether the EField dt adapts to the rate of change
+    ///                 of the membrane potential.
+    /// \param dt_min   Smallest EField dt.
+    /// \param dt_max   Largest EField dt.
+    /// \param dv_tol   Target of the largest change in potential (V) per
+    ///                 EField step at triangles with voltage-dependent
+    ///                 processes.
+    virtual void setEfieldAdaptiveDT(bool adaptive, double dt_min = 1.0e-6,
+                                     double dt_max = 1.0e-4, double dv_tol = 1.0e-4);
+
+    /// Enable or disable semi-implicit coupling of membrane currents.
+    ///
+    /// \param implicit Whether the ohmic and GHK currents are linearised
+    ///                 around the potential at the start of each EField
+    ///                 step, with their conductance added to the EField
+    ///                 system, instead of being applied explicitly.
+    ///                 This keeps larger EField dts stable, but
+    ///                 voltage-dependent rates still see the potential
+    ///                 once per step, so the error grows with the dt.
+    virtual void setEfieldSemiImplicit(bool implicit);
+
     virtual void setNSteps(uint nsteps);
 
     virtual void setTime(double time);
@@ -162,6 +188,20 @@ public:
     /// \todo ask iain
     virtual double getEfieldDT(void) const;
 
+    /// Return whether adaptive EField time stepping is enabled.
+    virtual bool getEfieldAdaptiveDT(void) const;
+
+    /// Return whether membrane currents are coupled semi-implicitly.
+    virtual bool getEfieldSemiImplicit(void) const;
+
+    /// Return the dt of each EField step taken since adaptive time
+    /// stepping was enabled, or since the history was last cleared.
+    /// Only the last 100000 steps are kept.
+    virtual std::vector<double> getEfieldDTHistory(void) const;
+
+    /// Clear the EField dt history.
+    virtual void clearEfieldDTHistory(void);
+
     /// Return the simulation temperature
     virtual double getTemp(void) const;
 
@@ -1062,6 +1102,21 @@ public:
 
     /// Get species counts of a list of triangles
     virtual void getBatchTriCountsNP(unsigned int* indices, int input_size, std::string const & s, double* counts, int output_size) const;
+
+    /// Get membrane potentials of a list of triangles
+    virtual void getBatchTriVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    /// Get potentials of a list of vertices
+    virtual void getBatchVertVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    /// Get total membrane currents of a list of triangles
+    virtual void getBatchTriIsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    /// Get currents of ohmic current oc in a list of triangles
+    virtual void getBatchTriOhmicIsNP(unsigned int* indices, int input_size, std::string const & oc, double* values, int output_size) const;
+
+    /// Get currents of GHK current ghk in a list of triangles
+    virtual void getBatchTriGHKIsNP(unsigned int* indices, int input_size, std::string const & ghk, double* values, int output_size) const;
     
 
     ////////////////////////////////////////////////////////////////////////
@@ -1080,6 +1135,21 @@ public:
     /// Get species counts of a list of triangles
     virtual void getROITriCountsNP(std::string ROI_id, std::string const & s, double* counts, int output_size) const;
 
+    /// Get membrane potentials of triangles in a ROI
+    virtual void getROITriVsNP(std::string ROI_id, double* values, int output_size) const;
+
+    /// Get potentials of vertices in a ROI
+    virtual void getROIVertVsNP(std::string ROI_id, double* values, int output_size) const;
+
+    /// Get total membrane currents of triangles in a ROI
+    virtual void getROITriIsNP(std::string ROI_id, double* values, int output_size) const;
+
+    /// Get currents of ohmic current oc in triangles of a ROI
+    virtual void getROITriOhmicIsNP(std::string ROI_id, std::string const & oc, double* values, int output_size) const;
+
+    /// Get currents of GHK current ghk in triangles of a ROI
+    virtual void getROITriGHKIsNP(std::string ROI_id, std::string const & ghk, double* values, int output_size) const;
+
      virtual double getROIVol(std::string ROI_id) const;
     virtual double getROIArea(std::string ROI_id) const;
     
@@ -73,5 +73,40 @@ void API::getBatchTriCountsNP(unsigned int* indices, int input_size, std::string
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void API::getBatchTriVsNP(unsigned int* indices, int input_size, double* values, int output_size) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void API::getBatchVertVsNP(unsigned int* indices, int input_size, double* values, int output_size) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void API::getBatchTriIsNP(unsigned int* indices, int input_size, double* values, int output_size) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void API::getBatchTriOhmicIsNP(unsigned int* indices, int input_size, std::string const & oc, double* values, int output_size) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void API::getBatchTriGHKIsNP(unsigned int* indices, int input_size, std::string const & ghk, double* values, int output_size) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 // END
 
@@ -171,6 +171,48 @@ double API::getEfieldDT(void) const
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void API::setEfieldAdaptiveDT(bool adaptive, double dt_min, double dt_max, double dv_tol)
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+bool API::getEfieldAdaptiveDT(void) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void API::setEfieldSemiImplicit(bool implicit)
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+bool API::getEfieldSemiImplicit(void) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::vector<double> API::getEfieldDTHistory(void) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void API::clearEfieldDTHistory(void)
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 void API::setTemp(double temp)
 {
     throw steps::NotImplErr();
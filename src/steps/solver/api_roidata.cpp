@@ -73,6 +73,41 @@ void API::getROITriCountsNP(std::string ROI_id, std::string const & s, double* c
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void API::getROITriVsNP(std::string ROI_id, double* values, int output_size) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void API::getROIVertVsNP(std::string ROI_id, double* values, int output_size) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void API::getROITriIsNP(std::string ROI_id, double* values, int output_size) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void API::getROITriOhmicIsNP(std::string ROI_id, std::string const & oc, double* values, int output_size) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void API::getROITriGHKIsNP(std::string ROI_id, std::string const & ghk, double* values, int output_size) const
+{
+    throw steps::NotImplErr();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 double API::getROIVol(std::string ROI_id) const
 {
     throw steps::NotImplErr();
@@ -42,11 +42,27 @@ namespace efield {
 
 // LU and back substitution implementations are from Numerical Recipes, 2nd ed., section 2.4.
 
+// Minimum half bandwidth for which the elimination below each pivot is
+// split between OpenMP threads; for narrower bands the work per pivot does
+// not cover the cost of starting the threads.
+static const int PAR_MIN_HALFBW = 32;
+
 inline void swap_row(double *u,double *v,int n) {
     for (int j=0;j<n;++j) std::swap(u[j],v[j]);
 }
 
 void BDSystem::solve()
+{
+    _factorize();
+    _substitute();
+}
+
+void BDSystem::resolve()
+{
+    _substitute();
+}
+
+void BDSystem::_factorize()
 {
     constexpr double TINY = 1.0e-20;
 
@@ -102,35 +118,39 @@ void BDSystem::solve()
         pp[k] = ipiv;
         if (ipiv != k) swap_row(ak,a+ipiv*w,w);
 
-        // perform eliminiation
-        double *aij = ak+w; // aij == a + (k+1)*w + 0
-        double *lki = lk;
-
+        // perform eliminiation; the rows below the pivot are independent,
+        // and are shared between threads if the band is wide enough.
+        #pragma omp parallel for schedule(static) if(h >= PAR_MIN_HALFBW)
         for (int i = k+1; i < p; ++i)
         {
-            dum = aij[0]/ak[0];
+            double *ai = a+i*w;
+            double f = ai[0]/ak[0];
 
-            // lki == l + k*h + (i-k-1)
-            *lki++ = dum;
+            // lk == l + k*h
+            lk[i-k-1] = f;
 
             for (int j = 1; j < w; ++j)
-            {
-                ++aij; // aij == a + i*w + j
-                aij[-1] =  aij[0] - ak[j]*dum;
-            }
-            aij[0] = 0.0; // aij == a + i*w + (w-1)
-            ++aij; // aij == a + (i+1)*w 
+                ai[j-1] = ai[j] - ak[j]*f;
+            ai[w-1] = 0.0;
         }
         ak += w;
         lk += h;
     }
+}
+
+void BDSystem::_substitute()
+{
+    int n = (int)pN;
+    int h = (int)pHalfBW;
+    int w = 2*h+1;
+    const double *a = pA.data(); // holds U from LU decomposition
+    const double *l = h>0?&pL[0]:0;
 
     // 2. Forward substitution, b into x.
     std::copy(pb.begin(),pb.end(),px.begin());
     double *x = &px[0];
     double *xk = x;
-    lk = l;
-    ak = a;
+    const double *lk = l;
     for (int k = 0; k < n; ++k)
     {
         int i = pp[k];
@@ -145,7 +165,7 @@ void BDSystem::solve()
     }
 
     // 3. Backward substitution on x
-    ak = a+n*w;
+    const double *ak = a+n*w;
     xk = x+n;
     for (int k = n-1; k >=0; --k)
     {
@@ -101,7 +101,13 @@ public:
 
     void solve(); // destructive: overwrites pA
 
+    // Solve for the current b with the factors of the last solve().
+    void resolve();
+
 private:
+    void _factorize();
+    void _substitute();
+
     size_t pN,pHalfBW;
 
     BDMatrix pA; // will contain U after LU-decomposition
@@ -39,6 +39,7 @@ namespace efield {
 
 extern "C" {
 extern void dgbsv_(int *n,int *kl,int *ku,int *nrhs,double *ab,int *ldab,int *ipiv,double *b,int *ldb,int *info);
+extern void dgbtrs_(char *trans,int *n,int *kl,int *ku,int *nrhs,double *ab,int *ldab,int *ipiv,double *b,int *ldb,int *info);
 }
 
 void BDSystemLapack::solve()
@@ -53,4 +54,17 @@ void BDSystemLapack::solve()
     dgbsv_(&n,&h,&h,&nrhs,pA.data(),&ldab,&pwork[0],&px[0],&n,&info);
 }
 
+void BDSystemLapack::resolve()
+{
+    int n=pN;
+    int h=pHalfBW;
+    int nrhs=1;
+    int ldab=3*h+1;
+    int info=0;
+    char trans='N';
+
+    std::copy(pb.begin(),pb.end(),px.begin());
+    dgbtrs_(&trans,&n,&h,&h,&nrhs,pA.data(),&ldab,&pwork[0],&px[0],&n,&info);
+}
+
 }}} // namespace steps::solver::efield
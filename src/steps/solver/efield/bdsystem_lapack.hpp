@@ -97,6 +97,9 @@ public:
 
     void solve(); // destructive: overwrites pA
 
+    // Solve for the current b with the factors of the last solve().
+    void resolve();
+
 private:
     size_t pN,pHalfBW;
 
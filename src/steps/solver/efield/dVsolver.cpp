@@ -32,6 +32,8 @@
 
 // STEPS headers.
 #include "steps/common.h"
+#include "steps/error.hpp"
+#include "steps/solver/efield/bdsystem_lapack.hpp"
 #include "steps/solver/efield/dVsolver.hpp"
 #include "steps/solver/efield/tetmesh.hpp"
 
@@ -52,12 +54,21 @@ void dVSolverBase::initMesh(TetMesh *mesh) {
 
     pTriCur.assign(pNTris, 0.0);
     pTriCurClamp.assign(pNTris, 0.0);
+
+    pTriG.assign(pNTris, 0.0);
+    pVertG.assign(pNVerts, 0.0);
+    pTriGSet = false;
+    pVertGUsed = false;
+
+    pMatrixDirty = true;
 }
 
 void dVSolverBase::setSurfaceConductance(double g_surface, double v_rev) {
     pVExt = v_rev;
     if (!pMesh) return;
 
+    pMatrixDirty = true;
+
     for (int i = 0; i < pNVerts; ++i) {
         VertexElement* ve = pMesh->getVertex(i);
         pGExt[ve->getIDX()] = g_surface * ve->getSurfaceArea();
@@ -80,5 +91,37 @@ int dVSolverBase::meshHalfBW(TetMesh *mesh) {
     return halfbw;
 }
 
+dVSolverBanded::dVSolverBanded(bool use_lapack): pUseLapack(use_lapack) {
+#ifndef STEPS_WITH_LAPACK
+    if (use_lapack)
+        throw steps::ArgErr("STEPS was built without LAPACK; use EF_DV_BDSYS instead.");
+#endif
+}
+
+dVSolverBanded::~dVSolverBanded() {}
+
+void dVSolverBanded::initMesh(TetMesh *mesh) {
+    dVSolverBase::initMesh(mesh);
+    int halfbw = meshHalfBW(mesh);
+
+#ifdef STEPS_WITH_LAPACK
+    if (pUseLapack) {
+        pBDSysLapack.reset(new BDSystemLapack(pNVerts, halfbw));
+        return;
+    }
+#endif
+    pBDSys.reset(new BDSystem(pNVerts, halfbw));
+}
+
+void dVSolverBanded::advance(double dt) {
+#ifdef STEPS_WITH_LAPACK
+    if (pUseLapack) {
+        _advance(pBDSysLapack.get(), dt);
+        return;
+    }
+#endif
+    _advance(pBDSys.get(), dt);
+}
+
 }}} // namespace steps::solver::efield
 
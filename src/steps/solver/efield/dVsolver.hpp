@@ -37,6 +37,7 @@
 #include "steps/common.h"
 #include "steps/solver/efield/bdsystem.hpp"
 #include "steps/solver/efield/efieldsolver.hpp"
+#include "steps/solver/efield/pcgsystem.hpp"
 #include "steps/solver/efield/tetmesh.hpp"
 #include "steps/solver/efield/vertexconnection.hpp"
 #include "steps/solver/efield/vertexelement.hpp"
@@ -47,7 +48,8 @@ namespace efield {
 
 class dVSolverBase: public EFieldSolver {
 public:
-    dVSolverBase(): pMesh(0), pNVerts(0), pNTris(0) {}
+    dVSolverBase(): pMesh(0), pNVerts(0), pNTris(0), pMatrixDt(0.0), pMatrixDirty(true),
+                    pTriGSet(false), pVertGUsed(false) {}
 
     /** Initialize state with given mesh */
     void initMesh(TetMesh *mesh) override;
@@ -70,7 +72,10 @@ public:
     bool getClamped(int i) const override { return pVertexClamp[i]; }
 
     /** Set voltage clamped status for vertex i */
-    void setClamped(int i, bool clamped) override { pVertexClamp[i] = clamped; }
+    void setClamped(int i, bool clamped) override {
+        if (static_cast<bool>(pVertexClamp[i]) != clamped) pMatrixDirty = true;
+        pVertexClamp[i] = clamped;
+    }
 
     /** Get current through triangle i */
     double getTriI(int i) const override { return -pTriCur[i]; }
@@ -78,44 +83,90 @@ public:
     /** Set current through triangle i to d (pA) */
     void setTriI(int i,double d) override { pTriCur[i] = -d; }
 
+    /** Set current through every triangle i to scale*d[i] (pA) */
+    void setTriIs(const double *d, double scale) override {
+        for (uint i = 0; i < pNTris; ++i) pTriCur[i] = -scale*d[i];
+    }
+
+    /** Set conductance through every triangle i to scale*g[i] (nS) for the next step */
+    void setTriGs(const double *g, double scale) override {
+        for (uint i = 0; i < pNTris; ++i) pTriG[i] = scale*g[i];
+        pTriGSet = true;
+    }
+
     /** Set additional current injection for triangle i to c (pA) */
     void setTriIClamp(int i, double c) override { pTriCurClamp[i] = -c; }
 
     /** Set additional current injection for area associated with vertex i to c (pA) */
     void setVertIClamp(int i, double c) override { pVertCurClamp[i] = -c; }
 
+    /** Force reassembly and refactorization of the matrix on the next step */
+    void invalidateMatrix() override { pMatrixDirty = true; }
+
 protected:
     /// Generic populate and solve
+    ///
+    /// The matrix depends only on the capacitances, conductances, clamps
+    /// and dt, so it is assembled and factorized again only if one of
+    /// those has changed since the last step; otherwise the factors of
+    /// the last step are reused with the new right hand side.
+    ///
+    /// Triangle conductances set with setTriGs are lumped onto the
+    /// vertices and added to the diagonal, as for the leak conductance,
+    /// so that the triangle currents act at the end of the step
+    /// (semi-implicit coupling). The matrix then changes every step.
     template <typename LinSysImpl>
     void _advance(LinSysImpl *L, double dt) {
         // Add up current clamp contributions
         std::copy(pVertCurClamp.begin(), pVertCurClamp.end(), pVertCur.begin());
-        for (uint i = 0; i < pNTris; ++i) {
+        const uint *triv = pMesh->getTriangle(0);
+        for (uint i = 0; i < pNTris; ++i, triv += 3) {
             double c = (pTriCur[i] + pTriCurClamp[i]) / 3.0;
 
-            uint *triv = pMesh->getTriangle(i);
             pVertCur[triv[0]] += c;
             pVertCur[triv[1]] += c;
             pVertCur[triv[2]] += c;
         }
 
+        if (pTriGSet || pVertGUsed) {
+            std::fill(pVertG.begin(), pVertG.end(), 0.0);
+            if (pTriGSet) {
+                triv = pMesh->getTriangle(0);
+                for (uint i = 0; i < pNTris; ++i, triv += 3) {
+                    double g = pTriG[i] / 3.0;
+
+                    pVertG[triv[0]] += g;
+                    pVertG[triv[1]] += g;
+                    pVertG[triv[2]] += g;
+                }
+            }
+            pMatrixDirty = true;
+            pVertGUsed = pTriGSet;
+            pTriGSet = false;
+        }
+
         typename LinSysImpl::matrix_type &A=L->A();
         typename LinSysImpl::vector_type &b=L->b();
 
         double oodt = 1.0/dt;
-
-        A.zero();
-        for (uint i = 0; i < pNVerts; ++i) {
+        int nverts = (int)pNVerts;
+
+        // Each vertex fills only its own row of A and b, so the rows are
+        // shared between threads if the library is built with OpenMP.
+        bool refactor = pMatrixDirty || dt != pMatrixDt;
+        if (refactor) A.zero();
+        #pragma omp parallel for schedule(static)
+        for (int i = 0; i < nverts; ++i) {
             VertexElement * ve = pMesh->getVertex(i);
             int ind = ve->getIDX();
 
             if (pVertexClamp[ind]) {
                 b.set(ind,0);
-                A.set(ind,ind,1.0);
+                if (refactor) A.set(ind,ind,1.0);
             }
             else {
                 double rhs = pVertCur[ind] + pGExt[ind] * (pVExt - pV[ind]);
-                double Aii = ve->getCapacitance()*oodt + pGExt[ind];
+                double Aii = ve->getCapacitance()*oodt + pGExt[ind] + pVertG[ind];
 
                 for (int inbr = 0; inbr < ve->getNCon(); ++inbr) {
                     int k = ve->nbrIdx(inbr);
@@ -123,17 +174,23 @@ protected:
 
                     rhs += cc * (pV[k] - pV[ind]);
                     Aii += cc;
-                    A.set(ind,k,-cc);
+                    if (refactor) A.set(ind,k,-cc);
                 }
                 b.set(ind,rhs);
-                A.set(ind,ind,Aii);
+                if (refactor) A.set(ind,ind,Aii);
             }
         }
         
-        L->solve();
+        if (refactor) {
+            L->solve();
+            pMatrixDt = dt;
+            pMatrixDirty = false;
+        }
+        else L->resolve();
 
         const typename LinSysImpl::vector_type DV=L->x();
-        for (uint i = 0; i < pNVerts; ++i)
+        #pragma omp parallel for schedule(static)
+        for (int i = 0; i < nverts; ++i)
             if (pVertexClamp[i] == false) pV[i] += DV.get(i);
 
         // reset pTriCur for caller contributions
@@ -175,21 +232,73 @@ protected:
 
     /// Current clamp through each vertex (adds to any triangle clamps.)
     std::vector<double>         pVertCurClamp;
+
+    /// Time step the current matrix factorization was computed for.
+    double                      pMatrixDt;
+
+    /// True if the matrix must be reassembled and factorized.
+    bool                        pMatrixDirty;
+
+    /// Conductance through each triangle for the next step.
+    std::vector<double>         pTriG;
+
+    /// Triangle conductance at each vertex (used only in advance()).
+    std::vector<double>         pVertG;
+
+    /// True if pTriG was set for the next step.
+    bool                        pTriGSet;
+
+    /// True if pVertG is part of the current matrix.
+    bool                        pVertGUsed;
 };
     
+class BDSystemLapack;
+
 class dVSolverBanded: public dVSolverBase {
+public:
+    /// \param use_lapack Factorize and solve with LAPACK dgbsv/dgbtrs
+    ///                   instead of the built-in banded LU; throws
+    ///                   steps::ArgErr if STEPS was built without LAPACK.
+    explicit dVSolverBanded(bool use_lapack = false);
+    ~dVSolverBanded();
+
+    void initMesh(TetMesh *mesh) override;
+
+    void advance(double dt) override;
+
+private:
+    bool                             pUseLapack;
+    std::unique_ptr<BDSystem>        pBDSys;
+    std::unique_ptr<BDSystemLapack>  pBDSysLapack;
+};
+
+class dVSolverPCG: public dVSolverBase {
 public:
     void initMesh(TetMesh *mesh) override {
         dVSolverBase::initMesh(mesh);
-        pBDSys.reset(new BDSystem(pNVerts, meshHalfBW(mesh)));
+        std::vector<std::vector<int>> rows(pNVerts);
+
+        for (uint i = 0; i < pNVerts; ++i) {
+            VertexElement *ve = mesh->getVertex(i);
+
+            int idx = ve->getIDX();
+            int ncon = ve->getNCon();
+
+            rows[idx].push_back(idx);
+            for (int j = 0; j < ncon; ++j) {
+                rows[idx].push_back((int)ve->nbrIdx(j));
+            }
+        }
+
+        pPCGSys.reset(new PCGSystem(rows));
     }
 
     void advance(double dt) override {
-        _advance(pBDSys.get(), dt);
+        _advance(pPCGSys.get(), dt);
     }
 
 private:
-    std::unique_ptr<BDSystem>  pBDSys;
+    std::unique_ptr<PCGSystem>  pPCGSys;
 };
 
 
@@ -0,0 +1,126 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+
+ */
+
+
+// STL headers.
+#include <algorithm>
+#include <sstream>
+
+// STEPS headers.
+#include "steps/common.h"
+#include "steps/error.hpp"
+#include "steps/solver/efield/dtcontrol.hpp"
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace sefield = steps::solver::efield;
+
+////////////////////////////////////////////////////////////////////////////////
+
+// Fraction of the tolerance aimed at, and the largest growth of the
+// target dt from one step to the next.
+static const double DT_SAFETY = 0.8;
+static const double DT_MAX_GROWTH = 2.0;
+
+// Number of steps kept in the dt history.
+static const std::size_t DT_HISTORY_MAX = 100000;
+
+////////////////////////////////////////////////////////////////////////////////
+
+sefield::DtControl::DtControl(void)
+: pAdaptive(false)
+, pDTMin(0.0)
+, pDTMax(0.0)
+, pDVTol(0.0)
+, pDT(0.0)
+, pLastDT(0.0)
+, pHistory()
+{
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::DtControl::setAdaptive(bool adaptive, double dt_min, double dt_max,
+                                     double dv_tol, double dt0)
+{
+    if (adaptive)
+    {
+        if (dt_min <= 0.0 || dt_max < dt_min)
+        {
+            std::ostringstream os;
+            os << "EField dt bounds must satisfy 0 < dt_min <= dt_max.";
+            throw steps::ArgErr(os.str());
+        }
+        if (dv_tol <= 0.0)
+        {
+            std::ostringstream os;
+            os << "EField potential tolerance must be greater than zero.";
+            throw steps::ArgErr(os.str());
+        }
+    }
+
+    pAdaptive = adaptive;
+    pDTMin = dt_min;
+    pDTMax = dt_max;
+    pDVTol = dv_tol;
+    pDT = adaptive ? _quantize(dt0) : dt0;
+    pLastDT = pDT;
+    pHistory.clear();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::DtControl::update(double dt_taken, double max_dv)
+{
+    if (!pAdaptive) return;
+
+    if (pHistory.size() == DT_HISTORY_MAX) pHistory.pop_front();
+    pHistory.push_back(dt_taken);
+    pLastDT = dt_taken;
+
+    double next = DT_MAX_GROWTH * pDT;
+    if (max_dv > 0.0)
+    {
+        next = std::min(next, DT_SAFETY * pDVTol * dt_taken / max_dv);
+    }
+    pDT = _quantize(next);
+}
+
+
+////////////////////////////////////////////////////////////////////////////////
+
+double sefield::DtControl::_quantize(double dt) const
+{
+    if (dt >= pDTMax) return pDTMax;
+
+    double level = pDTMin;
+    while (DT_MAX_GROWTH * level <= dt) level *= DT_MAX_GROWTH;
+    return level;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+// END
@@ -0,0 +1,129 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+
+ */
+
+
+#ifndef STEPS_SOLVER_EFIELD_DTCONTROL_HPP
+#define STEPS_SOLVER_EFIELD_DTCONTROL_HPP 1
+
+// STL headers.
+#include <deque>
+#include <vector>
+
+// STEPS headers.
+#include "steps/common.h"
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace steps {
+namespace solver {
+namespace efield {
+
+////////////////////////////////////////////////////////////////////////////////
+
+/// Step size control for the membrane potential solver.
+///
+/// With adaptive stepping enabled, the EField dt is chosen so that the
+/// largest change in potential over a step, at the triangles with
+/// voltage-dependent processes, stays near a tolerance. The change is
+/// taken to scale linearly with dt, so the step after one that changed
+/// the potential by dV is dt * safety * tol / dV, at most twice the
+/// previous target and within [dt_min, dt_max]. The target is rounded
+/// down to dt_min times a power of two (or dt_max), so that it only
+/// changes when the potential's rate of change does by about a factor
+/// of two and the solver can keep its factorized matrix between steps.
+/// Steps are never rejected: reactions and diffusion have already been
+/// applied when the potential is known.
+///
+/// The dt of the last 100000 EField steps taken in adaptive mode is
+/// recorded.
+///
+class DtControl
+{
+
+public:
+
+    DtControl(void);
+
+    /// Enable or disable adaptive stepping. The first adaptive step
+    /// uses dt0 limited to [dt_min, dt_max]. Clears the history.
+    ///
+    void setAdaptive(bool adaptive, double dt_min, double dt_max,
+                     double dv_tol, double dt0);
+
+    inline bool adaptive(void) const
+    { return pAdaptive; }
+
+    /// Target dt of the next step: the adaptive one, or fixed_dt.
+    ///
+    inline double dt(double fixed_dt) const
+    { return pAdaptive ? pDT : fixed_dt; }
+
+    /// Length of the last step in adaptive mode, or fixed_dt.
+    ///
+    inline double lastDT(double fixed_dt) const
+    { return pAdaptive ? pLastDT : fixed_dt; }
+
+    /// Record a step of length dt_taken during which the potential at
+    /// the monitored triangles changed by at most max_dv (V), and choose
+    /// the next target.
+    ///
+    void update(double dt_taken, double max_dv);
+
+    /// The recorded dts, oldest first.
+    ///
+    inline std::vector<double> history(void) const
+    { return std::vector<double>(pHistory.begin(), pHistory.end()); }
+
+    inline void clearHistory(void)
+    { pHistory.clear(); }
+
+private:
+
+    /// Round dt down to dt_min times a power of two, limited to
+    /// [dt_min, dt_max].
+    ///
+    double _quantize(double dt) const;
+
+    bool                                pAdaptive;
+    double                              pDTMin;
+    double                              pDTMax;
+    double                              pDVTol;
+    double                              pDT;
+    double                              pLastDT;
+    std::deque<double>                  pHistory;
+
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
+}
+}
+}
+
+#endif
+// STEPS_SOLVER_EFIELD_DTCONTROL_HPP
+
+// END
@@ -157,6 +157,7 @@ void sefield::EField::restore(std::fstream & cp_file)
     cp_file.read((char*)&pCPerm.front(), sizeof(uint) * nCPerm);
 
     pMesh->restore(cp_file);
+    pVProp->invalidateMatrix();
 }
 
 ////////////////////////////////////////////////////////////////////////////////
@@ -171,6 +172,7 @@ void sefield::EField::setMembCapac(uint midx, double cm)
     // specific capacitance in pF/um2.
     // Argument is in F/m^2: 1 F/m^2 = 1 pF / um^2 so no conversion needed!
     pMesh->applySurfaceCapacitance(cm);
+    pVProp->invalidateMatrix();
 }
 
 ////////////////////////////////////////////////////////////////////////////////
@@ -190,6 +192,7 @@ void sefield::EField::setMembVolRes(uint midx, double ro)
 {
     assert(ro >= 0.0);
     pMesh->applyConductance(1.0/(ro*1.0e-3));
+    pVProp->invalidateMatrix();
 }
 
 ////////////////////////////////////////////////////////////////////////////////
@@ -377,16 +380,35 @@ void sefield::EField::setTriIClamp(uint tidx, double cur)
 }
 
 ////////////////////////////////////////////////////////////////////////////////
-/*
-void    sefield::EField::setTriI(double * cur)
+
+void    sefield::EField::setTriIs(const double * cur)
+{
+    // convert to picoamp
+    pVProp->setTriIs(cur, 1.0e12);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void    sefield::EField::setTriGs(const double * g)
 {
-    for (uint i = 0; i < pNTris; ++i)
+    // convert to nanosiemens (picoamp per millivolt)
+    pVProp->setTriGs(g, 1.0e9);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void    sefield::EField::getTriVs(double * v)
+{
+    const uint * triv = pTritoVert.data();
+    for (uint i = 0; i < pNTris; ++i, triv += 3)
     {
-        // convert to picoamp
-        pVProp->setTriI(i, cur[i]*1.0e12);
+        double pot = pVProp->getV(triv[0]) + pVProp->getV(triv[1]) + pVProp->getV(triv[2]);
+
+        // getV returns in milliVolts
+        v[i] = (pot*1.0e-3)/3.0;
     }
 }
-*/
+
 ////////////////////////////////////////////////////////////////////////////////
 
 double    sefield::EField::getTetV(uint tidx)
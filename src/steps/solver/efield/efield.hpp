@@ -197,8 +197,21 @@ public:
 
     /// Auxiliary function for setting current in all triangles at once.
     /// \param cur A 1D array, size = number of surface triangles,
-    ///     of current across triangles
-    // void    setTriI(double * cur);
+    ///     of current across triangles (amps)
+    void    setTriIs(const double * cur);
+
+    /// Set the conductance (siemens) of the currents across all triangles
+    /// for the next step, as the derivative of the currents set with
+    /// setTriIs with respect to the potential. The currents are then
+    /// coupled semi-implicitly.
+    /// \param g A 1D array, size = number of surface triangles,
+    ///     of conductance across triangles (siemens)
+    void    setTriGs(const double * g);
+
+    /// Auxiliary function for getting the potential of all triangles at once.
+    /// \param v A 1D array, size = number of surface triangles, filled
+    ///     with the electric potential of the triangles (volts)
+    void    getTriVs(double * v);
 
     ////////////////////////////////////////////////////////////////////////
 
@@ -0,0 +1,458 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+
+ */
+
+
+// STL headers.
+#include <cassert>
+#include <iostream>
+#include <sstream>
+#include <string>
+#include <vector>
+
+// STEPS headers.
+#include "steps/common.h"
+#include "steps/error.hpp"
+#include "steps/geom/memb.hpp"
+#include "steps/geom/tetmesh.hpp"
+#include "steps/math/point.hpp"
+#include "steps/solver/api.hpp"
+#include "steps/solver/efield/dVsolver.hpp"
+#include "steps/solver/efield/efieldsim.hpp"
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace sefield = steps::solver::efield;
+namespace stetmesh = steps::tetmesh;
+using steps::solver::API;
+
+////////////////////////////////////////////////////////////////////////////////
+
+sefield::EFieldSim::EFieldSim(stetmesh::Tetmesh * mesh, int efield_solver)
+: EFieldSim(mesh, _makeSolver(efield_solver))
+{
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+sefield::EFieldSim::EFieldSim(stetmesh::Tetmesh * mesh,
+                              std::unique_ptr<EFieldSolver> impl)
+: pMesh(mesh)
+, pMemb(0)
+, pEField()
+, pTri_GtoL()
+, pVert_GtoL()
+, pTri_LtoG()
+, pVert_LtoG()
+, pTime(0.0)
+, pNSteps(0)
+{
+    if (pMesh == 0)
+    {
+        std::ostringstream os;
+        os << "No mesh provided to EFieldSim initializer function.";
+        throw steps::ArgErr(os.str());
+    }
+
+    if (pMesh->_countMembs() != 1)
+    {
+        std::ostringstream os;
+        os << "Membrane potential solver currently supports only one ";
+        os << "membrane description object.";
+        throw steps::ArgErr(os.str());
+    }
+    pMemb = pMesh->_getMemb(0);
+    assert(pMemb != 0);
+
+    pEField.reset(new EField(std::move(impl)));
+
+    // Same conversion to EField indices and units as in the solvers.
+    std::vector<uint> const & membverts = pMemb->_getAllVertIndices();
+    std::vector<uint> const & membtris = pMemb->_getAllTriIndices();
+    std::vector<uint> const & membtets = pMemb->_getAllVolTetIndices();
+
+    uint nverts = membverts.size();
+    uint ntris = membtris.size();
+    uint ntets = membtets.size();
+
+    pVert_GtoL.assign(pMesh->countVertices(), -1);
+    pTri_GtoL.assign(pMesh->countTris(), -1);
+    pVert_LtoG = membverts;
+    pTri_LtoG = membtris;
+
+    std::vector<double> verts(nverts * 3);
+    for (uint efv = 0; efv < nverts; ++efv)
+    {
+        uint vertidx = membverts[efv];
+        steps::math::point3d vert = pMesh->_getVertex(vertidx);
+
+        // CONVERTING TO MICRONS HERE. EFIELD OBJECT WILL NOT PERFORM THIS CONVERSION
+        verts[efv * 3] = vert[0] * 1.0e6;
+        verts[efv * 3 + 1] = vert[1] * 1.0e6;
+        verts[efv * 3 + 2] = vert[2] * 1.0e6;
+
+        pVert_GtoL[vertidx] = efv;
+    }
+
+    std::vector<uint> tets(ntets * 4);
+    for (uint eft = 0; eft < ntets; ++eft)
+    {
+        const uint * tet = pMesh->_getTet(membtets[eft]);
+        for (uint i = 0; i < 4; ++i)
+        {
+            int v = pVert_GtoL[tet[i]];
+            if (v == -1)
+            {
+                std::ostringstream os;
+                os << "Failed to create EField structures.";
+                throw steps::ProgErr(os.str());
+            }
+            tets[eft * 4 + i] = v;
+        }
+    }
+
+    std::vector<uint> tris(ntris * 3);
+    for (uint eft = 0; eft < ntris; ++eft)
+    {
+        const uint * tri = pMesh->_getTri(membtris[eft]);
+        for (uint i = 0; i < 3; ++i)
+        {
+            int v = pVert_GtoL[tri[i]];
+            if (v == -1)
+            {
+                std::ostringstream os;
+                os << "Failed to create EField structures.";
+                throw steps::ProgErr(os.str());
+            }
+            tris[eft * 3 + i] = v;
+        }
+        pTri_GtoL[membtris[eft]] = eft;
+    }
+
+    pEField->initMesh(nverts, verts.data(), ntris, tris.data(), ntets, tets.data(),
+                      pMemb->_getOpt_method(), pMemb->_getOpt_file_name(),
+                      pMemb->_getSearch_percent());
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+sefield::EFieldSim::~EFieldSim(void)
+{
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::unique_ptr<sefield::EFieldSolver> sefield::EFieldSim::_makeSolver(int efield_solver)
+{
+    switch (efield_solver) {
+    case API::EF_DEFAULT:
+    case API::EF_DV_BDSYS:
+        return std::unique_ptr<EFieldSolver>(new dVSolverBanded());
+    case API::EF_DV_PCG:
+        return std::unique_ptr<EFieldSolver>(new dVSolverPCG());
+    case API::EF_DV_BDSYS_LAPACK:
+        return std::unique_ptr<EFieldSolver>(new dVSolverBanded(true));
+    default:
+        throw steps::ArgErr("Unsupported E-Field solver.");
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::advance(double dt)
+{
+    if (dt <= 0.0)
+    {
+        std::ostringstream os;
+        os << "Time step must be greater than zero.";
+        throw steps::ArgErr(os.str());
+    }
+
+    pEField->advance(dt);
+    pTime += dt;
+    ++pNSteps;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::_checkMemb(std::string const & m) const
+{
+    if (m != pMemb->getID())
+    {
+        std::ostringstream os;
+        os << "Membrane '" << m << "' is not the membrane of the mesh.";
+        throw steps::ArgErr(os.str());
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setMembPotential(std::string const & m, double v)
+{
+    _checkMemb(m);
+    pEField->setMembPotential(0, v);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setMembCapac(std::string const & m, double cm)
+{
+    _checkMemb(m);
+    if (cm < 0.0)
+    {
+        std::ostringstream os;
+        os << "Capacitance must be greater than or equal to zero.";
+        throw steps::ArgErr(os.str());
+    }
+    pEField->setMembCapac(0, cm);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setMembVolRes(std::string const & m, double ro)
+{
+    _checkMemb(m);
+    if (ro < 0.0)
+    {
+        std::ostringstream os;
+        os << "Resistivity must be greater than or equal to zero.";
+        throw steps::ArgErr(os.str());
+    }
+    pEField->setMembVolRes(0, ro);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setMembRes(std::string const & m, double ro, double vrev)
+{
+    _checkMemb(m);
+    if (ro <= 0.0)
+    {
+        std::ostringstream os;
+        os << "Resistivity must be greater than zero.";
+        throw steps::ArgErr(os.str());
+    }
+    pEField->setSurfaceResistivity(0, ro, vrev);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+uint sefield::EFieldSim::_triG2L(uint tidx) const
+{
+    if (tidx >= pTri_GtoL.size())
+    {
+        std::ostringstream os;
+        os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
+        throw steps::ArgErr(os.str());
+    }
+    int loctidx = pTri_GtoL[tidx];
+    if (loctidx == -1)
+    {
+        std::ostringstream os;
+        os << "Triangle index " << tidx << " not assigned to a membrane.";
+        throw steps::ArgErr(os.str());
+    }
+    return loctidx;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+uint sefield::EFieldSim::_vertG2L(uint vidx) const
+{
+    if (vidx >= pVert_GtoL.size())
+    {
+        std::ostringstream os;
+        os << "Error (Index Overbound): There is no vertex with index " << vidx << ".\n";
+        throw steps::ArgErr(os.str());
+    }
+    int locvidx = pVert_GtoL[vidx];
+    if (locvidx == -1)
+    {
+        std::ostringstream os;
+        os << "Vertex index " << vidx << " not assigned to a conduction volume or membrane.";
+        throw steps::ArgErr(os.str());
+    }
+    return locvidx;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double sefield::EFieldSim::getTriV(uint tidx) const
+{
+    return pEField->getTriV(_triG2L(tidx));
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setTriV(uint tidx, double v)
+{
+    pEField->setTriV(_triG2L(tidx), v);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+bool sefield::EFieldSim::getTriVClamped(uint tidx) const
+{
+    return pEField->getTriVClamped(_triG2L(tidx));
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setTriVClamped(uint tidx, bool cl)
+{
+    pEField->setTriVClamped(_triG2L(tidx), cl);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setTriI(uint tidx, double cur)
+{
+    pEField->setTriI(_triG2L(tidx), cur);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setTriIClamp(uint tidx, double cur)
+{
+    pEField->setTriIClamp(_triG2L(tidx), cur);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double sefield::EFieldSim::getVertV(uint vidx) const
+{
+    return pEField->getVertV(_vertG2L(vidx));
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setVertV(uint vidx, double v)
+{
+    pEField->setVertV(_vertG2L(vidx), v);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+bool sefield::EFieldSim::getVertVClamped(uint vidx) const
+{
+    return pEField->getVertVClamped(_vertG2L(vidx));
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setVertVClamped(uint vidx, bool cl)
+{
+    pEField->setVertVClamped(_vertG2L(vidx), cl);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setVertIClamp(uint vidx, double cur)
+{
+    pEField->setVertIClamp(_vertG2L(vidx), cur);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setBatchTriIsNP(unsigned int* indices, int input_size, double* values, int output_size)
+{
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: input array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    for (int t = 0; t < input_size; t++)
+    {
+        pEField->setTriI(_triG2L(indices[t]), values[t]);
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::getBatchTriVsNP(unsigned int* indices, int input_size, double* values, int output_size) const
+{
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    for (int t = 0; t < input_size; t++)
+    {
+        values[t] = pEField->getTriV(_triG2L(indices[t]));
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::getBatchVertVsNP(unsigned int* indices, int input_size, double* values, int output_size) const
+{
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    for (int v = 0; v < input_size; v++)
+    {
+        values[v] = pEField->getVertV(_vertG2L(indices[v]));
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::setTriIsNP(double* values, int output_size)
+{
+    if (output_size != static_cast<int>(pTri_LtoG.size()))
+    {
+        std::ostringstream os;
+        os << "Error: input array (values) size should be the number of membrane triangles.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    pEField->setTriIs(values);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void sefield::EFieldSim::getTriVsNP(double* values, int output_size) const
+{
+    if (output_size != static_cast<int>(pTri_LtoG.size()))
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the number of membrane triangles.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    pEField->getTriVs(values);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+// END
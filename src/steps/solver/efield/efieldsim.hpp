@@ -0,0 +1,203 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+
+ */
+
+
+
+#ifndef STEPS_SOLVER_EFIELD_EFIELDSIM_HPP
+#define STEPS_SOLVER_EFIELD_EFIELDSIM_HPP 1
+
+// STL headers.
+#include <memory>
+#include <string>
+#include <vector>
+
+// STEPS headers.
+#include "steps/common.h"
+#include "steps/solver/api.hpp"
+#include "steps/solver/efield/efield.hpp"
+#include "steps/solver/efield/efieldsolver.hpp"
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace steps {
+namespace tetmesh {
+
+// Forward declarations.
+class Tetmesh;
+class Memb;
+
+}
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace steps {
+namespace solver {
+namespace efield {
+
+////////////////////////////////////////////////////////////////////////////////
+
+/// Standalone membrane potential simulation.
+///
+/// Runs the EField calculation on the membrane of a mesh without a model
+/// or a kinetic solver, driven by currents injected across the membrane
+/// triangles. This allows the electrical solve to be benchmarked and tuned
+/// in isolation, and cable-style simulations of passive membranes.
+///
+/// All values are in base s.i. units and elements are addressed by their
+/// indices in the mesh, as in the solver API.
+class EFieldSim
+{
+
+public:
+
+    /// Constructor
+    ///
+    /// \param mesh Tetrahedral mesh with exactly one membrane.
+    /// \param efield_solver EField solver: API::EF_DEFAULT, API::EF_DV_BDSYS,
+    ///                      API::EF_DV_PCG or API::EF_DV_BDSYS_LAPACK.
+    EFieldSim(steps::tetmesh::Tetmesh * mesh,
+              int efield_solver = steps::solver::API::EF_DEFAULT);
+
+    virtual ~EFieldSim(void);
+
+    ////////////////////////////////////////////////////////////////////////
+    // SOLVER CONTROLS
+    ////////////////////////////////////////////////////////////////////////
+
+    /// Advance the potential by one step of dt seconds.
+    ///
+    /// Currents set with setTriI or setBatchTriIsNP apply to this step
+    /// only; clamp currents apply until they are changed.
+    void advance(double dt);
+
+    inline double getTime(void) const
+    { return pTime; }
+
+    inline uint getNSteps(void) const
+    { return pNSteps; }
+
+    ////////////////////////////////////////////////////////////////////////
+    // MEMBRANE
+    ////////////////////////////////////////////////////////////////////////
+
+    void setMembPotential(std::string const & m, double v);
+    void setMembCapac(std::string const & m, double cm);
+    void setMembVolRes(std::string const & m, double ro);
+    void setMembRes(std::string const & m, double ro, double vrev);
+
+    /// Mesh indices of the membrane triangles, in the order used by
+    /// setTriIsNP and getTriVsNP.
+    inline std::vector<uint> const & getMembTris(void) const
+    { return pTri_LtoG; }
+
+    /// Mesh indices of the vertices in the conduction volume.
+    inline std::vector<uint> const & getMembVerts(void) const
+    { return pVert_LtoG; }
+
+    ////////////////////////////////////////////////////////////////////////
+    // ELEMENT ACCESS
+    ////////////////////////////////////////////////////////////////////////
+
+    double getTriV(uint tidx) const;
+    void setTriV(uint tidx, double v);
+    bool getTriVClamped(uint tidx) const;
+    void setTriVClamped(uint tidx, bool cl);
+
+    /// Current across triangle tidx (amps) for the next step.
+    void setTriI(uint tidx, double cur);
+    void setTriIClamp(uint tidx, double cur);
+
+    double getVertV(uint vidx) const;
+    void setVertV(uint vidx, double v);
+    bool getVertVClamped(uint vidx) const;
+    void setVertVClamped(uint vidx, bool cl);
+    void setVertIClamp(uint vidx, double cur);
+
+    ////////////////////////////////////////////////////////////////////////
+    // BATCH DATA ACCESS
+    ////////////////////////////////////////////////////////////////////////
+
+    /// Set the currents across a list of triangles for the next step.
+    void setBatchTriIsNP(unsigned int* indices, int input_size, double* values, int output_size);
+
+    void getBatchTriVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    void getBatchVertVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    /// Set the currents across all membrane triangles, in the order of
+    /// getMembTris, for the next step.
+    void setTriIsNP(double* values, int output_size);
+
+    /// Get the potentials of all membrane triangles, in the order of
+    /// getMembTris.
+    void getTriVsNP(double* values, int output_size) const;
+
+    ////////////////////////////////////////////////////////////////////////
+
+protected:
+
+    /// Construct with a given EField solver implementation.
+    EFieldSim(steps::tetmesh::Tetmesh * mesh, std::unique_ptr<EFieldSolver> impl);
+
+    /// Create the EField solver implementation for efield_solver.
+    static std::unique_ptr<EFieldSolver> _makeSolver(int efield_solver);
+
+    ////////////////////////////////////////////////////////////////////////
+
+private:
+
+    uint _triG2L(uint tidx) const;
+    uint _vertG2L(uint vidx) const;
+    void _checkMemb(std::string const & m) const;
+
+    ////////////////////////////////////////////////////////////////////////
+
+    steps::tetmesh::Tetmesh                   * pMesh;
+    steps::tetmesh::Memb                      * pMemb;
+    std::unique_ptr<EField>                     pEField;
+
+    // Mesh to EField indices (-1 if not in the membrane), and back.
+    std::vector<int>                            pTri_GtoL;
+    std::vector<int>                            pVert_GtoL;
+    std::vector<uint>                           pTri_LtoG;
+    std::vector<uint>                           pVert_LtoG;
+
+    double                                      pTime;
+    uint                                        pNSteps;
+
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
+}
+}
+}
+
+#endif
+// STEPS_SOLVER_EFIELD_EFIELDSIM_HPP
+
+// END
@@ -65,12 +65,24 @@ struct EFieldSolver {
     /** Set current through triangle i to d (pA) */
     virtual void setTriI(int i,double d) =0;
 
+    /** Set current through every triangle i to scale*d[i] (pA) */
+    virtual void setTriIs(const double *d, double scale) =0;
+
+    /** Set the conductance of the currents through every triangle i to
+     * scale*g[i] (nS) for the next step only; the currents set with
+     * setTriI(s) are then linearised around the present potential */
+    virtual void setTriGs(const double *g, double scale) =0;
+
     /** Set additional current injection for triangle i to c (pA) */
     virtual void setTriIClamp(int i, double c) =0;
 
     /** Set additional current injection for area associated with vertex i to c (pA) */
     virtual void setVertIClamp(int i, double c) =0;
 
+    /** Mark the system matrix as out of date after a change to the
+     * capacitance or conductance of mesh elements */
+    virtual void invalidateMatrix() =0;
+
     /** Solve for voltage with given dt */
     virtual void advance(double dt) =0;
 };
@@ -0,0 +1,276 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+
+ */
+
+
+#include <algorithm>
+#include <cmath>
+#include <sstream>
+#include <vector>
+
+#include "steps/common.h"
+#include "steps/error.hpp"
+#include "steps/solver/efield/pcgsystem.hpp"
+
+namespace steps {
+namespace solver {
+namespace efield {
+
+// Vector kernels; the loops are shared between threads if the library is
+// built with OpenMP.
+
+static double dot(int n, const double *u, const double *v) {
+    double s = 0.0;
+    #pragma omp parallel for reduction(+:s) schedule(static)
+    for (int i = 0; i < n; ++i) s += u[i]*v[i];
+    return s;
+}
+
+// y += a x
+static void axpy(int n, double a, const double *x, double *y) {
+    #pragma omp parallel for schedule(static)
+    for (int i = 0; i < n; ++i) y[i] += a*x[i];
+}
+
+// y = x + a y
+static void xpay(int n, const double *x, double a, double *y) {
+    #pragma omp parallel for schedule(static)
+    for (int i = 0; i < n; ++i) y[i] = x[i] + a*y[i];
+}
+
+CSRMatrix::CSRMatrix(const std::vector<std::vector<int>> &rows):
+    pN(rows.size()), pRowOff(rows.size()+1, 0)
+{
+    for (size_t i = 0; i < pN; ++i) {
+        std::vector<int> row(rows[i]);
+        std::sort(row.begin(), row.end());
+        row.erase(std::unique(row.begin(), row.end()), row.end());
+        if (!row.empty() && (row.front()<0 || row.back()>=(int)pN))
+            throw steps::ProgErr("out of range element in sparsity matrix");
+
+        pCols.insert(pCols.end(), row.begin(), row.end());
+        pRowOff[i+1] = pCols.size();
+    }
+    pValues.assign(pCols.size(), 0.0);
+}
+
+void CSRMatrix::set(size_t row, size_t col, double value) {
+    int i=get_offset((int)row, (int)col);
+    if (i<0) throw steps::ProgErr("index not in sparse template");
+
+    pValues[i]=value;
+}
+
+void CSRMatrix::multiply(const double *x, double *y) const {
+    int n = (int)pN;
+    const int *off = &pRowOff[0];
+    const int *cols = &pCols[0];
+    const double *vals = &pValues[0];
+
+    #pragma omp parallel for schedule(static)
+    for (int i = 0; i < n; ++i) {
+        double s = 0.0;
+        for (int a = off[i]; a < off[i+1]; ++a) s += vals[a]*x[cols[a]];
+        y[i] = s;
+    }
+}
+
+PCGSystem::PCGSystem(const std::vector<std::vector<int>> &rows, double reltol, size_t maxiter):
+    pN(rows.size()), pA(rows),
+    pb(pN,0.0), px(pN,0.0),
+    pb_view(pN,&pb[0]), px_view(pN,&px[0]),
+    pRelTol(reltol), pMaxIter(maxiter?maxiter:pN),
+    pFixed(pN,0),
+    pFactored(false),
+    pr(pN,0.0), pz(pN,0.0), pp(pN,0.0), pq(pN,0.0),
+    pIter(0), pResidual(0.0)
+{}
+
+void PCGSystem::solve() {
+    _factorize();
+    _iterate();
+}
+
+void PCGSystem::resolve() {
+    if (!pFactored) _factorize();
+    _iterate();
+}
+
+void PCGSystem::_factorize() {
+    int n = (int)pN;
+    const int *off = pA.rowOffsets();
+    const int *cols = pA.colIndices();
+    const double *vals = pA.values();
+
+    // Rows without off-diagonal entries are solved directly.
+    for (int i = 0; i < n; ++i) {
+        bool fixed = true;
+        for (int a = off[i]; a < off[i+1]; ++a) {
+            if (cols[a] != i && vals[a] != 0.0) {
+                fixed = false;
+                break;
+            }
+        }
+        pFixed[i] = fixed;
+    }
+
+    // Pattern of L: lower triangle of A over the free rows and columns,
+    // diagonal last in each row.
+    pLRowOff.assign(n+1, 0);
+    pLCols.clear();
+    std::vector<double> lower;
+    for (int i = 0; i < n; ++i) {
+        if (!pFixed[i]) {
+            for (int a = off[i]; a < off[i+1] && cols[a] <= i; ++a) {
+                int k = cols[a];
+                if (k < i && (pFixed[k] || vals[a] == 0.0)) continue;
+                pLCols.push_back(k);
+                lower.push_back(vals[a]);
+            }
+        }
+        pLRowOff[i+1] = pLCols.size();
+    }
+    pLValues.resize(lower.size());
+
+    // Incomplete Cholesky with zero fill-in. If a pivot is not positive,
+    // retry with an increasingly large shift of the diagonal.
+    double shift = 0.0;
+    for (;;) {
+        bool breakdown = false;
+        for (int i = 0; i < n && !breakdown; ++i) {
+            int rb = pLRowOff[i], diag = pLRowOff[i+1]-1;
+            if (diag < rb) continue;
+
+            for (int a = rb; a < diag; ++a) {
+                int k = pLCols[a];
+                int kb = pLRowOff[k], kdiag = pLRowOff[k+1]-1;
+
+                // sum of L(i,j) L(k,j) over j < k
+                double s = lower[a];
+                int p = rb, q = kb;
+                while (p < a && q < kdiag) {
+                    if (pLCols[p] < pLCols[q]) ++p;
+                    else if (pLCols[q] < pLCols[p]) ++q;
+                    else s -= pLValues[p++]*pLValues[q++];
+                }
+                pLValues[a] = s/pLValues[kdiag];
+            }
+
+            double d = lower[diag]*(1.0+shift);
+            for (int a = rb; a < diag; ++a) d -= pLValues[a]*pLValues[a];
+            if (!(d > 0.0)) breakdown = true;
+            else pLValues[diag] = std::sqrt(d);
+        }
+        if (!breakdown) break;
+        shift = shift == 0.0 ? 1.0e-3 : 2.0*shift;
+    }
+
+    pFactored = true;
+}
+
+void PCGSystem::_precondition(const double *r, double *z) const {
+    int n = (int)pN;
+
+    // Forward substitution, L y = r, with y stored in z.
+    for (int i = 0; i < n; ++i) {
+        int rb = pLRowOff[i], diag = pLRowOff[i+1]-1;
+        if (diag < rb) {
+            z[i] = 0.0;
+            continue;
+        }
+        double s = r[i];
+        for (int a = rb; a < diag; ++a) s -= pLValues[a]*z[pLCols[a]];
+        z[i] = s/pLValues[diag];
+    }
+
+    // Backward substitution, L^T z = y.
+    for (int i = n-1; i >= 0; --i) {
+        int rb = pLRowOff[i], diag = pLRowOff[i+1]-1;
+        if (diag < rb) continue;
+
+        double zi = z[i]/pLValues[diag];
+        z[i] = zi;
+        for (int a = rb; a < diag; ++a) z[pLCols[a]] -= pLValues[a]*zi;
+    }
+}
+
+void PCGSystem::_iterate() {
+    int n = (int)pN;
+    double *x = &px[0];
+    double *r = &pr[0];
+    double *z = &pz[0];
+    double *p = &pp[0];
+    double *q = &pq[0];
+
+    pIter = 0;
+
+    // Fixed rows have only a diagonal entry.
+    for (int i = 0; i < n; ++i)
+        if (pFixed[i]) x[i] = pb[i]/pA.get(i,i);
+
+    double bnorm = std::sqrt(dot(n, &pb[0], &pb[0]));
+    if (bnorm == 0.0) {
+        std::fill(px.begin(), px.end(), 0.0);
+        pResidual = 0.0;
+        return;
+    }
+    double tol = pRelTol*bnorm;
+
+    // r = b - A x, with x the solution of the previous step.
+    pA.multiply(x, r);
+    for (int i = 0; i < n; ++i)
+        r[i] = pFixed[i] ? 0.0 : pb[i]-r[i];
+
+    pResidual = std::sqrt(dot(n, r, r));
+    if (pResidual <= tol) return;
+
+    _precondition(r, z);
+    std::copy(z, z+n, p);
+    double rz = dot(n, r, z);
+
+    while (pIter < pMaxIter) {
+        ++pIter;
+
+        pA.multiply(p, q);
+        double alpha = rz/dot(n, p, q);
+        axpy(n, alpha, p, x);
+        axpy(n, -alpha, q, r);
+
+        pResidual = std::sqrt(dot(n, r, r));
+        if (pResidual <= tol) return;
+
+        _precondition(r, z);
+        double rz_next = dot(n, r, z);
+        xpay(n, z, rz_next/rz, p);
+        rz = rz_next;
+    }
+
+    std::ostringstream os;
+    os << "PCG solver failed to converge in " << pIter << " iterations (residual ";
+    os << pResidual << ", tolerance " << tol << ").";
+    throw steps::ProgErr(os.str());
+}
+
+}}} // namespace steps::solver::efield
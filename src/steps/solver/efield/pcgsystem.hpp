@@ -0,0 +1,167 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#    
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#    
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#    
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#    
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################   
+
+ */
+
+
+#ifndef STEPS_SOLVER_EFIELD_PCGSYSTEM_HPP
+#define STEPS_SOLVER_EFIELD_PCGSYSTEM_HPP 1
+
+#include <algorithm>
+#include <cstddef>
+#include <vector>
+
+#include "steps/common.h"
+#include "steps/solver/efield/linsystem.hpp"
+
+namespace steps {
+namespace solver {
+namespace efield {
+
+// Square sparse matrix in compressed sparse row format. The set of
+// nonzero positions is fixed at construction.
+
+class CSRMatrix: public AMatrix {
+public:
+    // rows[i] holds the column indices of the nonzeros in row i.
+    explicit CSRMatrix(const std::vector<std::vector<int>> &rows);
+
+    size_t nRow() const override final { return pN; }
+    size_t nCol() const override final { return pN; }
+
+    double get(size_t row,size_t col) const override final {
+        int i=get_offset((int)row, (int)col);
+        return i>=0?pValues[i]:0;
+    }
+
+    void set(size_t row,size_t col,double value) override final;
+
+    void zero() override final {
+        std::fill(pValues.begin(),pValues.end(),0.0);
+    }
+
+    size_t nNz() const { return pValues.size(); }
+
+    // direct access to compact representation
+
+    const int *rowOffsets() const { return &pRowOff[0]; }
+    const int *colIndices() const { return &pCols[0]; }
+    const double *values() const { return &pValues[0]; }
+
+    // y = Ax
+    void multiply(const double *x, double *y) const;
+
+private:
+    int get_offset(int i, int j) const {
+        const int *c0 = &pCols.front();
+        const int *cb = c0+pRowOff[i];
+        const int *ce = c0+pRowOff[i+1];
+
+        const int *c = std::lower_bound(cb, ce, j);
+        if (c==ce || *c!=j)
+            return -1;
+        else return c-c0;
+    }
+
+    size_t pN;
+    std::vector<int> pRowOff;
+    std::vector<int> pCols;
+    std::vector<double> pValues;
+};
+
+// Preconditioned conjugate gradient solver for symmetric positive
+// definite systems, preconditioned with a zero fill-in incomplete
+// Cholesky factorization.
+//
+// Rows with no off-diagonal entries (voltage clamped vertices) are
+// solved directly and left out of the iteration, so the system only
+// needs to be symmetric over the remaining rows and columns.
+//
+// Each solve starts from the solution of the previous one.
+
+class PCGSystem
+{
+public:
+    typedef CSRMatrix matrix_type;
+    typedef VVector vector_type;
+
+    // Stop when the residual norm is at most reltol times the norm of b,
+    // or throw after maxiter iterations (0: the number of rows).
+    explicit PCGSystem(const std::vector<std::vector<int>> &rows,
+                       double reltol = 1.0e-10, size_t maxiter = 0);
+
+    const matrix_type &A() const { return pA; }
+    matrix_type &A() { return pA; }
+
+    const vector_type &b() const { return pb_view; }
+    vector_type &b() { return pb_view; }
+
+    const vector_type &x() const { return px_view; }
+
+    // Factorize the preconditioner for the current A, then solve.
+    void solve();
+
+    // Solve for the current b with the preconditioner of the last solve().
+    void resolve();
+
+    // Iterations taken and final residual norm of the last solve.
+    size_t iterations() const { return pIter; }
+    double residual() const { return pResidual; }
+
+private:
+    void _factorize();
+    void _iterate();
+
+    // z = M^-1 r
+    void _precondition(const double *r, double *z) const;
+
+    size_t pN;
+    matrix_type pA;
+    std::vector<double> pb;
+    std::vector<double> px;
+    vector_type pb_view;
+    vector_type px_view;
+
+    double pRelTol;
+    size_t pMaxIter;
+
+    // True for rows solved directly.
+    std::vector<char> pFixed;
+
+    // Incomplete Cholesky factor L, lower triangle by row, diagonal last.
+    std::vector<int> pLRowOff;
+    std::vector<int> pLCols;
+    std::vector<double> pLValues;
+    bool pFactored;
+
+    // work space
+    std::vector<double> pr, pz, pp, pq;
+
+    size_t pIter;
+    double pResidual;
+};
+
+}}} // namespace steps::solver::efield
+
+#endif // ndef STEPS_SOLVER_EFIELD_PCGSYSTEM_HPP
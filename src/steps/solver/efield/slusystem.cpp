@@ -111,13 +111,23 @@ SLUSystem::SLUSystem(const sparsity_template &S, MPI_Comm mpi_comm):
 SLUSystem::~SLUSystem() {}
 
 void SLUSystem::solve() {
+    _solve(true);
+}
+
+void SLUSystem::resolve() {
+    _solve(!slu->factored);
+}
+
+void SLUSystem::_solve(bool refactor) {
     // use copy of A...
     SLU_NCMatrix Abis(pA);
 
     supermatrix_nc_view slu_A(Abis);
     std::copy(pb.begin(),pb.end(),px.begin());
 
-    if (!slu->factored)
+    if (!refactor)
+        slu->options.Fact = FACTORED;
+    else if (!slu->factored)
         slu->options.Fact = DOFACT;
     else if (slu->keepperm)
         slu->options.Fact = SamePattern_SameRowPerm;
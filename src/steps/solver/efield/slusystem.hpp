@@ -178,6 +178,9 @@ public:
     const vector_type &x() const { return px_view; }
 
     void solve();
+
+    // Solve for the current b with the factors of the last solve().
+    void resolve();
     
     // query solver stats, error
     double berr() const { return pBerr; }
@@ -189,6 +192,8 @@ public:
     SLUSolverStats solver_stats_global() const { return SLUSolverStats(); }
 
 private:
+    void _solve(bool refactor);
+
     int pN;
     SLU_NCMatrix pA;
     std::vector<double> pb, px;
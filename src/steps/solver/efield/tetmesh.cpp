@@ -39,6 +39,14 @@
 #include <queue>
 #include <fstream>
 #include <time.h>       /* time_t, struct tm, difftime, time, mktime */
+#include <cstdint>
+#include <cstdio>
+#include <cstdlib>
+#include <exception>
+#include <iomanip>
+#include <thread>
+#include <sys/stat.h>
+#include <unistd.h>
 
 // STEPS headers.
 #include "steps/common.h"
@@ -469,161 +477,299 @@ std::vector<double> sefield::TetMesh::centerOfMass(void)
 
 ////////////////////////////////////////////////////////////////////////////////
 
-void sefield::TetMesh::axisOrderElements(uint opt_method, std::string const & opt_file_name, double search_percent)
+namespace {
+
+// Vertex adjacency in compressed form, indexed by the vertex indices
+// current when it is built.
+struct Adjacency
 {
+    std::vector<uint> ptr;
+    std::vector<uint> idx;
 
-    // Now this method provides a choice between Stefan and Robert's method
-    // and the new method by Iain. The original method is fast and suffices for
-    // simple geometries, Iain's method is superior and important for complex
-    // geometries, but slow.
+    inline uint degree(uint v) const
+    { return ptr[v + 1] - ptr[v]; }
+};
 
-    if (opt_file_name != "")
+////////////////////////////////////////////////////////////////////////////////
+
+// Breadth first (Cuthill-McKee) ordering of the component containing
+// start: the unvisited neighbours of each vertex are appended in order of
+// increasing degree. Vertices already marked in visited are skipped.
+void cm_component(Adjacency const & adj, uint start,
+                  std::vector<char> & visited, std::vector<uint> & order)
+{
+    std::vector<std::pair<uint, uint> > nbrs;
+    uint head = order.size();
+    visited[start] = 1;
+    order.push_back(start);
+    while (head < order.size())
     {
-        std::fstream opt_file;
+        uint v = order[head++];
+        nbrs.clear();
+        for (uint i = adj.ptr[v]; i < adj.ptr[v + 1]; ++i)
+        {
+            uint n = adj.idx[i];
+            if (visited[n]) continue;
+            visited[n] = 1;
+            nbrs.push_back(std::make_pair(adj.degree(n), n));
+        }
+        std::stable_sort(nbrs.begin(), nbrs.end(),
+            [](std::pair<uint, uint> const & a, std::pair<uint, uint> const & b)
+            { return a.first < b.first; });
+        for (uint i = 0; i < nbrs.size(); ++i)
+        {
+            order.push_back(nbrs[i].second);
+        }
+    }
+}
 
-        opt_file.open(opt_file_name.c_str(),
-                    std::fstream::in | std::fstream::binary);
-        opt_file.seekg(0);
+////////////////////////////////////////////////////////////////////////////////
 
-        uint nelems = 0;
-        opt_file.read((char*)&nelems, sizeof(uint));
-        if (pElements.size() != nelems) {
-            std::ostringstream os;
-            os << "optimal data mismatch with simulator parameters: sefield::Tetmesh::nelems, ";
-            os << nelems << ":" << pElements.size();
-            throw steps::ArgErr(os.str());
+// Level structure rooted at root. Returns the eccentricity of root and
+// fills last_level with the vertices of the deepest level.
+uint bfs_levels(Adjacency const & adj, uint root, std::vector<int> & level,
+                std::vector<uint> & queue, std::vector<uint> & last_level)
+{
+    std::fill(level.begin(), level.end(), -1);
+    queue.clear();
+    queue.push_back(root);
+    level[root] = 0;
+    for (uint head = 0; head < queue.size(); ++head)
+    {
+        uint v = queue[head];
+        for (uint i = adj.ptr[v]; i < adj.ptr[v + 1]; ++i)
+        {
+            uint n = adj.idx[i];
+            if (level[n] >= 0) continue;
+            level[n] = level[v] + 1;
+            queue.push_back(n);
         }
-        opt_file.read((char*)pVertexPerm, sizeof(uint) * nelems);
+    }
+    uint depth = level[queue.back()];
+    last_level.clear();
+    for (uint i = queue.size(); i-- > 0 && level[queue[i]] == (int)depth;)
+    {
+        last_level.push_back(queue[i]);
+    }
+    return depth;
+}
 
-        VertexElementPVec elements_temp = pElements;
+////////////////////////////////////////////////////////////////////////////////
 
-        for (uint vidx = 0; vidx < nelems; ++vidx)
+// Pseudo-peripheral vertex of the component containing start (George and
+// Liu): move to a minimum degree vertex of the deepest level until the
+// eccentricity stops growing. The deepest level of the final root is
+// returned in last_level, sorted by degree.
+uint pseudo_peripheral(Adjacency const & adj, uint start, std::vector<uint> & last_level)
+{
+    std::vector<int> level(adj.ptr.size() - 1);
+    std::vector<uint> queue;
+    uint root = start;
+    uint depth = bfs_levels(adj, root, level, queue, last_level);
+    while (true)
+    {
+        uint cand = last_level[0];
+        for (uint i = 1; i < last_level.size(); ++i)
         {
-            VertexElementP vep = elements_temp[vidx];
-            // sanity check
-            assert(vep->getIDX() == vidx);
-            uint new_idx = pVertexPerm[vidx];
-            pElements[new_idx] = vep;
+            if (adj.degree(last_level[i]) < adj.degree(cand)) cand = last_level[i];
         }
+        std::vector<uint> cand_last;
+        uint cand_depth = bfs_levels(adj, cand, level, queue, cand_last);
+        if (cand_depth <= depth) break;
+        root = cand;
+        depth = cand_depth;
+        last_level.swap(cand_last);
+    }
+    std::stable_sort(last_level.begin(), last_level.end(),
+        [&adj](uint a, uint b) { return adj.degree(a) < adj.degree(b); });
+    last_level.insert(last_level.begin(), root);
+    return root;
+}
 
-        reindexElements();
-        reordered();
-        opt_file.close();
-        return;
+////////////////////////////////////////////////////////////////////////////////
 
+// Cuthill-McKee ordering of all vertices, starting from start. Further
+// components start from a pseudo-peripheral vertex.
+void cm_order(Adjacency const & adj, uint start,
+              std::vector<char> & visited, std::vector<uint> & order)
+{
+    uint nverts = adj.ptr.size() - 1;
+    std::fill(visited.begin(), visited.end(), 0);
+    order.clear();
+    order.reserve(nverts);
+    cm_component(adj, start, visited, order);
+    for (uint v = 0; v < nverts && order.size() < nverts; ++v)
+    {
+        if (visited[v]) continue;
+        std::vector<uint> last_level;
+        cm_component(adj, pseudo_peripheral(adj, v, last_level), visited, order);
     }
+}
 
+////////////////////////////////////////////////////////////////////////////////
 
-    if (opt_method == 2)
+// Half-bandwidth of the matrix when vertex order[i] is given index i.
+// Stops early once the width exceeds cutoff.
+uint bandwidth(Adjacency const & adj, std::vector<uint> const & order,
+               std::vector<uint> & pos, uint cutoff)
+{
+    for (uint i = 0; i < order.size(); ++i)
     {
-        // The breadth first search with Cuthill-McKee improvement
-
-        uint pNVerts = pElements.size();
+        pos[order[i]] = i;
+    }
+    uint width = 0;
+    for (uint v = 0; v < order.size(); ++v)
+    {
+        for (uint i = adj.ptr[v]; i < adj.ptr[v + 1]; ++i)
+        {
+            uint n = adj.idx[i];
+            uint d = (pos[v] > pos[n]) ? pos[v] - pos[n] : pos[n] - pos[v];
+            if (d > width)
+            {
+                width = d;
+                if (width > cutoff) return width;
+            }
+        }
+    }
+    return width;
+}
 
+////////////////////////////////////////////////////////////////////////////////
 
-        // the best vertex(narrowest width)
-        uint bestone = 0;
-        uint bestwidth = pNVerts;
+// Cuthill-McKee order from each candidate start vertex, spread over the
+// available hardware threads. Returns the index in cands of the narrowest
+// ordering (the first one on ties) and its order and width.
+uint best_cm_start(Adjacency const & adj, std::vector<uint> const & cands,
+                   std::vector<uint> & best_order, uint & best_width)
+{
+    uint nverts = adj.ptr.size() - 1;
+    uint nthreads = std::max(1u, std::thread::hardware_concurrency());
+    nthreads = std::min<uint>(nthreads, cands.size());
 
-        std::vector<VertexElement*> orig_indices = pElements;
+    std::vector<uint> t_best(nthreads, cands.size());
+    std::vector<uint> t_width(nthreads, nverts);
+    std::vector<std::exception_ptr> t_error(nthreads);
 
-        stringstream ss;
-        ss << "\n\n-- " << search_percent << "%  Samples of breadth first search --" << std::endl;
-        cout << ss.str() << endl;
+    auto worker = [&](uint t)
+    {
+        try
+        {
+            std::vector<char> visited(nverts);
+            std::vector<uint> order;
+            std::vector<uint> pos(nverts);
+            for (uint c = t; c < cands.size(); c += nthreads)
+            {
+                cm_order(adj, cands[c], visited, order);
+                uint width = bandwidth(adj, order, pos, t_width[t]);
+                if (width < t_width[t] || t_best[t] == cands.size())
+                {
+                    t_best[t] = c;
+                    t_width[t] = width;
+                }
+            }
+        }
+        catch (...)
+        {
+            t_error[t] = std::current_exception();
+        }
+    };
 
-        //time_t btime;
-        //time_t etime;
-        //time(&btime);
+    std::vector<std::thread> threads;
+    for (uint t = 1; t < nthreads; ++t)
+    {
+        threads.push_back(std::thread(worker, t));
+    }
+    worker(0);
+    for (uint t = 0; t < threads.size(); ++t)
+    {
+        threads[t].join();
+    }
+    for (uint t = 0; t < nthreads; ++t)
+    {
+        if (t_error[t]) std::rethrow_exception(t_error[t]);
+    }
 
-        for (uint vidx = 0; vidx < pNVerts; vidx += 100/search_percent)
+    uint best = cands.size();
+    best_width = nverts;
+    for (uint t = 0; t < nthreads; ++t)
+    {
+        if (t_width[t] < best_width || (t_width[t] == best_width && t_best[t] < best))
         {
-            set<VertexElement*> verteleset = set<VertexElement*>();
-            vector<VertexElement*> vertelevec = vector<VertexElement*>();
-            queue<VertexElement*> vertelqueue = queue<VertexElement*>();
+            best = t_best[t];
+            best_width = t_width[t];
+        }
+    }
 
-            verteleset.insert(orig_indices[vidx]);
-            vertelevec.push_back(orig_indices[vidx]);
-            uint ve0ncons = orig_indices[vidx]->getNCon();
-            VertexElement ** ve0neighbs = orig_indices[vidx]->getNeighbours();
+    std::vector<char> visited(nverts);
+    cm_order(adj, cands[best], visited, best_order);
+    return best;
+}
 
-            fill_ve_vec(verteleset, vertelevec, vertelqueue, ve0ncons, ve0neighbs);
-            pElements.clear();
+////////////////////////////////////////////////////////////////////////////////
 
-            vector<VertexElement*>::iterator vertele_end = vertelevec.end();
-            uint ielt = 0;
+// Directory of the automatic ordering cache: $STEPS_CACHE_DIR, or
+// $HOME/.cache/steps. An empty STEPS_CACHE_DIR disables the cache.
+std::string cache_dir(void)
+{
+    const char * dir = getenv("STEPS_CACHE_DIR");
+    if (dir != 0) return std::string(dir);
+
+    const char * home = getenv("HOME");
+    if (home == 0 || home[0] == '\0') return std::string();
+    std::string cache = std::string(home) + "/.cache";
+    mkdir(cache.c_str(), 0755);
+    cache += "/steps";
+    mkdir(cache.c_str(), 0755);
+    return cache;
+}
 
-            for (vector<VertexElement*>::iterator vertele = vertelevec.begin(); vertele != vertele_end; ++vertele)
-            {
-                pElements.push_back(*vertele);
-                pVertexPerm[(*vertele)->getIDX()]=ielt;
-                ielt++;
-            }
+}
 
-            // Note: this will reorder the vertex indices as we go- not a problem in this loop
-            // but they must be reset for the final index setting to work
-            reindexElements();
+////////////////////////////////////////////////////////////////////////////////
 
-            uint maxdi = 0;
-            for (int iv = 0; iv < pNVerts; ++iv)
-            {
-                VertexElement* ve = getVertex(iv);
-                int ind = ve->getIDX();
+void sefield::TetMesh::axisOrderElements(uint opt_method, std::string const & opt_file_name, double search_percent)
+{
 
-                for (int i = 0; i < ve->getNCon(); ++i)
-                {
-                    int inbr = ve->nbrIdx(i);
-                    int di = ind - inbr;
-                    if (di < 0)
-                    {
-                        di = -di;
-                    }
-                    if (di > maxdi)
-                    {
-                        maxdi = di;
-                    }
-                }
-            }
-            if (maxdi < bestwidth)
-            {
-                bestone = vidx;
-                bestwidth = maxdi;
-                //cout << "\nOriginal vertex "<< vidx << " gives banded matrix half-width " << maxdi;
-            }
-        }
+    // Now this method provides a choice between Stefan and Robert's method
+    // and the new method by Iain. The original method is fast and suffices for
+    // simple geometries, Iain's method is superior and important for complex
+    // geometries, but slow. Method 3 (reverse Cuthill-McKee from a
+    // pseudo-peripheral vertex) gives a similar width to Iain's method at a
+    // fraction of the cost.
 
-        // reset the vertex indices to their original value: important
-        for (uint v = 0; v < pNVerts; ++v)
+    if (opt_file_name != "")
+    {
+        if (!loadOptimal(opt_file_name, true))
         {
-            orig_indices[v]->setIDX(v);
+            std::ostringstream os;
+            os << "Unable to read optimal data from file " << opt_file_name << ".\n";
+            throw steps::ArgErr(os.str());
         }
+        return;
+    }
 
-        set<VertexElement*> verteleset = set<VertexElement*>();
-        vector<VertexElement*> vertelevec = vector<VertexElement*>();
-        queue<VertexElement*> vertelqueue = queue<VertexElement*>();
-
-        verteleset.insert(orig_indices[bestone]);
-        vertelevec.push_back(orig_indices[bestone]);
-        uint ve0ncons = orig_indices[bestone]->getNCon();
-        VertexElement ** ve0neighbs = orig_indices[bestone]->getNeighbours();
+    if (opt_method != 1 && opt_method != 2 && opt_method != 3)
+    {
+        std::ostringstream os;
+        os << "Unknown optimization method.\n";
+        throw steps::ArgErr(os.str());
+    }
 
-        fill_ve_vec(verteleset, vertelevec, vertelqueue, ve0ncons, ve0neighbs);
-        pElements.clear();
+    uint nverts = pElements.size();
 
-        vector<VertexElement*>::iterator vertele_end = vertelevec.end();
-        uint ielt = 0;
-        for (vector<VertexElement*>::iterator vertele = vertelevec.begin(); vertele != vertele_end; ++vertele)
+    // Orderings that search over start vertices are cached, keyed by the
+    // connectivity of the mesh, so that a mesh is only searched once.
+    std::string cache_file;
+    if (opt_method != 1 && nverts != 0)
+    {
+        cache_file = cacheFileName(opt_method, search_percent);
+        if (cache_file != "" && loadOptimal(cache_file, false))
         {
-            pElements.push_back(*vertele);
-            pVertexPerm[(*vertele)->getIDX()]=ielt;
-            ielt++;
+            return;
         }
-
-        //time(&etime);
-        //std::cout << "\nTime taken: "<< difftime(etime, btime) << std::endl;
     }
-    // / / / / / / / / / / / /  / / / / / / / / / / / / / / / / / / / / / / //
 
-    else if (opt_method == 1)
+    if (opt_method == 1)
     {
         //time_t btime;
         //time_t etime;
@@ -717,32 +863,204 @@ void sefield::TetMesh::axisOrderElements(uint opt_method, std::string const & op
     }
     else
     {
-        std::ostringstream os;
-        os << "Unknown optimization method.\n";
-        throw steps::ArgErr(os.str());
-    }
+        Adjacency adj;
+        adj.ptr.resize(nverts + 1, 0);
+        for (uint v = 0; v < nverts; ++v)
+        {
+            VertexElement * ve = pElements[v];
+            adj.ptr[v + 1] = adj.ptr[v] + ve->getNCon();
+            for (uint i = 0; i < ve->getNCon(); ++i)
+            {
+                adj.idx.push_back(ve->nbrIdx(i));
+            }
+        }
+
+        std::vector<uint> cands;
+        if (opt_method == 2)
+        {
+            // The breadth first search with Cuthill-McKee improvement,
+            // from every (100/search_percent)th vertex.
+            stringstream ss;
+            ss << "\n\n-- " << search_percent << "%  Samples of breadth first search --" << std::endl;
+            cout << ss.str() << endl;
+
+            double step = std::max(1.0, 100.0 / search_percent);
+            for (uint vidx = 0; vidx < nverts; vidx += step)
+            {
+                cands.push_back(vidx);
+            }
+        }
+        else
+        {
+            // Reverse Cuthill-McKee. The candidates are the
+            // pseudo-peripheral vertex, the other vertices of its deepest
+            // level and a sample of 48 vertices spread over the mesh.
+            pseudo_peripheral(adj, 0, cands);
+            if (cands.size() > 16) cands.resize(16);
+            uint stride = std::max(1u, nverts / 48);
+            for (uint vidx = 0; vidx < nverts; vidx += stride)
+            {
+                cands.push_back(vidx);
+            }
+        }
+
+        std::vector<uint> order;
+        uint width = 0;
+        best_cm_start(adj, cands, order, width);
+        if (opt_method == 3)
+        {
+            std::reverse(order.begin(), order.end());
+        }
 
+        std::vector<VertexElement*> orig_indices = pElements;
+        for (uint i = 0; i < nverts; ++i)
+        {
+            pElements[i] = orig_indices[order[i]];
+            pVertexPerm[order[i]] = i;
+        }
+    }
 
     reindexElements();
     reordered();
 
+    if (cache_file != "")
+    {
+        // Write to a private file first: several processes may be
+        // setting up the same mesh.
+        std::ostringstream tmp;
+        tmp << cache_file << "." << getpid() << ".tmp";
+        if (saveOptimal(tmp.str()))
+        {
+            if (rename(tmp.str().c_str(), cache_file.c_str()) != 0)
+            {
+                remove(tmp.str().c_str());
+            }
+        }
+    }
+
 }
 
 ///////////////////////////////////////////////////////////////////////////////
 
-void sefield::TetMesh::saveOptimal(std::string const & opt_file_name)
+bool sefield::TetMesh::saveOptimal(std::string const & opt_file_name)
 {
 
     std::fstream opt_file;
 
     opt_file.open(opt_file_name.c_str(),
                 std::fstream::out | std::fstream::binary | std::fstream::trunc);
+    if (!opt_file.is_open()) return false;
+
     uint nelems = pElements.size();
     opt_file.write((char*)&nelems, sizeof(uint));
 
     opt_file.write((char*)pVertexPerm, sizeof(uint) * nelems);
+    bool ok = opt_file.good();
     opt_file.close();
+    return ok;
+
+}
+
+///////////////////////////////////////////////////////////////////////////////
+
+bool sefield::TetMesh::loadOptimal(std::string const & opt_file_name, bool check_size)
+{
+    std::fstream opt_file;
+
+    opt_file.open(opt_file_name.c_str(),
+                std::fstream::in | std::fstream::binary);
+    if (!opt_file.is_open()) return false;
+    opt_file.seekg(0);
+
+    uint nelems = 0;
+    opt_file.read((char*)&nelems, sizeof(uint));
+    if (pElements.size() != nelems) {
+        if (!check_size) return false;
+        std::ostringstream os;
+        os << "optimal data mismatch with simulator parameters: sefield::Tetmesh::nelems, ";
+        os << nelems << ":" << pElements.size();
+        throw steps::ArgErr(os.str());
+    }
+
+    std::vector<uint> perm(nelems);
+    opt_file.read((char*)perm.data(), sizeof(uint) * nelems);
+    if (!opt_file.good()) return false;
+    opt_file.close();
+
+    // Reject anything that is not a permutation, e.g. a truncated
+    // cache file.
+    std::vector<char> seen(nelems, 0);
+    for (uint vidx = 0; vidx < nelems; ++vidx)
+    {
+        if (perm[vidx] >= nelems || seen[perm[vidx]]) return false;
+        seen[perm[vidx]] = 1;
+    }
+
+    std::copy(perm.begin(), perm.end(), pVertexPerm);
+
+    VertexElementPVec elements_temp = pElements;
+
+    for (uint vidx = 0; vidx < nelems; ++vidx)
+    {
+        VertexElementP vep = elements_temp[vidx];
+        // sanity check
+        assert(vep->getIDX() == vidx);
+        uint new_idx = pVertexPerm[vidx];
+        pElements[new_idx] = vep;
+    }
+
+    reindexElements();
+    reordered();
+    return true;
+}
+
+///////////////////////////////////////////////////////////////////////////////
+
+std::string sefield::TetMesh::cacheFileName(uint opt_method, double search_percent)
+{
+    std::string dir = cache_dir();
+    if (dir == "") return dir;
+
+    // 64-bit FNV-1a over the method, its parameters and the vertex
+    // adjacency in the original vertex order.
+    uint64_t hash = 14695981039346656037ULL;
+    auto mix = [&hash](uint64_t value)
+    {
+        for (uint b = 0; b < 8; ++b)
+        {
+            hash ^= (value >> (8 * b)) & 0xff;
+            hash *= 1099511628211ULL;
+        }
+    };
+
+    mix(opt_method);
+    if (opt_method == 2)
+    {
+        uint64_t bits;
+        memcpy(&bits, &search_percent, sizeof(bits));
+        mix(bits);
+    }
+    mix(pElements.size());
+    std::vector<uint> nbrs;
+    for (uint v = 0; v < pElements.size(); ++v)
+    {
+        VertexElement * ve = pElements[v];
+        nbrs.clear();
+        for (uint i = 0; i < ve->getNCon(); ++i)
+        {
+            nbrs.push_back(ve->nbrIdx(i));
+        }
+        std::sort(nbrs.begin(), nbrs.end());
+        mix(nbrs.size());
+        for (uint i = 0; i < nbrs.size(); ++i)
+        {
+            mix(nbrs[i]);
+        }
+    }
 
+    std::ostringstream os;
+    os << dir << "/efield_order_" << std::hex << std::setw(16) << std::setfill('0') << hash << ".bin";
+    return os.str();
 }
 
 ////////////////////////////////////////////////////////////////////////////////
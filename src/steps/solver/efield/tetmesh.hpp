@@ -300,9 +300,27 @@ public:
     /// Originally from Mesh.
     /// Iain: big changes here
     ///
+    /// Renumber the vertices to reduce the bandwidth of the system
+    /// matrix. opt_method 1 orders along the principal axis, 2 tries a
+    /// Cuthill-McKee ordering from search_percent % of the vertices and
+    /// 3 is reverse Cuthill-McKee from a pseudo-peripheral vertex. The
+    /// orderings of methods 2 and 3 are cached in $STEPS_CACHE_DIR
+    /// (default $HOME/.cache/steps; set it empty to disable), keyed by
+    /// the mesh connectivity.
+    ///
     void axisOrderElements(uint opt_method, std::string const & opt_file_name ="", double search_percent=100.0);
 
-    void saveOptimal(std::string const & opt_file_name);
+    /// Write the vertex permutation to a file. Returns false if the
+    /// file could not be written.
+    ///
+    bool saveOptimal(std::string const & opt_file_name);
+
+    /// Apply a vertex permutation saved with saveOptimal(). Returns false
+    /// if the file can not be read or does not hold a permutation; a
+    /// permutation of the wrong size throws steps::ArgErr if check_size
+    /// is true.
+    ///
+    bool loadOptimal(std::string const & opt_file_name, bool check_size);
 
     void fill_ve_vec(set<VertexElement*> & veset, vector<VertexElement*> & vevec, queue<VertexElement*> & vequeue, uint ncons, VertexElement ** nbrs);
 
@@ -362,6 +380,11 @@ private:
     ///
     VertexConnection * newConnection(VertexElement *, VertexElement *);
 
+    /// Path of the ordering cache file for this mesh and method, or an
+    /// empty string if caching is disabled.
+    ///
+    std::string cacheFileName(uint opt_method, double search_percent);
+
     ////////////////////////////////////////////////////////////////////////
 
     ////////////////////////////////////////////////////////////////////////
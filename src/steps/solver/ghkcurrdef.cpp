@@ -39,6 +39,7 @@
 
 // STEPS headers.
 #include "steps/common.h"
+#include "steps/math/constants.hpp"
 #include "steps/math/ghk.hpp"
 #include "steps/solver/types.hpp"
 #include "steps/error.hpp"
@@ -50,6 +51,17 @@
 
 namespace ssolver = steps::solver;
 namespace smod = steps::model;
+namespace smath = steps::math;
+
+////////////////////////////////////////////////////////////////////////////////
+
+// Temperature (in Kelvin) at which the GHK flux table is computed. Since
+// the flux equation depends on V/T only, a lookup at temperature T uses
+// the potential V * GHK_TAB_TEMP / T.
+static const double GHK_TAB_TEMP = 293.15;
+
+// Half-width (in volts) of the central difference of GHKslope.
+static const double GHK_SLOPE_DV = 1.0e-5;
 
 ////////////////////////////////////////////////////////////////////////////////
 
@@ -64,6 +76,10 @@ ssolver::GHKcurrdef::GHKcurrdef(Statedef * sd, uint gidx, smod::GHKcurr * ghk)
 , pVirtual_oconc()
 , pPerm(0.0)
 , pValence(0)
+, pVMin(0.0)
+, pVMax(0.0)
+, pDV(0.0)
+, pVTab()
 , pSpec_DEP(0)
 , pSpec_CHANSTATE(GIDX_UNDEFINED)
 , pSpec_ION(GIDX_UNDEFINED)
@@ -123,6 +139,11 @@ ssolver::GHKcurrdef::GHKcurrdef(Statedef * sd, uint gidx, smod::GHKcurr * ghk)
         pPerm = perm;
     }
 
+    pVMin = ghk->_getVMin();
+    pVMax = ghk->_getVMax();
+    pDV = ghk->_getDV();
+    _fillVTab();
+
     uint nspecs = pStatedef->countSpecs();
     if (nspecs == 0) return; // Would be weird, but okay.
     pSpec_DEP = new int[nspecs];
@@ -163,6 +184,66 @@ void ssolver::GHKcurrdef::restore(std::fstream & cp_file)
     cp_file.read((char*)&pPerm, sizeof(double));
     cp_file.read((char*)&pValence, sizeof(int));
     cp_file.read((char*)&pVshift, sizeof(double));
+
+    _fillVTab();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void ssolver::GHKcurrdef::_fillVTab(void)
+{
+    pVTab.clear();
+    if (pDV <= 0.0) return;
+
+    uint tablesize = static_cast<uint>(std::floor((pVMax - pVMin) / pDV)) + 1;
+    if (tablesize < 2) tablesize = 2;
+    pVTab.resize(tablesize);
+
+    double zfrt = (static_cast<double>(pValence) * smath::FARADAY)
+                  / (smath::GAS_CONSTANT * GHK_TAB_TEMP);
+    for (uint i = 0; i < tablesize; ++i)
+    {
+        double u = zfrt * (pVMin + i * pDV);
+        pVTab[i] = (u == 0.0) ? 1.0 : (u / -std::expm1(-u));
+    }
+    // Interpolate only between tabulated points.
+    pVMax = pVMin + (tablesize - 1) * pDV;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double ssolver::GHKcurrdef::GHKcurrent(double v, double T, double iconc,
+                                       double oconc) const
+{
+    v += pVshift;
+
+    double vtab = v * (GHK_TAB_TEMP / T);
+    if (pVTab.empty() || vtab < pVMin || vtab > pVMax)
+    {
+        return smath::GHKcurrent(pPerm, v, pValence, T, iconc, oconc);
+    }
+
+    double v2 = (vtab - pVMin) / pDV;
+    uint lvidx = static_cast<uint>(v2);
+    if (lvidx >= pVTab.size() - 1) lvidx = pVTab.size() - 2;
+    double r = v2 - lvidx;
+    double g = ((1.0 - r) * pVTab[lvidx]) + (r * pVTab[lvidx + 1]);
+
+    // With g = u/(1-exp(-u)) the flux equation is
+    // I = P z F (g iconc - (g - u) oconc).
+    double zf = static_cast<double>(pValence) * smath::FARADAY;
+    double u = (zf * v) / (smath::GAS_CONSTANT * T);
+    return pPerm * zf * ((g * iconc) - ((g - u) * oconc));
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double ssolver::GHKcurrdef::GHKslope(double v, double T, double iconc,
+                                     double oconc) const
+{
+    double ip = GHKcurrent(v + GHK_SLOPE_DV, T, iconc, oconc);
+    double im = GHKcurrent(v - GHK_SLOPE_DV, T, iconc, oconc);
+    return (ip - im) / (2.0 * GHK_SLOPE_DV);
 }
 
 ////////////////////////////////////////////////////////////////////////////////
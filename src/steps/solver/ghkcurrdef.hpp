@@ -126,6 +126,24 @@ public:
     inline int valence(void) const
     { return pValence; }
 
+    /// Return the single-channel current from the GHK flux equation.
+    ///
+    /// Equivalent to steps::math::GHKcurrent with this current's
+    /// permeability, valence and voltage-shift. Inside the voltage range
+    /// set with steps::model::GHKcurr::setVRange the voltage-dependent
+    /// part of the equation is interpolated from a table.
+    ///
+    /// \param v Membrane potential (in volts).
+    /// \param T Temperature (in Kelvin).
+    /// \param iconc Inner concentration of the ion (in mol/m^3).
+    /// \param oconc Outer concentration of the ion (in mol/m^3).
+    double GHKcurrent(double v, double T, double iconc, double oconc) const;
+
+    /// Return the single-channel conductance (in siemens), the derivative
+    /// of GHKcurrent with respect to the membrane potential, by a central
+    /// difference over GHK_SLOPE_DV.
+    double GHKslope(double v, double T, double iconc, double oconc) const;
+
     // Return the global index of the channel state
     uint chanstate(void) const;
 
@@ -143,6 +161,11 @@ private:
 
     ////////////////////////////////////////////////////////////////////////
 
+    // Fill pVTab for the current valence.
+    void _fillVTab(void);
+
+    ////////////////////////////////////////////////////////////////////////
+
     Statedef                          * pStatedef;
 
     // The global index of this ghk current.
@@ -183,6 +206,14 @@ private:
     // The ion valence, copied for calculation of the GHK flux
     int                                 pValence;
 
+    // Table of u/(1-exp(-u)), u = zFV/RT, at temperature GHK_TAB_TEMP
+    // over the potential range [pVMin, pVMax] in steps of pDV.
+    // Empty if the flux is not tabulated.
+    double                              pVMin;
+    double                              pVMax;
+    double                              pDV;
+    std::vector<double>                 pVTab;
+
     int *                                  pSpec_DEP;
 
     int *                                 pSpec_VOL_DEP;
@@ -26,6 +26,7 @@
 
 
 // Standard library & STL headers.
+#include <algorithm>
 #include <vector>
 
 // STEPS headers.
@@ -598,4 +599,62 @@ uint stex::Diff::updVecSize(void) const
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void stex::Diff::sampleDirections(steps::rng::RNG * rng, uint nmolcs, uint * moves,
+                                  uint threshold) const
+{
+    // Per-direction probabilities from the cumulative selector.
+    double p[4];
+    double prev_cdf = 0.0;
+    for (uint i = 0; i < 3; ++i)
+    {
+        p[i] = pCDFSelector[i] - prev_cdf;
+        prev_cdf = pCDFSelector[i];
+    }
+    // The selector does not store the last direction, whose probability
+    // is only known up to the rounding error of the cumulative sums; that
+    // error must not make a closed direction look open.
+    p[3] = 1.0 - prev_cdf;
+    if (p[3] < 1.0e-12) p[3] = 0.0;
+
+    // The last possible direction takes whatever is left over.
+    int last = 3;
+    while (last > 0 && p[last] <= 0.0) --last;
+
+    std::fill(moves, moves + 4, 0);
+
+    // A few molecules are cheaper to move one at a time.
+    if (nmolcs <= threshold)
+    {
+        for (uint m = 0; m < nmolcs; ++m)
+        {
+            double sel = rng->getUnfEE();
+            int iSel = 0;
+            while (iSel < last && sel >= pCDFSelector[iSel]) ++iSel;
+            ++moves[iSel];
+        }
+        return;
+    }
+
+    // Multinomial split by a chain of conditional binomials.
+    uint remaining = nmolcs;
+    double remaining_p = 1.0;
+    for (int i = 0; i <= last && remaining != 0; ++i)
+    {
+        if (p[i] <= 0.0) continue;
+        if (i == last)
+        {
+            moves[i] = remaining;
+            break;
+        }
+
+        double chance = p[i] / remaining_p;
+        if (chance >= 1.0) chance = 1.0;
+        moves[i] = rng->getBinom(remaining, chance);
+        remaining -= moves[i];
+        remaining_p -= p[i];
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 // END
@@ -98,6 +98,29 @@ public:
 
     uint updVecSize(void) const;
 
+    ////////////////////////////////////////////////////////////////////////
+    // OPERATOR SPLITTING SUPPORT
+    ////////////////////////////////////////////////////////////////////////
+
+    inline double getScaledDcst(void) const
+    { return pScaledDcst; }
+
+    inline steps::tetexact::Tet * getTet(void) const
+    { return pTet; }
+
+    inline uint getLigLidx(void) const
+    { return lidxTet; }
+
+    inline int getNeighbLidx(uint direction) const
+    { return pNeighbCompLidx[direction]; }
+
+    /// Split nmolcs molecules over the four directions with the
+    /// probabilities apply() uses for a single molecule, writing the
+    /// number of molecules per direction to moves[0..3]. Up to threshold
+    /// molecules, each direction is drawn separately as in apply().
+    void sampleDirections(steps::rng::RNG * rng, uint nmolcs, uint * moves,
+                          uint threshold = 0) const;
+
     ////////////////////////////////////////////////////////////////////////
 
     void setDiffBndActive(uint i, bool active);
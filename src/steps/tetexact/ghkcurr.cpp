@@ -232,8 +232,7 @@ double stex::GHKcurr::rate(steps::tetexact::Tetexact * solver)
     double v = solver->getTriV(pTri->idx());
     double T = solver->getTemp();
 
-    double flux = sm::GHKcurrent(pGHKcurrdef->perm(), v+pGHKcurrdef->vshift(), pGHKcurrdef->valence(),
-                                 T, iconc, oconc);
+    double flux = pGHKcurrdef->GHKcurrent(v, T, iconc, oconc);
 
     // Note: For a positive flux, this could be an efflux of +ve cations,
     // or an influx of -ve anions. Need to check the valence.
@@ -257,6 +256,28 @@ double stex::GHKcurr::rate(steps::tetexact::Tetexact * solver)
 
 ////////////////////////////////////////////////////////////////////////////////
 
+double stex::GHKcurr::conductance(double v, double T) const
+{
+    const uint gidxion = pGHKcurrdef->ion();
+    double voconc = pGHKcurrdef->voconc();
+
+    // Get concentrations in Molar units: convert to Mol/m^3
+    double iconc = (pTri->iTet()->conc(gidxion))*1.0e3;
+    double oconc = 0.0;
+
+    if (voconc < 0.0)  oconc = (pTri->oTet()->conc(gidxion))*1.0e3;
+    else  oconc = voconc*1.0e3;
+
+    ssolver::Patchdef * pdef = pTri->patchdef();
+    uint ghklidx = pdef->ghkcurrG2L(pGHKcurrdef->gidx());
+    uint cslidx = pdef->ghkcurr_chanstate(ghklidx);
+    double n = static_cast<double>(pTri->pools()[cslidx]);
+
+    return n * pGHKcurrdef->GHKslope(v, T, iconc, oconc);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 std::vector<stex::KProc*> const & stex::GHKcurr::apply(steps::rng::RNG * rng, double dt, double simtime)
 {
     stex::WmVol * itet = pTri->iTet();
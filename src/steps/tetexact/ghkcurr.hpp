@@ -89,6 +89,10 @@ public:
 
     double rate(steps::tetexact::Tetexact * solver);
 
+    /// Conductance (siemens) of the open channels at potential v and
+    /// temperature T: the derivative of the mean current with respect to v.
+    double conductance(double v, double T) const;
+
     // double rate(double v, double T);
     std::vector<KProc*> const & apply(steps::rng::RNG * rng, double dt, double simtime);
 
@@ -74,6 +74,13 @@ void stex::KProc::resetExtent(void)
 {
     rExtent = 0;
 }
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::KProc::incExtent(uint n)
+{
+    rExtent += n;
+}
 ////////////////////////////////////////////////////////////////////////////////
 
 void stex::KProc::resetCcst(void) const
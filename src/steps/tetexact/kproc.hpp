@@ -158,6 +158,9 @@ public:
     uint getExtent(void) const;
     void resetExtent(void);
 
+    /// Add n to the extent, for processes that are applied in bulk.
+    void incExtent(uint n);
+
     ////////////////////////////////////////////////////////////////////////
     /*
     // Return a pointer to the corresponding Reacdef Diffdef or SReacdef
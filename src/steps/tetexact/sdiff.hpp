@@ -99,6 +99,25 @@ public:
 
     uint updVecSize(void) const;
 
+    ////////////////////////////////////////////////////////////////////////
+    // OPERATOR SPLITTING SUPPORT
+    ////////////////////////////////////////////////////////////////////////
+
+    inline double getScaledDcst(void) const
+    { return pScaledDcst; }
+
+    inline steps::tetexact::Tri * getTri(void) const
+    { return pTri; }
+
+    inline uint getLigLidx(void) const
+    { return lidxTri; }
+
+    /// Split nmolcs molecules over the three directions with the
+    /// probabilities apply() uses for a single molecule, writing the
+    /// number of molecules per direction to moves[0..2]. Up to threshold
+    /// molecules, each direction is drawn separately as in apply().
+    void sampleDirections(steps::rng::RNG * rng, uint nmolcs, uint * moves,
+                          uint threshold = 0) const;
 
     ////////////////////////////////////////////////////////////////////////
 
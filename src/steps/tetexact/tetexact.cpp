@@ -113,6 +113,10 @@ stex::Tetexact::Tetexact(steps::model::Model * m, steps::wm::Geom * g, steps::rn
 , pEFoption(static_cast<EF_solver>(calcMembPot))
 , pTemp(0.0)
 , pEFDT(1.0e-5)
+, pEFDTControl()
+, pEFDTTris()
+, pEFDTTrisV()
+, pEFSemiImplicit(false)
 , pEFNVerts(0)
 , pEFVerts(0)
 , pEFNTris(0)
@@ -124,6 +128,7 @@ stex::Tetexact::Tetexact(steps::model::Model * m, steps::wm::Geom * g, steps::rn
 , pEFTri_GtoL()
 , pEFTet_GtoL()
 , pEFTri_LtoG()
+, pROICacheVersion(0)
 {
     if (rng() == 0)
     {
@@ -880,6 +885,12 @@ void stex::Tetexact::_setupEField(void)
     case EF_DV_BDSYS:
         pEField = make_EField<dVSolverBanded>();
         break;
+    case EF_DV_PCG:
+        pEField = make_EField<dVSolverPCG>();
+        break;
+    case EF_DV_BDSYS_LAPACK:
+        pEField = make_EField<dVSolverBanded>(true);
+        break;
     default:
         throw steps::ArgErr("Unsupported E-Field solver.");
     }
@@ -1009,7 +1020,23 @@ void stex::Tetexact::_setupEField(void)
         // This is added now for quicker iteration during run()
         // Extremely important for larger meshes, orders of magnitude times faster
         pEFTris_vec[eft] = pTris[triidx];
+
+        ssolver::Patchdef * pdef = pTris[triidx]->patchdef();
+        if (pdef->countVDepTrans() + pdef->countVDepSReacs() + pdef->countGHKcurrs() != 0)
+        {
+            pEFDTTris.push_back(eft);
+        }
+    }
+
+    // Without voltage-dependent processes, adaptive stepping follows
+    // the potential of the whole membrane.
+    if (pEFDTTris.empty())
+    {
+        for (uint eft = 0; eft < neftris(); ++eft) pEFDTTris.push_back(eft);
     }
+    pEFDTTrisV.resize(pEFDTTris.size());
+
+    _setupEFieldCurrents();
 
     pEField->initMesh(nefverts(), pEFVerts, neftris(), pEFTris, neftets(), pEFTets, memb->_getOpt_method(), memb->_getOpt_file_name(), memb->_getSearch_percent());
 }
@@ -1243,6 +1270,8 @@ void stex::Tetexact::reset(void)
 
     statedef()->resetTime();
     statedef()->resetNSteps();
+
+    pEFDTControl.clearHistory();
 }
 
 ////////////////////////////////////////////////////////////////////////////////
@@ -1280,6 +1309,14 @@ void stex::Tetexact::run(double endtime)
         // SSA before reaching the EField dt.
         while (statedef()->time() < endtime)
         {
+            // The maximum EField dt of this step. In adaptive mode the
+            // step is also kept from passing the endtime.
+            double max_ef_dt = pEFDT;
+            if (pEFDTControl.adaptive())
+            {
+                max_ef_dt = std::min(_nextEFieldDT(), endtime - statedef()->time());
+            }
+
             // The zero propensity
             double a0 = getA0();
             // We need a bool to check if the SSA contains no possible events. In
@@ -1288,10 +1325,10 @@ void stex::Tetexact::run(double endtime)
             double ssa_dt = 0.0;
             if (a0 != 0.0) ssa_dt = rng()->getExp(a0);
             else (ssa_on = false);
-            // Set the actual efield dt. This value will take a maximum pEFDT.
+            // Set the actual efield dt. This value will take a maximum max_ef_dt.
             double ef_dt = 0.0;
 
-            while (ssa_on && (ef_dt + ssa_dt) < pEFDT )
+            while (ssa_on && (ef_dt + ssa_dt) < max_ef_dt )
             {
                 stex::KProc * kp = _getNext();
                 if (kp == 0) break;
@@ -1303,7 +1340,7 @@ void stex::Tetexact::run(double endtime)
                 else (ssa_on = false);
 
             }
-            assert(ef_dt < pEFDT);
+            assert(ef_dt < max_ef_dt);
 
             // It's possible that ef_dt is zero here: ssa_dt is large, or has become large.
             // In that case print a warning but continue, running the EField simulation for EFDT
@@ -1317,35 +1354,29 @@ void stex::Tetexact::run(double endtime)
             if (ef_dt == 0.0)
             {
                 // This means that tau is larger than EField dt. We have no choice but to
-                // increase the state time by pEFDT.
-                ef_dt = pEFDT;
-                statedef()->incTime(pEFDT);
+                // increase the state time by max_ef_dt.
+                ef_dt = max_ef_dt;
+                statedef()->incTime(max_ef_dt);
             }
 
             // Now to perform the EField calculation. This means finding ohmic and GHK
             // currents from triangles during the ef_dt and applying these to the EField
             // object.
 
-            TriPVecCI eftri_end = pEFTris_vec.end();
-            uint tlidx = 0;
-            double sttime = statedef()->time();
+            _applyEFieldCurrents(ef_dt, statedef()->time());
             #ifdef SERIAL_EFIELD_DEBUG
             CLOG(DEBUG, "steps_debug") << "Received currents:\n";
-            #endif
-            for (TriPVecCI eft = pEFTris_vec.begin(); eft != eftri_end; ++eft)
+            for (uint tlidx = 0; tlidx < pEFNTris; tlidx++)
             {
-                double v = pEField->getTriV(tlidx);
-                double cur = (*eft)->computeI(v, ef_dt, sttime);
-                #ifdef SERIAL_EFIELD_DEBUG
-                if (cur != 0.0) {
-                    CLOG(DEBUG, "steps_debug") << "lid: " << tlidx << " cur: " << cur;
+                if (pEFTriI[tlidx] != 0.0) {
+                    CLOG(DEBUG, "steps_debug") << "lid: " << tlidx << " cur: " << pEFTriI[tlidx];
                 }
-                #endif
-                pEField->setTriI(tlidx, cur);
-                tlidx++;
             }
+            #endif
 
+            _beginEFieldStep();
             pEField->advance(ef_dt);
+            _endEFieldStep(ef_dt);
             
             #ifdef SERIAL_EFIELD_DEBUG
             std::vector<double> EFTrisV;
@@ -3459,6 +3490,179 @@ void stex::Tetexact::setEfieldDT(double efdt)
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void stex::Tetexact::setEfieldAdaptiveDT(bool adaptive, double dt_min, double dt_max, double dv_tol)
+{
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+    pEFDTControl.setAdaptive(adaptive, dt_min, dt_max, dv_tol, pEFDT);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::setEfieldSemiImplicit(bool implicit)
+{
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+    pEFSemiImplicit = implicit;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::_setupEFieldCurrents(void)
+{
+    uint ntris = neftris();
+
+    pEFOCPtr.assign(1, 0);
+    pEFGHKPtr.assign(1, 0);
+    for (uint eft = 0; eft < ntris; ++eft)
+    {
+        ssolver::Patchdef * pdef = pEFTris_vec[eft]->patchdef();
+        pEFOCPtr.push_back(pEFOCPtr.back() + pdef->countOhmicCurrs());
+        pEFGHKPtr.push_back(pEFGHKPtr.back() + pdef->countGHKcurrs());
+    }
+
+    uint nocs = pEFOCPtr.back();
+    pEFOCG.resize(nocs);
+    pEFOCERev.resize(nocs);
+    pEFOCCount.resize(nocs);
+    pEFOCTimeIntg.assign(nocs, 0.0);
+    pEFOCTimeUpd.assign(nocs, 0.0);
+
+    uint nghks = pEFGHKPtr.back();
+    pEFECharge.assign(nghks, 0);
+    pEFEChargeLast.assign(nghks, 0);
+
+    pEFTriV.assign(ntris, 0.0);
+    pEFTriI.assign(ntris, 0.0);
+    pEFTriG.assign(ntris, 0.0);
+
+    for (uint eft = 0; eft < ntris; ++eft)
+    {
+        stex::Tri * tri = pEFTris_vec[eft];
+        ssolver::Patchdef * pdef = tri->patchdef();
+        uint oc0 = pEFOCPtr[eft];
+        for (uint i = 0; i < pdef->countOhmicCurrs(); ++i)
+        {
+            ssolver::OhmicCurrdef * ocdef = pdef->ohmiccurrdef(i);
+            pEFOCG[oc0 + i] = ocdef->getG();
+            pEFOCERev[oc0 + i] = ocdef->getERev();
+            pEFOCCount[oc0 + i] = tri->pools() + pdef->ohmiccurr_chanstate(i);
+        }
+
+        // The vectors are not resized after this point.
+        uint ghk0 = pEFGHKPtr[eft];
+        tri->setEFieldStorage(pEFECharge.data() + ghk0, pEFEChargeLast.data() + ghk0,
+                              pEFOCTimeIntg.data() + oc0, pEFOCTimeUpd.data() + oc0);
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::_applyEFieldCurrents(double dt, double simtime)
+{
+    // Same computation as Tri::computeI, for all triangles at once.
+    pEField->getTriVs(pEFTriV.data());
+
+    uint ntris = neftris();
+    for (uint eft = 0; eft < ntris; ++eft)
+    {
+        double v = pEFTriV[eft];
+        double current = 0.0;
+        uint oc_end = pEFOCPtr[eft + 1];
+        for (uint k = pEFOCPtr[eft]; k < oc_end; ++k)
+        {
+            // First calculate the last little bit up to the simtime, then
+            // find the mean number of channels open over the dt
+            pEFOCTimeIntg[k] += (*pEFOCCount[k]) * (simtime - pEFOCTimeUpd[k]);
+            pEFOCTimeUpd[k] = simtime;
+            double n = pEFOCTimeIntg[k]/dt;
+            current += (n*pEFOCG[k])*(v-pEFOCERev[k]);
+        }
+
+        int efcharge = 0;
+        uint ghk_end = pEFGHKPtr[eft + 1];
+        for (uint k = pEFGHKPtr[eft]; k < ghk_end; ++k)
+        {
+            efcharge += pEFECharge[k];
+        }
+
+        // Convert charge to coulombs and find mean current
+        current += ((static_cast<double>(efcharge)*steps::math::E_CHARGE)/dt);
+        pEFTriI[eft] = current;
+    }
+
+    if (pEFSemiImplicit)
+    {
+        // Conductance of the same currents, for their linearisation
+        // around the present potential.
+        for (uint eft = 0; eft < ntris; ++eft)
+        {
+            double v = pEFTriV[eft];
+            double g = 0.0;
+            uint oc_end = pEFOCPtr[eft + 1];
+            for (uint k = pEFOCPtr[eft]; k < oc_end; ++k)
+            {
+                g += (pEFOCTimeIntg[k]/dt)*pEFOCG[k];
+            }
+
+            stex::Tri * tri = pEFTris_vec[eft];
+            uint nghkcurrs = tri->patchdef()->countGHKcurrs();
+            for (uint i = 0; i < nghkcurrs; ++i)
+            {
+                g += tri->ghkcurr(i)->conductance(v, pTemp);
+            }
+            pEFTriG[eft] = g;
+        }
+        pEField->setTriGs(pEFTriG.data());
+    }
+
+    // Equivalent of Tri::resetECharge and Tri::resetOCintegrals.
+    std::copy(pEFECharge.begin(), pEFECharge.end(), pEFEChargeLast.begin());
+    std::fill(pEFECharge.begin(), pEFECharge.end(), 0);
+    std::fill(pEFOCTimeIntg.begin(), pEFOCTimeIntg.end(), 0.0);
+
+    pEField->setTriIs(pEFTriI.data());
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::_beginEFieldStep(void)
+{
+    if (!pEFDTControl.adaptive()) return;
+
+    uint ntris = pEFDTTris.size();
+    for (uint i = 0; i < ntris; ++i)
+    {
+        pEFDTTrisV[i] = pEField->getTriV(pEFDTTris[i]);
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::_endEFieldStep(double dt)
+{
+    if (!pEFDTControl.adaptive()) return;
+
+    double max_dv = 0.0;
+    uint ntris = pEFDTTris.size();
+    for (uint i = 0; i < ntris; ++i)
+    {
+        double dv = std::fabs(pEField->getTriV(pEFDTTris[i]) - pEFDTTrisV[i]);
+        if (dv > max_dv) max_dv = dv;
+    }
+    pEFDTControl.update(dt, max_dv);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 double stex::Tetexact::_getTetV(uint tidx) const
 {
     if (efflag() != true)
@@ -4324,205 +4528,570 @@ void stex::Tetexact::getBatchTriCountsNP(unsigned int* indices, int input_size,
 
 ////////////////////////////////////////////////////////////////////////////////
 
-////////////////////////////////////////////////////////////////////////
-// ROI Data Access
-////////////////////////////////////////////////////////////////////////
+void stex::Tetexact::getBatchTriVsNP(unsigned int* indices, int input_size, double* values, int output_size) const
+{
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
 
-////////////////////////////////////////////////////////////////////////////////
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
 
-std::vector<double> stex::Tetexact::getROITetCounts(std::string ROI_id, std::string const & s) const
-{
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TET)) throw steps::ArgErr();
-    
-    uint *indices = mesh()->_getROIData(ROI_id);
-    int inputsize = mesh()->getROIDataSize(ROI_id);
-    std::vector<double> data(inputsize);
-    
-    getBatchTetCountsNP(indices, inputsize, s, const_cast<double*>(&data.front()), data.size());
-    return data;
-}
+    bool has_tri_warning = false;
+    std::ostringstream tri_not_assign;
 
-////////////////////////////////////////////////////////////////////////////////
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
 
-std::vector<double> stex::Tetexact::getROITriCounts(std::string ROI_id, std::string const & s) const
-{
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
-    
-    uint *indices = mesh()->_getROIData(ROI_id);
-    int inputsize = mesh()->getROIDataSize(ROI_id);
-    std::vector<double> data(inputsize);
-    
-    getBatchTriCountsNP(indices, inputsize, s, const_cast<double*>(&data.front()), data.size());
-    return data;
-}
+        if (tidx >= mesh()->countTris())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
 
-////////////////////////////////////////////////////////////////////////////////
+        int loctidx = pEFTri_GtoL[tidx];
+        if (loctidx == -1)
+        {
+            values[t] = 0.0;
+            tri_not_assign << tidx << " ";
+            has_tri_warning = true;
+            continue;
+        }
 
-void stex::Tetexact::getROITetCountsNP(std::string ROI_id, std::string const & s, double* counts, int output_size) const
-{
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TET)) throw steps::ArgErr();
-    
-    uint *indices = mesh()->_getROIData(ROI_id);
-    int inputsize = mesh()->getROIDataSize(ROI_id);
-    
-    getBatchTetCountsNP(indices, inputsize, s, counts, output_size);
+        values[t] = pEField->getTriV(loctidx);
+    }
+
+    if (has_tri_warning) {
+        std::cerr << "Warning: The following triangles have not been assigned to a membrane, fill in zeros at target positions:\n";
+        std::cerr << tri_not_assign.str() << "\n";
+    }
 }
 
 ////////////////////////////////////////////////////////////////////////////////
 
-void stex::Tetexact::getROITriCountsNP(std::string ROI_id, std::string const & s, double* counts, int output_size) const
+void stex::Tetexact::getBatchVertVsNP(unsigned int* indices, int input_size, double* values, int output_size) const
 {
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
-    
-    uint *indices = mesh()->_getROIData(ROI_id);
-    int inputsize = mesh()->getROIDataSize(ROI_id);
-    
-    getBatchTriCountsNP(indices, inputsize, s, counts, output_size);
-}
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
 
-////////////////////////////////////////////////////////////////////////////////
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
 
-double stex::Tetexact::getROIVol(std::string ROI_id) const
-{
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TET)) throw steps::ArgErr();
-    
-    uint *indices = mesh()->_getROIData(ROI_id);
-    int datasize = mesh()->getROIDataSize(ROI_id);
-    
-    double sum = 0.0;
-    for (uint t = 0; t < datasize; t++) {
-        sum += pTets[indices[t]]->vol();
+    bool has_vert_warning = false;
+    std::ostringstream vert_not_assign;
+
+    for (int v = 0; v < input_size; v++) {
+        uint vidx = indices[v];
+
+        if (vidx >= mesh()->countVertices())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no vertex with index " << vidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+
+        int locvidx = pEFVert_GtoL[vidx];
+        if (locvidx == -1)
+        {
+            values[v] = 0.0;
+            vert_not_assign << vidx << " ";
+            has_vert_warning = true;
+            continue;
+        }
+
+        values[v] = pEField->getVertV(locvidx);
+    }
+
+    if (has_vert_warning) {
+        std::cerr << "Warning: The following vertices have not been assigned to a conduction volume or membrane, fill in zeros at target positions:\n";
+        std::cerr << vert_not_assign.str() << "\n";
     }
-    return sum;
 }
 
 ////////////////////////////////////////////////////////////////////////////////
 
-double stex::Tetexact::getROIArea(std::string ROI_id) const
+void stex::Tetexact::getBatchTriIsNP(unsigned int* indices, int input_size, double* values, int output_size) const
 {
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
-    
-    uint *indices = mesh()->_getROIData(ROI_id);
-    int datasize = mesh()->getROIDataSize(ROI_id);
-    
-    double sum = 0.0;
-    for (uint t = 0; t < datasize; t++) {
-        sum += pTris[indices[t]]->area();
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+
+    bool has_tri_warning = false;
+    std::ostringstream tri_not_assign;
+
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+
+        if (tidx >= mesh()->countTris())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+
+        int loctidx = pEFTri_GtoL[tidx];
+        if (loctidx == -1)
+        {
+            values[t] = 0.0;
+            tri_not_assign << tidx << " ";
+            has_tri_warning = true;
+            continue;
+        }
+
+        values[t] = pEField->getTriI(loctidx);
+    }
+
+    if (has_tri_warning) {
+        std::cerr << "Warning: The following triangles have not been assigned to a membrane, fill in zeros at target positions:\n";
+        std::cerr << tri_not_assign.str() << "\n";
     }
-    return sum;
 }
 
 ////////////////////////////////////////////////////////////////////////////////
 
-double stex::Tetexact::getROICount(std::string ROI_id, std::string const & s) const
+void stex::Tetexact::getBatchTriOhmicIsNP(unsigned int* indices, int input_size, std::string const & oc, double* values, int output_size) const
 {
-    steps::tetmesh::ElementType type = mesh()->getROIType(ROI_id);
-    
-    uint *indices = mesh()->_getROIData(ROI_id);
-    int datasize = mesh()->getROIDataSize(ROI_id);
-    
-    double sum = 0.0;
-    
-    if (type == steps::tetmesh::ELEM_TRI) {
-        bool has_tri_warning = false;
-        bool has_spec_warning = false;
-        std::ostringstream tri_not_assign;
-        std::ostringstream spec_undefined;
-        
-        uint sgidx = statedef()->getSpecIdx(s);
-        
-        for (uint t = 0; t < datasize; t++) {
-            uint tidx = indices[t];
-            
-            if (tidx >= pTris.size())
-            {
-                std::ostringstream os;
-                os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
-                throw steps::ArgErr(os.str());
-            }
-            
-            if (pTris[tidx] == 0)
-            {
-                tri_not_assign << tidx << " ";
-                has_tri_warning = true;
-                continue;
-            }
-            
-            stex::Tri * tri = pTris[tidx];
-            uint slidx = tri->patchdef()->specG2L(sgidx);
-            if (slidx == ssolver::LIDX_UNDEFINED)
-            {
-                spec_undefined << tidx << " ";
-                has_spec_warning = true;
-                continue;
-            }
-            
-            sum += tri->pools()[slidx];
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+
+    // the following may raise exception if string is unknown
+    uint ocidx = statedef()->getOhmicCurrIdx(oc);
+
+    bool has_curr_warning = false;
+    std::ostringstream curr_undefined;
+
+    bool has_tri_warning = false;
+    std::ostringstream tri_not_assign;
+
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+
+        if (tidx >= mesh()->countTris())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
+            throw steps::ArgErr(os.str());
         }
-        
-        if (has_tri_warning) {
-            std::cerr << "Warning: The following triangles have not been assigned to a patch, fill in zeros at target positions:\n";
-            std::cerr << tri_not_assign.str() << "\n";
+
+        int loctidx = pEFTri_GtoL[tidx];
+        if (loctidx == -1)
+        {
+            values[t] = 0.0;
+            tri_not_assign << tidx << " ";
+            has_tri_warning = true;
+            continue;
         }
-        
-        if (has_spec_warning) {
-            std::cerr << "Warning: Species " << s << " has not been defined in the following triangles, fill in zeros at target positions:\n";
-            std::cerr << spec_undefined.str() << "\n";
+
+        stex::Tri * tri = pTris[tidx];
+        uint locidx = tri->patchdef()->ohmiccurrG2L(ocidx);
+        if (locidx == ssolver::LIDX_UNDEFINED)
+        {
+            values[t] = 0.0;
+            curr_undefined << tidx << " ";
+            has_curr_warning = true;
+            continue;
         }
+
+        values[t] = tri->getOhmicI(locidx, pEField->getTriV(loctidx), efdt());
     }
-    else if (type == steps::tetmesh::ELEM_TET) {
-        bool has_tet_warning = false;
-        bool has_spec_warning = false;
-        std::ostringstream tet_not_assign;
-        std::ostringstream spec_undefined;
-        
-        uint sgidx = statedef()->getSpecIdx(s);
-        
-        for (uint t = 0; t < datasize; t++) {
-            uint tidx = indices[t];
-            
-            if (tidx >= pTets.size())
-            {
-                std::ostringstream os;
-                os << "Error (Index Overbound): There is no tetrahedron with index " << tidx << ".\n";
-                throw steps::ArgErr(os.str());
-            }
-            
-            if (pTets[tidx] == 0)
-            {
-                tet_not_assign << tidx << " ";
-                has_tet_warning = true;
-                continue;
+
+    if (has_tri_warning) {
+        std::cerr << "Warning: The following triangles have not been assigned to a membrane, fill in zeros at target positions:\n";
+        std::cerr << tri_not_assign.str() << "\n";
+    }
+
+    if (has_curr_warning) {
+        std::cerr << "Warning: Ohmic current " << oc << " has not been defined in the following triangles, fill in zeros at target positions:\n";
+        std::cerr << curr_undefined.str() << "\n";
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::getBatchTriGHKIsNP(unsigned int* indices, int input_size, std::string const & ghk, double* values, int output_size) const
+{
+    if (input_size != output_size)
+    {
+        std::ostringstream os;
+        os << "Error: output array (values) size should be the same as input array (indices) size.\n";
+        throw steps::ArgErr(os.str());
+    }
+
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+
+    // the following may raise exception if string is unknown
+    uint ghkidx = statedef()->getGHKcurrIdx(ghk);
+
+    bool has_curr_warning = false;
+    std::ostringstream curr_undefined;
+
+    bool has_tri_warning = false;
+    std::ostringstream tri_not_assign;
+
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+
+        if (tidx >= mesh()->countTris())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+
+        int loctidx = pEFTri_GtoL[tidx];
+        if (loctidx == -1)
+        {
+            values[t] = 0.0;
+            tri_not_assign << tidx << " ";
+            has_tri_warning = true;
+            continue;
+        }
+
+        stex::Tri * tri = pTris[tidx];
+        uint locidx = tri->patchdef()->ghkcurrG2L(ghkidx);
+        if (locidx == ssolver::LIDX_UNDEFINED)
+        {
+            values[t] = 0.0;
+            curr_undefined << tidx << " ";
+            has_curr_warning = true;
+            continue;
+        }
+
+        values[t] = tri->getGHKI(locidx, efdt());
+    }
+
+    if (has_tri_warning) {
+        std::cerr << "Warning: The following triangles have not been assigned to a membrane, fill in zeros at target positions:\n";
+        std::cerr << tri_not_assign.str() << "\n";
+    }
+
+    if (has_curr_warning) {
+        std::cerr << "Warning: GHK current " << ghk << " has not been defined in the following triangles, fill in zeros at target positions:\n";
+        std::cerr << curr_undefined.str() << "\n";
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+////////////////////////////////////////////////////////////////////////
+// ROI Data Access
+////////////////////////////////////////////////////////////////////////
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::_checkROICaches(void) const
+{
+    uint version = mesh()->_getROIVersion();
+    if (version == pROICacheVersion) return;
+
+    pROIPools.clear();
+    pROIMeasures.clear();
+    pROICacheVersion = version;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::_checkROIBounds(steps::tetmesh::ROISet const & roi) const
+{
+    // The mesh checks ROI indices when they are added, but the cached
+    // pools index the element tables directly, so check them once here.
+    for (uint idx: roi.indices) {
+        if (roi.type == steps::tetmesh::ELEM_TET && idx >= pTets.size()) {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no tetrahedron with index " << idx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+        if (roi.type == steps::tetmesh::ELEM_TRI && idx >= pTris.size()) {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no triangle with index " << idx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::vector<const uint *> const & stex::Tetexact::_getROIPools(std::string const & ROI_id,
+    std::string const & s, steps::tetmesh::ElementType type) const
+{
+    _checkROICaches();
+
+    auto key = std::make_pair(ROI_id, s);
+    auto it = pROIPools.find(key);
+    if (it != pROIPools.end()) {
+        if (type != steps::tetmesh::ELEM_UNDEFINED && it->second.type != type)
+            throw steps::ArgErr("Element type mismatch for ROI " + ROI_id + ".");
+        return it->second.counts;
+    }
+
+    const steps::tetmesh::ROISet & roi = mesh()->_getROI(ROI_id, type);
+    if (roi.type != steps::tetmesh::ELEM_TET && roi.type != steps::tetmesh::ELEM_TRI)
+        throw steps::ArgErr("ROI " + ROI_id + " is not a tetrahedron or triangle ROI.");
+    _checkROIBounds(roi);
+    uint sgidx = statedef()->getSpecIdx(s);
+
+    // Elements without the species count as zero.
+    static const uint zero = 0;
+
+    ROIPools & pools = pROIPools[key];
+    pools.type = roi.type;
+    pools.counts.assign(roi.indices.size(), &zero);
+
+    std::ostringstream not_assigned;
+    std::ostringstream spec_undefined;
+    bool has_elem_warning = false;
+    bool has_spec_warning = false;
+
+    for (uint t = 0; t < roi.indices.size(); t++) {
+        uint idx = roi.indices[t];
+        const uint * elem_pools = nullptr;
+        uint slidx = ssolver::LIDX_UNDEFINED;
+
+        if (roi.type == steps::tetmesh::ELEM_TET) {
+            stex::Tet * tet = pTets[idx];
+            if (tet != nullptr) {
+                elem_pools = tet->pools();
+                slidx = tet->compdef()->specG2L(sgidx);
             }
-            
-            stex::Tet * tet = pTets[tidx];
-            uint slidx = tet->compdef()->specG2L(sgidx);
-            if (slidx == ssolver::LIDX_UNDEFINED)
-            {
-                spec_undefined << tidx << " ";
-                has_spec_warning = true;
-                continue;
+        }
+        else {
+            stex::Tri * tri = pTris[idx];
+            if (tri != nullptr) {
+                elem_pools = tri->pools();
+                slidx = tri->patchdef()->specG2L(sgidx);
             }
-            
-            sum += tet->pools()[slidx];
         }
-        
-        if (has_tet_warning) {
-            std::cerr << "Warning: The following tetrahedrons have not been assigned to a compartment, fill in zeros at target positions:\n";
-            std::cerr << tet_not_assign.str() << "\n";
+
+        if (elem_pools == nullptr) {
+            not_assigned << idx << " ";
+            has_elem_warning = true;
         }
-        
-        if (has_spec_warning) {
-            std::cerr << "Warning: Species " << s << " has not been defined in the following tetrahedrons, fill in zeros at target positions:\n";
-            std::cerr << spec_undefined.str() << "\n";
+        else if (slidx == ssolver::LIDX_UNDEFINED) {
+            spec_undefined << idx << " ";
+            has_spec_warning = true;
         }
+        else pools.counts[t] = elem_pools + slidx;
     }
-    else {
+
+    const char * elems = roi.type == steps::tetmesh::ELEM_TET ? "tetrahedrons" : "triangles";
+    if (has_elem_warning) {
+        std::cerr << "Warning: The following " << elems << " have not been assigned to a "
+                  << (roi.type == steps::tetmesh::ELEM_TET ? "compartment" : "patch")
+                  << ", fill in zeros at target positions:\n";
+        std::cerr << not_assigned.str() << "\n";
+    }
+
+    if (has_spec_warning) {
+        std::cerr << "Warning: Species " << s << " has not been defined in the following " << elems
+                  << ", fill in zeros at target positions:\n";
+        std::cerr << spec_undefined.str() << "\n";
+    }
+
+    return pools.counts;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stex::Tetexact::_getROIMeasure(std::string const & ROI_id, steps::tetmesh::ElementType type) const
+{
+    _checkROICaches();
+
+    auto it = pROIMeasures.find(ROI_id);
+    if (it != pROIMeasures.end() && it->second.first == type)
+        return it->second.second;
+
+    const steps::tetmesh::ROISet & roi = mesh()->_getROI(ROI_id, type);
+    _checkROIBounds(roi);
+
+    double sum = 0.0;
+    for (uint idx: roi.indices) {
+        if (type == steps::tetmesh::ELEM_TET) {
+            if (pTets[idx] == nullptr)
+                throw steps::ArgErr("Tetrahedron " + std::to_string(idx) + " has not been assigned to a compartment.");
+            sum += pTets[idx]->vol();
+        }
+        else {
+            if (pTris[idx] == nullptr)
+                throw steps::ArgErr("Triangle " + std::to_string(idx) + " has not been assigned to a patch.");
+            sum += pTris[idx]->area();
+        }
+    }
+
+    pROIMeasures[ROI_id] = std::make_pair(type, sum);
+    return sum;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::vector<double> stex::Tetexact::getROITetCounts(std::string ROI_id, std::string const & s) const
+{
+    auto const & counts = _getROIPools(ROI_id, s, steps::tetmesh::ELEM_TET);
+    std::vector<double> data(counts.size());
+    for (uint t = 0; t < counts.size(); t++) data[t] = *counts[t];
+    return data;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::vector<double> stex::Tetexact::getROITriCounts(std::string ROI_id, std::string const & s) const
+{
+    auto const & counts = _getROIPools(ROI_id, s, steps::tetmesh::ELEM_TRI);
+    std::vector<double> data(counts.size());
+    for (uint t = 0; t < counts.size(); t++) data[t] = *counts[t];
+    return data;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::getROITetCountsNP(std::string ROI_id, std::string const & s, double* counts, int output_size) const
+{
+    auto const & pools = _getROIPools(ROI_id, s, steps::tetmesh::ELEM_TET);
+    if (output_size != pools.size())
+    {
         std::ostringstream os;
-        os << "Error: Cannot find suitable ROI for the function call getROICount.\n";
+        os << "Error: output array (counts) size should be the same as the ROI size.\n";
         throw steps::ArgErr(os.str());
     }
-    
+    for (uint t = 0; t < pools.size(); t++) counts[t] = *pools[t];
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::getROITriCountsNP(std::string ROI_id, std::string const & s, double* counts, int output_size) const
+{
+    auto const & pools = _getROIPools(ROI_id, s, steps::tetmesh::ELEM_TRI);
+    if (output_size != pools.size())
+    {
+        std::ostringstream os;
+        os << "Error: output array (counts) size should be the same as the ROI size.\n";
+        throw steps::ArgErr(os.str());
+    }
+    for (uint t = 0; t < pools.size(); t++) counts[t] = *pools[t];
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::getROITriVsNP(std::string ROI_id, double* values, int output_size) const
+{
+    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
+
+    uint *indices = mesh()->_getROIData(ROI_id);
+    int inputsize = mesh()->getROIDataSize(ROI_id);
+
+    getBatchTriVsNP(indices, inputsize, values, output_size);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::getROIVertVsNP(std::string ROI_id, double* values, int output_size) const
+{
+    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_VERTEX)) throw steps::ArgErr();
+
+    uint *indices = mesh()->_getROIData(ROI_id);
+    int inputsize = mesh()->getROIDataSize(ROI_id);
+
+    getBatchVertVsNP(indices, inputsize, values, output_size);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::getROITriIsNP(std::string ROI_id, double* values, int output_size) const
+{
+    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
+
+    uint *indices = mesh()->_getROIData(ROI_id);
+    int inputsize = mesh()->getROIDataSize(ROI_id);
+
+    getBatchTriIsNP(indices, inputsize, values, output_size);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::getROITriOhmicIsNP(std::string ROI_id, std::string const & oc, double* values, int output_size) const
+{
+    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
+
+    uint *indices = mesh()->_getROIData(ROI_id);
+    int inputsize = mesh()->getROIDataSize(ROI_id);
+
+    getBatchTriOhmicIsNP(indices, inputsize, oc, values, output_size);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stex::Tetexact::getROITriGHKIsNP(std::string ROI_id, std::string const & ghk, double* values, int output_size) const
+{
+    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TRI)) throw steps::ArgErr();
+
+    uint *indices = mesh()->_getROIData(ROI_id);
+    int inputsize = mesh()->getROIDataSize(ROI_id);
+
+    getBatchTriGHKIsNP(indices, inputsize, ghk, values, output_size);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stex::Tetexact::getROIVol(std::string ROI_id) const
+{
+    return _getROIMeasure(ROI_id, steps::tetmesh::ELEM_TET);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stex::Tetexact::getROIArea(std::string ROI_id) const
+{
+    return _getROIMeasure(ROI_id, steps::tetmesh::ELEM_TRI);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stex::Tetexact::getROICount(std::string ROI_id, std::string const & s) const
+{
+    double sum = 0.0;
+    for (const uint * count: _getROIPools(ROI_id, s, steps::tetmesh::ELEM_UNDEFINED))
+        sum += *count;
     return sum;
 }
 
@@ -4610,8 +5179,9 @@ double stex::Tetexact::getROIAmount(std::string ROI_id, std::string const & s) c
 
 double stex::Tetexact::getROIConc(std::string ROI_id, std::string const & s) const
 {
-    if (!mesh()->checkROI(ROI_id, steps::tetmesh::ELEM_TET)) throw steps::ArgErr();
-    double count = getROICount(ROI_id, s);
+    double count = 0.0;
+    for (const uint * c: _getROIPools(ROI_id, s, steps::tetmesh::ELEM_TET))
+        count += *c;
     double vol = getROIVol(ROI_id);
     return count/ (1.0e3 * vol * steps::math::AVOGADRO);
 }
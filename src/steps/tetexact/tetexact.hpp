@@ -50,6 +50,7 @@
 #include "steps/tetexact/diffboundary.hpp"
 #include "steps/tetexact/crstruct.hpp"
 #include "steps/solver/efield/efield.hpp"
+#include "steps/solver/efield/dtcontrol.hpp"
 
 ////////////////////////////////////////////////////////////////////////////////
 
@@ -114,8 +115,27 @@ public:
 
     void setEfieldDT(double efdt);
 
+    /// EField dt of the last step, which is pEFDT unless adaptive time
+    /// stepping is enabled.
     inline double efdt(void) const
-    { return pEFDT; }
+    { return pEFDTControl.lastDT(pEFDT); }
+
+    void setEfieldAdaptiveDT(bool adaptive, double dt_min = 1.0e-6,
+                             double dt_max = 1.0e-4, double dv_tol = 1.0e-4);
+
+    inline bool getEfieldAdaptiveDT(void) const
+    { return pEFDTControl.adaptive(); }
+
+    inline std::vector<double> getEfieldDTHistory(void) const
+    { return pEFDTControl.history(); }
+
+    void setEfieldSemiImplicit(bool implicit);
+
+    inline bool getEfieldSemiImplicit(void) const
+    { return pEFSemiImplicit; }
+
+    inline void clearEfieldDTHistory(void)
+    { pEFDTControl.clearHistory(); }
 
     void setTemp(double t);
 
@@ -498,6 +518,16 @@ public:
     void getBatchTetCountsNP(unsigned int* indices, int input_size, std::string const & s, double* counts, int output_size) const;
     
     void getBatchTriCountsNP(unsigned int* indices, int input_size, std::string const & s, double* counts, int output_size) const;
+
+    void getBatchTriVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    void getBatchVertVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    void getBatchTriIsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    void getBatchTriOhmicIsNP(unsigned int* indices, int input_size, std::string const & oc, double* values, int output_size) const;
+
+    void getBatchTriGHKIsNP(unsigned int* indices, int input_size, std::string const & ghk, double* values, int output_size) const;
     
     ////////////////////////////////////////////////////////////////////////
     // ROI Data Access
@@ -515,6 +545,16 @@ public:
     /// Get species counts of a list of triangles
     void getROITriCountsNP(std::string ROI_id, std::string const & s, double* counts, int output_size) const;
 
+    void getROITriVsNP(std::string ROI_id, double* values, int output_size) const;
+
+    void getROIVertVsNP(std::string ROI_id, double* values, int output_size) const;
+
+    void getROITriIsNP(std::string ROI_id, double* values, int output_size) const;
+
+    void getROITriOhmicIsNP(std::string ROI_id, std::string const & oc, double* values, int output_size) const;
+
+    void getROITriGHKIsNP(std::string ROI_id, std::string const & ghk, double* values, int output_size) const;
+
      double getROIVol(std::string ROI_id) const;
     double getROIArea(std::string ROI_id) const;
     
@@ -546,7 +586,58 @@ public:
     void resetROIDiffExtent(std::string ROI_id, std::string const & d);
         
     ////////////////////////////////////////////////////////////////////////
-private:
+protected:
+
+    ////////////////////////////////////////////////////////////////////////
+    // EFIELD TIME STEPPING
+    ////////////////////////////////////////////////////////////////////////
+
+    /// Target length of the next EField step.
+    inline double _nextEFieldDT(void) const
+    { return pEFDTControl.dt(pEFDT); }
+
+    /// Record the potential of the monitored triangles before an EField
+    /// step (adaptive time stepping only).
+    void _beginEFieldStep(void);
+
+    /// Choose the next EField dt after a step of length dt.
+    void _endEFieldStep(double dt);
+
+    ////////////////////////////////////////////////////////////////////////
+    // EFIELD MEMBRANE CURRENTS
+    ////////////////////////////////////////////////////////////////////////
+
+    /// Move the ohmic and GHK current data of the EField triangles into
+    /// the contiguous arrays below.
+    void _setupEFieldCurrents(void);
+
+    /// Compute the currents of all EField triangles for the EField step
+    /// of length dt ending at simtime and pass them to the EField object.
+    void _applyEFieldCurrents(double dt, double simtime);
+
+    ////////////////////////////////////////////////////////////////////////
+    // ROI DATA CACHES
+    ////////////////////////////////////////////////////////////////////////
+
+    /// Return the count of species s in each element of ROI ROI_id. The
+    /// list is resolved and checked on first use and cached until the ROIs
+    /// of the mesh change. Elements without the species point to a zero
+    /// count.
+    ///
+    /// \param type Required element type of the ROI, or ELEM_UNDEFINED to
+    ///             accept tetrahedron and triangle ROIs.
+    std::vector<const uint *> const & _getROIPools(std::string const & ROI_id,
+        std::string const & s, steps::tetmesh::ElementType type) const;
+
+    /// Return the total volume of a tetrahedron ROI or area of a triangle
+    /// ROI, cached like _getROIPools.
+    double _getROIMeasure(std::string const & ROI_id, steps::tetmesh::ElementType type) const;
+
+    /// Discard the ROI caches if the ROIs of the mesh have changed.
+    void _checkROICaches(void) const;
+
+    /// Throw if an index of a tetrahedron or triangle ROI is out of range.
+    void _checkROIBounds(steps::tetmesh::ROISet const & roi) const;
 
     ////////////////////////////////////////////////////////////////////////
 
@@ -725,6 +816,15 @@ private:
     // The Efield time-step
     double                                       pEFDT;
 
+    // Adaptive time stepping, and the EField local indices and potential
+    // of the triangles with voltage-dependent processes it monitors.
+    steps::solver::efield::DtControl             pEFDTControl;
+    std::vector<uint>                            pEFDTTris;
+    std::vector<double>                          pEFDTTrisV;
+
+    // Semi-implicit coupling of the membrane currents.
+    bool                                         pEFSemiImplicit;
+
     // The number of vertices
     uint                                        pEFNVerts;
     // Array of vertices
@@ -737,6 +837,24 @@ private:
 
     std::vector<steps::tetexact::Tri *>        pEFTris_vec;
 
+    // Membrane current data of the EField triangles, by EField local
+    // triangle index. The ohmic currents of triangle t are entries
+    // pEFOCPtr[t] to pEFOCPtr[t+1]-1 and its GHK currents entries
+    // pEFGHKPtr[t] to pEFGHKPtr[t+1]-1. The channel time integrals and GHK
+    // charges are the storage of the Tri objects themselves.
+    std::vector<uint>                          pEFOCPtr;
+    std::vector<double>                        pEFOCG;
+    std::vector<double>                        pEFOCERev;
+    std::vector<const uint *>                  pEFOCCount;
+    std::vector<double>                        pEFOCTimeIntg;
+    std::vector<double>                        pEFOCTimeUpd;
+    std::vector<uint>                          pEFGHKPtr;
+    std::vector<int>                           pEFECharge;
+    std::vector<int>                           pEFEChargeLast;
+    std::vector<double>                        pEFTriV;
+    std::vector<double>                        pEFTriI;
+    std::vector<double>                        pEFTriG;
+
     // The number of tetrahedrons
     uint                                        pEFNTets;
     // Array of tetrahedrons
@@ -754,6 +872,19 @@ private:
     // Table of EField local triangle index to global triangle index.
     uint                                      * pEFTri_LtoG;
 
+    ////////////////////////////////////////////////////////////////////////
+
+    // Per (ROI, species) count pointers and per ROI volume or area, with
+    // the ROI type they were resolved for, and the mesh ROI version they
+    // are valid for.
+    struct ROIPools {
+        steps::tetmesh::ElementType            type;
+        std::vector<const uint *>              counts;
+    };
+    mutable std::map<std::pair<std::string, std::string>, ROIPools> pROIPools;
+    mutable std::map<std::string, std::pair<steps::tetmesh::ElementType, double>> pROIMeasures;
+    mutable uint                               pROICacheVersion;
+
 
 };
 
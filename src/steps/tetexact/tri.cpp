@@ -76,6 +76,7 @@ stex::Tri::Tri(uint idx, steps::solver::Patchdef * patchdef, double area,
 , pECharge_last(0)
 , pOCchan_timeintg(0)
 , pOCtime_upd(0)
+, pOwnsEFieldStorage(true)
 {
     assert(pPatchdef != 0);
     assert (pArea > 0.0);
@@ -130,9 +131,13 @@ stex::Tri::~Tri(void)
 {
     delete[] pPoolCount;
     delete[] pPoolFlags;
-    delete[] pECharge;
-    delete[] pOCchan_timeintg;
-    delete[] pOCtime_upd;
+    if (pOwnsEFieldStorage)
+    {
+        delete[] pECharge;
+        delete[] pECharge_last;
+        delete[] pOCchan_timeintg;
+        delete[] pOCtime_upd;
+    }
 
     KProcPVecCI e = pKProcs.end();
     for (std::vector<stex::KProc *>::const_iterator i = pKProcs.begin();
@@ -499,6 +504,34 @@ double stex::Tri::computeI(double v, double dt, double simtime)
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void stex::Tri::setEFieldStorage(int * echarge, int * echarge_last,
+                                 double * oc_timeintg, double * oc_time_upd)
+{
+    uint nghkcurrs = pPatchdef->countGHKcurrs();
+    std::copy(pECharge, pECharge + nghkcurrs, echarge);
+    std::copy(pECharge_last, pECharge_last + nghkcurrs, echarge_last);
+
+    uint nohmcurrs = pPatchdef->countOhmicCurrs();
+    std::copy(pOCchan_timeintg, pOCchan_timeintg + nohmcurrs, oc_timeintg);
+    std::copy(pOCtime_upd, pOCtime_upd + nohmcurrs, oc_time_upd);
+
+    if (pOwnsEFieldStorage)
+    {
+        delete[] pECharge;
+        delete[] pECharge_last;
+        delete[] pOCchan_timeintg;
+        delete[] pOCtime_upd;
+        pOwnsEFieldStorage = false;
+    }
+
+    pECharge = echarge;
+    pECharge_last = echarge_last;
+    pOCchan_timeintg = oc_timeintg;
+    pOCtime_upd = oc_time_upd;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 double stex::Tri::getOhmicI(double v,double dt) const
 {
     double current = 0.0;
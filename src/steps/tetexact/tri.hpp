@@ -192,6 +192,14 @@ public:
 
     double computeI(double v, double dt, double simtime);
 
+    /// Move the GHK charge and ohmic current integrals of this triangle
+    /// into solver-owned arrays of countGHKcurrs() and countOhmicCurrs()
+    /// entries, so that the currents of all membrane triangles can be
+    /// computed in one pass over contiguous memory. The current values
+    /// are copied; the arrays must outlive the triangle.
+    void setEFieldStorage(int * echarge, int * echarge_last,
+                          double * oc_timeintg, double * oc_time_upd);
+
     double getOhmicI(double v, double dt) const;
     double getOhmicI(uint lidx, double v,double dt) const;
 
@@ -298,6 +306,9 @@ private:
 
     double                               * pOCtime_upd;
 
+    // False once the arrays above have been moved to solver storage.
+    bool                                   pOwnsEFieldStorage;
+
     ////////////////////////////////////////////////////////////////////////
 
 };
@@ -335,6 +335,8 @@ stode::TetODE::TetODE(steps::model::Model * m, steps::wm::Geom * g, steps::rng::
 , pEFoption(static_cast<EF_solver>(calcMembPot))
 , pTemp(0.0)
 , pEFDT(1.0e-5)
+, pEFSemiImplicit(false)
+, pEFTriG()
 , pEFNVerts(0)
 , pEFVerts(0)
 , pEFNTris(0)
@@ -511,6 +513,19 @@ void stode::TetODE::setMaxNumSteps(uint maxn)
 
 ////////////////////////////////////////////////////////////////////////////////
 
+void stode::TetODE::setEfieldSemiImplicit(bool implicit)
+{
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+    pEFSemiImplicit = implicit;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
 double stode::TetODE::getTime(void) const
 {
     return statedef()->time();
@@ -1448,6 +1463,12 @@ void stode::TetODE::_setupEField(void)
     case EF_DV_BDSYS:
         pEField = make_EField<dVSolverBanded>();
         break;
+    case EF_DV_PCG:
+        pEField = make_EField<dVSolverPCG>();
+        break;
+    case EF_DV_BDSYS_LAPACK:
+        pEField = make_EField<dVSolverBanded>(true);
+        break;
     default:
         throw steps::ArgErr("Unsupported E-Field solver.");
     }
@@ -1549,6 +1570,7 @@ void stode::TetODE::_setupEField(void)
     assert(membtris.size() == neftris());
 
     pEFTris_vec.resize(neftris());
+    pEFTriG.assign(neftris(), 0.0);
 
     for (uint eft = 0; eft < neftris(); ++eft)
     {
@@ -1930,6 +1952,11 @@ void stode::TetODE::run(double endtime)
             //double cur = (*eft)->getOhmicI(v, dt, this);
             double ohmcur = (*eft)->getOhmicI(v, this);
 
+            // Conductance must be taken before getGHKI changes the
+            // concentrations.
+            if (pEFSemiImplicit)
+                pEFTriG[tlidx] = (*eft)->getOhmicG(this) + (*eft)->getGHKG(v, this);
+
             // The following method will also move the ions
             double ghkcur = (*eft)->getGHKI(v, dt, this);
 
@@ -1938,6 +1965,8 @@ void stode::TetODE::run(double endtime)
 
         }
 
+        if (pEFSemiImplicit) pEField->setTriGs(pEFTriG.data());
+
         pEField->advance(dt); //Now got to figure out how to update the voltage-dependent reactions, must have to be
         // at the top of this function somewhere
 
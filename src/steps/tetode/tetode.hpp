@@ -381,6 +381,11 @@ public:
 
     void setMaxNumSteps(uint maxn);
 
+    void setEfieldSemiImplicit(bool semi);
+
+    inline bool getEfieldSemiImplicit(void) const
+    { return pEFSemiImplicit; }
+
     ////////////////////////// ADDED FOR EFIELD ////////////////////////////
 
     /// Check the EField flag
@@ -449,6 +454,13 @@ private:
     // The Efield time-step
     double                                       pEFDT;
 
+    // Whether membrane conductances are coupled semi-implicitly into
+    // the EField system.
+    bool                                         pEFSemiImplicit;
+
+    // Per-triangle conductances for the semi-implicit coupling (S).
+    std::vector<double>                          pEFTriG;
+
     // The number of vertices
     uint                                        pEFNVerts;
     // Array of vertices
@@ -192,8 +192,7 @@ double stode::Tri::getGHKI(double v,double dt, steps::tetode::TetODE * solver) c
         //double v = solver->getTriV(idx()); // check indices are global or local
         double T = solver->getTemp();
 
-        double flux_per_channel = sm::GHKcurrent(ghkdef->perm(), v+ghkdef->vshift(), ghkdef->valence(),
-                                     T, iconc, oconc);
+        double flux_per_channel = ghkdef->GHKcurrent(v, T, iconc, oconc);
 
         // Fetch global index of channel state
         uint cs_gidx = ghkdef->chanstate();
@@ -227,5 +226,45 @@ double stode::Tri::getGHKI(double v,double dt, steps::tetode::TetODE * solver) c
 
 }
 
+////////////////////////////////////////////////////////////////////////////////
+
+double stode::Tri::getOhmicG(steps::tetode::TetODE * solver) const
+{
+    double g = 0.0;
+    uint nocs = patchdef()->countOhmicCurrs();
+    for (uint i = 0; i < nocs; ++i)
+    {
+        ssolver::OhmicCurrdef * ocdef = patchdef()->ohmiccurrdef(i);
+        uint spec_gidx = patchdef()->specL2G(patchdef()->ohmiccurr_chanstate(i));
+        g += solver->_getTriCount(pIdx, spec_gidx)*ocdef->getG();
+    }
+    return g;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stode::Tri::getGHKG(double v, steps::tetode::TetODE * solver) const
+{
+    double g = 0.0;
+    double T = solver->getTemp();
+
+    uint nghkcurrs = patchdef()->countGHKcurrs();
+    for (uint i = 0; i < nghkcurrs; ++i)
+    {
+        ssolver::GHKcurrdef * ghkdef = patchdef()->ghkcurrdef(i);
+        const uint gidxion = ghkdef->ion();
+        double voconc = ghkdef->voconc();
+
+        double iconc = solver->_getTetConc(iTet()->idx(), gidxion)*1.0e3;
+        double oconc = 0.0;
+        if (voconc < 0.0)  oconc = solver->_getTetConc(oTet()->idx(), gidxion)*1.0e3;
+        else  oconc = voconc*1.0e3;
+
+        uint cs_gidx = ghkdef->chanstate();
+        g += solver->_getTriCount(idx(), cs_gidx) * ghkdef->GHKslope(v, T, iconc, oconc);
+    }
+    return g;
+}
+
 ////////////////////////////////////////////////////////////////////////////////
 //END
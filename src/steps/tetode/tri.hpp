@@ -157,6 +157,16 @@ public:
 
     double getGHKI(double v,double dt, steps::tetode::TetODE * solver) const;
 
+    /// Return the total membrane conductance (in siemens) of the ohmic
+    /// currents in this triangle.
+    ///
+    double getOhmicG(stode::TetODE * solver) const;
+
+    /// Return the linearised GHK conductance dI/dV (in siemens) at
+    /// potential v. Unlike getGHKI, this does not move any ions.
+    ///
+    double getGHKG(double v, steps::tetode::TetODE * solver) const;
+
     /*
     inline uint * pools(void) const
     { return pPoolCount; }
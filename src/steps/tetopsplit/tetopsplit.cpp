@@ -0,0 +1,1260 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################
+
+ */
+
+
+// Standard library & STL headers.
+#include <algorithm>
+#include <cassert>
+#include <chrono>
+#include <cmath>
+#include <iostream>
+#include <limits>
+#include <sstream>
+#include <string>
+#include <vector>
+
+// STEPS headers.
+#include "steps/common.h"
+#include "steps/error.hpp"
+#include "steps/math/point.hpp"
+#include "steps/rng/create.hpp"
+#include "steps/solver/compdef.hpp"
+#include "steps/solver/patchdef.hpp"
+#include "steps/solver/statedef.hpp"
+#include "steps/solver/types.hpp"
+#include "steps/tetexact/tet.hpp"
+#include "steps/tetexact/tri.hpp"
+#include "steps/tetexact/wmvol.hpp"
+#include "steps/tetopsplit/tetopsplit.hpp"
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace ssolver = steps::solver;
+namespace stex = steps::tetexact;
+namespace stos = steps::tetopsplit;
+
+using steps::math::point3d;
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace
+{
+
+// Element type of a BoundaryChange.
+const uint BOUNDARY_TET = 0;
+const uint BOUNDARY_TRI = 1;
+
+// Buffer size of the per-partition random number generators.
+const uint PARTITION_RNG_BUFSIZE = 512;
+
+typedef std::chrono::steady_clock Clock;
+
+inline double elapsed(Clock::time_point const & from, Clock::time_point const & to)
+{
+    return std::chrono::duration<double>(to - from).count();
+}
+
+}
+
+////////////////////////////////////////////////////////////////////////////////
+// SumTree
+////////////////////////////////////////////////////////////////////////////////
+
+stos::SumTree::SumTree(void)
+: pSize(0)
+, pLeaves(1)
+, pTree(2, 0.0)
+{
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::SumTree::resize(uint n)
+{
+    pSize = n;
+    pLeaves = 1;
+    while (pLeaves < n) pLeaves <<= 1;
+    pTree.assign(2 * pLeaves, 0.0);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::SumTree::set(uint i, double value)
+{
+    assert(i < pSize);
+    uint node = pLeaves + i;
+    pTree[node] = value;
+    // Recompute the partial sums from the children rather than adding the
+    // difference, so that rounding errors do not accumulate.
+    for (node >>= 1; node >= 1; node >>= 1)
+    {
+        pTree[node] = pTree[2 * node] + pTree[2 * node + 1];
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+uint stos::SumTree::select(double value) const
+{
+    assert(total() > 0.0);
+    uint node = 1;
+    while (node < pLeaves)
+    {
+        uint left = 2 * node;
+        // Only descend into subtrees with nonzero propensity, even if
+        // rounding puts value just past the end of the right one.
+        if (value < pTree[left] || pTree[left + 1] <= 0.0)
+        {
+            node = left;
+        }
+        else
+        {
+            value -= pTree[left];
+            node = left + 1;
+        }
+    }
+    return node - pLeaves;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+// Partition
+////////////////////////////////////////////////////////////////////////////////
+
+stos::Partition::Partition(void)
+: rng()
+, tets()
+, tris()
+, ssaTris()
+, ssaKProcs()
+, propensities()
+, diffs()
+, sdiffs()
+, outbox()
+, binomPos()
+, binomN()
+, binomP()
+, binomDraws()
+, reacExtent(0.0)
+, diffExtent(0.0)
+{
+}
+
+////////////////////////////////////////////////////////////////////////////////
+// TetOpSplit
+////////////////////////////////////////////////////////////////////////////////
+
+stos::TetOpSplit::TetOpSplit(steps::model::Model * m, steps::wm::Geom * g,
+                             steps::rng::RNG * r, int calcMembPot,
+                             std::vector<uint> const & tet_hosts,
+                             std::map<uint, uint> const & tri_hosts,
+                             std::vector<uint> const & wm_hosts,
+                             uint nthreads)
+: Tetexact(m, g, r, calcMembPot)
+, pPartitions()
+, pBoundaryKProcs()
+, pBoundaryTree()
+, pTetPart()
+, pTriPart()
+, pKProcOwner()
+, pKProcSlot()
+, pTetDirty()
+, pTriDirty()
+, pUpdPeriod(0.0)
+, pDiffApplyThreshold(10)
+, pNThreads(nthreads)
+, pBoundaryReacExtent(0.0)
+, pNIteration(0.0)
+, pCompTime(0.0)
+, pSyncTime(0.0)
+, pIdleTime(0.0)
+, pPhasePeriod(0.0)
+, pPhaseTime(0.0)
+, pWorkers()
+, pPoolMutex()
+, pWorkCV()
+, pDoneCV()
+, pPhase(PHASE_REFRESH)
+, pGeneration(0)
+, pPending(0)
+, pWorkerError()
+{
+    _partition(tet_hosts, tri_hosts, nthreads);
+    _startWorkers();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+stos::TetOpSplit::~TetOpSplit(void)
+{
+    _stopWorkers();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::string stos::TetOpSplit::getSolverName(void) const
+{
+    return "TetOpSplit";
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::string stos::TetOpSplit::getSolverDesc(void) const
+{
+    return "Multithreaded approximate stochastic method in tetrahedral mesh";
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::string stos::TetOpSplit::getSolverAuthors(void) const
+{
+    return "Iain Hepburn, Weiliang Chen, Stefan Wils, Sam Yates";
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+std::string stos::TetOpSplit::getSolverEmail(void) const
+{
+    return "steps.dev@gmail.com";
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+int stos::TetOpSplit::_volPartition(stex::WmVol * vol) const
+{
+    if (vol == 0) return -1;
+    stex::Tet * tet = dynamic_cast<stex::Tet *>(vol);
+    // Well-mixed volume
+    if (tet == 0) return -1;
+    return pTetPart[tet->idx()];
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_assignKProc(stex::KProc * kp, int owner)
+{
+    uint sidx = kp->schedIDX();
+    pKProcOwner[sidx] = owner;
+    if (owner == static_cast<int>(pPartitions.size()))
+    {
+        pKProcSlot[sidx] = pBoundaryKProcs.size();
+        pBoundaryKProcs.push_back(kp);
+    }
+    else
+    {
+        Partition & part = pPartitions[owner];
+        pKProcSlot[sidx] = part.ssaKProcs.size();
+        part.ssaKProcs.push_back(kp);
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_partition(std::vector<uint> const & tet_hosts,
+                                  std::map<uint, uint> const & tri_hosts,
+                                  uint nthreads)
+{
+    uint ntets = mesh()->countTets();
+    uint ntris = mesh()->countTris();
+
+    pTetPart.assign(ntets, -1);
+    pTriPart.assign(ntris, -1);
+
+    std::vector<uint> comp_tets;
+    for (uint t = 0; t < ntets; ++t)
+    {
+        if (pTets[t] != 0) comp_tets.push_back(t);
+    }
+
+    uint nparts = 0;
+    if (!tet_hosts.empty())
+    {
+        if (tet_hosts.size() != ntets)
+        {
+            std::ostringstream os;
+            os << "Size of tet_hosts (" << tet_hosts.size() << ") does not match ";
+            os << "the number of tetrahedrons in the mesh (" << ntets << ").\n";
+            throw steps::ArgErr(os.str());
+        }
+        for (uint t : comp_tets)
+        {
+            pTetPart[t] = tet_hosts[t];
+            nparts = std::max(nparts, tet_hosts[t] + 1);
+        }
+    }
+    else
+    {
+        nparts = nthreads;
+        if (nparts == 0) nparts = std::thread::hardware_concurrency();
+        if (nparts > comp_tets.size()) nparts = comp_tets.size();
+        if (nparts == 0) nparts = 1;
+
+        // Slabs along the longest axis of the bounding box of the barycentres
+        point3d lo(std::numeric_limits<double>::max());
+        point3d hi(-std::numeric_limits<double>::max());
+        for (uint t : comp_tets)
+        {
+            point3d const & b = mesh()->_getTetBarycenter(t);
+            for (uint d = 0; d < 3; ++d)
+            {
+                lo[d] = std::min(lo[d], b[d]);
+                hi[d] = std::max(hi[d], b[d]);
+            }
+        }
+        uint axis = 0;
+        for (uint d = 1; d < 3; ++d)
+        {
+            if (hi[d] - lo[d] > hi[axis] - lo[axis]) axis = d;
+        }
+        std::sort(comp_tets.begin(), comp_tets.end(),
+            [this, axis](uint a, uint b)
+            { return mesh()->_getTetBarycenter(a)[axis] < mesh()->_getTetBarycenter(b)[axis]; });
+
+        uint ncomp_tets = comp_tets.size();
+        for (uint i = 0; i < ncomp_tets; ++i)
+        {
+            pTetPart[comp_tets[i]] = static_cast<int>((static_cast<unsigned long>(i) * nparts) / ncomp_tets);
+        }
+    }
+
+    pPartitions.clear();
+    pPartitions.resize(nparts);
+    for (uint p = 0; p < nparts; ++p)
+    {
+        Partition & part = pPartitions[p];
+        part.rng.reset(steps::rng::create("mt19937", PARTITION_RNG_BUFSIZE));
+        part.rng->initialize(rng()->get());
+        part.outbox.resize(nparts);
+    }
+
+    for (uint t = 0; t < ntris; ++t)
+    {
+        stex::Tri * tri = pTris[t];
+        if (tri == 0) continue;
+
+        std::map<uint, uint>::const_iterator host = tri_hosts.find(t);
+        if (host != tri_hosts.end())
+        {
+            if (host->second >= nparts)
+            {
+                std::ostringstream os;
+                os << "Triangle " << t << " is assigned to partition " << host->second;
+                os << " but there are only " << nparts << " partitions.\n";
+                throw steps::ArgErr(os.str());
+            }
+            pTriPart[t] = host->second;
+        }
+        else
+        {
+            int inner = _volPartition(tri->iTet());
+            int outer = _volPartition(tri->oTet());
+            if (inner >= 0) pTriPart[t] = inner;
+            else if (outer >= 0) pTriPart[t] = outer;
+            else pTriPart[t] = 0;
+        }
+    }
+
+    // Sort the kinetic processes into partition SSA, boundary SSA and diffusion.
+    pKProcOwner.assign(countKProcs(), -1);
+    pKProcSlot.assign(countKProcs(), 0);
+    pBoundaryKProcs.clear();
+
+    int boundary = nparts;
+
+    for (uint t = 0; t < ntets; ++t)
+    {
+        stex::Tet * tet = pTets[t];
+        if (tet == 0) continue;
+        Partition & part = pPartitions[pTetPart[t]];
+        part.tets.push_back(t);
+        for (auto kp : tet->kprocs())
+        {
+            stex::Diff * diff = dynamic_cast<stex::Diff *>(kp);
+            if (diff != 0) part.diffs.push_back(diff);
+            else _assignKProc(kp, pTetPart[t]);
+        }
+    }
+
+    for (auto wmvol : pWmVols)
+    {
+        if (wmvol == 0) continue;
+        for (auto kp : wmvol->kprocs()) _assignKProc(kp, boundary);
+    }
+
+    for (uint t = 0; t < ntris; ++t)
+    {
+        stex::Tri * tri = pTris[t];
+        if (tri == 0) continue;
+        int p = pTriPart[t];
+        Partition & part = pPartitions[p];
+        part.tris.push_back(t);
+
+        bool interior = (tri->iTet() == 0 || _volPartition(tri->iTet()) == p)
+                     && (tri->oTet() == 0 || _volPartition(tri->oTet()) == p);
+        if (interior) part.ssaTris.push_back(t);
+
+        for (auto kp : tri->kprocs())
+        {
+            stex::SDiff * sdiff = dynamic_cast<stex::SDiff *>(kp);
+            if (sdiff != 0) part.sdiffs.push_back(sdiff);
+            else _assignKProc(kp, interior ? p : boundary);
+        }
+    }
+
+    for (auto & part : pPartitions)
+    {
+        part.propensities.resize(part.ssaKProcs.size());
+    }
+    pBoundaryTree.resize(pBoundaryKProcs.size());
+
+    pTetDirty.assign(ntets, 0);
+    pTriDirty.assign(ntris, 0);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::repartitionAndReset(std::vector<uint> const & tet_hosts,
+                                           std::map<uint, uint> const & tri_hosts,
+                                           std::vector<uint> const & wm_hosts)
+{
+    _stopWorkers();
+    _partition(tet_hosts, tri_hosts, pNThreads);
+    _startWorkers();
+    reset();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::reset(void)
+{
+    Tetexact::reset();
+
+    for (auto & part : pPartitions)
+    {
+        part.reacExtent = 0.0;
+        part.diffExtent = 0.0;
+        for (auto & box : part.outbox) box.clear();
+    }
+    std::fill(pTetDirty.begin(), pTetDirty.end(), 0);
+    std::fill(pTriDirty.begin(), pTriDirty.end(), 0);
+
+    pBoundaryReacExtent = 0.0;
+    pNIteration = 0.0;
+
+    pCompTime = 0.0;
+    pSyncTime = 0.0;
+    pIdleTime = 0.0;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::run(double endtime)
+{
+    if (endtime < statedef()->time())
+    {
+        std::ostringstream os;
+        os << "Endtime is before current simulation time";
+        throw steps::ArgErr(os.str());
+    }
+
+    // Counts, rate constants and activation flags may have been changed
+    // through the API since the last call, so start from fresh propensities.
+    _computeUpdPeriod();
+    _runPhase(PHASE_REFRESH);
+
+    if (efflag()) _runWithEField(endtime);
+    else _runWithoutEField(endtime);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::step(void)
+{
+    std::ostringstream os;
+    os << "This function is not available for this solver!";
+    throw steps::NotImplErr(os.str());
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_computeUpdPeriod(void)
+{
+    double max_rate = 0.0;
+    for (auto const & part : pPartitions)
+    {
+        for (auto d : part.diffs)
+        {
+            if (d->active() && d->getScaledDcst() > max_rate) max_rate = d->getScaledDcst();
+        }
+        for (auto d : part.sdiffs)
+        {
+            if (d->active() && d->getScaledDcst() > max_rate) max_rate = d->getScaledDcst();
+        }
+    }
+
+    if (max_rate > 0.0) pUpdPeriod = 1.0 / max_rate;
+    else pUpdPeriod = std::numeric_limits<double>::infinity();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_runWithoutEField(double endtime)
+{
+    // This bool tracks if the update time has been aligned to the endtime. Trying to
+    // do this by instead comparing two doubles can cause infinite loops.
+    bool aligned = false;
+
+    while (statedef()->time() < endtime && !aligned)
+    {
+        double pre_ssa_time = statedef()->time();
+        double update_period = pUpdPeriod;
+        // Update period may take us past the endtime- adjust if so
+        if (pre_ssa_time + update_period > endtime)
+        {
+            update_period = endtime - pre_ssa_time;
+            aligned = true;
+        }
+
+        double extent_before = getReacExtent() + getDiffExtent();
+
+        pPhasePeriod = update_period;
+        pPhaseTime = pre_ssa_time;
+
+        // *********************** Operator Split: SSA *********************************
+        _runPhase(PHASE_SSA);
+
+        Clock::time_point sync_start = Clock::now();
+        _runSerialSSA(update_period, pre_ssa_time);
+        pSyncTime += elapsed(sync_start, Clock::now());
+
+        // *********************** Operator Split: Diffusion ***************************
+        _runPhase(PHASE_DIFFUSION);
+        _runPhase(PHASE_COMMIT);
+
+        statedef()->setTime(pre_ssa_time + update_period);
+        uint nsteps = static_cast<uint>(getReacExtent() + getDiffExtent() - extent_before);
+        if (nsteps > 0) statedef()->incNSteps(nsteps);
+
+        pNIteration += 1;
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_runWithEField(double endtime)
+{
+    while (statedef()->time() < endtime)
+    {
+        double t0 = statedef()->time();
+        _runWithoutEField(std::min(t0 + _nextEFieldDT(), endtime));
+
+        double sttime = statedef()->time();
+        _applyEFieldCurrents(sttime - t0, sttime);
+
+        _beginEFieldStep();
+        pEField->advance(sttime - t0);
+        _endEFieldStep(sttime - t0);
+
+        // TODO: Replace this with something that only resets voltage-dependent things
+        _runPhase(PHASE_REFRESH);
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_updateOwner(stex::KProc * kp)
+{
+    uint sidx = kp->schedIDX();
+    int owner = pKProcOwner[sidx];
+    if (owner < 0) return;
+    if (owner == static_cast<int>(pPartitions.size()))
+    {
+        pBoundaryTree.set(pKProcSlot[sidx], kp->rate(this));
+    }
+    else
+    {
+        pPartitions[owner].propensities.set(pKProcSlot[sidx], kp->rate(this));
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_runSerialSSA(double period, double starttime)
+{
+    uint nboundary = pBoundaryKProcs.size();
+    if (nboundary == 0) return;
+
+    // The partitions have changed the elements these processes read.
+    for (uint i = 0; i < nboundary; ++i)
+    {
+        pBoundaryTree.set(i, pBoundaryKProcs[i]->rate(this));
+    }
+
+    double cumulative_dt = 0.0;
+    while (true)
+    {
+        double a0 = pBoundaryTree.total();
+        if (a0 <= 0.0) break;
+        double dt = rng()->getExp(a0);
+        if (cumulative_dt + dt > period) break;
+
+        stex::KProc * kp = pBoundaryKProcs[pBoundaryTree.select(rng()->getUnfIE() * a0)];
+        std::vector<stex::KProc *> const & upd = kp->apply(rng(), dt, starttime + cumulative_dt);
+        cumulative_dt += dt;
+        pBoundaryReacExtent += 1;
+
+        // Running alone, so partition propensities can be updated in place.
+        for (auto u : upd) _updateOwner(u);
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_refreshPartition(uint p)
+{
+    Partition & part = pPartitions[p];
+    uint nkprocs = part.ssaKProcs.size();
+    for (uint i = 0; i < nkprocs; ++i)
+    {
+        part.propensities.set(i, part.ssaKProcs[i]->rate(this));
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_runPartitionSSA(uint p)
+{
+    Partition & part = pPartitions[p];
+    steps::rng::RNG * r = part.rng.get();
+    double period = pPhasePeriod;
+    double starttime = pPhaseTime;
+
+    double cumulative_dt = 0.0;
+    while (true)
+    {
+        double a0 = part.propensities.total();
+        if (a0 <= 0.0) break;
+        double dt = r->getExp(a0);
+        if (cumulative_dt + dt > period) break;
+
+        stex::KProc * kp = part.ssaKProcs[part.propensities.select(r->getUnfIE() * a0)];
+        std::vector<stex::KProc *> const & upd = kp->apply(r, dt, starttime + cumulative_dt);
+        cumulative_dt += dt;
+        part.reacExtent += 1;
+
+        // Interior processes only change elements of this partition, so the
+        // only other owners that can appear here are the boundary set and
+        // diffusion, both of which recompute their rates when they run.
+        for (auto u : upd)
+        {
+            uint sidx = u->schedIDX();
+            if (pKProcOwner[sidx] == static_cast<int>(p))
+            {
+                part.propensities.set(pKProcSlot[sidx], u->rate(this));
+            }
+        }
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_diffusePartition(uint p)
+{
+    Partition & part = pPartitions[p];
+    steps::rng::RNG * r = part.rng.get();
+    double period = pPhasePeriod;
+    uint moves[4];
+
+    // volume diffusion
+
+    part.binomPos.clear();
+    part.binomN.clear();
+    part.binomP.clear();
+
+    uint ndiffs = part.diffs.size();
+    for (uint pos = 0; pos < ndiffs; ++pos)
+    {
+        stex::Diff * d = part.diffs[pos];
+        if (d->inactive()) continue;
+        double scaleddcst = d->getScaledDcst();
+        if (scaleddcst <= 0.0) continue;
+        uint population = d->getTet()->pools()[d->getLigLidx()];
+        if (population == 0) continue;
+
+        // Mean proportion of molecules leaving during the period
+        double t1 = period * scaleddcst;
+        if (t1 > 1.0) t1 = 1.0;
+
+        part.binomPos.push_back(pos);
+        part.binomN.push_back(population);
+        part.binomP.push_back(t1);
+    }
+
+    uint nbinom = part.binomPos.size();
+    part.binomDraws.resize(nbinom);
+    if (nbinom != 0)
+    {
+        r->getBinomBatch(nbinom, &part.binomN[0], &part.binomP[0], &part.binomDraws[0]);
+    }
+
+    for (uint bi = 0; bi < nbinom; ++bi)
+    {
+        uint nmolcs = part.binomDraws[bi];
+        if (nmolcs == 0) continue;
+
+        stex::Diff * d = part.diffs[part.binomPos[bi]];
+        stex::Tet * tet = d->getTet();
+        uint lidx = d->getLigLidx();
+
+        d->sampleDirections(r, nmolcs, moves, pDiffApplyThreshold);
+        for (uint dir = 0; dir < 4; ++dir)
+        {
+            if (moves[dir] == 0) continue;
+            stex::Tet * next = tet->nextTet(dir);
+            int nlidx = d->getNeighbLidx(dir);
+            assert(next != 0);
+            assert(nlidx > -1);
+            if (next->clamped(nlidx)) continue;
+
+            uint nidx = next->idx();
+            int dest = pTetPart[nidx];
+            if (dest == static_cast<int>(p))
+            {
+                next->incCount(nlidx, moves[dir]);
+                pTetDirty[nidx] = 1;
+            }
+            else
+            {
+                BoundaryChange change = {BOUNDARY_TET, nidx, static_cast<uint>(nlidx), moves[dir]};
+                part.outbox[dest].push_back(change);
+            }
+        }
+
+        if (!tet->clamped(lidx))
+        {
+            tet->incCount(lidx, -static_cast<int>(nmolcs));
+            pTetDirty[tet->idx()] = 1;
+        }
+        d->incExtent(nmolcs);
+        part.diffExtent += nmolcs;
+    }
+
+    // surface diffusion
+
+    part.binomPos.clear();
+    part.binomN.clear();
+    part.binomP.clear();
+
+    uint nsdiffs = part.sdiffs.size();
+    for (uint pos = 0; pos < nsdiffs; ++pos)
+    {
+        stex::SDiff * d = part.sdiffs[pos];
+        if (d->inactive()) continue;
+        double scaleddcst = d->getScaledDcst();
+        if (scaleddcst <= 0.0) continue;
+        uint population = d->getTri()->pools()[d->getLigLidx()];
+        if (population == 0) continue;
+
+        double t1 = period * scaleddcst;
+        if (t1 > 1.0) t1 = 1.0;
+
+        part.binomPos.push_back(pos);
+        part.binomN.push_back(population);
+        part.binomP.push_back(t1);
+    }
+
+    nbinom = part.binomPos.size();
+    part.binomDraws.resize(nbinom);
+    if (nbinom != 0)
+    {
+        r->getBinomBatch(nbinom, &part.binomN[0], &part.binomP[0], &part.binomDraws[0]);
+    }
+
+    for (uint bi = 0; bi < nbinom; ++bi)
+    {
+        uint nmolcs = part.binomDraws[bi];
+        if (nmolcs == 0) continue;
+
+        stex::SDiff * d = part.sdiffs[part.binomPos[bi]];
+        stex::Tri * tri = d->getTri();
+        uint lidx = d->getLigLidx();
+
+        d->sampleDirections(r, nmolcs, moves, pDiffApplyThreshold);
+        for (uint dir = 0; dir < 3; ++dir)
+        {
+            if (moves[dir] == 0) continue;
+            stex::Tri * next = tri->nextTri(dir);
+            assert(next != 0);
+            if (next->clamped(lidx)) continue;
+
+            uint nidx = next->idx();
+            int dest = pTriPart[nidx];
+            if (dest == static_cast<int>(p))
+            {
+                next->incCount(lidx, moves[dir]);
+                pTriDirty[nidx] = 1;
+            }
+            else
+            {
+                BoundaryChange change = {BOUNDARY_TRI, nidx, lidx, moves[dir]};
+                part.outbox[dest].push_back(change);
+            }
+        }
+
+        if (!tri->clamped(lidx))
+        {
+            tri->incCount(lidx, -static_cast<int>(nmolcs));
+            pTriDirty[tri->idx()] = 1;
+        }
+        d->incExtent(nmolcs);
+        part.diffExtent += nmolcs;
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_commitPartition(uint p)
+{
+    Partition & part = pPartitions[p];
+
+    // Apply the changes other partitions buffered for this one. Each
+    // buffer is written only in the diffusion phase by its source and
+    // read only here by its destination.
+    for (auto & src : pPartitions)
+    {
+        std::vector<BoundaryChange> & inbox = src.outbox[p];
+        for (auto const & c : inbox)
+        {
+            if (c.type == BOUNDARY_TET)
+            {
+                pTets[c.idx]->incCount(c.lidx, c.count);
+                pTetDirty[c.idx] = 1;
+            }
+            else
+            {
+                pTris[c.idx]->incCount(c.lidx, c.count);
+                pTriDirty[c.idx] = 1;
+            }
+        }
+        inbox.clear();
+    }
+
+    // Update the propensities of interior processes on changed elements.
+    for (uint t : part.tets)
+    {
+        if (!pTetDirty[t]) continue;
+        for (auto kp : pTets[t]->kprocs())
+        {
+            uint sidx = kp->schedIDX();
+            if (pKProcOwner[sidx] == static_cast<int>(p))
+            {
+                part.propensities.set(pKProcSlot[sidx], kp->rate(this));
+            }
+        }
+    }
+
+    for (uint t : part.ssaTris)
+    {
+        stex::Tri * tri = pTris[t];
+        stex::Tet * itet = dynamic_cast<stex::Tet *>(tri->iTet());
+        stex::Tet * otet = dynamic_cast<stex::Tet *>(tri->oTet());
+        bool changed = pTriDirty[t]
+            || (itet != 0 && pTetDirty[itet->idx()])
+            || (otet != 0 && pTetDirty[otet->idx()]);
+        if (!changed) continue;
+        for (auto kp : tri->kprocs())
+        {
+            uint sidx = kp->schedIDX();
+            if (pKProcOwner[sidx] == static_cast<int>(p))
+            {
+                part.propensities.set(pKProcSlot[sidx], kp->rate(this));
+            }
+        }
+    }
+
+    for (uint t : part.tets) pTetDirty[t] = 0;
+    for (uint t : part.tris) pTriDirty[t] = 0;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_doPhase(Phase phase, uint p)
+{
+    switch (phase)
+    {
+        case PHASE_REFRESH:
+            _refreshPartition(p);
+            break;
+        case PHASE_SSA:
+            _runPartitionSSA(p);
+            break;
+        case PHASE_DIFFUSION:
+            _diffusePartition(p);
+            break;
+        case PHASE_COMMIT:
+            _commitPartition(p);
+            break;
+        default:
+            break;
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_startWorkers(void)
+{
+    assert(pWorkers.empty());
+    pGeneration = 0;
+    pPending = 0;
+    pWorkerError = std::exception_ptr();
+
+    // Partition 0 is run by the calling thread.
+    uint nparts = pPartitions.size();
+    for (uint p = 1; p < nparts; ++p)
+    {
+        pWorkers.push_back(std::thread(&TetOpSplit::_workerLoop, this, p));
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_stopWorkers(void)
+{
+    if (pWorkers.empty()) return;
+    {
+        std::lock_guard<std::mutex> lock(pPoolMutex);
+        pPhase = PHASE_EXIT;
+        ++pGeneration;
+    }
+    pWorkCV.notify_all();
+    for (auto & w : pWorkers) w.join();
+    pWorkers.clear();
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_workerLoop(uint p)
+{
+    uint seen = 0;
+    while (true)
+    {
+        Phase phase;
+        {
+            std::unique_lock<std::mutex> lock(pPoolMutex);
+            pWorkCV.wait(lock, [this, seen] { return pGeneration != seen; });
+            seen = pGeneration;
+            phase = pPhase;
+        }
+        if (phase == PHASE_EXIT) return;
+
+        try
+        {
+            _doPhase(phase, p);
+        }
+        catch (...)
+        {
+            std::lock_guard<std::mutex> lock(pPoolMutex);
+            if (!pWorkerError) pWorkerError = std::current_exception();
+        }
+
+        {
+            std::lock_guard<std::mutex> lock(pPoolMutex);
+            if (--pPending == 0) pDoneCV.notify_one();
+        }
+    }
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::_runPhase(Phase phase)
+{
+    Clock::time_point start = Clock::now();
+
+    if (!pWorkers.empty())
+    {
+        {
+            std::lock_guard<std::mutex> lock(pPoolMutex);
+            pPhase = phase;
+            pPending = pWorkers.size();
+            ++pGeneration;
+        }
+        pWorkCV.notify_all();
+    }
+
+    std::exception_ptr error;
+    try
+    {
+        _doPhase(phase, 0);
+    }
+    catch (...)
+    {
+        error = std::current_exception();
+    }
+
+    Clock::time_point done = Clock::now();
+
+    if (!pWorkers.empty())
+    {
+        std::unique_lock<std::mutex> lock(pPoolMutex);
+        pDoneCV.wait(lock, [this] { return pPending == 0; });
+        if (!error) error = pWorkerError;
+        pWorkerError = std::exception_ptr();
+    }
+
+    Clock::time_point end = Clock::now();
+    pCompTime += elapsed(start, done);
+    pIdleTime += elapsed(done, end);
+
+    if (error) std::rethrow_exception(error);
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stos::TetOpSplit::getUpdPeriod(void)
+{
+    _computeUpdPeriod();
+    return pUpdPeriod;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+void stos::TetOpSplit::setDiffApplyThreshold(int threshold)
+{
+    if (threshold < 0)
+    {
+        std::ostringstream os;
+        os << "Diffusion apply threshold cannot be negative.\n";
+        throw steps::ArgErr(os.str());
+    }
+    pDiffApplyThreshold = threshold;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stos::TetOpSplit::getReacExtent(bool local)
+{
+    double sum = pBoundaryReacExtent;
+    for (auto const & part : pPartitions) sum += part.reacExtent;
+    return sum;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stos::TetOpSplit::getDiffExtent(bool local)
+{
+    double sum = 0.0;
+    for (auto const & part : pPartitions) sum += part.diffExtent;
+    return sum;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stos::TetOpSplit::getNIteration(void)
+{
+    return pNIteration;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stos::TetOpSplit::getCompTime(void)
+{
+    return pCompTime;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stos::TetOpSplit::getSyncTime(void)
+{
+    return pSyncTime;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stos::TetOpSplit::getIdleTime(void)
+{
+    return pIdleTime;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stos::TetOpSplit::sumBatchTetCountsNP(unsigned int* indices, int input_size, std::string const & s)
+{
+    bool has_tet_warning = false;
+    bool has_spec_warning = false;
+    std::ostringstream tet_not_assign;
+    std::ostringstream spec_undefined;
+
+    uint sgidx = statedef()->getSpecIdx(s);
+    double sum = 0.0;
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+
+        if (tidx >= pTets.size())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no tetrahedron with index " << tidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+
+        if (pTets[tidx] == 0)
+        {
+            tet_not_assign << tidx << " ";
+            has_tet_warning = true;
+            continue;
+        }
+
+        stex::Tet * tet = pTets[tidx];
+        uint slidx = tet->compdef()->specG2L(sgidx);
+        if (slidx == ssolver::LIDX_UNDEFINED)
+        {
+            spec_undefined << tidx << " ";
+            has_spec_warning = true;
+            continue;
+        }
+
+        sum += tet->pools()[slidx];
+    }
+
+    if (has_tet_warning) {
+        std::cerr << "Warning: The following tetrahedrons have not been assigned to a compartment, fill in zeros at target positions:\n";
+        std::cerr << tet_not_assign.str() << "\n";
+    }
+
+    if (has_spec_warning) {
+        std::cerr << "Warning: Species " << s << " has not been defined in the following tetrahedrons, fill in zeros at target positions:\n";
+        std::cerr << spec_undefined.str() << "\n";
+    }
+    return sum;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stos::TetOpSplit::sumBatchTriCountsNP(unsigned int* indices, int input_size, std::string const & s)
+{
+    bool has_tri_warning = false;
+    bool has_spec_warning = false;
+    std::ostringstream tri_not_assign;
+    std::ostringstream spec_undefined;
+
+    uint sgidx = statedef()->getSpecIdx(s);
+    double sum = 0.0;
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+
+        if (tidx >= pTris.size())
+        {
+            std::ostringstream os;
+            os << "Error (Index Overbound): There is no triangle with index " << tidx << ".\n";
+            throw steps::ArgErr(os.str());
+        }
+
+        if (pTris[tidx] == 0)
+        {
+            tri_not_assign << tidx << " ";
+            has_tri_warning = true;
+            continue;
+        }
+
+        stex::Tri * tri = pTris[tidx];
+        uint slidx = tri->patchdef()->specG2L(sgidx);
+        if (slidx == ssolver::LIDX_UNDEFINED)
+        {
+            spec_undefined << tidx << " ";
+            has_spec_warning = true;
+            continue;
+        }
+
+        sum += tri->pools()[slidx];
+    }
+
+    if (has_tri_warning) {
+        std::cerr << "Warning: The following triangles have not been assigned to a patch, fill in zeros at target positions:\n";
+        std::cerr << tri_not_assign.str() << "\n";
+    }
+
+    if (has_spec_warning) {
+        std::cerr << "Warning: Species " << s << " has not been defined in the following triangles, fill in zeros at target positions:\n";
+        std::cerr << spec_undefined.str() << "\n";
+    }
+    return sum;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stos::TetOpSplit::sumBatchTriGHKIsNP(unsigned int* indices, int input_size, std::string const & ghk)
+{
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+    // the following may raise exception if string is unknown
+    uint ghkidx = statedef()->getGHKcurrIdx(ghk);
+
+    double sum = 0.0;
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+        if (tidx >= mesh()->countTris())
+        {
+            std::ostringstream os;
+            os << "Triangle index out of range.";
+            throw steps::ArgErr(os.str());
+        }
+        sum += _getTriGHKI(tidx, ghkidx);
+    }
+    return sum;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+double stos::TetOpSplit::sumBatchTriOhmicIsNP(unsigned int* indices, int input_size, std::string const & oc)
+{
+    if (efflag() != true)
+    {
+        std::ostringstream os;
+        os << "Method not available: EField calculation not included in simulation.";
+        throw steps::ArgErr(os.str());
+    }
+    // the following may raise exception if string is unknown
+    uint ocidx = statedef()->getOhmicCurrIdx(oc);
+
+    double sum = 0.0;
+    for (int t = 0; t < input_size; t++) {
+        uint tidx = indices[t];
+        if (tidx >= mesh()->countTris())
+        {
+            std::ostringstream os;
+            os << "Triangle index out of range.";
+            throw steps::ArgErr(os.str());
+        }
+        sum += _getTriOhmicI(tidx, ocidx);
+    }
+    return sum;
+}
+
+////////////////////////////////////////////////////////////////////////////////
+
+// END
@@ -0,0 +1,348 @@
+/*
+ #################################################################################
+#
+#    STEPS - STochastic Engine for Pathway Simulation
+#    Copyright (C) 2007-2017 Okinawa Institute of Science and Technology, Japan.
+#    Copyright (C) 2003-2006 University of Antwerp, Belgium.
+#
+#    See the file AUTHORS for details.
+#    This file is part of STEPS.
+#
+#    STEPS is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License version 2,
+#    as published by the Free Software Foundation.
+#
+#    STEPS is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#################################################################################
+
+ */
+
+
+#ifndef STEPS_TETOPSPLIT_TETOPSPLIT_HPP
+#define STEPS_TETOPSPLIT_TETOPSPLIT_HPP 1
+
+// STL headers.
+#include <condition_variable>
+#include <exception>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <thread>
+#include <vector>
+
+// STEPS headers.
+#include "steps/common.h"
+#include "steps/rng/rng.hpp"
+#include "steps/tetexact/tetexact.hpp"
+#include "steps/tetexact/diff.hpp"
+#include "steps/tetexact/sdiff.hpp"
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace steps {
+namespace tetopsplit {
+
+////////////////////////////////////////////////////////////////////////////////
+
+/// Propensities of a fixed set of kinetic processes, stored as a complete
+/// binary tree of partial sums so that both updating an entry and
+/// selecting an entry by a uniform deviate are O(log n).
+class SumTree
+{
+
+public:
+
+    SumTree(void);
+
+    /// Resize to n entries, all with zero propensity.
+    void resize(uint n);
+
+    inline uint size(void) const
+    { return pSize; }
+
+    /// Set the propensity of entry i and update the partial sums.
+    void set(uint i, double value);
+
+    /// Sum of all propensities.
+    inline double total(void) const
+    { return pTree.empty() ? 0.0 : pTree[1]; }
+
+    /// Return the entry in which value (in [0, total())) falls.
+    uint select(double value) const;
+
+private:
+
+    uint                                        pSize;
+    uint                                        pLeaves;
+    std::vector<double>                         pTree;
+
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
+/// Molecule change to an element owned by another partition, produced in
+/// the diffusion phase and applied by the owner in the commit phase.
+struct BoundaryChange
+{
+    uint                                        type;
+    uint                                        idx;
+    uint                                        lidx;
+    uint                                        count;
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
+/// All data that one worker thread touches during the parallel phases.
+///
+/// A partition owns a set of tetrahedrons and triangles. Its SSA covers the
+/// kinetic processes whose reactants and products all lie in those
+/// elements; every other non-diffusive process runs in the serial boundary
+/// phase.
+struct Partition
+{
+    Partition(void);
+
+    std::unique_ptr<steps::rng::RNG>            rng;
+
+    // Owned elements (global indices).
+    std::vector<uint>                           tets;
+    std::vector<uint>                           tris;
+
+    // Owned triangles whose non-diffusive kprocs are interior.
+    std::vector<uint>                           ssaTris;
+
+    // SSA over interior kprocs; entry i of the tree is ssaKProcs[i].
+    std::vector<steps::tetexact::KProc *>       ssaKProcs;
+    SumTree                                     propensities;
+
+    std::vector<steps::tetexact::Diff *>        diffs;
+    std::vector<steps::tetexact::SDiff *>       sdiffs;
+
+    // Changes to elements of other partitions, indexed by destination.
+    std::vector<std::vector<BoundaryChange> >   outbox;
+
+    // Scratch arrays for the batched binomial draws.
+    std::vector<uint>                           binomPos;
+    std::vector<uint>                           binomN;
+    std::vector<double>                         binomP;
+    std::vector<uint>                           binomDraws;
+
+    double                                      reacExtent;
+    double                                      diffExtent;
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
+/// Serial, shared-memory version of the operator-splitting approximate
+/// solver steps::mpi::tetopsplit::TetOpSplitP.
+///
+/// The mesh is split into partitions, one per worker thread. In each
+/// update period every partition runs the SSA on its interior reactions
+/// and then the binomial diffusion step; processes that cross a partition
+/// boundary run in a short serial SSA between the two. Diffusion into a
+/// neighbouring partition is written to a per-destination buffer and
+/// applied by the owning thread afterwards, so no element is ever written
+/// by two threads at once.
+///
+/// Element, kinetic process and EField data are the ones of Tetexact, so
+/// every data access method behaves as it does for that solver.
+class TetOpSplit: public steps::tetexact::Tetexact
+{
+
+public:
+
+    /// Constructor
+    ///
+    /// \param tet_hosts Partition index of each tetrahedron. If empty, the
+    ///                  mesh is split into nthreads slabs along its longest axis.
+    /// \param tri_hosts Partition index of patch triangles. Triangles not
+    ///                  listed follow their inner tetrahedron.
+    /// \param wm_hosts  Accepted for compatibility with TetOpSplitP; processes
+    ///                  in well-mixed compartments always run in the serial phase.
+    /// \param nthreads  Number of worker threads if tet_hosts is empty;
+    ///                  0 selects the hardware concurrency.
+    TetOpSplit(steps::model::Model * m, steps::wm::Geom * g, steps::rng::RNG * r,
+               int calcMembPot = EF_NONE,
+               std::vector<uint> const & tet_hosts = std::vector<uint>(),
+               std::map<uint, uint> const & tri_hosts = std::map<uint, uint>(),
+               std::vector<uint> const & wm_hosts = std::vector<uint>(),
+               uint nthreads = 0);
+    ~TetOpSplit(void);
+
+    ////////////////////////////////////////////////////////////////////////
+    // SOLVER INFORMATION
+    ////////////////////////////////////////////////////////////////////////
+
+    std::string getSolverName(void) const;
+    std::string getSolverDesc(void) const;
+    std::string getSolverAuthors(void) const;
+    std::string getSolverEmail(void) const;
+
+    ////////////////////////////////////////////////////////////////////////
+    // SOLVER CONTROLS
+    ////////////////////////////////////////////////////////////////////////
+
+    void reset(void);
+    void run(double endtime);
+    void step(void);
+
+    ////////////////////////////////////////////////////////////////////////
+    // OPERATOR SPLITTING INFORMATION
+    ////////////////////////////////////////////////////////////////////////
+
+    double getUpdPeriod(void);
+
+    /// Set the number of molecules up to which the directions of the
+    /// molecules leaving a voxel in a diffusion step are drawn one by
+    /// one, as in TetOpSplitP. Larger numbers are split by binomial draws.
+    void setDiffApplyThreshold(int threshold);
+
+    double getReacExtent(bool local = false);
+    double getDiffExtent(bool local = false);
+    double getNIteration(void);
+
+    inline uint getNThreads(void) const
+    { return pPartitions.size(); }
+
+    /// Time spent in the parallel phases, in the serial boundary phase and
+    /// waiting for the slowest partition, measured on the calling thread.
+    double getCompTime(void);
+    double getSyncTime(void);
+    double getIdleTime(void);
+
+    ////////////////////////////////////////////////////////////////////////
+    // BATCH DATA ACCESS
+    ////////////////////////////////////////////////////////////////////////
+
+    double sumBatchTetCountsNP(unsigned int* indices, int input_size, std::string const & s);
+    double sumBatchTriCountsNP(unsigned int* indices, int input_size, std::string const & s);
+    double sumBatchTriGHKIsNP(unsigned int* indices, int input_size, std::string const & ghk);
+    double sumBatchTriOhmicIsNP(unsigned int* indices, int input_size, std::string const & oc);
+
+    ////////////////////////////////////////////////////////////////////////
+
+    void repartitionAndReset(std::vector<uint> const & tet_hosts,
+                             std::map<uint, uint> const & tri_hosts = std::map<uint, uint>(),
+                             std::vector<uint> const & wm_hosts = std::vector<uint>());
+
+    ////////////////////////////////////////////////////////////////////////
+
+private:
+
+    enum Phase
+    {
+        PHASE_REFRESH,
+        PHASE_SSA,
+        PHASE_DIFFUSION,
+        PHASE_COMMIT,
+        PHASE_EXIT
+    };
+
+    ////////////////////////////////////////////////////////////////////////
+    // PARTITIONING
+    ////////////////////////////////////////////////////////////////////////
+
+    void _partition(std::vector<uint> const & tet_hosts,
+                    std::map<uint, uint> const & tri_hosts, uint nthreads);
+
+    int _volPartition(steps::tetexact::WmVol * vol) const;
+
+    void _assignKProc(steps::tetexact::KProc * kp, int owner);
+
+    ////////////////////////////////////////////////////////////////////////
+    // OPERATOR SPLITTING
+    ////////////////////////////////////////////////////////////////////////
+
+    void _computeUpdPeriod(void);
+
+    void _runWithoutEField(double endtime);
+    void _runWithEField(double endtime);
+
+    void _runSerialSSA(double period, double starttime);
+
+    void _updateOwner(steps::tetexact::KProc * kp);
+
+    void _refreshPartition(uint p);
+    void _runPartitionSSA(uint p);
+    void _diffusePartition(uint p);
+    void _commitPartition(uint p);
+
+    ////////////////////////////////////////////////////////////////////////
+    // THREADING
+    ////////////////////////////////////////////////////////////////////////
+
+    void _startWorkers(void);
+    void _stopWorkers(void);
+    void _workerLoop(uint p);
+    void _runPhase(Phase phase);
+    void _doPhase(Phase phase, uint p);
+
+    ////////////////////////////////////////////////////////////////////////
+
+    std::vector<Partition>                      pPartitions;
+
+    // Processes that cross a partition boundary or sit in a well-mixed
+    // volume, run by the calling thread with the solver RNG.
+    std::vector<steps::tetexact::KProc *>       pBoundaryKProcs;
+    SumTree                                     pBoundaryTree;
+
+    // Partition index of each tet and tri (-1 if not in a comp/patch).
+    std::vector<int>                            pTetPart;
+    std::vector<int>                            pTriPart;
+
+    // Owner (partition index, pPartitions.size() for the boundary set,
+    // or -1 for diffusion) and tree slot of each kproc, by schedIDX.
+    std::vector<int>                            pKProcOwner;
+    std::vector<uint>                           pKProcSlot;
+
+    // Elements changed in the diffusion and commit phases, written only by
+    // the owning partition.
+    std::vector<char>                           pTetDirty;
+    std::vector<char>                           pTriDirty;
+
+    double                                      pUpdPeriod;
+    uint                                        pDiffApplyThreshold;
+
+    // Number of threads requested at construction, reused when the mesh
+    // is repartitioned.
+    uint                                        pNThreads;
+
+    double                                      pBoundaryReacExtent;
+    double                                      pNIteration;
+
+    double                                      pCompTime;
+    double                                      pSyncTime;
+    double                                      pIdleTime;
+
+    // Arguments of the current phase.
+    double                                      pPhasePeriod;
+    double                                      pPhaseTime;
+
+    std::vector<std::thread>                    pWorkers;
+    std::mutex                                  pPoolMutex;
+    std::condition_variable                     pWorkCV;
+    std::condition_variable                     pDoneCV;
+    Phase                                       pPhase;
+    uint                                        pGeneration;
+    uint                                        pPending;
+    std::exception_ptr                          pWorkerError;
+
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
+}
+}
+
+#endif
+// STEPS_TETOPSPLIT_TETOPSPLIT_HPP
+
+// END
@@ -25,11 +25,22 @@
 %}
 
 %apply (unsigned int* IN_ARRAY1, int DIM1) {
+    (unsigned int* tets, int tets_size),
+    (unsigned int* tris, int tris_size),
     (unsigned int* indices, int input_size),
     (unsigned int* t_indices, int input_size),
     (unsigned int* indices, int index_size)
 }
 
+%apply (double* IN_ARRAY1, int DIM1) {
+    (double* points, int input_size),
+    (double* verts, int verts_size)
+}
+
+%apply (int* INPLACE_ARRAY1, int DIM1) {
+    (int* tet_indices, int output_size)
+}
+
 %apply (double* INPLACE_ARRAY1, int DIM1) {
     (double* centres, int output_size),
     (double* cords, int cord_size),
@@ -45,6 +56,18 @@
     (unsigned int* point_counts, int count_size)
 }
 
+%apply (int** ARGOUTVIEW_ARRAY2, int* DIM1, int* DIM2) {
+    (int** data, int* rows, int* cols)
+}
+
+%apply (unsigned int** ARGOUTVIEW_ARRAY2, int* DIM1, int* DIM2) {
+    (unsigned int** data, int* rows, int* cols)
+}
+
+%apply (double** ARGOUTVIEW_ARRAY2, int* DIM1, int* DIM2) {
+    (double** data, int* rows, int* cols)
+}
+
 %import "unchecked_stl_seq.i"
 UNCHECKED_STL_SEQ_CONVERT(std::vector<unsigned int>,push_back,PyInt_AsUnsignedLongMask)
 UNCHECKED_STL_SEQ_CONVERT(std::set<unsigned int>,insert,PyInt_AsUnsignedLongMask)
@@ -167,6 +190,9 @@ struct ROISet {
 	} catch (steps::ProgErr & pe){
         PyErr_SetString(PyExc_RuntimeError, pe.getMsg());
         return NULL;
+    } catch (steps::IOErr & ioe){
+        PyErr_SetString(PyExc_IOError, ioe.getMsg());
+        return NULL;
     }
 }
 
@@ -774,6 +800,20 @@ public:
 			std::vector<int> const & tet_tet_neighbs);
 	
 	virtual ~Tetmesh(void);
+
+#ifdef WITH_NUMPY
+	// Constructor from numpy arrays, called by steps.geom.Tetmesh when
+	// given arrays. A separate name keeps it out of the overload
+	// resolution of the list constructors, which accept any sequence.
+	%extend {
+	%newobject _newFromNP;
+	static steps::tetmesh::Tetmesh * _newFromNP(double* verts, int verts_size,
+			unsigned int* tets, int tets_size,
+			unsigned int* tris, int tris_size) {
+		return new steps::tetmesh::Tetmesh(verts, verts_size, tets, tets_size, tris, tris_size);
+	}
+	}
+#endif
     
     %feature("autodoc", 
 "
@@ -1187,6 +1227,116 @@ Return:
     int
 ");
 	int findTetByPoint(std::vector<double> p) const;
+
+    %feature("autodoc", 
+"
+Returns the indices of the tetrahedra which encompass a list of points
+(given in Cartesian coordinates x,y,z, one point after another). The
+index is -1 for a point outside the mesh.
+
+The first call builds a spatial index of the mesh, so that each point
+is located without scanning all tetrahedra.
+
+Syntax::
+
+    findTetsByPoints(points)
+
+Arguments:
+    list<float, length = 3 * npoints> points
+             
+Return:
+    list<int, length = npoints>
+");
+	std::vector<int> findTetsByPoints(std::vector<double> const & points) const;
+
+    %feature("autodoc", 
+"
+Returns the indices of the tetrahedra which encompass a list of points
+in numpy arrays. The index is -1 for a point outside the mesh. Points
+are located in parallel if STEPS is built with OpenMP.
+
+Syntax::
+
+    import numpy as np
+    points = np.array([x0, y0, z0, x1, y1, z1], dtype=np.float64)
+    tet_indices = np.zeros(len(points) // 3, dtype=np.int32)
+    findTetsByPointsNP(points, tet_indices)
+
+Arguments:
+    * numpy.array<float> points
+    * numpy.array<int, length = len(points) / 3> tet_indices
+             
+Return:
+    None
+");
+	void findTetsByPointsNP(double* points, int input_size, int* tet_indices, int output_size) const;
+
+    %feature("autodoc", 
+"
+Returns the index of the tetrahedron which encompasses a given point
+p (given in Cartesian coordinates x,y,z), searching from a nearby
+tetrahedron start_tet. The search walks across tetrahedron faces towards
+p, and falls back to the spatial index if the walk leaves the mesh.
+Returns -1 if p is a position outside the mesh.
+
+If p is on a boundary between tetrahedra, any one of them may be
+returned, which is not necessarily the one findTetByPoint returns.
+
+Syntax::
+
+    findTetByPointWalk(p, start_tet)
+
+Arguments:
+    * list<float, length = 3> p
+    * int start_tet (-1 to use the spatial index directly)
+             
+Return:
+    int
+");
+	int findTetByPointWalk(std::vector<double> p, int start_tet) const;
+
+    %feature("autodoc", 
+"
+Returns the indices of the tetrahedra which encompass a sequence of
+points, such as the positions along a trajectory. The search for each
+point starts from the tetrahedron found for the previous one, so close
+consecutive points are located in a few steps each.
+
+Syntax::
+
+    findTetsByPointsWalk(points, start_tet)
+
+Arguments:
+    * list<float, length = 3 * npoints> points
+    * int start_tet (default = -1)
+             
+Return:
+    list<int, length = npoints>
+");
+	std::vector<int> findTetsByPointsWalk(std::vector<double> const & points, int start_tet = -1) const;
+
+    %feature("autodoc", 
+"
+Returns the indices of the tetrahedra which encompass a sequence of
+points in numpy arrays, each search starting from the tetrahedron found
+for the previous point.
+
+Syntax::
+
+    import numpy as np
+    points = np.array([x0, y0, z0, x1, y1, z1], dtype=np.float64)
+    tet_indices = np.zeros(len(points) // 3, dtype=np.int32)
+    findTetsByPointsWalkNP(points, tet_indices, start_tet)
+
+Arguments:
+    * numpy.array<float> points
+    * numpy.array<int, length = len(points) / 3> tet_indices
+    * int start_tet (default = -1)
+             
+Return:
+    None
+");
+	void findTetsByPointsWalkNP(double* points, int input_size, int* tet_indices, int output_size, int start_tet = -1) const;
 	
     %feature("autodoc", 
 "
@@ -1637,6 +1787,136 @@ Return:
 
     //std::vector<int> getTetsTetNeighbSet(std::vector<uint> const & t_indices) const;
     
+    ////////////////////////////////////////////////////////////////////////
+    // Renumbering
+    ////////////////////////////////////////////////////////////////////////
+
+	// Wrapped by steps.geom.Tetmesh.renumber, which splits the result
+	// into the vertex, tetrahedron, triangle and bar maps.
+	%extend {
+	std::vector<unsigned int> _renumber(void) {
+		std::vector<unsigned int> vert_map, tet_map, tri_map, bar_map;
+		$self->renumber(vert_map, tet_map, tri_map, bar_map);
+		std::vector<unsigned int> maps(vert_map);
+		maps.insert(maps.end(), tet_map.begin(), tet_map.end());
+		maps.insert(maps.end(), tri_map.begin(), tri_map.end());
+		maps.insert(maps.end(), bar_map.begin(), bar_map.end());
+		return maps;
+	}
+	}
+
+    ////////////////////////////////////////////////////////////////////////
+    // Sub-mesh Extraction
+    ////////////////////////////////////////////////////////////////////////
+
+	// Wrapped by steps.geom.Tetmesh.extractSubmesh, which returns the new
+	// mesh together with the vertex, tetrahedron and triangle maps.
+	%extend {
+	%newobject _extractSubmesh;
+	steps::tetmesh::Tetmesh * _extractSubmesh(std::vector<unsigned int> const & tets) const {
+		return $self->extractSubmesh(tets);
+	}
+	std::vector<unsigned int> _getSubmeshMaps(std::vector<unsigned int> const & tets) const {
+		std::vector<unsigned int> vert_map, tet_map, tri_map;
+		$self->getSubmeshMaps(tets, vert_map, tet_map, tri_map);
+		std::vector<unsigned int> maps(vert_map);
+		maps.insert(maps.end(), tet_map.begin(), tet_map.end());
+		maps.insert(maps.end(), tri_map.begin(), tri_map.end());
+		return maps;
+	}
+	}
+
+    ////////////////////////////////////////////////////////////////////////
+    // Well-mixed Lumping
+    ////////////////////////////////////////////////////////////////////////
+
+	// Wrapped by steps.geom.Tetmesh.lumpComps.
+	%extend {
+	%newobject _lumpComps;
+	steps::tetmesh::Tetmesh * _lumpComps(std::vector<std::string> const & comp_ids) const {
+		return $self->lumpComps(comp_ids);
+	}
+	}
+
+    %feature("autodoc", 
+"
+Returns whether steps.geom.Tetmesh.lumpComps can make the compartment
+with identifier string comp_id well-mixed. Compartments must be
+tetrahedral and not be connected by a diffusion boundary or form the
+conduction volume of a membrane.
+
+Syntax::
+
+    canLumpComp(comp_id)
+
+Arguments:
+    string comp_id
+             
+Return:
+    bool
+");
+	bool canLumpComp(std::string const & comp_id) const;
+
+#ifdef WITH_NUMPY
+    ////////////////////////////////////////////////////////////////////////
+    // Bulk Topology Access
+    ////////////////////////////////////////////////////////////////////////
+
+	// Views of the internal tables without copying, for
+	// steps.geom.Tetmesh.getTopologyNP, which keeps the mesh alive for as
+	// long as the arrays are. One dimensional tables are viewed as a
+	// single column.
+	%extend {
+	void _tetTetNeighbsView(int** data, int* rows, int* cols) {
+		*data = const_cast<int *>($self->_getTetTetNeighbsData());
+		*rows = $self->countTets(); *cols = 4;
+	}
+	void _tetTriNeighbsView(unsigned int** data, int* rows, int* cols) {
+		*data = const_cast<unsigned int *>($self->_getTetTriNeighbsData());
+		*rows = $self->countTets(); *cols = 4;
+	}
+	void _triTetNeighbsView(int** data, int* rows, int* cols) {
+		*data = const_cast<int *>($self->_getTriTetNeighbsData());
+		*rows = $self->countTris(); *cols = 2;
+	}
+	void _tetVolsView(double** data, int* rows, int* cols) {
+		*data = const_cast<double *>($self->_getTetVolsData());
+		*rows = $self->countTets(); *cols = 1;
+	}
+	void _tetBarycsView(double** data, int* rows, int* cols) {
+		*data = const_cast<double *>($self->_getTetBarycsData());
+		*rows = $self->countTets(); *cols = 3;
+	}
+	void _triAreasView(double** data, int* rows, int* cols) {
+		*data = const_cast<double *>($self->_getTriAreasData());
+		*rows = $self->countTris(); *cols = 1;
+	}
+	void _triBarycsView(double** data, int* rows, int* cols) {
+		*data = const_cast<double *>($self->_getTriBarycsData());
+		*rows = $self->countTris(); *cols = 3;
+	}
+	void _triNormsView(double** data, int* rows, int* cols) {
+		*data = const_cast<double *>($self->_getTriNormsData());
+		*rows = $self->countTris(); *cols = 3;
+	}
+	void _triTriOffsetsView(unsigned int** data, int* rows, int* cols) {
+		const unsigned int * neighbours;
+		unsigned int nneighbours;
+		const unsigned int * offsets;
+		$self->_getTriTriNeighbsCSR(offsets, neighbours, nneighbours);
+		*data = const_cast<unsigned int *>(offsets);
+		*rows = $self->countTris() + 1; *cols = 1;
+	}
+	void _triTriNeighbsView(unsigned int** data, int* rows, int* cols) {
+		const unsigned int * neighbours;
+		unsigned int nneighbours;
+		const unsigned int * offsets;
+		$self->_getTriTriNeighbsCSR(offsets, neighbours, nneighbours);
+		*data = const_cast<unsigned int *>(neighbours);
+		*rows = nneighbours; *cols = 1;
+	}
+	}
+#endif
     
     ////////////////////////////////////////////////////////////////////////
     // ROI Recording
@@ -2191,6 +2471,47 @@ void saveASCII(std::string pathname, Tetmesh * m);
 */
 ////////////////////////////////////////////////////////////////////////////////
 
+%feature("autodoc", 
+"
+Loads a tetrahedral mesh, with its compartments, patches and ROI data,
+from a STEPS binary mesh file written by saveBinary. The mesh tables
+are copied directly from a memory map of the file; neighbour data is not
+recomputed.
+
+Syntax::
+
+    loadBinary(pathname)
+
+Arguments:
+    string pathname
+             
+Return:
+    steps.geom.Tetmesh
+");
+%newobject loadBinary;
+Tetmesh * loadBinary(std::string const & pathname);
+
+%feature("autodoc", 
+"
+Saves a tetrahedral mesh, with its compartments, patches and ROI data,
+to a STEPS binary mesh file. Membranes and diffusion boundaries are not
+saved.
+
+Syntax::
+
+    saveBinary(pathname, mesh)
+
+Arguments:
+    * string pathname
+    * steps.geom.Tetmesh mesh
+             
+Return:
+    None
+");
+void saveBinary(std::string const & pathname, Tetmesh * m);
+
+////////////////////////////////////////////////////////////////////////////////
+
 /* /////////////////////////////////////////////////////////////////////////////
 //////// OBJECT REMOVED BECAUSE OF MEMORY ISSUES. SEE TODO NOTE IN C++ /////////
 ///////////////////////// CONSTRUCTOR FOR DETAILS //////////////////////////////
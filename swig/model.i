@@ -2818,6 +2818,46 @@ Return:
     None
 ");
 	void setP(double p);
+
+////////////////////////////////////////////////////////////////////////////////
+    %feature("autodoc",
+"
+Tabulate the voltage-dependent part of the GHK flux equation over a range
+of potentials (in volts). Solvers then interpolate linearly in the table 
+instead of evaluating the exponentials of the flux equation each time the
+current is updated. The range applies to the shifted potential at 293.15K
+and scales with the absolute temperature at other temperatures; outside it
+the exact equation is used. An empty list turns the table off (the default).
+
+Syntax::
+
+    setVRange(vrange)
+
+Arguments:
+    * list vrange ([minimum voltage, maximum voltage, voltage step], e.g. [-150.0e-3, 100.0e-3, 1.0e-4])
+
+Return:
+    None
+");
+	void setVRange(std::vector<double> const & vrange);
+
+////////////////////////////////////////////////////////////////////////////////
+    %feature("autodoc",
+"
+Returns the tabulated voltage range [minimum voltage, maximum voltage, voltage step]
+(in volts), or an empty list if the flux equation is not tabulated.
+
+Syntax::
+
+    getVRange()
+
+Arguments:
+    None
+
+Return:
+    list<float>
+");
+	std::vector<double> getVRange(void) const;
     
 };
 
@@ -26,7 +26,8 @@
     (unsigned int* indices, int input_size)
 }
 %apply (double* INPLACE_ARRAY1, int DIM1) {
-    (double* output, int output_size)
+    (double* output, int output_size),
+    (double* values, int output_size)
 }
 
 %import "unchecked_stl_seq.i"
@@ -42,6 +43,7 @@ UNCHECKED_STL_DICT_CONVERT(%arg(std::map<unsigned int,unsigned int>),insert,PyIn
 %{
 #include "steps/solver/api.hpp"
 #include "steps/mpi/tetopsplit/tetopsplit.hpp"
+#include "steps/mpi/efieldsimp.hpp"
 %}
 
 %feature("autodoc", "1");
@@ -163,7 +165,11 @@ Return:
 
     %feature("autodoc", 
 "
-Checkpoint data to a file. Not yet implemented.
+Checkpoint data to a file.
+
+All ranks write collectively to a single shared file using MPI-IO.
+The file records the partition it was written with, so it can be
+restored by a run with a different partition or number of ranks.
     
 Syntax::
     
@@ -182,7 +188,10 @@ Return:
     
     %feature("autodoc", 
 "
-Restore data from a file. Not yet implemented.
+Restore data from a file written by checkpoint().
+
+The model and geometry must be the same as those of the checkpointing
+run; the partition and number of ranks may differ.
     
 Syntax::
     
@@ -251,6 +260,47 @@ Return:
 ");
     virtual double getTime(void) const;
     
+/////////////------------------------------------------------------////////////////
+    
+    %feature("autodoc", 
+"
+Overlap the gathering of membrane currents with simulation work.
+
+If enabled, the membrane currents of each EField step are gathered with a
+non-blocking collective while the reactions and diffusion of the next
+step run. Voltage-dependent processes then use the membrane potential
+from one EField step earlier. Disabled by default.
+
+Syntax::
+    
+    setEfieldOverlap(overlap)
+    
+Arguments:
+    bool overlap
+
+Return:
+    None
+");
+    void setEfieldOverlap(bool overlap);
+    
+/////////////------------------------------------------------------////////////////
+    
+    %feature("autodoc", 
+"
+Return whether the membrane current gather overlaps simulation work.
+
+Syntax::
+    
+    getEfieldOverlap()
+    
+Arguments:
+    None
+
+Return:
+    bool
+");
+    bool getEfieldOverlap(void) const;
+    
 /////////////------------------------------------------------------////////////////
     
     %feature("autodoc", 
@@ -538,3 +588,24 @@ Return:
 } // end namespace mpi
 } // end namespace steps
 
+////////////////////////////////////////////////////////////////////////////////
+
+namespace steps
+{
+namespace mpi
+{
+
+class EFieldSimP : public steps::solver::efield::EFieldSim
+{
+
+public:
+
+    EFieldSimP(steps::tetmesh::Tetmesh * mesh, int efield_solver = EF_DEFAULT);
+    ~EFieldSimP(void);
+
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
+} // end namespace mpi
+} // end namespace steps
@@ -85,6 +85,7 @@ Return:
             double getExp(double lambda);
             long getPsn(float lambda);
             float getStdNrm(void);
+            unsigned int getBinom(unsigned int t, double p);
             
         protected:
             // Mark this class as abstract.
@@ -7,8 +7,10 @@
 
 %include "std_string.i"
 %include "std_vector.i"
+%include "std_map.i"
 
 %template(vector_unsigned) std::vector<unsigned int>;
+%template(map_unsigned_unsigned) std::map<unsigned int, unsigned int>;
 
 
 #ifdef WITH_NUMPY
@@ -26,11 +28,13 @@
     (unsigned int* indices, int input_size)
 }
 %apply (double* INPLACE_ARRAY1, int DIM1) {
-    (double* counts, int output_size)
+    (double* counts, int output_size),
+    (double* values, int output_size)
 }
 
 %import "unchecked_stl_seq.i"
 UNCHECKED_STL_SEQ_CONVERT(std::vector<unsigned int>,push_back,PyInt_AsUnsignedLongMask)
+UNCHECKED_STL_DICT_CONVERT(%arg(std::map<unsigned int,unsigned int>),insert,PyInt_AsUnsignedLongMask,PyInt_AsUnsignedLongMask)
 
 #endif
 
@@ -44,7 +48,9 @@ UNCHECKED_STL_SEQ_CONVERT(std::vector<unsigned int>,push_back,PyInt_AsUnsignedLo
 #include "steps/wmrk4/wmrk4.hpp"
 #include "steps/wmdirect/wmdirect.hpp"
 #include "steps/tetexact/tetexact.hpp"
+#include "steps/tetopsplit/tetopsplit.hpp"
 #include "steps/tetode/tetode.hpp"
+#include "steps/solver/efield/efieldsim.hpp"
 #include "steps/error.hpp"
 #include <limits>
 %}
@@ -56,6 +62,8 @@ fwd_api_enum(EF_NONE)
 fwd_api_enum(EF_DEFAULT)
 fwd_api_enum(EF_DV_BDSYS)
 fwd_api_enum(EF_DV_SLUSYS)
+fwd_api_enum(EF_DV_PCG)
+fwd_api_enum(EF_DV_BDSYS_LAPACK)
 
 namespace steps
 {
@@ -422,6 +430,136 @@ Return:
 
     %feature("autodoc", 
 "
+Enable or disable adaptive time stepping of the membrane potential solver.
+
+In adaptive mode the EField dt is chosen after each step from the largest 
+change in potential over that step at the membrane triangles with 
+voltage-dependent processes (all membrane triangles if there are none), 
+aiming for a change of dv_tol per step. The dt grows by at most a factor 
+of 2 per step and stays within [dt_min, dt_max]. It is rounded down to 
+dt_min times a power of 2 (or dt_max), so that it changes rarely and the 
+solver can reuse its factorized matrix. Steps are not rejected, 
+so a sudden change in potential is only followed from the next step. 
+Enabling or disabling adaptive stepping clears the dt history.
+
+Syntax::
+    
+    setEfieldAdaptiveDT(adaptive, dt_min = 1.0e-6, dt_max = 1.0e-4, dv_tol = 1.0e-4)
+    
+Arguments:
+    * bool adaptive
+    * float dt_min (s)
+    * float dt_max (s)
+    * float dv_tol (V)
+
+Return:
+    None
+");
+    virtual void setEfieldAdaptiveDT(bool adaptive, double dt_min = 1.0e-6,
+                                     double dt_max = 1.0e-4, double dv_tol = 1.0e-4);
+
+    %feature("autodoc", 
+"
+Returns whether adaptive time stepping of the membrane potential solver 
+is enabled.
+
+Syntax::
+    
+    getEfieldAdaptiveDT()
+    
+Arguments:
+    None
+
+Return:
+    bool
+");
+    virtual bool getEfieldAdaptiveDT(void) const;
+
+    %feature("autodoc", 
+"
+Enable or disable semi-implicit coupling of the membrane currents to the 
+membrane potential solver.
+
+By default the ohmic and GHK currents of each EField step are computed 
+from the potential at the start of the step and applied as fixed 
+currents, which limits the stable EField dt at high channel densities. 
+In semi-implicit mode the currents are linearised around that potential 
+and their conductance is added to the EField system, so that they act 
+with the potential at the end of the step and larger EField dts remain 
+stable. The EField matrix is then factorized again at every step.
+
+Voltage-dependent transitions still see the potential only once per 
+EField step, so accuracy keeps decreasing with the EField dt. In a 
+Hodgkin-Huxley action potential in Tetexact, a 10x larger dt 
+(1e-4 s) was stable with spike times within 0.02 ms of a 1e-6 s 
+reference, where explicit coupling failed, but the V(t) error grew 
+from 1.7 mV (rms) at 1e-5 s to 4.5 mV.
+
+Syntax::
+    
+    setEfieldSemiImplicit(implicit)
+    
+Arguments:
+    bool implicit
+
+Return:
+    None
+");
+    virtual void setEfieldSemiImplicit(bool implicit);
+
+    %feature("autodoc", 
+"
+Returns whether the membrane currents are coupled semi-implicitly to the 
+membrane potential solver.
+
+Syntax::
+    
+    getEfieldSemiImplicit()
+    
+Arguments:
+    None
+
+Return:
+    bool
+");
+    virtual bool getEfieldSemiImplicit(void) const;
+
+    %feature("autodoc", 
+"
+Returns the dt of each membrane potential step taken in adaptive mode, 
+since adaptive stepping was enabled, the solver was reset or the history 
+was cleared. Only the last 100000 steps are kept.
+
+Syntax::
+    
+    getEfieldDTHistory()
+    
+Arguments:
+    None
+
+Return:
+    list<float>
+");
+    virtual std::vector<double> getEfieldDTHistory(void) const;
+
+    %feature("autodoc", 
+"
+Clears the history of membrane potential dts.
+
+Syntax::
+    
+    clearEfieldDTHistory()
+    
+Arguments:
+    None
+
+Return:
+    None
+");
+    virtual void clearEfieldDTHistory(void);
+
+    %feature("autodoc", 
+"
 Set the current simulation time.
 
 Syntax::
@@ -2931,6 +3069,98 @@ Return:
 "
 );
     virtual void getBatchTriCountsNP(unsigned int* indices, int input_size, std::string const & s, double* counts, int output_size) const;
+
+    %feature("autodoc",
+"
+Get the membrane potentials (in volts) of a list of triangles.
+Triangles that are not in a membrane get the value 0.
+
+Syntax::
+    getBatchTriVsNP(indices, values)
+
+Arguments:
+    * numpy.array<uint> indices
+    * numpy.array<double, length = len(indices)> values
+
+Return:
+    None
+"
+);
+    virtual void getBatchTriVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    %feature("autodoc",
+"
+Get the potentials (in volts) of a list of vertices.
+Vertices that are not in a conduction volume or membrane get the value 0.
+
+Syntax::
+    getBatchVertVsNP(indices, values)
+
+Arguments:
+    * numpy.array<uint> indices
+    * numpy.array<double, length = len(indices)> values
+
+Return:
+    None
+"
+);
+    virtual void getBatchVertVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    %feature("autodoc",
+"
+Get the total membrane currents (in amps) of a list of triangles.
+Triangles that are not in a membrane get the value 0.
+
+Syntax::
+    getBatchTriIsNP(indices, values)
+
+Arguments:
+    * numpy.array<uint> indices
+    * numpy.array<double, length = len(indices)> values
+
+Return:
+    None
+"
+);
+    virtual void getBatchTriIsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    %feature("autodoc",
+"
+Get the currents (in amps) of ohmic current oc in a list of triangles.
+Triangles where oc is not defined get the value 0.
+
+Syntax::
+    getBatchTriOhmicIsNP(indices, oc, values)
+
+Arguments:
+    * numpy.array<uint> indices
+    * string oc
+    * numpy.array<double, length = len(indices)> values
+
+Return:
+    None
+"
+);
+    virtual void getBatchTriOhmicIsNP(unsigned int* indices, int input_size, std::string const & oc, double* values, int output_size) const;
+
+    %feature("autodoc",
+"
+Get the currents (in amps) of GHK current ghk in a list of triangles.
+Triangles where ghk is not defined get the value 0.
+
+Syntax::
+    getBatchTriGHKIsNP(indices, ghk, values)
+
+Arguments:
+    * numpy.array<uint> indices
+    * string ghk
+    * numpy.array<double, length = len(indices)> values
+
+Return:
+    None
+"
+);
+    virtual void getBatchTriGHKIsNP(unsigned int* indices, int input_size, std::string const & ghk, double* values, int output_size) const;
     
              ////////////////////////////////////////////////////////////////////////
              // ROI Data Access
@@ -3014,6 +3244,93 @@ Return:
 
     %feature("autodoc",
 "
+Get the membrane potentials (in volts) of triangles in a ROI.
+
+Syntax::
+    getROITriVsNP(ROI_id, values)
+
+Arguments:
+    * string ROI_id
+    * numpy.array<double, length = ROI size> values
+
+Return:
+    None
+"
+);
+    virtual void getROITriVsNP(std::string ROI_id, double* values, int output_size) const;
+
+    %feature("autodoc",
+"
+Get the potentials (in volts) of vertices in a ROI.
+
+Syntax::
+    getROIVertVsNP(ROI_id, values)
+
+Arguments:
+    * string ROI_id
+    * numpy.array<double, length = ROI size> values
+
+Return:
+    None
+"
+);
+    virtual void getROIVertVsNP(std::string ROI_id, double* values, int output_size) const;
+
+    %feature("autodoc",
+"
+Get the total membrane currents (in amps) of triangles in a ROI.
+
+Syntax::
+    getROITriIsNP(ROI_id, values)
+
+Arguments:
+    * string ROI_id
+    * numpy.array<double, length = ROI size> values
+
+Return:
+    None
+"
+);
+    virtual void getROITriIsNP(std::string ROI_id, double* values, int output_size) const;
+
+    %feature("autodoc",
+"
+Get the currents (in amps) of ohmic current oc in triangles of a ROI.
+
+Syntax::
+    getROITriOhmicIsNP(ROI_id, oc, values)
+
+Arguments:
+    * string ROI_id
+    * string oc
+    * numpy.array<double, length = ROI size> values
+
+Return:
+    None
+"
+);
+    virtual void getROITriOhmicIsNP(std::string ROI_id, std::string const & oc, double* values, int output_size) const;
+
+    %feature("autodoc",
+"
+Get the currents (in amps) of GHK current ghk in triangles of a ROI.
+
+Syntax::
+    getROITriGHKIsNP(ROI_id, ghk, values)
+
+Arguments:
+    * string ROI_id
+    * string ghk
+    * numpy.array<double, length = ROI size> values
+
+Return:
+    None
+"
+);
+    virtual void getROITriGHKIsNP(std::string ROI_id, std::string const & ghk, double* values, int output_size) const;
+
+    %feature("autodoc",
+"
 Get the volume of a ROI.
 
 Syntax::
@@ -3988,30 +4305,37 @@ Return:
 } // end namespace tetexact
 } // end namespace steps
 
-
 ////////////////////////////////////////////////////////////////////////////////
 
 namespace steps
 {
-namespace tetode
+namespace tetopsplit
 {
 
-class TetODE : public steps::solver::API
-{	
+class TetOpSplit : public steps::tetexact::Tetexact
+{
 
 public:
+    %feature("autodoc", "1");
+/* note: as for TetOpSplitP, the interface with default arguments is not used
+   with the python wrapper, see mpi_solver.i.
 
-    TetODE(steps::model::Model * m, steps::wm::Geom * g, steps::rng::RNG * r, int calcMembPot = EF_NONE);
-    ~TetODE(void);
+    TetOpSplit(steps::model::Model * m, steps::wm::Geom * g, steps::rng::RNG * r, int calcMembPot = EF_NONE, std::vector<uint> const & tet_hosts = std::vector<uint>(), std::map<uint, uint> const & tri_hosts = std::map<uint, uint>(), std::vector<uint> const & wm_hosts = std::vector<uint>(), uint nthreads = 0);
+*/
+    TetOpSplit(steps::model::Model * m, steps::wm::Geom * g, steps::rng::RNG * r, int calcMembPot, std::vector<uint> const & tet_hosts, std::map<uint, uint> const & tri_hosts, std::vector<uint> const & wm_hosts, uint nthreads);
+    %feature("autodoc", "1");
+    ~TetOpSplit(void);
+
+/////////////------------------------------------------------------////////////////
 
     %feature("autodoc", 
 "
 Returns a string of the solver's name.
 
 Syntax::
-
+    
     getSolverName()
-
+    
 Arguments:
     None
 
@@ -4019,15 +4343,17 @@ Return:
     string
 ");
     virtual std::string getSolverName(void) const;
+    
+/////////////------------------------------------------------------////////////////
 
     %feature("autodoc", 
 "
 Returns a string giving a short description of the solver.
 
 Syntax::
-
+    
     getSolverDesc()
-
+    
 Arguments:
     None
 
@@ -4035,15 +4361,17 @@ Return:
     string
 ");
     virtual std::string getSolverDesc(void) const;
+    
+/////////////------------------------------------------------------////////////////
 
-%feature("autodoc", 
+    %feature("autodoc", 
 "
 Returns a string of the solver authors names.
 
 Syntax::
-
+    
     getSolverAuthors()
-
+    
 Arguments:
     None
 
@@ -4051,15 +4379,17 @@ Return:
     string
 ");
     virtual std::string getSolverAuthors(void) const;
+    
+/////////////------------------------------------------------------////////////////
 
     %feature("autodoc", 
 "
 Returns a string giving the author's email address.
 
 Syntax::
-
+    
     getSolverEmail()
-
+    
 Arguments:
     None
 
@@ -4067,22 +4397,413 @@ Return:
     string
 ");
     virtual std::string getSolverEmail(void) const;
+    
+/////////////------------------------------------------------------////////////////
 
     %feature("autodoc", 
 "
-Checkpoint data to a file.
+Reset the simulation to the state the solver was initialised to.
 
 Syntax::
-
-    checkpoint(file_name)
-
+    
+    reset()
+    
 Arguments:
-    string file_name
+    None
 
 Return:
     None
 ");
-    virtual void checkpoint(std::string const & file_name);
+    virtual void reset(void);
+    
+/////////////------------------------------------------------------////////////////
+
+    %feature("autodoc", 
+"
+Advance the simulation until endtime (given in seconds) is reached. 
+The endtime must be larger or equal to the current simulation time.
+
+Syntax::
+    
+    run(endtime)
+    
+Arguments:
+    float endtime
+
+Return:
+    None
+");
+    virtual void run(double endtime);
+    
+/////////////------------------------------------------------------////////////////
+    
+    %feature("autodoc", 
+"
+Return the update period tau of the Operator-Splitting solution.
+See (Hepburn et al, 2016) for more detail.
+
+Syntax::
+    
+    getUpdPeriod()
+    
+Arguments:
+    None
+
+Return:
+    float
+");
+    double getUpdPeriod(void);
+    
+/////////////------------------------------------------------------////////////////
+    
+    %feature("autodoc", 
+"
+Set the number of molecules up to which the directions of the molecules 
+leaving a voxel in a diffusion step are drawn one by one (default 10). 
+Larger numbers are split between the directions with binomial draws.
+
+Syntax::
+    
+    setDiffApplyThreshold(threshold)
+    
+Arguments:
+    int threshold
+
+Return:
+    None
+");
+    void setDiffApplyThreshold(int threshold);
+    
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Return the number of reaction events happened in the simulation.
+
+The local argument is kept for compatibility with TetOpSplitP and
+has no effect.
+
+Syntax::
+    
+    getReacExtent(local)
+    
+Arguments:
+    bool local (default: false)
+
+Return:
+    float
+");
+    double getReacExtent(bool local = false);
+    
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Return the number of diffusion events happened in the simulation.
+
+The local argument is kept for compatibility with TetOpSplitP and
+has no effect.
+
+Syntax::
+    
+    getDiffExtent(local)
+    
+Arguments:
+    bool local (default: false)
+
+Return:
+    float
+");
+    double getDiffExtent(bool local = false);
+    
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Return the number of update periods run in the simulation.
+
+Syntax::
+    
+    getNIteration()
+    
+Arguments:
+    None
+
+Return:
+    float
+");
+    double getNIteration(void);
+    
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Return the number of partitions, each of which is run by one thread.
+
+Syntax::
+    
+    getNThreads()
+    
+Arguments:
+    None
+
+Return:
+    int
+");
+    uint getNThreads(void) const;
+    
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Return the accumulated sum of species s in a batch of tetrahedrons.
+
+This function requires NumPy array as input.
+
+Syntax::
+    
+    sumBatchTetCountsNP(tet_list, s)
+    
+Arguments:
+    numpy.array tet_list
+    string s
+
+Return:
+    float
+");
+    double sumBatchTetCountsNP(unsigned int* indices, int input_size, std::string const & s);
+    
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Return the accumulated sum of species s in a batch of triangles.
+
+This function requires NumPy array as input.
+
+Syntax::
+    
+    sumBatchTriCountsNP(tri_list, s)
+    
+Arguments:
+    numpy.array tri_list
+    string s
+
+Return:
+    float
+");
+    double sumBatchTriCountsNP(unsigned int* indices, int input_size, std::string const & s);
+    
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Return the accumulated sum of GHK currents in a batch of triangles.
+
+This function requires NumPy array as input.
+
+Syntax::
+    
+    sumBatchTriGHKIsNP(tri_list, ghk)
+    
+Arguments:
+    numpy.array tri_list
+    string ghk
+
+Return:
+    float
+");
+    double sumBatchTriGHKIsNP(unsigned int* indices, int input_size, std::string const & ghk);
+    
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Return the accumulated sum of Ohmic currents in a batch of triangles.
+
+This function requires NumPy array as input.
+
+Syntax::
+    
+    sumBatchTriOhmicIsNP(tri_list, oc)
+    
+Arguments:
+    numpy.array tri_list
+    string oc
+
+Return:
+    float
+");
+    double sumBatchTriOhmicIsNP(unsigned int* indices, int input_size, std::string const & oc);
+    
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Repartition the mesh between the threads and reset the simulation.
+If tet_hosts is empty, the mesh is split into as many slabs as the 
+number of threads given to the constructor.
+
+Syntax::
+    
+    repartitionAndReset(tet_hosts, tri_hosts, wm_hosts)
+    
+Arguments:
+    list tet_hosts
+    dict tri_hosts (default: {})
+    list wm_hosts (default: [])
+
+Return:
+    None
+");
+    void repartitionAndReset(std::vector<uint> const &tet_hosts, std::map<uint, uint> const &tri_hosts  = std::map<uint, uint>(), std::vector<uint> const &wm_hosts = std::vector<uint>());
+
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Return the accumulated time the calling thread spent in the parallel phases.
+
+Syntax::
+    
+    getCompTime()
+    
+Arguments:
+    None
+    
+Return:
+    float
+");
+    double getCompTime(void);
+    
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Return the accumulated time spent in the serial phase that runs the
+reactions crossing a partition boundary.
+
+Syntax::
+    
+    getSyncTime()
+    
+Arguments:
+    None
+    
+Return:
+    float
+");
+    double getSyncTime(void);
+    
+/////////////------------------------------------------------------////////////////
+    %feature("autodoc", 
+"
+Return the accumulated time the calling thread waited for the other threads.
+
+Syntax::
+    
+    getIdleTime()
+    
+Arguments:
+    None
+    
+Return:
+    float
+");
+    double getIdleTime(void);
+    
+/////////////------------------------------------------------------////////////////
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
+} // end namespace tetopsplit
+} // end namespace steps
+
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace steps
+{
+namespace tetode
+{
+
+class TetODE : public steps::solver::API
+{	
+
+public:
+
+    TetODE(steps::model::Model * m, steps::wm::Geom * g, steps::rng::RNG * r, int calcMembPot = EF_NONE);
+    ~TetODE(void);
+
+    %feature("autodoc", 
+"
+Returns a string of the solver's name.
+
+Syntax::
+
+    getSolverName()
+
+Arguments:
+    None
+
+Return:
+    string
+");
+    virtual std::string getSolverName(void) const;
+
+    %feature("autodoc", 
+"
+Returns a string giving a short description of the solver.
+
+Syntax::
+
+    getSolverDesc()
+
+Arguments:
+    None
+
+Return:
+    string
+");
+    virtual std::string getSolverDesc(void) const;
+
+%feature("autodoc", 
+"
+Returns a string of the solver authors names.
+
+Syntax::
+
+    getSolverAuthors()
+
+Arguments:
+    None
+
+Return:
+    string
+");
+    virtual std::string getSolverAuthors(void) const;
+
+    %feature("autodoc", 
+"
+Returns a string giving the author's email address.
+
+Syntax::
+
+    getSolverEmail()
+
+Arguments:
+    None
+
+Return:
+    string
+");
+    virtual std::string getSolverEmail(void) const;
+
+    %feature("autodoc", 
+"
+Checkpoint data to a file.
+
+Syntax::
+
+    checkpoint(file_name)
+
+Arguments:
+    string file_name
+
+Return:
+    None
+");
+    virtual void checkpoint(std::string const & file_name);
 
     %feature("autodoc", 
 "
@@ -4090,138 +4811,587 @@ Restore data from a file.
 
 Syntax::
 
-    restore(file_name)
+    restore(file_name)
+
+Arguments:
+    string file_name
+
+Return:
+    None
+");
+    virtual void restore(std::string const & file_name);
+
+%feature("autodoc", 
+"
+Reset the simulation to the state the solver was initialised to. 
+Typically, this resets all concentrations of all chemical species in 
+all elements (whether compartments and patches in a well-mixed solver 
+or tetrahedrons and triangles in a mesh-based solver) to zero, 
+resets the simulation time to zero and resets reaction (and diffusion) 
+rates to the default values described in the steps.model objects. 
+All reaction (and diffusion) rules are reset to active and all 
+compartment volumes and patch areas are reset to default values 
+described in steps.geom objects (for well-mixed solvers). 
+Usually, this method should be called before starting each simulation iteration.
+
+Syntax::
+
+    reset()
+
+Arguments:
+    None
+
+Return:
+    None
+");
+
+    %feature("autodoc", 
+"
+Reset the simulation to the state the solver was initialised to. 
+Typically, this resets all concentrations of all chemical species in 
+all elements (whether compartments and patches in a well-mixed solver 
+or tetrahedrons and triangles in a mesh-based solver) to zero, 
+resets the simulation time to zero and resets reaction (and diffusion) 
+rates to the default values described in the steps.model objects. 
+All reaction (and diffusion) rules are reset to active and all 
+compartment volumes and patch areas are reset to default values 
+described in steps.geom objects (for well-mixed solvers). 
+Usually, this method should be called before starting each simulation iteration.
+
+Syntax::
+
+    reset()
+
+Arguments:
+    None
+
+Return:
+    None
+");
+    virtual void reset(void);
+
+    %feature("autodoc", 
+"
+Advance the simulation until endtime (given in seconds) is reached. 
+The endtime must be larger or equal to the current simulation time.
+
+Syntax::
+
+    run(endtime)
+
+Arguments:
+    float endtime
+
+Return:
+    None
+");
+    virtual void run(double endtime);
+
+    %feature("autodoc", 
+"
+Returns the current simulation time in seconds.
+
+Syntax::
+
+    getTime()
+
+Arguments:
+    None
+
+Return:
+    float
+");
+    virtual double getTime(void) const;
+    
+%feature("autodoc", 
+"
+Sets the maximum number of steps in CVODE per call to run().
+Default is 10000 if this function is not called.
+             
+Syntax::
+             
+    setMaxNumSteps()
+             
+Arguments:
+    unsigned integer maxn
+             
+Return:
+    None
+");
+    void setMaxNumSteps(unsigned int maxn);
+
+%feature("autodoc", 
+"
+Set the absolute tolerance and the relative tolerance for CVODE.
+             
+Syntax::
+             
+    setTolerance(atol, rtol)
+             
+Arguments:
+    float atol
+    float rtol
+             
+Return:
+    None
+");
+    void setTolerances(double atol, double rtol);
+
+
+////////////////////////////////////////////////////////////////////////			
+
+};
+
+////////////////////////////////////////////////////////////////////////////////
+
+} // end namespace tetode
+} // end namespace steps
+
+
+////////////////////////////////////////////////////////////////////////////////
+
+namespace steps
+{
+namespace solver
+{
+namespace efield
+{
+
+class EFieldSim
+{
+
+public:
+
+    EFieldSim(steps::tetmesh::Tetmesh * mesh, int efield_solver = EF_DEFAULT);
+    virtual ~EFieldSim(void);
+
+    %feature("autodoc",
+"
+Advance the membrane potential by one step of dt seconds.
+Currents set with setTriI, setBatchTriIsNP or setTriIsNP apply to
+this step only; clamp currents apply until they are changed.
+
+Syntax::
+
+    advance(dt)
+
+Arguments:
+    float dt
+
+Return:
+    None
+");
+    void advance(double dt);
+
+    %feature("autodoc",
+"
+Returns the simulation time in seconds.
+
+Syntax::
+
+    getTime()
+
+Arguments:
+    None
+
+Return:
+    float
+");
+    double getTime(void) const;
+
+    %feature("autodoc",
+"
+Returns the number of steps taken.
+
+Syntax::
+
+    getNSteps()
+
+Arguments:
+    None
+
+Return:
+    uint
+");
+    uint getNSteps(void) const;
+
+    %feature("autodoc",
+"
+Sets the potential (in volts) across membrane m.
+
+Syntax::
+
+    setMembPotential(m, v)
 
 Arguments:
-    string file_name
+    string m
+    float v
 
 Return:
     None
 ");
-    virtual void restore(std::string const & file_name);
+    void setMembPotential(std::string const & m, double v);
 
-%feature("autodoc", 
+    %feature("autodoc",
 "
-Reset the simulation to the state the solver was initialised to. 
-Typically, this resets all concentrations of all chemical species in 
-all elements (whether compartments and patches in a well-mixed solver 
-or tetrahedrons and triangles in a mesh-based solver) to zero, 
-resets the simulation time to zero and resets reaction (and diffusion) 
-rates to the default values described in the steps.model objects. 
-All reaction (and diffusion) rules are reset to active and all 
-compartment volumes and patch areas are reset to default values 
-described in steps.geom objects (for well-mixed solvers). 
-Usually, this method should be called before starting each simulation iteration.
+Sets the specific capacitance (in farads per square m) of membrane m.
 
 Syntax::
 
-    reset()
+    setMembCapac(m, cm)
 
 Arguments:
+    string m
+    float cm
+
+Return:
     None
+");
+    void setMembCapac(std::string const & m, double cm);
+
+    %feature("autodoc",
+"
+Sets the bulk electrical resistivity (in ohm.m) of the conduction
+volume of membrane m.
+
+Syntax::
+
+    setMembVolRes(m, ro)
+
+Arguments:
+    string m
+    float ro
 
 Return:
     None
 ");
+    void setMembVolRes(std::string const & m, double ro);
 
-    %feature("autodoc", 
+    %feature("autodoc",
 "
-Reset the simulation to the state the solver was initialised to. 
-Typically, this resets all concentrations of all chemical species in 
-all elements (whether compartments and patches in a well-mixed solver 
-or tetrahedrons and triangles in a mesh-based solver) to zero, 
-resets the simulation time to zero and resets reaction (and diffusion) 
-rates to the default values described in the steps.model objects. 
-All reaction (and diffusion) rules are reset to active and all 
-compartment volumes and patch areas are reset to default values 
-described in steps.geom objects (for well-mixed solvers). 
-Usually, this method should be called before starting each simulation iteration.
+Sets the surface electrical resistivity ro (in ohm.m^2) and the
+reversal potential vrev (in volts) of membrane m.
 
 Syntax::
 
-    reset()
+    setMembRes(m, ro, vrev)
+
+Arguments:
+    string m
+    float ro
+    float vrev
+
+Return:
+    None
+");
+    void setMembRes(std::string const & m, double ro, double vrev);
+
+    %feature("autodoc",
+"
+Returns the mesh indices of the membrane triangles, in the order
+used by setTriIsNP and getTriVsNP.
+
+Syntax::
+
+    getMembTris()
+
+Arguments:
+    None
+
+Return:
+    list<uint>
+");
+    std::vector<uint> const & getMembTris(void) const;
+
+    %feature("autodoc",
+"
+Returns the mesh indices of the vertices in the conduction volume.
+
+Syntax::
+
+    getMembVerts()
 
 Arguments:
     None
 
+Return:
+    list<uint>
+");
+    std::vector<uint> const & getMembVerts(void) const;
+
+    %feature("autodoc",
+"
+Returns the potential (in volts) of triangle tidx.
+
+Syntax::
+
+    getTriV(tidx)
+
+Arguments:
+    uint tidx
+
+Return:
+    float
+");
+    double getTriV(uint tidx) const;
+
+    %feature("autodoc",
+"
+Sets the potential (in volts) of triangle tidx.
+
+Syntax::
+
+    setTriV(tidx, v)
+
+Arguments:
+    uint tidx
+    float v
+
 Return:
     None
 ");
-    virtual void reset(void);
+    void setTriV(uint tidx, double v);
 
-    %feature("autodoc", 
+    %feature("autodoc",
 "
-Advance the simulation until endtime (given in seconds) is reached. 
-The endtime must be larger or equal to the current simulation time.
+Returns whether the potential of triangle tidx is clamped.
 
 Syntax::
 
-    run(endtime)
+    getTriVClamped(tidx)
 
 Arguments:
-    float endtime
+    uint tidx
+
+Return:
+    bool
+");
+    bool getTriVClamped(uint tidx) const;
+
+    %feature("autodoc",
+"
+Sets whether the potential of triangle tidx is clamped.
+
+Syntax::
+
+    setTriVClamped(tidx, cl)
+
+Arguments:
+    uint tidx
+    bool cl
 
 Return:
     None
 ");
-    virtual void run(double endtime);
+    void setTriVClamped(uint tidx, bool cl);
 
-    %feature("autodoc", 
+    %feature("autodoc",
 "
-Returns the current simulation time in seconds.
+Sets the current (in amps) across triangle tidx for the next step.
 
 Syntax::
 
-    getTime()
+    setTriI(tidx, cur)
 
 Arguments:
+    uint tidx
+    float cur
+
+Return:
+    None
+");
+    void setTriI(uint tidx, double cur);
+
+    %feature("autodoc",
+"
+Sets the current clamp (in amps) of triangle tidx.
+
+Syntax::
+
+    setTriIClamp(tidx, cur)
+
+Arguments:
+    uint tidx
+    float cur
+
+Return:
     None
+");
+    void setTriIClamp(uint tidx, double cur);
+
+    %feature("autodoc",
+"
+Returns the potential (in volts) of vertex vidx.
+
+Syntax::
+
+    getVertV(vidx)
+
+Arguments:
+    uint vidx
 
 Return:
     float
 ");
-    virtual double getTime(void) const;
-    
-%feature("autodoc", 
+    double getVertV(uint vidx) const;
+
+    %feature("autodoc",
 "
-Sets the maximum number of steps in CVODE per call to run().
-Default is 10000 if this function is not called.
-             
+Sets the potential (in volts) of vertex vidx.
+
 Syntax::
-             
-    setMaxNumSteps()
-             
+
+    setVertV(vidx, v)
+
 Arguments:
-    unsigned integer maxn
-             
+    uint vidx
+    float v
+
 Return:
     None
 ");
-    void setMaxNumSteps(unsigned int maxn);
+    void setVertV(uint vidx, double v);
 
-%feature("autodoc", 
+    %feature("autodoc",
 "
-Set the absolute tolerance and the relative tolerance for CVODE.
-             
+Returns whether the potential of vertex vidx is clamped.
+
 Syntax::
-             
-    setTolerance(atol, rtol)
-             
+
+    getVertVClamped(vidx)
+
 Arguments:
-    float atol
-    float rtol
-             
+    uint vidx
+
+Return:
+    bool
+");
+    bool getVertVClamped(uint vidx) const;
+
+    %feature("autodoc",
+"
+Sets whether the potential of vertex vidx is clamped.
+
+Syntax::
+
+    setVertVClamped(vidx, cl)
+
+Arguments:
+    uint vidx
+    bool cl
+
 Return:
     None
 ");
-    void setTolerances(double atol, double rtol);
+    void setVertVClamped(uint vidx, bool cl);
 
+    %feature("autodoc",
+"
+Sets the current clamp (in amps) of vertex vidx.
 
-////////////////////////////////////////////////////////////////////////			
+Syntax::
+
+    setVertIClamp(vidx, cur)
+
+Arguments:
+    uint vidx
+    float cur
+
+Return:
+    None
+");
+    void setVertIClamp(uint vidx, double cur);
+
+    %feature("autodoc",
+"
+Sets the currents (in amps) across a list of membrane triangles for
+the next step.
+
+Syntax::
+
+    setBatchTriIsNP(indices, values)
+
+Arguments:
+    * numpy.array<uint> indices
+    * numpy.array<double, length = len(indices)> values
+
+Return:
+    None
+");
+    void setBatchTriIsNP(unsigned int* indices, int input_size, double* values, int output_size);
+
+    %feature("autodoc",
+"
+Gets the potentials (in volts) of a list of membrane triangles.
+
+Syntax::
+
+    getBatchTriVsNP(indices, values)
+
+Arguments:
+    * numpy.array<uint> indices
+    * numpy.array<double, length = len(indices)> values
+
+Return:
+    None
+");
+    void getBatchTriVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    %feature("autodoc",
+"
+Gets the potentials (in volts) of a list of vertices.
+
+Syntax::
+
+    getBatchVertVsNP(indices, values)
+
+Arguments:
+    * numpy.array<uint> indices
+    * numpy.array<double, length = len(indices)> values
+
+Return:
+    None
+");
+    void getBatchVertVsNP(unsigned int* indices, int input_size, double* values, int output_size) const;
+
+    %feature("autodoc",
+"
+Sets the currents (in amps) across all membrane triangles, in the
+order of getMembTris, for the next step.
+
+Syntax::
+
+    setTriIsNP(values)
+
+Arguments:
+    * numpy.array<double, length = len(getMembTris())> values
+
+Return:
+    None
+");
+    void setTriIsNP(double* values, int output_size);
+
+    %feature("autodoc",
+"
+Gets the potentials (in volts) of all membrane triangles, in the
+order of getMembTris.
+
+Syntax::
+
+    getTriVsNP(values)
+
+Arguments:
+    * numpy.array<double, length = len(getMembTris())> values
+
+Return:
+    None
+");
+    void getTriVsNP(double* values, int output_size) const;
 
 };
 
 ////////////////////////////////////////////////////////////////////////////////
 
-} // end namespace tetode
+} // end namespace efield
+} // end namespace solver
 } // end namespace steps